@@ -6,7 +6,7 @@ B 站动态订阅插件入口（自研，替换 nonebot-bison）
   同名命令注册两个 matcher 会在启动时报 Duplicated prefix rule）。私聊通道的存在意义是
   「不打扰生产群的前提下验证插件」：只读命令私聊直接可用，会改状态的命令要求显式给出群号。
 - 定时任务：由 `from . import scheduler` 的 import 副作用注册（见 scheduler.py）
-- 推送目标：**完全由订阅关系（state.json 的 groups）决定**，不叠加任何群级开关；
+- 推送目标：**完全由订阅关系（state.db 中 subscriptions 表的 groups）决定**，不叠加任何群级开关；
   「不想收了」的正确操作是「b站退订」，而不是禁用插件（理由见 docs/bili_dyn_sub_design.md §11.4.3）
 """
 
@@ -92,7 +92,7 @@ def parse_uid(raw: str) -> Optional[str]:
         match = pattern.search(text)
         if not match:
             continue
-        # 去掉可能的前导零，保证与 state.json 里的 key 一致
+        # 去掉可能的前导零，保证与 state.db 里的 uid 一致
         uid = match.group(1).lstrip("0")
         return uid or None
     return None
@@ -102,7 +102,7 @@ def parse_group_id(raw: str) -> Optional[int]:
     """解析群号：必须是正整数纯数字，否则返回 None（由调用方给出用法提示）。
 
     非数字 / 负号 / 小数点 / 超长（>15 位）一律拒绝；`0`（以及 `000`）也拒绝——
-    不存在 0 号群，放行只会在 state.json 里留下一条永远推不出去的死订阅。
+    不存在 0 号群，放行只会在 state.db 里留下一条永远推不出去的死订阅。
     """
     text = (raw or "").strip()
     if not _GROUP_ID_RE.match(text):
@@ -207,7 +207,7 @@ def _format_global_status() -> str:
 async def membership_warning(bot: Bot, group_id: int) -> str:
     """目标群不在 bot 的群列表里时给出警告文案，否则返回空串。
 
-    私聊（或群聊里跨群操作）时群号是手打的，打错一位照样能写进 state.json，
+    私聊（或群聊里跨群操作）时群号是手打的，打错一位照样能写进 state.db，
     此后每轮推送都会 ActionFailed，而回执却说"已订阅"——回执不能这么误导人。
     这里只做一次廉价的只读校验：**查不到就静默跳过**（超时/接口不支持/返回异常格式），
     绝不因为校验失败而挡下订阅，也绝不让命令卡在这一步。
@@ -498,7 +498,7 @@ async def handle_test(bot: Bot, event: MessageEvent, args: Message = CommandArg(
             f"{truncate(build_text(latest), _PREVIEW_TEXT_LENGTH)}"
         )
 
-    # 复用 scheduler 的分发路径：首段单发 → 余下 1 段单发 / ≥2 段合并转发 + 全局间隔。
+    # 复用 scheduler 的分发路径：首段单发 → 余下 1 段单发 / ≥2 段合并转发 + 发送限速。
     # 预览必须与真实推送走同一条路，否则"预览没问题"证明不了"推到群里没问题"。
     target = (
         SendTarget(user_id=event.user_id)
@@ -30,9 +30,14 @@ class Config(BaseModel, extra="ignore"):
     """B 站动态订阅插件配置"""
 
     # --- 轮询调度（§6）---
-    poll_interval_seconds: int = 100  # 轮询基础间隔
-    poll_jitter_seconds: int = 20  # 每轮随机抖动上限
-    uid_request_gap_seconds: float = 8.0  # 同一轮内两个 UID 之间的最小间隔（串行错开）
+    poll_interval_seconds: int = 100  # 每个 UID 的取数间隔（请求均匀摊在这个周期里）
+    poll_jitter_seconds: int = 20  # 每个 UID 每次取数的随机抖动上限
+    # 实际请求间隔 = poll_interval_seconds / UID 数（均匀摊开），这里只是兜底下限，
+    # 风控时由令牌桶自动降速，不必靠调大它来求稳
+    min_request_gap_seconds: float = 1.0
+    max_request_gap_seconds: float = 60.0  # 风控降速后两次请求之间的最大间隔
+    active_poll_factor: float = 0.5  # 近期发过动态的 UID 取数间隔倍率（越小越勤）
+    active_window_minutes: int = 360  # 最新动态在这么久以内的 UID 视为活跃
 
     # --- 推送新鲜度闸门（§4.3）---
     # 这里只有一个问题：一条动态最多可以"旧"到什么程度，还值得推送？答案是一个时长。
@@ -65,9 +70,10 @@ class Config(BaseModel, extra="ignore"):
     seen_retention_days: int = 14  # 已推送状态保留天数
 
     # --- 推送节奏与渲染（§5.2）---
-    send_interval_seconds: float = 1.5  # 全局发送队列间隔
     send_retry_times: int = 3  # 单条消息发送失败重试次数
     text_truncate_length: int = 500  # 正文截断长度（超出加 "..."）
+    pic_download_concurrency: int = 4  # 拼图前并发下载配图的上限
+    pic_cache_ttl_hours: int = 24  # 配图下载缓存的有效期（重渲染同一动态时免下载）
 
     @field_validator("user_agent")
     @classmethod
@@ -91,12 +97,16 @@ CONFIG_FILE_PATH = PLUGIN_DIR / "config.json"
 # 运行时数据目录（订阅/去重状态、cookie 缓存均在此）
 DATA_DIR = Path("data/bili_dyn_sub")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-STATE_FILE = DATA_DIR / "state.json"  # 订阅 + seen_ids/游标
+STATE_DB = DATA_DIR / "state.db"  # 订阅 + seen_ids/游标（SQLite WAL，按 UID 逐行更新）
+STATE_FILE = DATA_DIR / "state.json"  # 旧版整文件状态，仅用于首次启动时迁移进 STATE_DB
 CREDENTIAL_FILE = DATA_DIR / "credential.json"  # cookie / ticket 缓存
+PIC_CACHE_DIR = DATA_DIR / "pic_cache"  # 九宫格拼图用的配图下载缓存（按 URL 哈希命名）
 
 # 历史字段 → 现字段的改名对照，仅用于清理旧 config.json 时给出提示（不做旧值自动迁移）
 _RENAMED_FIELDS: dict[str, str] = {
     "catchup_max_count": "max_push_per_round",
+    # 旧项是串行轮询时 UID 之间的固定间隔（默认 8s），沿用会把令牌桶下限卡死在 8s，故改名而不迁移旧值
+    "uid_request_gap_seconds": "min_request_gap_seconds",
 }
 
 
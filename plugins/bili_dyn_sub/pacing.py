@@ -0,0 +1,217 @@
+"""bili_dyn_sub 取数节奏：自适应令牌桶 + per-UID 到期调度（设计文档 §6）。
+
+旧实现每轮把全部 UID 串行打一遍、两两之间固定 sleep uid_request_gap_seconds，
+一轮耗时 = UID 数 × 间隔：150 个订阅一轮要 20 分钟，每个 UP 的推送延迟随订阅数线性增长。
+本模块把「什么时候该查谁」与「多快能发请求」拆成两件事：
+
+- PollPlanner：每个 UID 各有下一次到期时间，目标是每 poll_interval_seconds 查一次；
+  最近发过动态的 UID（活跃）按 active_poll_factor 缩短间隔，到期冲突时优先；
+  处于 backoff_manager 退避中的 UID 直接把到期时间推到退避结束，不占请求名额。
+- AdaptiveRateLimiter：全局令牌桶，基础速率 = 一个轮询周期内应发的请求数 / 周期，
+  即把请求均匀摊在整个周期里（下限间隔 min_request_gap_seconds，上限 max_request_gap_seconds）；
+  观察到 352 / 412 风控时乘性降速，持续成功后逐步恢复（AIMD）。
+
+令牌桶容量固定为 1：任何时刻都不会攒出突发，仍满足「绝不在同一 tick 并发打多个请求」。
+
+与 backoff.py 一样是纯逻辑：无 IO、不读配置，时间统一走 time.monotonic()，
+涉及时间的方法都带可选 now 参数便于单测注入。
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from ..utils.tools import get_logger
+
+logger = get_logger("bili_dyn_sub.pacing")
+
+# 风控降速倍率：352 视为「请求偏密」，412 是 IP 层风控，降得更狠
+RISK_SLOWDOWN_FACTOR = 2.0
+IP_BLOCK_SLOWDOWN_FACTOR = 4.0
+# 惩罚倍率上限（实际间隔另受 max_gap 约束）
+MAX_PENALTY = 16.0
+# 连续成功这么多次才恢复一档，恢复时惩罚倍率乘以 RECOVERY_FACTOR
+RECOVERY_SUCCESS_STREAK = 10
+RECOVERY_FACTOR = 0.8
+
+
+class AdaptiveRateLimiter:
+    """全局请求令牌桶（容量 1）+ 风控驱动的 AIMD 调速。单事件循环内使用，不加锁。"""
+
+    def __init__(self, min_gap: float, max_gap: float) -> None:
+        self.min_gap = max(0.0, min_gap)
+        self.max_gap = max(self.min_gap, max_gap)
+        self._base_gap = self.min_gap
+        self._penalty = 1.0
+        self._success_streak = 0
+        self._next_token_at = 0.0
+
+    # ---------- 配置 ----------
+
+    def set_target_rate(self, requests: float, period: float) -> None:
+        """按「period 秒内需发 requests 个请求」设置基础间隔（均匀摊开，夹在上下限之间）"""
+        gap = period / requests if requests > 0 else self.max_gap
+        self._base_gap = min(max(gap, self.min_gap), self.max_gap)
+
+    # ---------- 查询 ----------
+
+    @property
+    def gap(self) -> float:
+        """当前实际请求间隔（基础间隔 × 惩罚倍率，不超过 max_gap）"""
+        return min(max(self._base_gap * self._penalty, self.min_gap), self.max_gap)
+
+    @property
+    def penalty(self) -> float:
+        return self._penalty
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """距下一个令牌还需等待的秒数（0 表示现在就可以发）"""
+        current = time.monotonic() if now is None else now
+        return max(0.0, self._next_token_at - current)
+
+    # ---------- 令牌 ----------
+
+    def consume(self, now: Optional[float] = None) -> None:
+        """取走一个令牌：下一个令牌在 max(现在, 本该到期) + gap 之后产生"""
+        current = time.monotonic() if now is None else now
+        self._next_token_at = max(current, self._next_token_at) + self.gap
+
+    # ---------- 调速 ----------
+
+    def _slow_down(self, factor: float, reason: str, now: Optional[float]) -> None:
+        before = self.gap
+        self._penalty = min(MAX_PENALTY, self._penalty * factor)
+        self._success_streak = 0
+        # 风控后立刻按新速率重新排下一个令牌，而不是沿用降速前的间隔
+        current = time.monotonic() if now is None else now
+        self._next_token_at = max(self._next_token_at, current + self.gap)
+        if self.gap > before:
+            logger.info(f"取数触发风控（{reason}），请求间隔 {before:.1f}s → {self.gap:.1f}s")
+
+    def on_risk_control(self, now: Optional[float] = None) -> None:
+        """352 风控：请求间隔翻倍"""
+        self._slow_down(RISK_SLOWDOWN_FACTOR, "-352", now)
+
+    def on_ip_block(self, now: Optional[float] = None) -> None:
+        """412 IP 层风控：请求间隔 ×4"""
+        self._slow_down(IP_BLOCK_SLOWDOWN_FACTOR, "HTTP 412", now)
+
+    def on_success(self) -> None:
+        """取数成功：连续成功达到阈值后恢复一档速率"""
+        if self._penalty <= 1.0:
+            return
+        self._success_streak += 1
+        if self._success_streak < RECOVERY_SUCCESS_STREAK:
+            return
+        before = self.gap
+        self._penalty = max(1.0, self._penalty * RECOVERY_FACTOR)
+        self._success_streak = 0
+        logger.debug(f"取数连续成功 {RECOVERY_SUCCESS_STREAK} 次，请求间隔 {before:.1f}s → {self.gap:.1f}s")
+
+
+@dataclass
+class PollEntry:
+    """单个 UID 的调度状态"""
+
+    next_due: float  # 下一次该取数的时间（monotonic）
+    last_active: Optional[float] = None  # 最近一次观察到新动态的时间（wall clock）
+
+
+class PollPlanner:
+    """per-UID 到期调度：决定下一个该取数的 UID。单事件循环内使用，不加锁。"""
+
+    def __init__(self, interval: float, jitter: float, active_factor: float, active_window: float) -> None:
+        self._entries: dict[str, PollEntry] = {}
+        self.interval = max(1.0, interval)
+        self.jitter = max(0.0, jitter)
+        self.active_factor = min(1.0, max(0.05, active_factor))
+        self.active_window = max(0.0, active_window)
+
+    # ---------- 订阅集合 ----------
+
+    def sync(self, uids: Iterable[str], now: Optional[float] = None) -> None:
+        """与当前订阅对齐：新 UID 立即到期，已退订的 UID 丢弃"""
+        current = time.monotonic() if now is None else now
+        wanted = [str(uid) for uid in uids]
+        keep = set(wanted)
+        for uid in list(self._entries):
+            if uid not in keep:
+                del self._entries[uid]
+        for uid in wanted:
+            if uid not in self._entries:
+                self._entries[uid] = PollEntry(next_due=current)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- 活跃度 ----------
+
+    def is_active(self, uid: str, wall_now: Optional[float] = None) -> bool:
+        """最近 active_window 秒内发过动态"""
+        entry = self._entries.get(uid)
+        if entry is None or entry.last_active is None:
+            return False
+        current = time.time() if wall_now is None else wall_now
+        return current - entry.last_active < self.active_window
+
+    def note_activity(self, uid: str, pub_ts: float) -> None:
+        """记录该 UID 最新一条动态的发布时间（取 feed 里最新的 pub_ts，重启后首轮即可恢复）"""
+        entry = self._entries.get(uid)
+        if entry is None or not pub_ts:
+            return
+        if entry.last_active is None or pub_ts > entry.last_active:
+            entry.last_active = float(pub_ts)
+
+    def interval_for(self, uid: str, wall_now: Optional[float] = None) -> float:
+        """该 UID 的目标取数间隔：活跃 UID 按 active_factor 缩短"""
+        if self.is_active(uid, wall_now):
+            return self.interval * self.active_factor
+        return self.interval
+
+    def requests_per_interval(self, wall_now: Optional[float] = None) -> float:
+        """一个 interval 内按计划应发的请求数（令牌桶据此设定基础速率）"""
+        return sum(self.interval / self.interval_for(uid, wall_now) for uid in self._entries)
+
+    # ---------- 调度 ----------
+
+    def next_uid(self, now: Optional[float] = None) -> tuple[Optional[str], float]:
+        """返回 (已到期中优先级最高的 UID, 0)；都未到期时返回 (None, 距最早到期的秒数)。
+
+        优先级：活跃 UID 优先，同类之间逾期越久越优先。
+        """
+        if not self._entries:
+            return None, self.interval
+        current = time.monotonic() if now is None else now
+        wall_now = time.time()
+        best: Optional[str] = None
+        best_key: Optional[tuple[bool, float]] = None
+        earliest = float("inf")
+        for uid, entry in self._entries.items():
+            if entry.next_due > current:
+                earliest = min(earliest, entry.next_due)
+                continue
+            key = (not self.is_active(uid, wall_now), entry.next_due)
+            if best_key is None or key < best_key:
+                best, best_key = uid, key
+        if best is not None:
+            return best, 0.0
+        return None, earliest - current
+
+    def mark_polled(self, uid: str, now: Optional[float] = None) -> None:
+        """本次取数已完成（无论成败）：按该 UID 的间隔 + 随机抖动排下一次"""
+        entry = self._entries.get(uid)
+        if entry is None:
+            return
+        current = time.monotonic() if now is None else now
+        entry.next_due = current + self.interval_for(uid) + random.uniform(0.0, self.jitter)
+
+    def defer(self, uid: str, seconds: float, now: Optional[float] = None) -> None:
+        """把该 UID 的下一次取数推迟到 seconds 之后（用于 backoff_manager 的退避窗口）"""
+        entry = self._entries.get(uid)
+        if entry is None:
+            return
+        current = time.monotonic() if now is None else now
+        entry.next_due = max(entry.next_due, current + max(0.0, seconds))
@@ -20,18 +20,21 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import os
+import time
 from io import BytesIO
 from typing import Optional, Union
 
 import aiohttp
 from nonebot.adapters.onebot.v11 import MessageSegment
 from PIL import Image
-from PIL.Image import Image as PILImage
 
 from ..utils.browser import text_to_pic
+from ..utils.draw.render_pool import get_render_pool
 from ..utils.network import HttpError, download_bytes
 from ..utils.tools import get_exc_desc, get_logger, run_in_pool
-from .config import plugin_config
+from .config import PIC_CACHE_DIR, plugin_config
 from .parser import DELETED_SOURCE_TIPS, ParsedDynamic
 
 logger = get_logger("bili_dyn_sub.render")
@@ -48,6 +51,8 @@ DEFAULT_TRUNCATE_LENGTH = 500
 MIN_IMAGE_BYTES = 4096
 #: 图片下载 / 解码可预期的异常（下载失败只跳过合并，不影响整体推送）
 _PIC_ERRORS = (HttpError, aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError)
+#: 最多能参与拼图的配图张数（3×3）
+_GRID_MAX_PICS = 9
 
 
 # ---------------------------------------------------------------- 文字模板
@@ -157,38 +162,129 @@ def _is_mergable(pics: list[str]) -> bool:
     return all(pic.startswith("http://") or pic.startswith("https://") for pic in pics)
 
 
-def _open_image(data: bytes) -> PILImage:
-    """线程池里解码图片（`load()` 提前触发解码，坏图在此处就抛出而非拼接时才炸）"""
-    img = Image.open(BytesIO(data))
-    img.load()
-    return img
+def _image_size(data: bytes) -> tuple[int, int]:
+    """只读文件头拿尺寸（PIL 的 open 是惰性的，不解码像素）；坏图抛 OSError/ValueError"""
+    with Image.open(BytesIO(data)) as img:
+        return img.size
 
 
 def _compose_grid(
-    images: list[PILImage],
+    datas: list[bytes],
     matrix: tuple[int, int],
     x_coord: list[int],
     y_coord: list[int],
 ) -> bytes:
-    """照抄 bison `pic_merge` 的拼接段：按坐标 paste 后存为 JPEG（同步，须在线程池执行）"""
+    """照抄 bison `pic_merge` 的拼接段：按坐标 paste 后存为 JPEG（同步，须在线程池执行）。
+
+    只有真正参与拼接的图才在这里完整解码。
+    """
     target = Image.new("RGB", (x_coord[-1], y_coord[-1]))
     for y in range(matrix[1]):
         for x in range(matrix[0]):
-            source = images[y * matrix[0] + x]
-            if source.mode != "RGB":
-                # PIL 的 paste 本会隐式转换，这里显式处理以避免带 alpha 的图存 JPEG 报错
-                source = source.convert("RGB")
-            target.paste(source, (x_coord[x], y_coord[y], x_coord[x + 1], y_coord[y + 1]))
+            with Image.open(BytesIO(datas[y * matrix[0] + x])) as source:
+                if source.mode != "RGB":
+                    # PIL 的 paste 本会隐式转换，这里显式处理以避免带 alpha 的图存 JPEG 报错
+                    source = source.convert("RGB")
+                target.paste(source, (x_coord[x], y_coord[y], x_coord[x + 1], y_coord[y + 1]))
     buffer = BytesIO()
     target.save(buffer, "JPEG")
     return buffer.getvalue()
 
 
+# ---------- 配图下载缓存 ----------
+#
+# 同一条动态可能被重渲染（推送失败后重推、`b站订阅测试` 预览），配图 URL 不变、内容不变，
+# 按 URL 哈希落盘缓存，有效期 pic_cache_ttl_hours；过期文件由每日裁剪任务清理。
+
+
+def _pic_cache_ttl() -> float:
+    hours = getattr(plugin_config, "pic_cache_ttl_hours", 24)
+    return max(0, hours if isinstance(hours, int) else 24) * 3600.0
+
+
+def _pic_cache_path(url: str) -> str:
+    return os.path.join(PIC_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+
+def _read_pic_cache(url: str, ttl: float) -> Optional[bytes]:
+    path = _pic_cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) >= ttl:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_pic_cache(url: str, data: bytes) -> None:
+    path = _pic_cache_path(url)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(PIC_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug(f"配图缓存写入失败（不影响推送）: {get_exc_desc(e)}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def prune_pic_cache() -> int:
+    """删除过期的配图缓存文件，返回删除数量（同步，供每日裁剪任务在线程池调用）"""
+    ttl = _pic_cache_ttl()
+    now = time.time()
+    removed = 0
+    try:
+        entries = list(os.scandir(PIC_CACHE_DIR))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime >= ttl:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+async def _fetch_pic(url: str, semaphore: asyncio.Semaphore, ttl: float) -> Optional[tuple[bytes, tuple[int, int]]]:
+    """取一张配图（缓存优先）并读出尺寸；失败返回 None（不阻塞整体推送，退回原图 URL）"""
+    data = await run_in_pool(_read_pic_cache, url, ttl) if ttl > 0 else None
+    from_cache = data is not None
+    try:
+        if data is None:
+            async with semaphore:
+                data = await download_bytes(url, proxy=plugin_config.proxy)
+        size = await run_in_pool(_image_size, data)
+    except _PIC_ERRORS as e:
+        logger.warning(f"配图下载/解码失败，放弃合并: {url} ({get_exc_desc(e)})")
+        return None
+    if not from_cache and ttl > 0:
+        await run_in_pool(_write_pic_cache, url, data)
+    return data, size
+
+
+async def _prefetch_pics(urls: list[str]) -> list[Optional[tuple[bytes, tuple[int, int]]]]:
+    """并发预取全部候选配图（信号量限流），结果与 urls 一一对应"""
+    limit = getattr(plugin_config, "pic_download_concurrency", 4)
+    semaphore = asyncio.Semaphore(max(1, limit if isinstance(limit, int) else 4))
+    ttl = _pic_cache_ttl()
+    return list(await asyncio.gather(*(_fetch_pic(url, semaphore, ttl) for url in urls)))
+
+
 async def merge_pics(pic_urls: list[str]) -> list[Union[bytes, str]]:
     """配图合并（照抄 bison `pic_merge`，设计文档 §5.2 第 2 步）。
 
     ≥3 张、每张都是方图、同行等高同列等宽时拼成 3×N 大图（N=1/2/3），
     大图放在列表首位、其余原图 URL 原样跟随；任一条件不满足则原样返回 URL 列表。
+
+    与 bison 逐张下载判断不同，这里先并发预取前 9 张（带磁盘缓存），
+    判据只用文件头里的尺寸，确定要拼的图之后才在线程池里完整解码；判定结果与 bison 一致。
     """
     pics: list[str] = [url for url in pic_urls if isinstance(url, str) and url.strip()]
     if len(pics) != len(pic_urls):
@@ -196,80 +292,74 @@ async def merge_pics(pic_urls: list[str]) -> list[Union[bytes, str]]:
     if len(pics) < 3 or not _is_mergable(pics):
         return list(pics)
 
-    loaded: dict[int, PILImage] = {}
+    fetched = await _prefetch_pics(pics[:_GRID_MAX_PICS])
 
-    async def load(index: int) -> Optional[PILImage]:
-        """下载并解码第 index 张图；失败返回 None（不阻塞整体推送，退回原图 URL）"""
-        if index in loaded:
-            return loaded[index]
-        try:
-            data = await download_bytes(pics[index], proxy=plugin_config.proxy)
-            image = await run_in_pool(_open_image, data)
-        except _PIC_ERRORS as e:
-            logger.warning(f"配图下载/解码失败，放弃合并: {pics[index]} ({get_exc_desc(e)})")
-            return None
-        loaded[index] = image
-        return image
+    def size_of(index: int) -> Optional[tuple[int, int]]:
+        item = fetched[index] if index < len(fetched) else None
+        return item[1] if item is not None else None
 
-    first_image = await load(0)
-    if first_image is None or not _check_image_square(first_image.size):
+    first_size = size_of(0)
+    if first_size is None or not _check_image_square(first_size):
         return list(pics)
 
-    images: list[PILImage] = [first_image]
+    sizes: list[tuple[int, int]] = [first_size]
     # 第一行：必须是方图且与首图等高
     for i in range(1, 3):
-        cur_img = await load(i)
-        if cur_img is None or not _check_image_square(cur_img.size):
+        cur_size = size_of(i)
+        if cur_size is None or not _check_image_square(cur_size):
             return list(pics)
-        if cur_img.size[1] != images[0].size[1]:
+        if cur_size[1] != sizes[0][1]:
             return list(pics)
-        images.append(cur_img)
+        sizes.append(cur_size)
 
     _tmp = 0
     x_coord = [0]
     for i in range(3):
-        _tmp += images[i].size[0]
+        _tmp += sizes[i][0]
         x_coord.append(_tmp)
-    y_coord = [0, first_image.size[1]]
+    y_coord = [0, first_size[1]]
 
-    async def process_row(row: int) -> bool:
+    def process_row(row: int) -> bool:
         """尝试补齐第 row 行（0 起算）；任一校验不过返回 False，已拼好的行照常使用"""
         if len(pics) < (row + 1) * 3:
             return False
-        row_first_img = await load(row * 3)
-        if row_first_img is None or not _check_image_square(row_first_img.size):
+        row_first_size = size_of(row * 3)
+        if row_first_size is None or not _check_image_square(row_first_size):
             return False
-        if row_first_img.size[0] != images[0].size[0]:
+        if row_first_size[0] != sizes[0][0]:
             return False
-        image_row: list[PILImage] = [row_first_img]
+        size_row: list[tuple[int, int]] = [row_first_size]
         for i in range(row * 3 + 1, row * 3 + 3):
-            cur_img = await load(i)
-            if cur_img is None or not _check_image_square(cur_img.size):
+            cur_size = size_of(i)
+            if cur_size is None or not _check_image_square(cur_size):
                 return False
-            if cur_img.size[1] != row_first_img.size[1]:
+            if cur_size[1] != row_first_size[1]:
                 return False
-            if cur_img.size[0] != images[i % 3].size[0]:
+            if cur_size[0] != sizes[i % 3][0]:
                 return False
-            image_row.append(cur_img)
-        images.extend(image_row)
-        y_coord.append(y_coord[-1] + row_first_img.size[1])
+            size_row.append(cur_size)
+        sizes.extend(size_row)
+        y_coord.append(y_coord[-1] + row_first_size[1])
         return True
 
     matrix = (3, 1)
-    if await process_row(1):
+    if process_row(1):
         matrix = (3, 2)
         # 第 2 行不成立时不再试第 3 行：bison 原实现此处会 images 索引越界，行为等价且不崩
-        if await process_row(2):
+        if process_row(2):
             matrix = (3, 3)
 
+    count = matrix[0] * matrix[1]
+    datas = [fetched[i][0] for i in range(count)]
     try:
-        merged = await run_in_pool(_compose_grid, images, matrix, x_coord, y_coord)
+        # 拼图走共享渲染线程池，与其他插件的 PIL 绘图一起限流
+        merged = await get_render_pool().run(_compose_grid, datas, matrix, x_coord, y_coord, owner="bili_dyn_sub")
     except (OSError, ValueError) as e:
         logger.warning(f"配图拼接失败，退回原图列表: {get_exc_desc(e)}")
         return list(pics)
 
-    logger.info(f"触发图片合并：{matrix[0]}×{matrix[1]}，合并 {matrix[0] * matrix[1]} 张")
-    rest: list[Union[bytes, str]] = list(pics[matrix[0] * matrix[1] :])
+    logger.info(f"触发图片合并：{matrix[0]}×{matrix[1]}，合并 {count} 张")
+    rest: list[Union[bytes, str]] = list(pics[count:])
     rest.insert(0, merged)
     return rest
 
@@ -1,9 +1,11 @@
 """
-bili_dyn_sub 调度层：UID 串行轮转 + 错误分流 + 补推闸门 + 复刻 bison 发送节奏
+bili_dyn_sub 调度层：自适应取数节奏 + 错误分流 + 补推闸门 + 复刻 bison 发送节奏
 
 职责（设计文档 §6 / §4.2 / §4.3 / §5.2）：
-- APScheduler interval job：间隔 poll_interval_seconds + jitter，max_instances=1 防重入
-- **UID 之间串行且错开** uid_request_gap_seconds，绝不在同一 tick 并发打多个请求
+- 常驻取数循环：每个 UID 约每 poll_interval_seconds（+ jitter）取数一次，请求经全局令牌桶
+  均匀摊在整个周期里（见 pacing.py）；活跃 UID 间隔更短且优先，风控时整体降速
+- **取数严格串行**，令牌桶容量为 1，绝不在同一 tick 并发打多个请求
+- 渲染与分发交给独立的推送任务（队列），一次慢推送不会拖住取数循环
 - 取数异常按类型分流到 per-UID 退避；**任何异常都不推进 seen 状态**（§3.5）
 - 首轮只建基线不回推历史（§4.2）；跳过类型/超期/超量的动态只标 seen 不推送（§4.3），
   其中"超出推送窗口"的停机积压**静默**丢弃（只记日志），只有防刷屏压下去的条数才提示群友
@@ -15,7 +17,8 @@ bili_dyn_sub 调度层：UID 串行轮转 + 错误分流 + 补推闸门 + 复刻
 
 借鉴来源：nonebot-bison (MIT, Copyright (c) 2021 felinae98)
 - `send.py:71-84` 的拆包语义（首段单发 / 余下 1 段单发 / ≥2 段合并转发）
-- `send.py:15` 的 `MESSGE_SEND_INTERVAL = 1.5` 全局发送间隔与 `bison_resend_times` 重试次数
+- `send.py:15` 的 `MESSGE_SEND_INTERVAL = 1.5` 发送间隔（现为 utils.dispatcher 的 per-群令牌桶速率）
+  与 `bison_resend_times` 重试次数
 """
 
 from __future__ import annotations
@@ -35,18 +38,19 @@ require("nonebot_plugin_apscheduler")
 # 故一律用 apscheduler 别名引用外部调度器。
 from nonebot_plugin_apscheduler import scheduler as apscheduler
 
+from ..utils.dispatcher import SendTarget, message_dispatcher
 from ..utils.tools import get_exc_desc, get_logger, run_in_pool
 from . import api
 from .backoff import ACTION_REFRESH_COOKIE, backoff_manager
 from .config import plugin_config
 from .credential import LoginStatus, credential_manager
+from .pacing import AdaptiveRateLimiter, PollPlanner
 from .parser import ParsedDynamic, parse_feed, should_skip
-from .render import build_messages
+from .render import build_messages, prune_pic_cache
 from .store import dyn_id_to_int, store
 
 logger = get_logger("bili_dyn_sub.scheduler")
 
-POLL_JOB_ID = "bili_dyn_sub_poll"
 PRUNE_JOB_ID = "bili_dyn_sub_prune"
 LOGIN_CHECK_JOB_ID = "bili_dyn_sub_login_check"
 
@@ -79,6 +83,13 @@ _MIN_SEND_ATTEMPTS = 1
 # 合并转发的 Bot 身份（uin, nickname），首次用到时取一次
 _self_identity: Optional[tuple[str, str]] = None
 
+# 取数循环无事可做时最多睡这么久再对一次订阅列表（新订阅最迟这么久后开始取数）
+_FETCH_LOOP_IDLE_SECONDS = 5.0
+# 没有 Bot 连接时取数循环的等待间隔（推不出去就先不取，免得把新动态白白标成已读）
+_NO_BOT_RETRY_SECONDS = 10.0
+# 推送队列上限：积压到这个量说明发送端长期异常，再排队也只是占内存
+_PUSH_QUEUE_MAXSIZE = 200
+
 
 # ---------------------------------------------------------------- 配置兜底
 
@@ -103,6 +114,19 @@ def _cfg_int(name: str, default: int, minimum: int = 0) -> int:
     return max(minimum, value)
 
 
+# 全局请求令牌桶与 per-UID 到期调度（见 pacing.py）
+rate_limiter = AdaptiveRateLimiter(
+    min_gap=_cfg_float("min_request_gap_seconds", 1.0, 0.0),
+    max_gap=_cfg_float("max_request_gap_seconds", 60.0, 0.0),
+)
+poll_planner = PollPlanner(
+    interval=_cfg_int("poll_interval_seconds", 100, 30),
+    jitter=_cfg_int("poll_jitter_seconds", 20, 0),
+    active_factor=_cfg_float("active_poll_factor", 0.5, 0.05),
+    active_window=_cfg_int("active_window_minutes", 360, 0) * 60,
+)
+
+
 async def _save_state() -> None:
     """把去重状态落盘（同步原子写下线程池，不阻塞事件循环）"""
     await run_in_pool(store.save)
@@ -111,6 +135,14 @@ async def _save_state() -> None:
 # ---------------------------------------------------------------- 取数与分流
 
 
+async def _acquire_request_slot() -> None:
+    """等令牌桶放行一个请求（取数循环串行调用，同一时刻至多一个请求在途）"""
+    delay = rate_limiter.delay()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    rate_limiter.consume()
+
+
 def _log_error(uid: str, error_key: str, message: str) -> None:
     """日志纪律（§3.5）：同一错误码只在状态跃迁时 warn，连续复发降级为 debug"""
     if backoff_manager.should_log_warning(uid, error_key):
@@ -265,9 +297,12 @@ async def _fetch_feed(uid: str) -> Optional[dict[str, Any]]:
     """取一次 feed；成功返回 data 段，任何失败返回 None（调用方一律不推进状态）"""
     force_refresh = False
     for attempt in (1, 2):
+        # 重试同样走令牌桶：换 cookie 后立刻重打正是最容易连环吃风控的时候
+        await _acquire_request_slot()
         try:
             return await api.fetch_space_feed(uid, force_refresh_cookie=force_refresh)
         except api.BiliRiskControlError as e:
+            rate_limiter.on_risk_control()
             action = backoff_manager.on_risk_control(uid, "-352")
             if action == ACTION_REFRESH_COOKIE and attempt == 1:
                 logger.info(f"UID {uid} 触发 -352 风控，强制重造 cookie 后重试一次")
@@ -284,6 +319,7 @@ async def _fetch_feed(uid: str) -> Optional[dict[str, Any]]:
             )
             return None
         except api.BiliIpBlockedError as e:
+            rate_limiter.on_ip_block()
             backoff_manager.on_ip_block(uid, "HTTP 412")
             _log_error(
                 uid,
@@ -405,7 +441,11 @@ def _select_pushable(uid: str, parsed_list: list[ParsedDynamic]) -> PushSelectio
     两个抑制计数的差别见 PushSelection。二者都不含"跳过类型"与"未订阅分类"，
     那两类不属于"未展示的动态"，无需向用户提示。
     """
-    fresh = [p for p in parsed_list if p.dyn_id and not store.is_seen(uid, p.dyn_id)]
+    # 已在推送队列里排队的动态尚未标 seen，但也不算"新"，否则活跃 UID 再次取数时会重复入队
+    pending = _pending_push.get(uid, ())
+    fresh = [
+        p for p in parsed_list if p.dyn_id and not store.is_seen(uid, p.dyn_id) and p.dyn_id not in pending
+    ]
     if not fresh:
         return PushSelection([], 0, 0)
 
@@ -479,26 +519,6 @@ async def _self_info(bot: Bot) -> tuple[str, str]:
     return _self_identity
 
 
-@dataclass(frozen=True, slots=True)
-class SendTarget:
-    """一个发送目标：群聊或私聊二选一。
-
-    推送走群聊；`b站订阅测试` 的渲染预览走私聊（把真实推送效果发给发起人自己，
-    不打扰任何生产群）。两者共用同一套重试/间隔/合并转发降级逻辑，
-    以保证预览与真实推送的分包节奏**逐条一致**。
-    """
-
-    group_id: Optional[int] = None
-    user_id: Optional[int] = None
-
-    @property
-    def is_private(self) -> bool:
-        return self.user_id is not None
-
-    def __str__(self) -> str:
-        return f"私聊 {self.user_id}" if self.is_private else f"群 {self.group_id}"
-
-
 async def _send_with_retry(
     bot: Bot,
     target: SendTarget,
@@ -507,49 +527,24 @@ async def _send_with_retry(
     forward: bool = False,
     desc: str = "",
 ) -> bool:
-    """发一条消息，失败重试 send_retry_times 次；每次发送后固定 sleep 全局间隔。
+    """经全局发送调度器发一条消息并等待结果，失败重试 send_retry_times 次。
 
+    发送节奏由调度器的 per-bot / per-群令牌桶控制（取代原先每次发送后固定 sleep 的全局间隔），
+    不同群之间并发投递、同一群内保序。
     返回 False 仅代表"确认失败"（调用方可安全降级重发）；
     超时属于"可能已送达"，返回 True 以避免重复推送（同 utils.tools.send_forward_msg 的判断）。
     """
     attempts = max(_MIN_SEND_ATTEMPTS, _cfg_int("send_retry_times", 3, _MIN_SEND_ATTEMPTS))
-    interval = _cfg_float("send_interval_seconds", 1.5, 0.0)
-
-    for attempt in range(1, attempts + 1):
-        try:
-            if forward:
-                api_name = "send_private_forward_msg" if target.is_private else "send_group_forward_msg"
-                kwargs = (
-                    {"user_id": target.user_id} if target.is_private else {"group_id": target.group_id}
-                )
-                await bot.call_api(api_name, messages=payload, **kwargs)
-            elif target.is_private:
-                await bot.send_private_msg(user_id=target.user_id, message=payload)
-            else:
-                await bot.send_group_msg(group_id=target.group_id, message=payload)
-        except NetworkError as e:
-            await asyncio.sleep(interval)
-            if "timeout" in str(e).lower():
-                logger.warning(f"{target} 发送{desc}超时，服务端可能已处理，跳过重试避免重复推送")
-                return True
-            logger.warning(f"{target} 发送{desc}网络错误（第 {attempt}/{attempts} 次）: {get_exc_desc(e)}")
-        except (ActionFailed, ValueError, asyncio.TimeoutError) as e:
-            await asyncio.sleep(interval)
-            logger.warning(f"{target} 发送{desc}失败（第 {attempt}/{attempts} 次）: {get_exc_desc(e)}")
-        else:
-            # 全局节奏：发送成功后也要间隔，避免连发触发风控/限速
-            await asyncio.sleep(interval)
-            return True
-
-    logger.error(f"{target} 发送{desc}最终失败，已重试 {attempts} 次")
-    return False
+    result = await message_dispatcher.send(bot, target, payload, forward=forward, retries=attempts, desc=desc)
+    return result.ok
 
 
 async def dispatch_segments(bot: Bot, target: SendTarget, segments: list[MessageSegment]) -> None:
     """按 §5.2 的拆包语义分发：首段单发 → 余下 1 段单发 / ≥2 段合并转发。
 
     公开给 `__init__.py` 的渲染预览复用：预览与真实推送必须走同一条分发路径，
-    否则"预览看着没问题"就证明不了"推到群里也没问题"。
+    否则"预览看着没问题"就证明不了"推到群里也没问题"。推送走群聊，预览走私聊
+    （把真实推送效果发给发起人自己，不打扰任何生产群）。
     """
     if not segments:
         return
@@ -578,23 +573,129 @@ async def dispatch_segments(bot: Bot, target: SendTarget, segments: list[Message
             await _send_with_retry(bot, target, Message(segment), desc="动态配图（降级）")
 
 
-# ---------------------------------------------------------------- 主循环
+# ---------------------------------------------------------------- 推送队列
+#
+# 取数与推送解耦：取数侧只负责判新与闸门，把要推的动态交给单个推送任务按序渲染、分发。
+# 单任务保证同一 UP 的动态按序到达；同一条动态的各群之间经 utils.dispatcher 并发投递（群内保序、
+# 令牌桶限速）。一次慢推送（大图渲染、合并转发超时重试）只会让队列排长，不会拖住其他 UID 的取数。
+#
+# seen 仍在**推送前**逐条写入（§4.2：渲染/发送失败最多重复 1 条）；排队期间用 _pending_push
+# 挡住重复入队。进程在排队期间退出时这些动态尚未标 seen，重启后按推送窗口正常补推。
+
 
+@dataclass(slots=True)
+class PushJob:
+    """一个 UID 一次取数筛出的待推送动态（升序）"""
 
-async def _poll_uid(bot: Bot, uid: str) -> None:
-    """处理单个 UID：取数 → 判新 → 闸门 → 渲染 → 分发"""
-    if backoff_manager.is_backing_off(uid):
-        logger.debug(f"UID {uid} 仍在退避中（剩余 {backoff_manager.remaining_seconds(uid)}s），跳过本轮")
+    uid: str
+    dynamics: list[ParsedDynamic]
+    overflow: int = 0  # 被单轮条数上限压下去的条数，推完后提示群友
+
+
+_push_queue: Optional[asyncio.Queue[PushJob]] = None
+# uid -> 已入队但尚未推送的 dyn_id
+_pending_push: dict[str, set[str]] = {}
+
+
+def _enqueue_push(job: PushJob) -> bool:
+    """把推送任务放进队列；队列满时放弃本次（动态未标 seen，下次取数会再筛出来）"""
+    if _push_queue is None:
+        logger.warning(f"推送任务尚未启动，UID {job.uid} 的 {len(job.dynamics)} 条新动态留待下次取数")
+        return False
+    try:
+        _push_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        logger.warning(
+            f"推送队列已满（{_PUSH_QUEUE_MAXSIZE}），UID {job.uid} 的 {len(job.dynamics)} 条新动态留待下次取数"
+        )
+        return False
+    _pending_push.setdefault(job.uid, set()).update(p.dyn_id for p in job.dynamics)
+    return True
+
+
+def _release_pending(job: PushJob) -> None:
+    pending = _pending_push.get(job.uid)
+    if pending is None:
+        return
+    pending.difference_update(p.dyn_id for p in job.dynamics)
+    if not pending:
+        _pending_push.pop(job.uid, None)
+
+
+async def _push_job(job: PushJob) -> None:
+    """渲染并分发一个推送任务"""
+    uid = job.uid
+    try:
+        bot = get_bot()
+    except (ValueError, KeyError) as e:
+        logger.info(
+            f"当前没有可用的 Bot 连接，UID {uid} 的 {len(job.dynamics)} 条新动态留待下次取数: {get_exc_desc(e)}"
+        )
+        return
+
+    # 推送目标**完全由订阅关系决定**：订阅关系即唯一开关，不再叠加任何群级开关。
+    # 双层控制会造成"订阅列表里有、就是不推"的诡异状态（且超管一句「禁用all」就能让订阅静默失效），
+    # 「不想收了」的正确操作是「b站退订」。完整理由见 docs/bili_dyn_sub_design.md §11.4.3。
+    # 排队期间可能有群退订，所以在推送时才取订阅群。
+    targets = store.get_groups(uid)
+    if not targets:
+        for parsed in job.dynamics:
+            store.mark_seen(uid, parsed.dyn_id, save=False)
+        await _save_state()
+        logger.info(f"UID {uid} 有 {len(job.dynamics)} 条新动态，但已无订阅群（可能刚被退订），仅标记已读")
         return
 
+    logger.info(f"UID {uid} 推送 {len(job.dynamics)} 条新动态到 {len(targets)} 个群")
+    for parsed in job.dynamics:
+        # 推送前先写状态：渲染/发送失败最多重复 1 条，不会像 haruka-bot 那样永久卡死（§4.2）
+        store.mark_seen(uid, parsed.dyn_id, save=False)
+        await _save_state()
+        # 同一动态跨群只渲染一次（§5.3）
+        segments = await build_messages(parsed)
+        await asyncio.gather(
+            *(dispatch_segments(bot, SendTarget(group_id=group_id), segments) for group_id in targets)
+        )
+
+    # 只有「刷屏保护压下去的条数」才提示群友；超出推送窗口的停机积压保持静默
+    # （默认窗口的目的就是让重启/迁移对群友无感，提示一句等于把停机公告出去）
+    if job.overflow > 0:
+        tip = Message(f"另有 {job.overflow} 条动态未展示")
+        await asyncio.gather(
+            *(_send_with_retry(bot, SendTarget(group_id=group_id), tip, desc="未展示提示") for group_id in targets)
+        )
+
+
+async def _push_worker() -> None:
+    """常驻推送任务：逐个消费推送队列"""
+    assert _push_queue is not None
+    while True:
+        job = await _push_queue.get()
+        try:
+            await _push_job(job)
+        except Exception as e:
+            # 任务边界：单个 UID 推送的任何意外都不能让推送任务退出
+            logger.exception(f"UID {job.uid} 推送失败: {get_exc_desc(e)}")
+        finally:
+            _release_pending(job)
+            _push_queue.task_done()
+
+
+# ---------------------------------------------------------------- 取数循环
+
+
+async def _poll_uid(uid: str) -> None:
+    """处理单个 UID 的取数侧：取数 → 判新 → 闸门 → 交给推送队列"""
     data = await _fetch_feed(uid)
     if data is None:
         return  # 风控/网络/解析失败一律不动游标、不写 seen（§3.5）
 
     backoff_manager.on_success(uid)
+    rate_limiter.on_success()
     store.touch_last_success(uid, save=False)
     parsed_list = parse_feed(data)
     _track_empty_feed(uid, parsed_list)
+    # 用 feed 里最新一条的发布时间判断活跃度：重启后第一次取数即可恢复，无需持久化
+    poll_planner.note_activity(uid, max((p.pub_ts or 0 for p in parsed_list), default=0))
 
     if not store.is_baseline_initialized(uid):
         _init_baseline(uid, parsed_list)  # 内部已落盘
@@ -604,6 +705,9 @@ async def _poll_uid(bot: Bot, uid: str) -> None:
     # 先把「只标 seen 不推」的部分与 last_success 落盘
     await _save_state()
 
+    if stale > 0:
+        logger.info(f"UID {uid} 另有 {stale} 条动态超出推送窗口，已静默标记已读（不提示群友）")
+
     if not to_push:
         if stale or overflow:
             logger.info(
@@ -613,60 +717,62 @@ async def _poll_uid(bot: Bot, uid: str) -> None:
             logger.debug(f"UID {uid} 本轮无新动态")
         return
 
-    # 推送目标**完全由订阅关系决定**：订阅关系即唯一开关，不再叠加任何群级开关。
-    # 双层控制会造成"订阅列表里有、就是不推"的诡异状态（且超管一句「禁用all」就能让订阅静默失效），
-    # 「不想收了」的正确操作是「b站退订」。完整理由见 docs/bili_dyn_sub_design.md §11.4.3。
-    targets = store.get_groups(uid)
-    if not targets:
-        for parsed in to_push:
-            store.mark_seen(uid, parsed.dyn_id, save=False)
-        await _save_state()
-        logger.info(f"UID {uid} 有 {len(to_push)} 条新动态，但已无订阅群（可能刚被退订），仅标记已读")
-        return
+    if _enqueue_push(PushJob(uid, to_push, overflow)):
+        logger.info(f"UID {uid} 发现 {len(to_push)} 条新动态，已加入推送队列")
 
-    logger.info(f"UID {uid} 发现 {len(to_push)} 条新动态，推送到 {len(targets)} 个群")
-    for parsed in to_push:
-        # 推送前先写状态：渲染/发送失败最多重复 1 条，不会像 haruka-bot 那样永久卡死（§4.2）
-        store.mark_seen(uid, parsed.dyn_id, save=False)
-        await _save_state()
-        # 同一动态跨群只渲染一次（§5.3）
-        segments = await build_messages(parsed)
-        for group_id in targets:
-            await dispatch_segments(bot, SendTarget(group_id=group_id), segments)
 
-    # 只有「刷屏保护压下去的条数」才提示群友；超出推送窗口的停机积压保持静默
-    # （默认窗口的目的就是让重启/迁移对群友无感，提示一句等于把停机公告出去）
-    if overflow > 0:
-        tip = Message(f"另有 {overflow} 条动态未展示")
-        for group_id in targets:
-            await _send_with_retry(bot, group_id, tip, desc="未展示提示")
-    if stale > 0:
-        logger.info(f"UID {uid} 另有 {stale} 条动态超出推送窗口，已静默标记已读（不提示群友）")
+def _bot_available() -> bool:
+    try:
+        get_bot()
+    except (ValueError, KeyError):
+        return False
+    return True
 
 
-async def poll_once() -> None:
-    """一轮完整轮询：UID 之间串行且错开，单个 UID 失败不影响其他 UID"""
+async def _fetch_step() -> float:
+    """取数循环的一步：挑一个到期 UID 取数，返回下一步之前应等待的秒数"""
     uids = store.get_all_uids()
+    poll_planner.sync(uids)
     if not uids:
-        logger.debug("暂无 B 站动态订阅，跳过本轮轮询")
-        return
+        return _FETCH_LOOP_IDLE_SECONDS
+    if not _bot_available():
+        logger.debug("当前没有可用的 Bot 连接，暂停 B 站动态取数")
+        return _NO_BOT_RETRY_SECONDS
+
+    # 基础速率 = 一个周期内按计划要发的请求数 / 周期，把请求均匀摊开而不是挤在周期开头
+    rate_limiter.set_target_rate(poll_planner.requests_per_interval(), poll_planner.interval)
+    uid, wait = poll_planner.next_uid()
+    if uid is None:
+        return min(wait, _FETCH_LOOP_IDLE_SECONDS)
+
+    if backoff_manager.is_backing_off(uid):
+        remaining = backoff_manager.remaining_seconds(uid)
+        logger.debug(f"UID {uid} 仍在退避中（剩余 {remaining}s），推迟到退避结束再取数")
+        poll_planner.defer(uid, remaining)
+        return 0.0
 
     try:
-        bot = get_bot()
-    except (ValueError, KeyError) as e:
-        logger.info(f"当前没有可用的 Bot 连接，跳过本轮 B 站动态轮询: {get_exc_desc(e)}")
-        return
+        await _poll_uid(uid)
+    except Exception as e:
+        # 取数边界：单个 UID 的任何意外都不能中断循环
+        logger.exception(f"UID {uid} 本次处理失败: {get_exc_desc(e)}")
+    finally:
+        poll_planner.mark_polled(uid)
+    if backoff_manager.is_backing_off(uid):
+        poll_planner.defer(uid, backoff_manager.remaining_seconds(uid))
+    return 0.0
+
 
-    gap = _cfg_float("uid_request_gap_seconds", 8.0, 0.0)
-    for index, uid in enumerate(uids):
-        if index > 0 and gap > 0:
-            # 绝不在同一 tick 并发打多个请求（设计文档 §6）
-            await asyncio.sleep(gap)
+async def _fetch_loop() -> None:
+    """常驻取数循环：UID 按到期时间与活跃度排队，请求间隔由令牌桶控制"""
+    while True:
         try:
-            await _poll_uid(bot, uid)
+            wait = await _fetch_step()
         except Exception as e:
-            # 轮询边界：单个 UID 的任何意外都不能中断整轮
-            logger.exception(f"UID {uid} 本轮处理失败: {get_exc_desc(e)}")
+            logger.exception(f"B 站动态取数循环异常: {get_exc_desc(e)}")
+            wait = _FETCH_LOOP_IDLE_SECONDS
+        if wait > 0:
+            await asyncio.sleep(wait)
 
 
 async def prune_state() -> None:
@@ -674,26 +780,18 @@ async def prune_state() -> None:
     removed = await run_in_pool(store.prune)
     if removed:
         logger.info(f"去重状态裁剪完成，清理 {removed} 条记录")
+    await run_in_pool(store.compact)
+    expired = await run_in_pool(prune_pic_cache)
+    if expired:
+        logger.info(f"配图缓存裁剪完成，清理 {expired} 个过期文件")
 
 
 # ---------------------------------------------------------------- 定时任务注册
 
 
 def _register_jobs() -> None:
-    """注册轮询与裁剪任务（import 即注册，幂等）"""
-    interval = _cfg_int("poll_interval_seconds", 100, 30)
-    jitter = _cfg_int("poll_jitter_seconds", 20, 0)
+    """注册裁剪任务（import 即注册，幂等）"""
     try:
-        apscheduler.add_job(
-            poll_once,
-            trigger="interval",
-            seconds=interval,
-            jitter=jitter or None,
-            id=POLL_JOB_ID,
-            replace_existing=True,
-            max_instances=1,
-            coalesce=True,
-        )
         apscheduler.add_job(
             prune_state,
             trigger="cron",
@@ -705,12 +803,47 @@ def _register_jobs() -> None:
             coalesce=True,
         )
     except (ValueError, TypeError, LookupError) as e:
-        logger.error(f"注册 B 站动态轮询任务失败: {get_exc_desc(e)}")
+        logger.error(f"注册 B 站动态状态裁剪任务失败: {get_exc_desc(e)}")
+
+
+_fetch_task: Optional[asyncio.Task] = None
+_push_task: Optional[asyncio.Task] = None
+
+
+def _register_loops() -> None:
+    """启动时拉起取数循环与推送任务，关闭时取消"""
+    try:
+        driver = get_driver()
+    except ValueError as e:
+        logger.debug(f"当前没有 driver，不启动 B 站动态取数循环: {get_exc_desc(e)}")
         return
-    logger.info(
-        f"B 站动态轮询任务已注册：间隔 {interval}s（jitter {jitter}s），"
-        f"当前订阅 {len(store.get_all_uids())} 个 UID"
-    )
+
+    async def _on_startup() -> None:
+        global _fetch_task, _push_task, _push_queue
+        _push_queue = asyncio.Queue(maxsize=_PUSH_QUEUE_MAXSIZE)
+        _push_task = asyncio.create_task(_push_worker())
+        _fetch_task = asyncio.create_task(_fetch_loop())
+        logger.info(
+            f"B 站动态取数循环已启动：每个 UID 约 {poll_planner.interval:.0f}s 取数一次"
+            f"（jitter {poll_planner.jitter:.0f}s，活跃 UID ×{poll_planner.active_factor:g}），"
+            f"请求间隔 {rate_limiter.min_gap:g}~{rate_limiter.max_gap:g}s，"
+            f"当前订阅 {len(store.get_all_uids())} 个 UID"
+        )
+
+    async def _on_shutdown() -> None:
+        # 排队中的推送尚未标 seen，直接取消即可：重启后会按推送窗口重新筛出来
+        for task in (_fetch_task, _push_task):
+            if task is not None and not task.done():
+                task.cancel()
+        for task in (_fetch_task, _push_task):
+            if task is not None:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    driver.on_startup(_on_startup)
+    driver.on_shutdown(_on_shutdown)
 
 
 def _register_login_check() -> None:
@@ -756,4 +889,5 @@ def _register_login_check() -> None:
 
 
 _register_jobs()
+_register_loops()
 _register_login_check()
@@ -1,9 +1,15 @@
 """bili_dyn_sub 订阅与去重状态持久化（设计文档 §4.1 / §4.2）。
 
-data/bili_dyn_sub/state.json 结构：
-    {"subscriptions": {uid: {"name": str, "groups": [int], "categories": [int]}},
-     "seen": {uid: {"cursor": int, "ids": [dyn_id]}},
-     "last_success": {uid: "2026-07-26T20:05:00"}}
+data/bili_dyn_sub/state.db（SQLite，WAL）三张表，每个 UID 一行：
+    subscriptions(uid, name, groups, categories)   -- groups / categories 为 JSON 数组
+    seen(uid, cursor, ids)                          -- ids 为 JSON 数组
+    last_success(uid, ts)                           -- ISO 时间字符串
+
+内存里仍是完整的三段 dict（读全部走内存），写入只落**脏 UID** 的行：
+旧实现每次 save() 都把整份 state.json 重写一遍，每轮每个 UID 至少写一次、每条推送前再写一次，
+订阅一多文件就越写越大；现在一次 save() 的代价是 O(改动的 UID 数)。
+崩溃安全与旧的原子写等价：每次 save() 是一个事务，synchronous=FULL，提交即落盘，
+「推送前先写 seen」（§4.2）的保证不变。旧版 state.json 在首次启动时自动迁移（原文件改名保留）。
 
 约定：
 - uid / dyn_id 一律用 str 作 key（B 站 id_str 会超出 JS 安全整数范围，字符串更保险）。
@@ -16,13 +22,14 @@ data/bili_dyn_sub/state.json 结构：
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Optional
 
-from ..utils.json_io import atomic_write_json
 from ..utils.tools import get_logger
-from .config import STATE_FILE, plugin_config
+from .config import STATE_DB, STATE_FILE, plugin_config
 
 logger = get_logger("bili_dyn_sub.store")
 
@@ -77,44 +84,130 @@ def _seen_sort_key(dyn_id: str) -> tuple[int, int]:
     return (1, 0) if value is None else (0, value)
 
 
+# 三段状态对应的表名（也是脏标记的 section 名）
+_SUBSCRIPTIONS = "subscriptions"
+_SEEN = "seen"
+_LAST_SUCCESS = "last_success"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    uid TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    groups TEXT NOT NULL,
+    categories TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    uid TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    ids TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS last_success (
+    uid TEXT PRIMARY KEY,
+    ts TEXT NOT NULL
+);
+"""
+
+
 class Store:
     """订阅 + 去重状态容器；模块级单例见文件末尾的 store"""
 
-    def __init__(self, state_file: Path = STATE_FILE) -> None:
-        self._state_file: Path = Path(state_file)
+    def __init__(self, state_db: Path = STATE_DB, legacy_file: Path = STATE_FILE) -> None:
+        self._state_db: Path = Path(state_db)
+        self._legacy_file: Path = Path(legacy_file)
         self._subscriptions: dict[str, dict[str, Any]] = {}
         self._seen: dict[str, dict[str, Any]] = {}
         self._last_success: dict[str, str] = {}
+        # 待落盘的 (section, uid)；内存里已删除的 uid 落盘时删行
+        self._dirty: set[tuple[str, str]] = set()
+        # save() 会经 run_in_pool 在线程里执行，同一连接的写入用锁串行
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
         self.load()
 
     # -------------------- 读写 --------------------
 
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._state_db.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._state_db), timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL：每次提交都 fsync，与旧的「临时文件 + fsync + replace」同等持久（§4.2 推送前先写 seen）
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _mark(self, section: str, uid: str) -> None:
+        self._dirty.add((section, uid))
+
     def load(self) -> None:
-        """从 state.json 载入；文件缺失/损坏时回落空结构并记日志"""
+        """从 state.db 载入（首次启动时迁移旧 state.json）；读盘失败时回落空结构并记日志"""
         self._subscriptions = {}
         self._seen = {}
         self._last_success = {}
+        self._dirty = set()
 
-        if not self._state_file.exists():
-            logger.debug(f"状态文件不存在，以空状态启动: {self._state_file}")
+        try:
+            with self._lock:
+                conn = self._connect()
+                empty = conn.execute(
+                    "SELECT NOT EXISTS(SELECT 1 FROM subscriptions) AND NOT EXISTS(SELECT 1 FROM seen)"
+                ).fetchone()[0]
+                if empty and self._legacy_file.exists():
+                    self._migrate_legacy(conn)
+                    return
+                raw_subscriptions = {
+                    uid: {"name": name, "groups": json.loads(groups), "categories": json.loads(categories)}
+                    for uid, name, groups, categories in conn.execute(
+                        "SELECT uid, name, groups, categories FROM subscriptions"
+                    )
+                }
+                raw_seen = {
+                    uid: {"cursor": cursor, "ids": json.loads(ids)}
+                    for uid, cursor, ids in conn.execute("SELECT uid, cursor, ids FROM seen")
+                }
+                raw_last_success = dict(conn.execute("SELECT uid, ts FROM last_success").fetchall())
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.error(f"读取状态库失败，本次以空状态运行（原文件保留待人工检查）: {e}")
             return
 
+        self._subscriptions = self._parse_subscriptions(raw_subscriptions)
+        self._seen = self._parse_seen(raw_seen)
+        self._last_success = self._parse_last_success(raw_last_success)
+        logger.debug(
+            f"状态载入完成: {len(self._subscriptions)} 个订阅 UID, {len(self._seen)} 份去重记录"
+        )
+
+    def _migrate_legacy(self, conn: sqlite3.Connection) -> None:
+        """把旧版 state.json 整份导入 state.db，成功后原文件改名为 .migrated 保留（调用方持锁）"""
         try:
-            with open(self._state_file, "r", encoding="utf-8") as f:
+            with open(self._legacy_file, "r", encoding="utf-8") as f:
                 raw = json.load(f)
         except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
-            logger.error(f"读取状态文件失败，本次以空状态运行（原文件保留待人工检查）: {e}")
+            logger.error(f"读取旧状态文件失败，本次以空状态运行（原文件保留待人工检查）: {e}")
             return
-
         if not isinstance(raw, dict):
-            logger.error("状态文件顶层不是对象，本次以空状态运行")
+            logger.error("旧状态文件顶层不是对象，本次以空状态运行")
             return
 
         self._subscriptions = self._parse_subscriptions(raw.get("subscriptions"))
         self._seen = self._parse_seen(raw.get("seen"))
         self._last_success = self._parse_last_success(raw.get("last_success"))
-        logger.debug(
-            f"状态载入完成: {len(self._subscriptions)} 个订阅 UID, {len(self._seen)} 份去重记录"
+        for section, data in (
+            (_SUBSCRIPTIONS, self._subscriptions),
+            (_SEEN, self._seen),
+            (_LAST_SUCCESS, self._last_success),
+        ):
+            self._dirty.update((section, uid) for uid in data)
+        if not self._flush(conn):
+            return
+        try:
+            self._legacy_file.replace(self._legacy_file.with_name(self._legacy_file.name + ".migrated"))
+        except OSError as e:
+            logger.warning(f"旧状态文件改名失败（不影响运行，下次启动不会重复迁移）: {e}")
+        logger.info(
+            f"已将 {self._legacy_file.name} 迁移到 {self._state_db.name}: "
+            f"{len(self._subscriptions)} 个订阅 UID, {len(self._seen)} 份去重记录"
         )
 
     @staticmethod
@@ -165,9 +258,9 @@ class Store:
     def to_dict(self) -> dict[str, Any]:
         """导出当前状态的**快照副本**（供落盘与调试，改它不会影响内部状态）。
 
-        必须是副本：save() 会被 run_in_pool 丢到线程里执行（scheduler._save_state /
-        prune_state），若把内部 dict/list 直接交给 json.dump，事件循环侧的 mark_seen
-        追加一个 id 就会让线程里抛 RuntimeError: dictionary changed size during iteration。
+        必须是副本：调用方可能在线程里使用（同 save() 的 _dirty_rows），若直接拿内部 dict/list
+        去序列化，事件循环侧的 mark_seen 追加一个 id 就会让线程里抛
+        RuntimeError: dictionary changed size during iteration。
         """
         return {
             "subscriptions": {
@@ -181,15 +274,80 @@ class Store:
             "last_success": dict(self._last_success),
         }
 
-    def save(self) -> bool:
-        """同步原子写盘；调用方负责别在热路径高频调用。失败只记日志并返回 False"""
+    def _dirty_rows(
+        self, dirty: set[tuple[str, str]]
+    ) -> tuple[list[tuple], list[tuple], list[tuple], list[tuple[str, str]]]:
+        """把脏标记展开成待写的行（逐条复制，线程里执行时不会撞上事件循环侧的修改）"""
+        subscriptions: list[tuple] = []
+        seen: list[tuple] = []
+        last_success: list[tuple] = []
+        deletes: list[tuple[str, str]] = []
+        for section, uid in dirty:
+            if section == _SUBSCRIPTIONS:
+                item = self._subscriptions.get(uid)
+                if item is None:
+                    deletes.append((section, uid))
+                else:
+                    subscriptions.append(
+                        (uid, item.get("name", ""), json.dumps(list(item["groups"])), json.dumps(list(item["categories"])))
+                    )
+            elif section == _SEEN:
+                entry = self._seen.get(uid)
+                if entry is None:
+                    deletes.append((section, uid))
+                else:
+                    seen.append((uid, entry.get("cursor", 0), json.dumps(list(entry.get("ids") or []), ensure_ascii=False)))
+            else:
+                ts = self._last_success.get(uid)
+                if ts is None:
+                    deletes.append((section, uid))
+                else:
+                    last_success.append((uid, ts))
+        return subscriptions, seen, last_success, deletes
+
+    def _flush(self, conn: sqlite3.Connection) -> bool:
+        """把当前脏行在一个事务里写入（调用方持锁）；失败时脏标记放回，下次 save() 重试"""
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return True
         try:
-            atomic_write_json(self._state_file, self.to_dict())
+            subscriptions, seen, last_success, deletes = self._dirty_rows(dirty)
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO subscriptions (uid, name, groups, categories) VALUES (?, ?, ?, ?)",
+                    subscriptions,
+                )
+                conn.executemany("INSERT OR REPLACE INTO seen (uid, cursor, ids) VALUES (?, ?, ?)", seen)
+                conn.executemany("INSERT OR REPLACE INTO last_success (uid, ts) VALUES (?, ?)", last_success)
+                for section, uid in deletes:
+                    conn.execute(f"DELETE FROM {section} WHERE uid = ?", (uid,))
             return True
-        except (OSError, TypeError, ValueError, RuntimeError) as e:
-            logger.error(f"写入状态文件失败，本次修改仅存在内存中: {e}")
+        except (sqlite3.Error, TypeError, ValueError, RuntimeError) as e:
+            self._dirty |= dirty
+            logger.error(f"写入状态库失败，本次修改暂存内存、下次保存时重试: {e}")
             return False
 
+    def save(self) -> bool:
+        """同步落盘：只写自上次保存以来改动过的 UID 行，一次保存一个事务。失败只记日志并返回 False"""
+        if not self._dirty:
+            return True
+        try:
+            with self._lock:
+                return self._flush(self._connect())
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"打开状态库失败，本次修改仅存在内存中: {e}")
+            return False
+
+    def compact(self) -> None:
+        """整理状态库：WAL 检查点截断 + VACUUM（由每日裁剪在线程池里调用）"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            logger.warning(f"整理状态库失败（不影响运行）: {e}")
+
     # -------------------- 订阅管理 --------------------
 
     def add_subscription(
@@ -217,6 +375,7 @@ class Store:
                 "groups": [group_id],
                 "categories": _normalize_categories(categories),
             }
+            self._mark(_SUBSCRIPTIONS, uid)
             self.save()
             logger.info(f"新增订阅 uid={uid} name={name!r} group={group_id}")
             return True
@@ -228,6 +387,7 @@ class Store:
             item["name"] = name
         if categories is not None:
             item["categories"] = _normalize_categories(categories)
+        self._mark(_SUBSCRIPTIONS, uid)
         self.save()
         logger.info(f"更新订阅 uid={uid} group={group_id} 新增={added}")
         return added
@@ -241,10 +401,13 @@ class Store:
             return False
 
         item["groups"] = [g for g in item["groups"] if g != group_id]
+        self._mark(_SUBSCRIPTIONS, uid)
         if not item["groups"]:
             self._subscriptions.pop(uid, None)
             self._seen.pop(uid, None)
             self._last_success.pop(uid, None)
+            self._mark(_SEEN, uid)
+            self._mark(_LAST_SUCCESS, uid)
             logger.info(f"退订 uid={uid} group={group_id}，已无订阅群，清除去重状态")
         else:
             logger.info(f"退订 uid={uid} group={group_id}，剩余群 {item['groups']}")
@@ -305,6 +468,7 @@ class Store:
         # 显式取全量 max，避免置顶动态把游标压低
         final_cursor = max([dyn_id_to_int(cursor) or 0, *numeric, 0])
         self._seen[uid] = {"cursor": final_cursor, "ids": str_ids}
+        self._mark(_SEEN, uid)
         self.save()
         logger.info(f"建立基线 uid={uid} cursor={final_cursor} ids={len(str_ids)} 条")
 
@@ -344,12 +508,14 @@ class Store:
         else:
             entry["cursor"] = max(dyn_id_to_int(entry.get("cursor")) or 0, value)
 
+        self._mark(_SEEN, uid)
         if save:
             self.save()
 
     def touch_last_success(self, uid: str, *, save: bool = True) -> None:
         """记录一次成功取数的时间（仅 code==0 且拿到 items 时调用）"""
         self._last_success[str(uid)] = datetime.now().isoformat(timespec="seconds")
+        self._mark(_LAST_SUCCESS, str(uid))
         if save:
             self.save()
 
@@ -382,6 +548,8 @@ class Store:
                 if stale:
                     self._seen.pop(uid, None)
                     self._last_success.pop(uid, None)
+                    self._mark(_SEEN, uid)
+                    self._mark(_LAST_SUCCESS, uid)
                     dropped_uids.append(uid)
                     continue
 
@@ -389,11 +557,13 @@ class Store:
             if len(ids) > limit:
                 trimmed_ids += len(ids) - limit
                 del ids[: len(ids) - limit]
+                self._mark(_SEEN, uid)
 
         # 清理没有对应订阅与去重状态的孤立时间戳
         for uid in list(self._last_success.keys()):
             if uid not in self._subscriptions and uid not in self._seen:
                 self._last_success.pop(uid, None)
+                self._mark(_LAST_SUCCESS, uid)
 
         removed = trimmed_ids + len(dropped_uids)
         if removed:
@@ -2,6 +2,8 @@ from nonebot import require, get_driver
 from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import Bot
 import json
+import time
+from functools import partial
 from pathlib import Path
 
 # 导入定时任务依赖
@@ -10,6 +12,7 @@ from nonebot_plugin_apscheduler import scheduler
 
 # 导入管理模块
 from ..plugin_manager.enable import is_plugin_enabled
+from ..utils.dispatcher import SendTarget, message_dispatcher
 
 # 获取所有机器人实例
 bots = get_driver().bots
@@ -93,13 +96,28 @@ async def send_message_to_enabled_groups(message: str):
         logger.info("没有启用了定时消息插件的群组")
         return
 
+    # 交给全局发送调度器：各群并发投递、自动限速重试，这里提交完即返回
+    # 幂等键精确到分钟，定时任务误触发两次也只会发一次
+    minute_key = time.strftime("%Y%m%d%H%M")
     for group_id in enabled_groups:
         bot = group_bot_map[group_id]
-        try:
-            await bot.send_group_msg(group_id=int(group_id), message=message)
-            logger.info(f"成功发送消息到群 {group_id}: {message}")
-        except Exception as e:
-            logger.error(f"发送消息到群 {group_id} 失败: {e}")
+        future = message_dispatcher.submit(
+            bot,
+            SendTarget(group_id=int(group_id)),
+            message,
+            key=f"daily_message:{minute_key}:{group_id}:{message}",
+            desc="定时消息",
+        )
+        future.add_done_callback(partial(_log_send_result, message))
+    logger.info(f"已提交定时消息到 {len(enabled_groups)} 个群: {message}")
+
+
+def _log_send_result(message: str, future):
+    result = future.result()
+    if result.ok:
+        logger.info(f"成功发送消息到{result.target}: {message}")
+    else:
+        logger.error(f"发送消息到{result.target}失败: {result.error}")
 
 
 def setup_scheduled_jobs():
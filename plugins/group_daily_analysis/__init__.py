@@ -19,12 +19,14 @@ from nonebot_plugin_apscheduler import scheduler
 
 from plugins.plugin_manager.enable import is_plugin_enabled, is_feature_enabled
 from plugins.plugin_manager import plugin_status
+from plugins.utils.dispatcher import SendTarget, message_dispatcher
 
 from .src.config import plugin_config, save_config
 from .src.analysis.main import MessageAnalyzer
 from .src.render.renderer import ReportRenderer
 from .src.data_source import MessageFetcher
 from .src.database import db
+from .src.ingest import ingestor
 
 # --- 过滤本插件发出的“日报总结”消息（通过 message_id 精确过滤，避免递归污染） ---
 # group_id -> {message_id -> timestamp}
@@ -104,15 +106,15 @@ async def record_message(bot: Bot, event: GroupMessageEvent):
             logger.debug(f"消息序列化失败: {e}")
             raw_message = ""
 
-        await asyncio.to_thread(
-            db.add_message,
+        await ingestor.submit(
             group_id=str(event.group_id),
             user_id=str(event.user_id),
             sender_name=nickname,
             content=event.get_plaintext(),
             timestamp=int(event.time),
             msg_type="group",
-            raw_message=raw_message
+            raw_message=raw_message,
+            segments=msg_list if raw_message else None,
         )
     except Exception as e:
         # 记录失败不应影响主流程，仅打日志
@@ -175,8 +177,7 @@ async def record_message_sent(bot: Bot, event: OneBotEvent):
         except Exception:
             content = ""
 
-        await asyncio.to_thread(
-            db.add_message,
+        await ingestor.submit(
             group_id=str(group_id),
             user_id=str(user_id),
             sender_name=sender_name,
@@ -184,11 +185,26 @@ async def record_message_sent(bot: Bot, event: OneBotEvent):
             timestamp=int(getattr(event, "time")),
             msg_type="group_sent",
             raw_message=raw_message,
+            segments=msg_list if raw_message else None,
         )
     except Exception as e:
         logger.debug(f"记录 message_sent 失败: {e}")
         return
 
+
+@get_driver().on_startup
+async def _start_message_ingestor():
+    # 首次升级时从已保留的消息重建小时聚合统计，完成后再开始写入新消息
+    await asyncio.to_thread(db.ensure_aggregates)
+    ingestor.start()
+
+
+@get_driver().on_shutdown
+async def _drain_message_ingestor():
+    """关闭前写完队列中尚未落盘的消息"""
+    await ingestor.drain()
+
+
 # --- 分析命令 ---
 analysis_cmd = on_command("daily_analysis", aliases={"今日总结", "群日报"}, permission=SUPERUSER, priority=5, block=True)
 debug_analysis_cmd = on_command("debug_daily_analysis", aliases={"日报调试"}, permission=SUPERUSER, priority=5, block=True)
@@ -450,19 +466,24 @@ async def auto_run_daily_analysis():
             group_id = int(group_id_str)
             image_bytes = await run_analysis(bot, group_id, retries=3) # 自动任务重试3次
             if image_bytes:
-                resp = await bot.send_group_msg(
-                    group_id=group_id, message=MessageSegment.image(image_bytes)
+                # 发送交给全局调度器（限速/重试），不阻塞下一个群的分析
+                future = message_dispatcher.submit(
+                    bot,
+                    SendTarget(group_id=group_id),
+                    MessageSegment.image(image_bytes),
+                    key=f"group_daily_analysis:{time.strftime('%Y%m%d')}:{group_id}",
+                    desc="每日总结",
                 )
-                if isinstance(resp, dict):
-                    _mark_report_message_id(group_id, resp.get("message_id"))
-            
-            # 避免并发过高
-            import asyncio
-            await asyncio.sleep(10) 
-            
+                future.add_done_callback(_on_report_sent)
         except Exception as e:
             logger.error(f"群 {group_id_str} 自动总结失败: {e}")
 
+
+def _on_report_sent(future):
+    result = future.result()
+    if result.ok:
+        _mark_report_message_id(result.target.group_id, result.message_id)
+
 def cleanup_old_messages_job():
     """独立的消息清理任务（与自动总结解耦）"""
     try:
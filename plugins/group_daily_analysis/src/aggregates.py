@@ -0,0 +1,182 @@
+"""
+按小时预聚合的群消息统计。
+
+消息写入时（见 ingest.py）就按 (群, 小时) 累加消息数、字数、表情数，以及每个用户的消息数和最新昵称，
+统计与活跃度图表直接读取聚合结果，复杂度为 O(小时数 + 用户数)，不再每次重新解析全部消息链。
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+HOUR_SECONDS = 3600
+
+# 表情计数字段（与 EmojiStatistics 对应）
+EMOJI_FIELDS = ("face_count", "mface_count", "bface_count", "sface_count", "other_emoji_count")
+
+
+def hour_of(timestamp: int) -> int:
+    """时间戳所在小时的起始时间戳"""
+    return int(timestamp) // HOUR_SECONDS * HOUR_SECONDS
+
+
+@dataclass
+class MessageStats:
+    """单条消息的字数与表情统计"""
+    characters: int = 0
+    face_count: int = 0
+    mface_count: int = 0
+    bface_count: int = 0
+    sface_count: int = 0
+    other_emoji_count: int = 0
+    emoji_details: Dict[str, int] = field(default_factory=dict)
+
+
+def compute_message_stats(segments: List[Dict[str, Any]]) -> MessageStats:
+    """统计消息链中的文本字数和各类表情数量"""
+    stats = MessageStats()
+    details = stats.emoji_details
+    for seg in segments or []:
+        seg_type = seg.get("type")
+        data = seg.get("data") or {}
+        if seg_type == "text":
+            stats.characters += len(data.get("text", ""))
+        elif seg_type == "face":
+            # QQ基础表情
+            stats.face_count += 1
+            key = f"face_{data.get('id', 'unknown')}"
+            details[key] = details.get(key, 0) + 1
+        elif seg_type == "mface":
+            # 动画表情/魔法表情
+            stats.mface_count += 1
+            key = f"mface_{data.get('emoji_id', 'unknown')}"
+            details[key] = details.get(key, 0) + 1
+        elif seg_type == "bface":
+            # 超级表情
+            stats.bface_count += 1
+            key = f"bface_{data.get('p', 'unknown')}"
+            details[key] = details.get(key, 0) + 1
+        elif seg_type == "sface":
+            # 小表情
+            stats.sface_count += 1
+            key = f"sface_{data.get('id', 'unknown')}"
+            details[key] = details.get(key, 0) + 1
+        elif seg_type == "image":
+            # 检查是否是动画表情（通过summary字段判断）
+            summary = data.get("summary", "")
+            if "动画表情" in summary or "表情" in summary:
+                stats.mface_count += 1
+                key = f"animated_{data.get('file', 'unknown')}"
+                details[key] = details.get(key, 0) + 1
+        elif seg_type in ["record", "video"] and "emoji" in str(data).lower():
+            # 其他可能的表情类型
+            stats.other_emoji_count += 1
+    return stats
+
+
+class HourlyAggregates:
+    """
+    (群, 小时) 维度的累加器。写入时按批累加后落库；查询时也用它合并数据库结果与边界小时的原始消息
+    """
+
+    def __init__(self):
+        # (group_id, hour_ts) -> [消息数, 字数, face, mface, bface, sface, other]
+        self.hours: Dict[Tuple[str, int], List[int]] = defaultdict(lambda: [0] * (2 + len(EMOJI_FIELDS)))
+        # (group_id, hour_ts, user_id) -> 消息数
+        self.users: Dict[Tuple[str, int, str], int] = defaultdict(int)
+        # (group_id, hour_ts, emoji_key) -> 次数
+        self.emojis: Dict[Tuple[str, int, str], int] = defaultdict(int)
+        # (group_id, user_id) -> (昵称, 时间戳)，只保留最新的
+        self.names: Dict[Tuple[str, str], Tuple[str, int]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.hours)
+
+    def add(self, group_id: str, user_id: str, sender_name: str, timestamp: int, stats: MessageStats):
+        hour_ts = hour_of(timestamp)
+        row = self.hours[(group_id, hour_ts)]
+        row[0] += 1
+        row[1] += stats.characters
+        for i, name in enumerate(EMOJI_FIELDS):
+            row[2 + i] += getattr(stats, name)
+        self.users[(group_id, hour_ts, user_id)] += 1
+        for key, count in stats.emoji_details.items():
+            self.emojis[(group_id, hour_ts, key)] += count
+        if sender_name:
+            old = self.names.get((group_id, user_id))
+            if old is None or timestamp >= old[1]:
+                self.names[(group_id, user_id)] = (sender_name, int(timestamp))
+
+
+@dataclass
+class WindowStatistics:
+    """一个时间窗口内（单个群）的汇总统计"""
+    message_count: int = 0
+    total_characters: int = 0
+    emoji_counts: Dict[str, int] = field(default_factory=lambda: {name: 0 for name in EMOJI_FIELDS})
+    emoji_details: Dict[str, int] = field(default_factory=dict)
+    hourly_counts: Dict[int, int] = field(default_factory=dict)  # hour_ts -> 消息数
+    user_counts: Dict[str, int] = field(default_factory=dict)  # user_id -> 消息数
+    user_names: Dict[str, Tuple[str, int]] = field(default_factory=dict)  # user_id -> (昵称, 时间戳)
+
+    def add_hour(self, hour_ts: int, message_count: int, characters: int, emoji_counts: Dict[str, int]):
+        self.message_count += message_count
+        self.total_characters += characters
+        self.hourly_counts[hour_ts] = self.hourly_counts.get(hour_ts, 0) + message_count
+        for name, count in emoji_counts.items():
+            self.emoji_counts[name] += count
+
+    def add_user(self, user_id: str, count: int):
+        self.user_counts[user_id] = self.user_counts.get(user_id, 0) + count
+
+    def add_emoji(self, key: str, count: int):
+        self.emoji_details[key] = self.emoji_details.get(key, 0) + count
+
+    def set_name(self, user_id: str, name: str, timestamp: int):
+        old = self.user_names.get(user_id)
+        if name and (old is None or timestamp >= old[1]):
+            self.user_names[user_id] = (name, timestamp)
+
+    def add_message(self, msg: Dict[str, Any]):
+        """累加一条 MessageFetcher 格式的原始消息（用于窗口两端不完整的小时）"""
+        ts = int(msg.get("time", 0) or 0)
+        if not ts:
+            return
+        sender = msg.get("sender", {})
+        user_id = str(sender.get("user_id") or sender.get("nickname", "unknown"))
+        stats = compute_message_stats(msg.get("message", []))
+        self.add_hour(hour_of(ts), 1, stats.characters, {name: getattr(stats, name) for name in EMOJI_FIELDS})
+        self.add_user(user_id, 1)
+        for key, count in stats.emoji_details.items():
+            self.add_emoji(key, count)
+        self.set_name(user_id, sender.get("card") or sender.get("nickname") or "", ts)
+
+    def hourly_activity(self) -> Dict[int, int]:
+        """按本地时间的小时（0-23）汇总"""
+        result = {h: 0 for h in range(24)}
+        for hour_ts, count in self.hourly_counts.items():
+            result[datetime.fromtimestamp(hour_ts).hour] += count
+        return result
+
+    def daily_activity(self) -> Dict[str, int]:
+        result: Dict[str, int] = defaultdict(int)
+        for hour_ts, count in self.hourly_counts.items():
+            result[datetime.fromtimestamp(hour_ts).strftime("%Y-%m-%d")] += count
+        return dict(result)
+
+
+def split_window(messages: List[Dict[str, Any]]) -> Optional[Tuple[int, int, List[Dict[str, Any]]]]:
+    """
+    将消息时间范围拆成「中间的完整小时」和「两端的不完整小时」
+
+    返回: (完整小时起点, 完整小时终点(不含), 两端小时内的原始消息)；没有消息时返回 None
+    """
+    times = [int(m.get("time", 0) or 0) for m in messages if m.get("time")]
+    if not times:
+        return None
+    first_hour = hour_of(min(times))
+    last_hour = hour_of(max(times))
+    full_start = first_hour + HOUR_SECONDS
+    full_end = last_hour
+    edge = [m for m in messages if m.get("time") and not (full_start <= hour_of(m["time"]) < full_end)]
+    return full_start, full_end, edge
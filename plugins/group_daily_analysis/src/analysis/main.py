@@ -14,6 +14,8 @@ from ..models import (
     UserTitle, GoldenQuote, TokenUsage, EmojiStatistics
 )
 from ..visualization.charts import ActivityVisualizer
+from ..aggregates import WindowStatistics, split_window
+from ..database import db
 from ..utils.llm import call_chat_completion, _is_retryable_error
 from .context import TranscriptContext, build_transcript_context
 from .fallbacks import (
@@ -97,7 +99,7 @@ class MessageAnalyzer:
         if debug_mode and not messages:
             stats = self._generate_mock_statistics()
         else:
-            stats = self._calculate_statistics(messages)
+            stats = self._calculate_statistics(messages, group_id)
             
         # Debug 模式下如果统计数据为空（计算失败），强制使用 Mock
         if debug_mode and stats.message_count == 0:
@@ -659,12 +661,12 @@ class MessageAnalyzer:
         )
 
         # 不再 catch 异常 - 由上层 _run_subtask_with_retry 负责重试
-        content, tokens = await call_chat_completion(
-            [{"role": "user", "content": prompt}],
-            temperature=0.7,
-            response_format={"type": "json_object"},
-            max_tokens=plugin_config.llm.max_tokens,
-        )
+        content, tokens = await call_chat_completion(
+            [{"role": "user", "content": prompt}],
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            max_tokens=plugin_config.llm.max_tokens,
+        )
         data = parse_payload_items(content, UserTitlesPayload, module_name="用户称号")
 
         features_by_name = {}
@@ -905,53 +907,12 @@ class MessageAnalyzer:
 
     # --- Helpers ---
 
-    def _calculate_statistics(self, messages: list) -> GroupStatistics:
-        total_chars = 0
-        participants = set()
-        emoji_stats = EmojiStatistics()
-        
-        for msg in messages:
-            sender = msg.get("sender", {})
-            uid = sender.get("user_id") or sender.get("nickname", "unknown")
-            participants.add(uid)
-            
-            for seg in msg.get("message", []):
-                if seg["type"] == "text":
-                    total_chars += len(seg["data"].get("text", ""))
-                elif seg["type"] == "face":
-                    # QQ基础表情
-                    emoji_stats.face_count += 1
-                    face_id = seg["data"].get("id", "unknown")
-                    emoji_stats.face_details[f"face_{face_id}"] = emoji_stats.face_details.get(f"face_{face_id}", 0) + 1
-                elif seg["type"] == "mface":
-                    # 动画表情/魔法表情
-                    emoji_stats.mface_count += 1
-                    emoji_id = seg["data"].get("emoji_id", "unknown")
-                    emoji_stats.face_details[f"mface_{emoji_id}"] = emoji_stats.face_details.get(f"mface_{emoji_id}", 0) + 1
-                elif seg["type"] == "bface":
-                    # 超级表情
-                    emoji_stats.bface_count += 1
-                    emoji_id = seg["data"].get("p", "unknown")
-                    emoji_stats.face_details[f"bface_{emoji_id}"] = emoji_stats.face_details.get(f"bface_{emoji_id}", 0) + 1
-                elif seg["type"] == "sface":
-                    # 小表情
-                    emoji_stats.sface_count += 1
-                    emoji_id = seg["data"].get("id", "unknown")
-                    emoji_stats.face_details[f"sface_{emoji_id}"] = emoji_stats.face_details.get(f"sface_{emoji_id}", 0) + 1
-                elif seg["type"] == "image":
-                    # 检查是否是动画表情（通过summary字段判断）
-                    data = seg.get("data", {})
-                    summary = data.get("summary", "")
-                    if "动画表情" in summary or "表情" in summary:
-                        emoji_stats.mface_count += 1
-                        file_name = data.get("file", "unknown")
-                        emoji_stats.face_details[f"animated_{file_name}"] = emoji_stats.face_details.get(f"animated_{file_name}", 0) + 1
-                elif seg["type"] in ["record", "video"] and "emoji" in str(seg.get("data", {})).lower():
-                    # 其他可能的表情类型
-                    emoji_stats.other_emoji_count += 1
+    def _calculate_statistics(self, messages: list, group_id: str | None = None) -> GroupStatistics:
+        window = self._collect_window_statistics(messages, group_id)
+        emoji_stats = EmojiStatistics(**window.emoji_counts, face_details=dict(window.emoji_details))
         
         # Most active period & Visualization
-        viz = self.activity_visualizer.generate_activity_visualization(messages)
+        viz = self.activity_visualizer.generate_from_window(window)
         
         # Find peak hour
         hourly = viz.hourly_activity
@@ -960,14 +921,32 @@ class MessageAnalyzer:
 
         return GroupStatistics(
             message_count=len(messages),
-            total_characters=total_chars,
-            participant_count=len(participants),
+            total_characters=window.total_characters,
+            participant_count=len(window.user_counts),
             most_active_period=period,
             emoji_count=emoji_stats.total_emoji_count,
             emoji_statistics=emoji_stats,
             activity_visualization=viz
         )
 
+    def _collect_window_statistics(self, messages: list, group_id: str | None) -> WindowStatistics:
+        """
+        中间的完整小时直接读取写入时累加好的小时聚合，只有两端不完整的小时逐条统计；
+        没有 group_id 时退化为逐条统计全部消息
+        """
+        split = split_window(messages) if group_id else None
+        if split is None:
+            window = WindowStatistics()
+            for msg in messages:
+                window.add_message(msg)
+            return window
+
+        full_start, full_end, edge_messages = split
+        window = db.get_window_statistics(group_id, full_start, full_end)
+        for msg in edge_messages:
+            window.add_message(msg)
+        return window
+
     def _get_mock_data(self):
         """生成 Mock 数据用于调试渲染"""
         return {
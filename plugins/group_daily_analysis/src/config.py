@@ -36,6 +36,7 @@ class PluginConfig(StrictBaseModel):
     enable_auto_analysis: bool = False
     bot_qq_ids: List[str] = []
     enable_user_card: bool = False
+    compress_raw_message: bool = False  # 较长的消息链用 zlib 压缩后保存（纯文本消息始终不重复保存消息链）
     report_template: str = "scrapbook"
     min_messages_threshold: int = 50
     watermark_text: str = "Generated by HakuBot · Refactored by Hakuchumu"
@@ -1,15 +1,72 @@
+import json
 import sqlite3
 import threading
 import time
+import zlib
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
 from nonebot.log import logger
 
+from .aggregates import (
+    EMOJI_FIELDS,
+    HOUR_SECONDS,
+    HourlyAggregates,
+    WindowStatistics,
+    compute_message_stats,
+)
+
 # 数据目录
 DATA_DIR = Path("data/group_daily_analysis")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DATA_DIR / "messages.db"
 
+# 压缩存储的 raw_message 以 BLOB 保存（TEXT 列可以直接存 BLOB），读取时按类型区分
+RAW_COMPRESS_MIN_LENGTH = 256  # 短消息压缩收益不大，保持原样
+
+
+def encode_raw_message(raw_message: str, content: str, compress: bool = False) -> Union[str, bytes]:
+    """
+    压缩 raw_message 的存储：
+    - 纯文本消息（只有一个 text 段且与 content 相同）不重复保存，读取时由 content 还原
+    - compress=True 时较长的消息链用 zlib 压缩
+    """
+    if not raw_message:
+        return ""
+    if raw_message.startswith('[{"type": "text"') and raw_message == json.dumps(
+        [{"type": "text", "data": {"text": content}}], ensure_ascii=False
+    ):
+        return ""
+    if compress and len(raw_message) >= RAW_COMPRESS_MIN_LENGTH:
+        return zlib.compress(raw_message.encode("utf-8"), 6)
+    return raw_message
+
+
+def decode_raw_message(value: Union[str, bytes, None]) -> str:
+    if isinstance(value, bytes):
+        try:
+            return zlib.decompress(value).decode("utf-8")
+        except (zlib.error, UnicodeDecodeError):
+            return ""
+    return value or ""
+
+
+def parse_raw_message(raw_message: Union[str, bytes, None], content: str) -> list:
+    """还原消息链（raw_message 为空或损坏时按纯文本处理）"""
+    raw_message = decode_raw_message(raw_message)
+    if raw_message:
+        try:
+            return json.loads(raw_message)
+        except json.JSONDecodeError:
+            pass
+    return [{"type": "text", "data": {"text": content}}]
+
+
+# 聚合表版本，结构或统计口径变更时递增，启动时会从 messages 表重建
+AGGREGATES_VERSION = "1"
+
+# add_messages 的行格式：(group_id, user_id, sender_name, content, timestamp, message_type, raw_message)
+MessageRow = Tuple[str, str, str, str, int, str, Union[str, bytes]]
+
 class DatabaseManager:
     def __init__(self):
         # 线程本地存储，每个线程复用一个连接
@@ -51,22 +108,168 @@ class DatabaseManager:
                 """)
                 # 创建索引加速查询
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_group_time ON messages (group_id, timestamp)")
+                # 按小时预聚合的统计（写入消息时同步累加）
+                emoji_columns = "".join(f"{name} INTEGER NOT NULL DEFAULT 0,\n" for name in EMOJI_FIELDS)
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS hourly_stats (
+                        group_id TEXT NOT NULL,
+                        hour_ts INTEGER NOT NULL,
+                        message_count INTEGER NOT NULL DEFAULT 0,
+                        total_characters INTEGER NOT NULL DEFAULT 0,
+                        {emoji_columns}
+                        PRIMARY KEY (group_id, hour_ts)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS hourly_user_stats (
+                        group_id TEXT NOT NULL,
+                        hour_ts INTEGER NOT NULL,
+                        user_id TEXT NOT NULL,
+                        message_count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (group_id, hour_ts, user_id)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS hourly_emoji_stats (
+                        group_id TEXT NOT NULL,
+                        hour_ts INTEGER NOT NULL,
+                        emoji_key TEXT NOT NULL,
+                        count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (group_id, hour_ts, emoji_key)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS user_names (
+                        group_id TEXT NOT NULL,
+                        user_id TEXT NOT NULL,
+                        display_name TEXT NOT NULL,
+                        last_ts INTEGER NOT NULL,
+                        PRIMARY KEY (group_id, user_id)
+                    )
+                """)
+                cursor.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
                 conn.commit()
         except Exception as e:
             logger.error(f"初始化数据库失败: {e}")
 
     def add_message(self, group_id: str, user_id: str, sender_name: str, content: str, timestamp: int, msg_type: str = "text", raw_message: str = ""):
         """添加消息"""
+        aggregates = HourlyAggregates()
+        aggregates.add(str(group_id), str(user_id), sender_name, int(timestamp),
+                       compute_message_stats(parse_raw_message(raw_message, content)))
+        self.add_messages(
+            [(str(group_id), str(user_id), sender_name, content, timestamp, msg_type, raw_message)],
+            aggregates,
+        )
+
+    def add_messages(self, rows: Sequence[MessageRow], aggregates: Optional[HourlyAggregates] = None) -> bool:
+        """批量添加消息（与对应的小时聚合在同一事务中提交），返回是否写入成功"""
+        if not rows:
+            return True
         try:
             with self._get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
+                conn.executemany("""
                     INSERT INTO messages (group_id, user_id, sender_name, content, timestamp, message_type, raw_message)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (str(group_id), str(user_id), sender_name, content, timestamp, msg_type, raw_message))
+                """, rows)
+                if aggregates:
+                    self._apply_aggregates(conn, aggregates)
                 conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"批量写入 {len(rows)} 条消息失败: {e}")
+            return False
+
+    @staticmethod
+    def _apply_aggregates(conn: sqlite3.Connection, aggregates: HourlyAggregates):
+        """把一批累加结果合并进聚合表（调用方负责提交）"""
+        columns = ("message_count", "total_characters") + EMOJI_FIELDS
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+        conn.executemany(f"""
+            INSERT INTO hourly_stats (group_id, hour_ts, {", ".join(columns)})
+            VALUES (?, ?, {", ".join("?" * len(columns))})
+            ON CONFLICT(group_id, hour_ts) DO UPDATE SET {updates}
+        """, [(g, h, *values) for (g, h), values in aggregates.hours.items()])
+        conn.executemany("""
+            INSERT INTO hourly_user_stats (group_id, hour_ts, user_id, message_count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(group_id, hour_ts, user_id) DO UPDATE SET message_count = message_count + excluded.message_count
+        """, [(g, h, u, c) for (g, h, u), c in aggregates.users.items()])
+        conn.executemany("""
+            INSERT INTO hourly_emoji_stats (group_id, hour_ts, emoji_key, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(group_id, hour_ts, emoji_key) DO UPDATE SET count = count + excluded.count
+        """, [(g, h, k, c) for (g, h, k), c in aggregates.emojis.items()])
+        conn.executemany("""
+            INSERT INTO user_names (group_id, user_id, display_name, last_ts) VALUES (?, ?, ?, ?)
+            ON CONFLICT(group_id, user_id) DO UPDATE SET
+                display_name = excluded.display_name, last_ts = excluded.last_ts
+            WHERE excluded.last_ts >= user_names.last_ts
+        """, [(g, u, name, ts) for (g, u), (name, ts) in aggregates.names.items()])
+
+    def ensure_aggregates(self):
+        """聚合表版本不匹配（首次升级或口径变更）时，从已保留的消息重建"""
+        try:
+            conn = self._get_conn()
+            row = conn.execute("SELECT value FROM meta WHERE key = 'aggregates_version'").fetchone()
+            if row and row[0] == AGGREGATES_VERSION:
+                return
+            start = time.time()
+            with conn:
+                for table in ("hourly_stats", "hourly_user_stats", "hourly_emoji_stats", "user_names"):
+                    conn.execute(f"DELETE FROM {table}")
+                cursor = conn.execute("""
+                    SELECT group_id, user_id, sender_name, content, timestamp, raw_message FROM messages
+                """)
+                total = 0
+                while True:
+                    rows = cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    aggregates = HourlyAggregates()
+                    for group_id, user_id, sender_name, content, timestamp, raw_message in rows:
+                        aggregates.add(group_id, user_id, sender_name, timestamp,
+                                       compute_message_stats(parse_raw_message(raw_message, content or "")))
+                    self._apply_aggregates(conn, aggregates)
+                    total += len(rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('aggregates_version', ?)", (AGGREGATES_VERSION,)
+                )
+            logger.info(f"已从 {total} 条消息重建小时聚合统计，耗时 {time.time() - start:.2f}s")
+        except Exception as e:
+            logger.error(f"重建小时聚合统计失败: {e}")
+
+    def get_window_statistics(self, group_id: str, start_hour: int, end_hour: int) -> WindowStatistics:
+        """读取 [start_hour, end_hour) 内完整小时的聚合统计"""
+        stats = WindowStatistics()
+        if end_hour <= start_hour:
+            return stats
+        group_id = str(group_id)
+        try:
+            conn = self._get_conn()
+            columns = ("message_count", "total_characters") + EMOJI_FIELDS
+            for row in conn.execute(f"""
+                SELECT hour_ts, {", ".join(columns)} FROM hourly_stats
+                WHERE group_id = ? AND hour_ts >= ? AND hour_ts < ?
+            """, (group_id, start_hour, end_hour)):
+                row = tuple(row)
+                stats.add_hour(row[0], row[1], row[2], dict(zip(EMOJI_FIELDS, row[3:])))
+            for user_id, count in conn.execute("""
+                SELECT user_id, SUM(message_count) FROM hourly_user_stats
+                WHERE group_id = ? AND hour_ts >= ? AND hour_ts < ? GROUP BY user_id
+            """, (group_id, start_hour, end_hour)):
+                stats.add_user(user_id, count)
+            for key, count in conn.execute("""
+                SELECT emoji_key, SUM(count) FROM hourly_emoji_stats
+                WHERE group_id = ? AND hour_ts >= ? AND hour_ts < ? GROUP BY emoji_key
+            """, (group_id, start_hour, end_hour)):
+                stats.add_emoji(key, count)
+            for user_id, name, ts in conn.execute(
+                "SELECT user_id, display_name, last_ts FROM user_names WHERE group_id = ?", (group_id,)
+            ):
+                if user_id in stats.user_counts:
+                    stats.set_name(user_id, name, ts)
         except Exception as e:
-            logger.error(f"写入消息失败: {e}")
+            logger.error(f"读取小时聚合统计失败: {e}")
+        return stats
 
     def get_messages(self, group_id: str, start_ts: int, end_ts: int) -> List[Dict[str, Any]]:
         """获取指定时间段的消息"""
@@ -81,7 +284,12 @@ class DatabaseManager:
                 """, (str(group_id), start_ts, end_ts))
                 
                 rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                result = []
+                for row in rows:
+                    item = dict(row)
+                    item["raw_message"] = decode_raw_message(item.get("raw_message"))
+                    result.append(item)
+                return result
         except Exception as e:
             logger.error(f"查询消息失败: {e}")
             return []
@@ -94,6 +302,11 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM messages WHERE timestamp < ?", (cutoff_ts,))
                 deleted_count = cursor.rowcount
+                # 聚合统计按整小时清理（保留 cutoff 所在的小时）
+                cutoff_hour = cutoff_ts // HOUR_SECONDS * HOUR_SECONDS
+                for table in ("hourly_stats", "hourly_user_stats", "hourly_emoji_stats"):
+                    cursor.execute(f"DELETE FROM {table} WHERE hour_ts < ?", (cutoff_hour,))
+                cursor.execute("DELETE FROM user_names WHERE last_ts < ?", (cutoff_ts,))
                 conn.commit()
                 if deleted_count > 0:
                     logger.info(f"已清理 {deleted_count} 条过期消息 (保留 {retention_days} 天)")
@@ -0,0 +1,160 @@
+"""
+消息写入管线：record_message 只把消息放进队列，由单个后台任务攒批后用 executemany 一次提交，
+避免每条消息一次 INSERT + commit（fsync）以及频繁占用线程池。
+
+- 攒够 INGEST_BATCH_SIZE 条或距第一条超过 INGEST_FLUSH_INTERVAL 秒即写入
+- 队列满时 submit 会等待（背压），不会无限堆积内存
+- 关闭时 drain() 写完队列中剩余的消息
+- 同一批消息的小时聚合统计（见 aggregates.py）在同一事务中累加
+"""
+import asyncio
+import json
+import time
+from typing import List, Optional, Tuple
+
+from nonebot.log import logger
+
+from .config import plugin_config
+from .aggregates import HourlyAggregates, MessageStats, compute_message_stats
+from .database import db, encode_raw_message, MessageRow
+
+# 队列元素：(待写入的行, 该消息的统计)
+QueueItem = Tuple[MessageRow, MessageStats]
+
+INGEST_BATCH_SIZE = 500
+INGEST_FLUSH_INTERVAL = 1.0  # 秒
+INGEST_QUEUE_MAXSIZE = 20000
+
+
+class MessageIngestor:
+    def __init__(
+        self,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        queue_maxsize: int = INGEST_QUEUE_MAXSIZE,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_maxsize = queue_maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        """启动后台写入任务（需在事件循环中调用，重复调用无副作用）"""
+        if self._task is not None and not self._task.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_maxsize)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(
+        self,
+        group_id: str,
+        user_id: str,
+        sender_name: str,
+        content: str,
+        timestamp: int,
+        msg_type: str = "text",
+        raw_message: str = "",
+        segments: Optional[list] = None,
+    ):
+        """
+        提交一条消息（队列满时等待）
+
+        segments: 已解析的消息链，未传入时从 raw_message 解析（用于统计字数/表情）
+        """
+        if segments is None:
+            try:
+                segments = json.loads(raw_message) if raw_message else None
+            except json.JSONDecodeError:
+                segments = None
+            if segments is None:
+                segments = [{"type": "text", "data": {"text": content}}]
+        row: MessageRow = (
+            str(group_id),
+            str(user_id),
+            sender_name,
+            content,
+            int(timestamp),
+            msg_type,
+            encode_raw_message(raw_message, content, plugin_config.compress_raw_message),
+        )
+        item: QueueItem = (row, compute_message_stats(segments))
+        if self._closing:
+            # 已开始关闭，直接写入，避免丢消息
+            await self._write([item])
+            return
+        self.start()
+        await self._queue.put(item)
+
+    async def _collect(self) -> Tuple[List[QueueItem], bool]:
+        """等待第一条消息，然后在时间窗口内尽量多取；返回 (批次, 是否收到停止信号)"""
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _write(self, batch: List[QueueItem]):
+        rows = [row for row, _ in batch]
+        aggregates = HourlyAggregates()
+        for (group_id, user_id, sender_name, _, timestamp, _, _), stats in batch:
+            aggregates.add(group_id, user_id, sender_name, timestamp, stats)
+        try:
+            ok = await asyncio.to_thread(db.add_messages, rows, aggregates)
+        except Exception as e:
+            logger.error(f"写入消息批次失败: {e}")
+            ok = False
+        if ok:
+            self.written += len(batch)
+        else:
+            self.failed += len(batch)
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._collect()
+            if batch:
+                await self._write(batch)
+            if stop:
+                return
+
+    async def drain(self):
+        """停止后台任务并写完队列中剩余的消息"""
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            # 停止信号排在已入队的消息之后，后台任务会先写完它们
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        if self._queue is None:
+            return
+        batch: List[QueueItem] = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        if batch:
+            await self._write(batch)
+            logger.info(f"关闭前写入剩余 {len(batch)} 条消息")
+
+
+ingestor = MessageIngestor()
@@ -45,6 +45,7 @@ class ReportRenderer:
                 html=html_content,
                 template_path=template_uri,
                 viewport={"width": 800, "height": 10},  # 宽度设为800，高度自适应
+                cache_ttl=600,  # 同一份分析结果重复发送 / 重试时复用截图
             )
             return image_bytes
         except Exception as e:
@@ -2,6 +2,7 @@ from typing import Dict, List, Any
 from datetime import datetime
 from collections import defaultdict
 from ..models import ActivityVisualization
+from ..aggregates import WindowStatistics
 
 class ActivityVisualizer:
     def generate_activity_visualization(self, messages: list) -> ActivityVisualization:
@@ -9,6 +10,7 @@ class ActivityVisualizer:
         hourly_activity = {h: 0 for h in range(24)}
         daily_activity = defaultdict(int)
         user_message_count = defaultdict(int)
+        user_names: Dict[str, str] = {}
         
         for msg in messages:
             # NoneBot/OneBot message 'time' is timestamp
@@ -30,7 +32,26 @@ class ActivityVisualizer:
             user_id = str(sender.get("user_id", ""))
             if user_id:
                 user_message_count[user_id] += 1
+                # 记录用户第一次出现时的昵称
+                if user_id not in user_names:
+                    user_names[user_id] = sender.get("card") or sender.get("nickname") or "未知用户"
         
+        return self._build_visualization(hourly_activity, dict(daily_activity), user_message_count, user_names)
+
+    def generate_from_window(self, window: WindowStatistics) -> ActivityVisualization:
+        """从小时预聚合统计生成活跃度数据（O(小时数 + 用户数)）"""
+        user_names = {user_id: name for user_id, (name, _) in window.user_names.items()}
+        return self._build_visualization(
+            window.hourly_activity(), window.daily_activity(), window.user_counts, user_names
+        )
+
+    def _build_visualization(
+        self,
+        hourly_activity: Dict[int, int],
+        daily_activity: Dict[str, int],
+        user_message_count: Dict[str, int],
+        user_names: Dict[str, str],
+    ) -> ActivityVisualization:
         # 计算高峰时段（消息数量 > 平均值的小时）
         avg_hourly = sum(hourly_activity.values()) / 24 if hourly_activity else 0
         peak_hours = [hour for hour, count in hourly_activity.items() if count > avg_hourly and count > 0]
@@ -39,23 +60,15 @@ class ActivityVisualizer:
         # 生成用户活跃度排行
         user_activity_ranking = []
         for user_id, count in sorted(user_message_count.items(), key=lambda x: x[1], reverse=True):
-            # 从消息中获取用户昵称
-            user_name = "未知用户"
-            for msg in messages:
-                sender = msg.get("sender", {})
-                if str(sender.get("user_id", "")) == user_id:
-                    user_name = sender.get("card") or sender.get("nickname") or "未知用户"
-                    break
-            
             user_activity_ranking.append({
                 "user_id": user_id,
-                "user_name": user_name,
+                "user_name": user_names.get(user_id) or "未知用户",
                 "message_count": count
             })
                 
         return ActivityVisualization(
             hourly_activity=hourly_activity,
-            daily_activity=dict(daily_activity),
+            daily_activity=daily_activity,
             user_activity_ranking=user_activity_ranking,
             peak_hours=peak_hours
         )
@@ -89,5 +89,5 @@ async def handle_stat_command(event: GroupMessageEvent):
     if total == 0:
         await stat_command.finish("今日暂无消息统计")
 
-    img_bytes = await render_today_stat_image(total, top_users)
+    img_bytes = await render_today_stat_image(total, top_users, group_id=group_id)
     await stat_command.finish(MessageSegment.image(img_bytes))
@@ -13,13 +13,21 @@ def _fmt_date(d: date) -> str:
     return d.strftime("%Y.%m.%d")
 
 
+def _cache_key(kind: str, group_id: Optional[int]) -> Optional[str]:
+    return f"group_statistics:{kind}:{group_id}" if group_id is not None else None
+
+
 async def render_today_stat_image(
-    total: int, top_users: List[Tuple[str, int]], stat_date: Optional[date] = None
+    total: int,
+    top_users: List[Tuple[str, int]],
+    stat_date: Optional[date] = None,
+    group_id: Optional[int] = None,
 ) -> bytes:
     """渲染“今日统计”图片（不含每日额外文案）
 
     Args:
         stat_date: 统计日期（默认取今天）
+        group_id: 群号，用作渲染缓存键（同一群重复查询且数据未变时直接复用结果）
     """
     if stat_date is None:
         stat_date = datetime.now(TZ_CN).date()
@@ -35,11 +43,12 @@ async def render_today_stat_image(
         watermark=f"Generated by HakuBot · {date_str}",
         width=720,
         colors=DARK_COLORS,
+        cache_key=_cache_key("today", group_id),
     )
 
 
 async def render_daily_stat_image(
-    total: int, top_users: List[Tuple[str, int]], stat_date: date
+    total: int, top_users: List[Tuple[str, int]], stat_date: date, group_id: Optional[int] = None
 ) -> bytes:
     """渲染“每日统计”图片（包含阈值额外文案）
 
@@ -59,4 +68,5 @@ async def render_daily_stat_image(
         watermark=f"Generated by HakuBot · {date_str}",
         width=720,
         colors=DARK_COLORS,
+        cache_key=_cache_key("daily", group_id),
     )
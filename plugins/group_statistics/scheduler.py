@@ -35,7 +35,7 @@ async def send_daily_report(bot, group_id: int):
         return
 
     stat_date = datetime.now(TZ_CN).date() - timedelta(days=1)
-    img_bytes = await render_daily_stat_image(total, top_users, stat_date=stat_date)
+    img_bytes = await render_daily_stat_image(total, top_users, stat_date=stat_date, group_id=group_id)
 
     try:
         await bot.send_group_msg(group_id=group_id, message=MessageSegment.image(img_bytes))
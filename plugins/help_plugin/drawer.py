@@ -22,5 +22,7 @@ async def render_help_image(config: HelpConfig, is_dark: bool) -> bytes:
         pages={
             "viewport": {"width": 650, "height": 100},
             "base_url": f"file://{TEMPLATE_PATH}"
-        }
+        },
+        # 帮助内容只随配置变化（配置变化会改变缓存键），可长时间复用
+        cache_ttl=3600,
     )
@@ -0,0 +1,130 @@
+"""
+HLTV 解析器基准（开发用脚本，不随插件加载）
+
+用法（在仓库根目录执行）：
+    python plugins/hltv_sub/bench_parsers.py [页面文件或目录...] [-n 轮数]
+
+不传路径时使用 tests/fixtures/hltv/ 下的样例页面。
+页面为事先保存的 HLTV HTML（浏览器「另存为」或 curl 保存均可），按内容自动识别类型：
+- 含 match-wrapper：matches 页，对比整页解析与 make_matches_soup 选择性解析
+- 含 result-con：results 页，对比整页解析与 parse_event_results 选择性解析
+
+每个页面都会先校验两种方式的解析结果完全一致，再分别计时。
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Callable
+
+PLUGIN_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = PLUGIN_DIR.parents[1] / "tests" / "fixtures" / "hltv"
+
+
+def _load_parsers():
+    """只加载 parsers / models，不执行插件 __init__（注册命令、定时任务需要运行中的 NoneBot）"""
+    package = types.ModuleType("hltv_sub")
+    package.__path__ = [str(PLUGIN_DIR)]
+    sys.modules.setdefault("hltv_sub", package)
+
+    from hltv_sub.parsers import matches, results
+
+    return matches, results
+
+
+def _timeit(func: Callable[[], object], rounds: int) -> float:
+    """返回单次调用耗时的中位数（毫秒）"""
+    costs = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        costs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(costs)
+
+
+def _collect_pages(paths: list[str]) -> list[Path]:
+    pages: list[Path] = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            pages.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in {".html", ".htm"}))
+        elif path.is_file():
+            pages.append(path)
+    return pages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HLTV 解析器基准：整页解析 vs 选择性解析")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[str(FIXTURE_DIR)],
+        help="保存的 HTML 页面文件或目录（默认 tests/fixtures/hltv/）",
+    )
+    parser.add_argument("-n", "--rounds", type=int, default=20, help="每个页面每种方式的计时轮数")
+    args = parser.parse_args()
+
+    import pytz
+    from bs4 import BeautifulSoup
+
+    matches, results = _load_parsers()
+    tz = pytz.timezone("Asia/Shanghai")
+
+    pages = _collect_pages(args.paths)
+    if not pages:
+        print("未找到任何 HTML 页面")
+        return 1
+
+    rounds = max(1, args.rounds)
+    failed = False
+    print(f"{'page':<40} {'type':<8} {'size':>8} {'full(ms)':>10} {'fast(ms)':>10} {'speedup':>8}")
+
+    for page in pages:
+        html = page.read_text(encoding="utf-8", errors="replace")
+
+        if "match-wrapper" in html:
+            kind = "matches"
+
+            def full():
+                return matches.parse_event_matches_with_hints(BeautifulSoup(html, "lxml"), tz)
+
+            def fast():
+                soup, _ = matches.make_matches_soup(html)
+                return matches.parse_event_matches_with_hints(soup, tz)
+
+        elif "result-con" in html:
+            kind = "results"
+
+            def full():
+                return results.parse_event_results_soup(BeautifulSoup(html, "lxml"))
+
+            def fast():
+                return results.parse_event_results(html)
+
+        else:
+            print(f"{page.name:<40} 跳过（无法识别页面类型）")
+            continue
+
+        if full() != fast():
+            print(f"{page.name:<40} {kind:<8} 解析结果不一致！")
+            failed = True
+            continue
+
+        full_ms = _timeit(full, rounds)
+        fast_ms = _timeit(fast, rounds)
+        speedup = full_ms / fast_ms if fast_ms > 0 else float("inf")
+        print(
+            f"{page.name:<40} {kind:<8} {len(html) // 1024:>7}K "
+            f"{full_ms:>10.1f} {fast_ms:>10.1f} {speedup:>7.1f}x"
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
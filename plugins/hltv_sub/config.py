@@ -30,6 +30,10 @@ class Config(BaseModel):
     # FlareSolverr 配置（可选，用于 Cloudflare 挑战回退）
     hltv_flaresolverr_url: str = ""  # FlareSolverr 地址，例如 http://localhost:8191/v1
 
+    # 页面缓存（见 page_cache.py）
+    hltv_page_cache_enabled: bool = True  # 关闭后每次都完整请求页面
+    hltv_page_cache_max_stale_seconds: int = 1800  # 请求持续失败时可回退使用的旧页面最大年龄
+
 
 # 获取配置
 plugin_config = get_plugin_config(Config)
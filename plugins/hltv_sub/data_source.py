@@ -5,10 +5,13 @@
 - 网络请求：由 HLTVHttpClient 负责（重试/代理/会话管理）
 - HTML 解析：拆分到 plugins/hltv_sub/parsers/*
 - 数据模型：拆分到 plugins/hltv_sub/models.py
+- 缓存：页面由 HLTVHttpClient 的 PageCache 缓存，解析结果按内容摘要走 parse_cache，
+  scheduler 与交互命令共享带宽和解析开销
 """
 
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
 from typing import Optional
 
@@ -18,6 +21,7 @@ from nonebot.log import logger
 
 from .config import plugin_config
 from .http_client import FetchResult, HLTVHttpClient
+from .page_cache import PageCache, content_digest, parse_cache
 from .models import (
     EventInfo,
     MatchInfo,
@@ -26,11 +30,15 @@ from .models import (
     ResultInfo,
 )
 from .parsers.events import parse_big_events, parse_event_info
-from .parsers.matches import parse_event_matches_with_hints
+from .parsers.common import extract_page_title
+from .parsers.matches import make_matches_soup, parse_event_matches_with_hints
 from .parsers.results import parse_event_results
 from .parsers.stats import parse_match_stats
 
 
+_MATCH_HREF_RE = re.compile(r"""<a\b[^>]*\bhref\s*=\s*["'][^"']*/matches/""", re.IGNORECASE)
+
+
 @dataclass
 class EventMatchesMeta:
     status_code: Optional[int] = None
@@ -55,47 +63,86 @@ class HLTVDataSource:
             proxy_list=plugin_config.hltv_proxy_list,
             impersonate=plugin_config.hltv_impersonate,
             flaresolverr_url=plugin_config.hltv_flaresolverr_url,
+            page_cache=(
+                PageCache(max_stale=plugin_config.hltv_page_cache_max_stale_seconds)
+                if plugin_config.hltv_page_cache_enabled
+                else None
+            ),
         )
 
     async def close(self):
         """关闭会话"""
         await self._client.close()
 
-    async def get_big_events(self) -> list[EventInfo]:
+    @staticmethod
+    def _digest(fetch_result: FetchResult) -> str:
+        return fetch_result.digest or content_digest(fetch_result.text or "")
+
+    async def get_big_events(self, *, allow_stale: bool = False) -> list[EventInfo]:
         """获取 Big Events（正在进行 + 即将举行的赛事）"""
-        html = await self._client.fetch(f"{self.BASE_URL}/events")
+        fetch_result = await self._client.fetch_with_meta(
+            f"{self.BASE_URL}/events", allow_stale=allow_stale
+        )
+        html = fetch_result.text
         if not html:
             return []
-        return parse_big_events(html, self._tz)
+        return parse_cache.get_or_parse(
+            "big_events",
+            self._digest(fetch_result),
+            None,
+            lambda: parse_big_events(html, self._tz),
+        )
 
-    async def get_event_info(self, event_id: str, event_title: str = "") -> Optional[EventInfo]:
+    async def get_event_info(
+        self, event_id: str, event_title: str = "", *, allow_stale: bool = False
+    ) -> Optional[EventInfo]:
         """获取赛事详细信息"""
         title_slug = event_title.lower().replace(" ", "-") if event_title else "event"
         url = f"{self.BASE_URL}/events/{event_id}/{title_slug}"
 
-        html = await self._client.fetch(url)
+        fetch_result = await self._client.fetch_with_meta(url, allow_stale=allow_stale)
+        html = fetch_result.text
         if not html:
             return None
 
-        return parse_event_info(html, event_id=event_id, event_title=event_title, tz=self._tz)
+        return parse_cache.get_or_parse(
+            "event_info",
+            self._digest(fetch_result),
+            (event_id, event_title),
+            lambda: parse_event_info(html, event_id=event_id, event_title=event_title, tz=self._tz),
+        )
 
     def _analyze_matches_meta(
-        self, event_id: str, fetch_result: FetchResult, soup: Optional[BeautifulSoup]
+        self,
+        event_id: str,
+        fetch_result: FetchResult,
+        soup: Optional[BeautifulSoup],
+        *,
+        selective: bool = False,
     ) -> EventMatchesMeta:
+        """selective=True 时 soup 只含 match-wrapper 节点：标题与链接数从原始 HTML 直接取"""
         status = fetch_result.status_code
         final_url = fetch_result.final_url or ""
-        title = soup.title.get_text(strip=True) if soup and soup.title else ""
-
         wrappers = soup.find_all("div", class_="match-wrapper") if soup else []
-        links = soup.find_all("a", href=lambda x: bool(x and "/matches/" in x)) if soup else []
-        text = soup.get_text(" ", strip=True).lower() if soup else ""
+
+        if selective:
+            html = fetch_result.text or ""
+            title = extract_page_title(html)
+            link_count = len(_MATCH_HREF_RE.findall(html))
+            # 有 match-wrapper 时不可能是「通用 matches 页」，无需全文
+            text = ""
+        else:
+            title = soup.title.get_text(strip=True) if soup and soup.title else ""
+            links = soup.find_all("a", href=lambda x: bool(x and "/matches/" in x)) if soup else []
+            link_count = len(links)
+            text = soup.get_text(" ", strip=True).lower() if soup else ""
 
         meta = EventMatchesMeta(
             status_code=status,
             final_url=final_url,
             page_title=title,
             match_wrapper_count=len(wrappers),
-            match_link_count=len(links),
+            match_link_count=link_count,
         )
 
         if status is None:
@@ -128,10 +175,11 @@ class HLTVDataSource:
         days: int = 7,
         *,
         include_partial_tbd: bool = False,
+        allow_stale: bool = False,
     ) -> tuple[list[MatchInfo], list[MatchTimeHint], EventMatchesMeta]:
         """获取赛事比赛列表 + 时间提示 + 页面元信息"""
         url = f"{self.BASE_URL}/events/{event_id}/matches"
-        fetch_result = await self._client.fetch_with_meta(url)
+        fetch_result = await self._client.fetch_with_meta(url, allow_stale=allow_stale)
         if not fetch_result.text:
             meta = self._analyze_matches_meta(event_id, fetch_result, None)
             if not meta.unavailable_reason:
@@ -139,10 +187,26 @@ class HLTVDataSource:
                 meta.unavailable_reason = "empty_response"
             return [], [], meta
 
-        soup = BeautifulSoup(fetch_result.text, "lxml")
-        meta = self._analyze_matches_meta(event_id, fetch_result, soup)
+        def parse() -> tuple[list[MatchInfo], list[MatchTimeHint], EventMatchesMeta]:
+            soup, selective = make_matches_soup(fetch_result.text)
+            meta = self._analyze_matches_meta(event_id, fetch_result, soup, selective=selective)
+            # 页面不可用时，明确返回空，避免 parser fallback 误抓全站 /matches 链接
+            if meta.is_unavailable:
+                return [], [], meta
+            matches, hints = parse_event_matches_with_hints(
+                soup,
+                self._tz,
+                include_partial_tbd=include_partial_tbd,
+            )
+            return matches, hints, meta
+
+        matches, hints, meta = parse_cache.get_or_parse(
+            "event_matches",
+            self._digest(fetch_result),
+            (event_id, fetch_result.status_code, fetch_result.final_url, include_partial_tbd),
+            parse,
+        )
 
-        # 页面不可用时，明确返回空，避免 parser fallback 误抓全站 /matches 链接
         if meta.is_unavailable:
             logger.warning(
                 f"[HLTV] 赛事 matches 页面不可用: event={event_id}, "
@@ -151,11 +215,6 @@ class HLTVDataSource:
             )
             return [], [], meta
 
-        matches, hints = parse_event_matches_with_hints(
-            soup,
-            self._tz,
-            include_partial_tbd=include_partial_tbd,
-        )
         logger.info(
             f"[HLTV] 获取到 {len(matches)} 场比赛 (filtered) / {len(hints)} 条时间提示 (raw), "
             f"event={event_id}, wrappers={meta.match_wrapper_count}"
@@ -183,35 +242,66 @@ class HLTVDataSource:
         matches, _ = await self.get_event_matches_with_hints(event_id, days=days)
         return matches
 
-    async def get_event_matches_for_display(self, event_id: str, days: int = 7) -> list[MatchInfo]:
+    async def get_event_matches_for_display(
+        self, event_id: str, days: int = 7, *, allow_stale: bool = False
+    ) -> list[MatchInfo]:
         """获取赛事的比赛列表（允许单边 TBD 用于展示）"""
         matches, _, _ = await self.get_event_matches_with_hints_and_meta(
             event_id,
             days=days,
             include_partial_tbd=True,
+            allow_stale=allow_stale,
         )
         return matches
 
     async def get_event_results(
-        self, event_id: str, days: int = 7, max_results: int = 20
+        self,
+        event_id: str,
+        days: int = 7,
+        max_results: int = 20,
+        *,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
     ) -> list[ResultInfo]:
-        """获取赛事的已结束比赛结果"""
+        """获取赛事的已结束比赛结果
+
+        max_age: 可接受的页面缓存年龄（秒），None 按默认新鲜期；0 表示必须向源站确认
+        allow_stale: 请求失败时是否接受旧页面（仅用户主动查询时开启）
+        """
         url = f"{self.BASE_URL}/results?event={event_id}"
-        html = await self._client.fetch(url)
+        fetch_result = await self._client.fetch_with_meta(
+            url, max_age=max_age, allow_stale=allow_stale
+        )
+        html = fetch_result.text
         if not html:
             logger.warning(f"[HLTV][RESULTS] fetch_empty event={event_id} url={url}")
             return []
 
-        results = parse_event_results(html, max_results=max_results)
+        results = parse_cache.get_or_parse(
+            "event_results",
+            self._digest(fetch_result),
+            max_results,
+            lambda: parse_event_results(html, max_results=max_results),
+        )
         logger.info(
             f"[HLTV][RESULTS] parsed event={event_id} count={len(results)} max_results={max_results}"
         )
         return results
 
     async def get_match_stats(
-        self, match_id: str, team1: str = "", team2: str = "", event_title: str = ""
+        self,
+        match_id: str,
+        team1: str = "",
+        team2: str = "",
+        event_title: str = "",
+        *,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
     ) -> Optional[MatchStats]:
-        """获取比赛详细数据"""
+        """获取比赛详细数据
+
+        max_age: 可接受的页面缓存年龄（秒），None 按默认新鲜期；0 表示必须向源站确认
+        """
         # 构建 URL（保持旧逻辑：slug 仅用于 URL 友好，不影响 match_id 定位）
         t1_slug = team1.lower().replace(" ", "-") if team1 else "team1"
         t2_slug = team2.lower().replace(" ", "-") if team2 else "team2"
@@ -220,17 +310,25 @@ class HLTVDataSource:
         url = f"{self.BASE_URL}/matches/{match_id}/{t1_slug}-vs-{t2_slug}-{event_slug}"
         logger.info(f"[HLTV][STATS] fetch_start match_id={match_id} url={url}")
 
-        html = await self._client.fetch(url)
+        fetch_result = await self._client.fetch_with_meta(
+            url, max_age=max_age, allow_stale=allow_stale
+        )
+        html = fetch_result.text
         if not html:
             logger.warning(f"[HLTV][STATS] fetch_empty match_id={match_id} url={url}")
             return None
 
-        parsed = parse_match_stats(
-            html,
-            match_id=match_id,
-            team1=team1,
-            team2=team2,
-            event_title=event_title,
+        parsed = parse_cache.get_or_parse(
+            "match_stats",
+            self._digest(fetch_result),
+            (match_id, team1, team2, event_title),
+            lambda: parse_match_stats(
+                html,
+                match_id=match_id,
+                team1=team1,
+                team2=team2,
+                event_title=event_title,
+            ),
         )
 
         if not parsed:
@@ -243,10 +341,10 @@ class HLTVDataSource:
         return parsed
 
     async def get_latest_result_with_stats(
-        self, event_id: str, event_title: str = ""
+        self, event_id: str, event_title: str = "", *, allow_stale: bool = False
     ) -> Optional[MatchStats]:
         """获取最近一场比赛的详细数据"""
-        results = await self.get_event_results(event_id, max_results=1)
+        results = await self.get_event_results(event_id, max_results=1, allow_stale=allow_stale)
         if not results:
             logger.warning(f"[HLTV][LATEST_STATS] no_results event={event_id}")
             return None
@@ -262,6 +360,7 @@ class HLTVDataSource:
             team1=result.team1,
             team2=result.team2,
             event_title=event_title,
+            allow_stale=allow_stale,
         )
 
 
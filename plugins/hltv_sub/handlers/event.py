@@ -30,7 +30,7 @@ async def handle_event_list(bot: Bot, event: GroupMessageEvent):
     await event_list.send("正在获取赛事列表，请稍候...")
 
     try:
-        events = await hltv_data.get_big_events()
+        events = await hltv_data.get_big_events(allow_stale=True)
 
         if not events:
             await event_list.finish("暂无赛事数据")
@@ -80,7 +80,7 @@ async def handle_event_subscribe(bot: Bot, event: GroupMessageEvent, args: Messa
     await event_subscribe.send("正在获取赛事信息...")
 
     try:
-        events = await hltv_data.get_big_events()
+        events = await hltv_data.get_big_events(allow_stale=True)
         event_info = None
         for e in events:
             if e.id == event_id:
@@ -88,7 +88,7 @@ async def handle_event_subscribe(bot: Bot, event: GroupMessageEvent, args: Messa
                 break
 
         if not event_info:
-            event_info = await hltv_data.get_event_info(event_id)
+            event_info = await hltv_data.get_event_info(event_id, allow_stale=True)
 
         if event_info:
             created = data_manager.subscribe_event(
@@ -36,7 +36,7 @@ async def handle_results_list(bot: Bot, event: GroupMessageEvent):
         results_by_event = {}
 
         for sub in sorted(subscriptions, key=lambda x: int(x.event_id) if x.event_id.isdigit() else x.event_id):
-            results = await hltv_data.get_event_results(sub.event_id)
+            results = await hltv_data.get_event_results(sub.event_id, allow_stale=True)
             if results:
                 event_key = f"#{sub.event_id} {sub.event_title}"
                 results_by_event[event_key] = results
@@ -39,7 +39,7 @@ async def handle_stats(bot: Bot, event: GroupMessageEvent, args: Message = Comma
 
         try:
             for sub in subscriptions:
-                stats = await hltv_data.get_latest_result_with_stats(sub.event_id, sub.event_title)
+                stats = await hltv_data.get_latest_result_with_stats(sub.event_id, sub.event_title, allow_stale=True)
                 if stats:
                     img = await render_stats(stats)
                     await stats_cmd.finish(MessageSegment.image(img))
@@ -59,7 +59,7 @@ async def handle_stats(bot: Bot, event: GroupMessageEvent, args: Message = Comma
 
         try:
             # 优先直接按 match_id 拉取，避免先遍历所有订阅赛事 results 带来的额外请求开销
-            stats = await hltv_data.get_match_stats(match_id=match_id)
+            stats = await hltv_data.get_match_stats(match_id=match_id, allow_stale=True)
 
             # 直连失败时，再尝试通过订阅赛事补全 slug 信息后重试（兼容少量边缘路由）
             if not stats and subscriptions:
@@ -68,7 +68,7 @@ async def handle_stats(bot: Bot, event: GroupMessageEvent, args: Message = Comma
                 event_title = ""
 
                 for sub in subscriptions:
-                    results = await hltv_data.get_event_results(sub.event_id, max_results=10)
+                    results = await hltv_data.get_event_results(sub.event_id, max_results=10, allow_stale=True)
                     for r in results:
                         if r.id == match_id:
                             team1 = r.team1
@@ -83,6 +83,7 @@ async def handle_stats(bot: Bot, event: GroupMessageEvent, args: Message = Comma
                     team1=team1,
                     team2=team2,
                     event_title=event_title,
+                    allow_stale=True,
                 )
 
             if stats:
@@ -5,6 +5,9 @@ HLTV HTTP 客户端（负责请求、重试、代理、会话管理）
 - 使用可配置的 impersonate 版本（默认 chrome136）
 - 完善请求头（Sec-* 系列）
 - FlareSolverr 回退（遇到持续 403 时自动尝试）
+- 页面缓存（见 page_cache.py）：新鲜期内直接复用，过期后条件请求（ETag / Last-Modified），
+  持续 403 时优先回退到旧页面（仅限 allow_stale=True 的调用方），减少 FlareSolverr 回退
+- 在途请求合并：同一 URL 已有请求在进行时，后来的调用直接等待同一个结果，不再重复请求
 """
 
 from __future__ import annotations
@@ -12,13 +15,15 @@ from __future__ import annotations
 import asyncio
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional
 
 import httpx
 from curl_cffi.requests import AsyncSession
 from nonebot.log import logger
 
+from .page_cache import CachedPage, PageCache
+
 
 @dataclass
 class FetchResult:
@@ -26,6 +31,20 @@ class FetchResult:
     status_code: Optional[int] = None
     final_url: str = ""
     error: str = ""
+    digest: str = ""  # 页面内容 sha1（用于解析结果缓存）
+    from_cache: bool = False
+    stale: bool = False  # 请求失败后回退的旧页面
+
+
+def _result_from_cache(page: CachedPage, *, stale: bool = False) -> FetchResult:
+    return FetchResult(
+        text=page.text,
+        status_code=page.status_code,
+        final_url=page.final_url,
+        digest=page.digest,
+        from_cache=True,
+        stale=stale,
+    )
 
 
 def _chrome_hint_version(impersonate: str) -> str:
@@ -68,6 +87,7 @@ class HLTVHttpClient:
         proxy_list: list[str] | None = None,
         impersonate: str = "chrome136",
         flaresolverr_url: str = "",
+        page_cache: Optional[PageCache] = None,
     ) -> None:
         self._timeout = timeout
         self._min_delay = min_delay
@@ -75,6 +95,8 @@ class HLTVHttpClient:
         self._impersonate = impersonate
         self._flaresolverr_url = flaresolverr_url.rstrip("/") if flaresolverr_url else ""
         self._session: Optional[AsyncSession] = None
+        self._page_cache = page_cache
+        self._inflight: dict[tuple[str, bool], asyncio.Task[FetchResult]] = {}
 
         # 代理轮换状态（失败退避 + 冷却）
         self._proxy_cursor: int = 0
@@ -89,6 +111,9 @@ class HLTVHttpClient:
         return self._session
 
     async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
         if self._session is not None:
             await self._session.close()
             self._session = None
@@ -174,10 +199,75 @@ class HLTVHttpClient:
             logger.error(f"[HLTV] FlareSolverr 异常: {url} error={e}")
             return FetchResult(text=None, error=f"flaresolverr_exception: {repr(e)}")
 
-    async def fetch_with_meta(self, url: str, max_retries: int = 5) -> FetchResult:
-        """发送请求获取 HTML + 响应元信息"""
+    def _store(self, url: str, result: FetchResult, response=None) -> FetchResult:
+        """把成功结果写入页面缓存，并补上内容摘要"""
+        if self._page_cache is None or not result.text:
+            return result
+        etag = last_modified = ""
+        if response is not None:
+            etag = response.headers.get("ETag", "") or ""
+            last_modified = response.headers.get("Last-Modified", "") or ""
+        page = self._page_cache.put(
+            url,
+            result.text,
+            status_code=result.status_code or 200,
+            final_url=result.final_url,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        result.digest = page.digest
+        return result
+
+    def _stale_fallback(self, url: str, reason: str) -> Optional[FetchResult]:
+        if self._page_cache is None:
+            return None
+        page = self._page_cache.stale(url)
+        if page is None:
+            return None
+        logger.warning(f"[HLTV] {reason}，回退使用 {page.age():.0f}s 前的缓存页面: {url}")
+        return _result_from_cache(page, stale=True)
+
+    async def fetch_with_meta(
+        self,
+        url: str,
+        max_retries: int = 5,
+        *,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
+    ) -> FetchResult:
+        """发送请求获取 HTML + 响应元信息
+
+        max_age: 可接受的缓存年龄（秒），None 表示按页面类型取默认新鲜期，0 表示必须向源站确认
+        （仍会带条件请求头，内容未变时源站返回 304；请求失败时也不回退旧页面）
+        allow_stale: 请求失败时是否接受旧页面（FetchResult.stale=True）。只适合用户主动查询；
+        定时任务应保持 False，否则源站持续故障时拿到的仍是「成功」结果，察觉不到抓取错误
+        """
+        if self._page_cache is not None:
+            page = self._page_cache.fresh(url, max_age)
+            if page is not None:
+                logger.debug(f"[HLTV] 命中页面缓存 ({page.age():.0f}s): {url}")
+                return _result_from_cache(page)
+
+        # 合并在途请求：正在进行的请求一定是刚发出的，满足任何 max_age；
+        # 接受与不接受旧页面回退的调用分开合并
+        allow_stale = allow_stale and max_age != 0
+        key = (url, allow_stale)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request(url, max_retries, allow_stale=allow_stale))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        else:
+            logger.debug(f"[HLTV] 合并在途请求: {url}")
+        # shield：某个调用方被取消时不影响其他等待同一请求的调用方
+        result = await asyncio.shield(task)
+        return replace(result)
+
+    async def _request(self, url: str, max_retries: int, *, allow_stale: bool) -> FetchResult:
         session = await self._get_session()
         headers = _build_headers(self._impersonate)
+        if self._page_cache is not None:
+            headers.update(self._page_cache.conditional_headers(url))
 
         last_status: Optional[int] = None
         last_final_url = ""
@@ -205,25 +295,51 @@ class HLTVHttpClient:
                 last_status = response.status_code
                 last_final_url = str(response.url)
 
+                if response.status_code == 304 and self._page_cache is not None:
+                    page = self._page_cache.touch(url)
+                    if page is not None:
+                        self._mark_proxy_success(proxy)
+                        logger.debug(f"[HLTV] 页面未变化 (304): {url}")
+                        return _result_from_cache(page)
+                    # 缓存已被淘汰：去掉条件头立即重新请求，不占用重试次数
+                    headers.pop("If-None-Match", None)
+                    headers.pop("If-Modified-Since", None)
+                    response = await session.get(
+                        url,
+                        proxy=proxy,
+                        timeout=self._timeout,
+                        headers=headers,
+                    )
+                    last_status = response.status_code
+                    last_final_url = str(response.url)
+
                 if response.status_code == 200:
                     self._mark_proxy_success(proxy)
                     logger.debug(f"[HLTV] 请求成功: {url}")
-                    return FetchResult(
-                        text=response.text,
-                        status_code=response.status_code,
-                        final_url=last_final_url,
+                    return self._store(
+                        url,
+                        FetchResult(
+                            text=response.text,
+                            status_code=response.status_code,
+                            final_url=last_final_url,
+                        ),
+                        response,
                     )
                 if response.status_code == 403:
                     consecutive_403 += 1
                     self._mark_proxy_failure(proxy)
                     logger.warning(f"[HLTV] 403 Forbidden: {url} (proxy={proxy or 'direct'}, attempt={attempt + 1})")
 
-                    # 连续 403 达到 2 次且配置了 FlareSolverr，尝试回退
+                    # 连续 403 达到 2 次：有不太旧的缓存页面时直接用，否则尝试 FlareSolverr 回退
+                    if consecutive_403 >= 2 and allow_stale:
+                        stale = self._stale_fallback(url, f"连续 {consecutive_403} 次 403")
+                        if stale is not None:
+                            return stale
                     if consecutive_403 >= 2 and self._flaresolverr_url:
                         logger.info(f"[HLTV] 连续 {consecutive_403} 次 403，尝试 FlareSolverr 回退...")
                         fs_result = await self._fetch_via_flaresolverr(url)
                         if fs_result.text:
-                            return fs_result
+                            return self._store(url, fs_result)
                         logger.warning(f"[HLTV] FlareSolverr 回退失败: {fs_result.error}")
 
                     continue
@@ -243,7 +359,12 @@ class HLTVHttpClient:
             logger.info(f"[HLTV] 所有重试失败（403），最终 FlareSolverr 回退...")
             fs_result = await self._fetch_via_flaresolverr(url)
             if fs_result.text:
-                return fs_result
+                return self._store(url, fs_result)
+
+        if allow_stale:
+            stale = self._stale_fallback(url, "所有重试失败")
+            if stale is not None:
+                return stale
 
         logger.error(f"[HLTV] 请求失败，已达最大重试次数: {url}")
         return FetchResult(
@@ -253,7 +374,16 @@ class HLTVHttpClient:
             error=last_error,
         )
 
-    async def fetch(self, url: str, max_retries: int = 5) -> Optional[str]:
+    async def fetch(
+        self,
+        url: str,
+        max_retries: int = 5,
+        *,
+        max_age: Optional[float] = None,
+        allow_stale: bool = False,
+    ) -> Optional[str]:
         """发送请求获取 HTML（兼容旧接口）"""
-        result = await self.fetch_with_meta(url, max_retries=max_retries)
+        result = await self.fetch_with_meta(
+            url, max_retries=max_retries, max_age=max_age, allow_stale=allow_stale
+        )
         return result.text
@@ -0,0 +1,183 @@
+"""
+HLTV 页面缓存 + 解析结果缓存
+
+scheduler 与交互命令（matches / results / stats / event）经常在几分钟内反复请求同一批页面，
+每次都完整下载 HTML 并重新 BeautifulSoup 解析，既浪费带宽，也更容易触发 403 / FlareSolverr 回退。
+
+- PageCache：按 URL 缓存页面正文 + ETag / Last-Modified
+  - 新鲜期内直接返回缓存，不发请求；新鲜期按页面类型区分（见 PAGE_TTL_RULES）
+  - 过期后带 If-None-Match / If-Modified-Since 做条件请求，304 时复用缓存正文
+  - 请求持续失败（403 等）时，可回退到不超过 max_stale 秒的旧页面
+- ParseCache：按 (解析器名, 页面内容 sha1, 额外参数) 缓存解析结果，
+  同一份 HTML 只解析一次；返回深拷贝，调用方修改结果不会污染缓存
+
+两者均为单事件循环内使用的纯内存 LRU，不加锁、不落盘。
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# (URL 正则, 新鲜期秒数)，按顺序匹配，首个命中生效
+PAGE_TTL_RULES: list[tuple[re.Pattern[str], float]] = [
+    (re.compile(r"/events/\d+/matches"), 60),  # 赛事比赛列表：变化最快
+    (re.compile(r"/results\?"), 60),  # 赛事结果列表
+    (re.compile(r"/matches/\d+"), 300),  # 单场比赛详情（stats）
+    (re.compile(r"/events/\d+"), 1800),  # 赛事详情页：基本信息很少变化
+    (re.compile(r"/events(?:$|\?)"), 600),  # Big Events 列表
+]
+DEFAULT_PAGE_TTL = 60.0
+
+PAGE_CACHE_MAX_ENTRIES = 64
+PARSE_CACHE_MAX_ENTRIES = 128
+
+
+def page_ttl(url: str) -> float:
+    """按页面类型返回新鲜期（秒）"""
+    for pattern, ttl in PAGE_TTL_RULES:
+        if pattern.search(url):
+            return float(ttl)
+    return DEFAULT_PAGE_TTL
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+@dataclass
+class CachedPage:
+    text: str
+    status_code: int
+    final_url: str
+    digest: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0  # 最近一次确认内容有效的时间（200 或 304）
+
+    def age(self, now: Optional[float] = None) -> float:
+        current = time.monotonic() if now is None else now
+        return current - self.fetched_at
+
+
+class PageCache:
+    """URL -> CachedPage 的 LRU"""
+
+    def __init__(self, max_entries: int = PAGE_CACHE_MAX_ENTRIES, max_stale: float = 1800.0) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_stale = max(0.0, max_stale)
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        page = self._entries.get(url)
+        if page is not None:
+            self._entries.move_to_end(url)
+        return page
+
+    def fresh(self, url: str, max_age: Optional[float] = None) -> Optional[CachedPage]:
+        """新鲜期内的缓存；max_age 为 None 时按页面类型取默认新鲜期"""
+        page = self.get(url)
+        ttl = page_ttl(url) if max_age is None else max_age
+        if page is None or page.age() >= ttl:
+            return None
+        self.hits += 1
+        return page
+
+    def stale(self, url: str) -> Optional[CachedPage]:
+        """请求失败时可回退使用的旧页面（不超过 max_stale 秒）"""
+        page = self.get(url)
+        if page is None or page.age() >= self.max_stale:
+            return None
+        self.stale_served += 1
+        return page
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        page = self.get(url)
+        if page is None:
+            return {}
+        headers: dict[str, str] = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        *,
+        status_code: int = 200,
+        final_url: str = "",
+        etag: str = "",
+        last_modified: str = "",
+    ) -> CachedPage:
+        self.misses += 1
+        page = CachedPage(
+            text=text,
+            status_code=status_code,
+            final_url=final_url or url,
+            digest=content_digest(text),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.monotonic(),
+        )
+        self._entries[url] = page
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return page
+
+    def touch(self, url: str) -> Optional[CachedPage]:
+        """304：内容未变，刷新确认时间"""
+        page = self.get(url)
+        if page is not None:
+            page.fetched_at = time.monotonic()
+            self.revalidated += 1
+        return page
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ParseCache:
+    """(解析器名, 内容摘要, 额外参数) -> 解析结果 的 LRU"""
+
+    def __init__(self, max_entries: int = PARSE_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_parse(self, name: str, digest: str, extra: Hashable, parse: Callable[[], T]) -> T:
+        """命中时返回缓存结果的深拷贝，否则调用 parse() 并缓存"""
+        key = (name, digest, extra)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[key])
+
+        self.misses += 1
+        result = parse()
+        self._entries[key] = result
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return copy.deepcopy(result)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# 全局解析缓存：scheduler 与交互命令共用同一个 HLTVDataSource，也共用这一份
+parse_cache = ParseCache()
@@ -6,10 +6,22 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
+from html import unescape
 
 import pytz
 
 
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def extract_page_title(html: str) -> str:
+    """不建树直接取 <title> 文本（供选择性解析时记录页面元信息）"""
+    match = _TITLE_RE.search(html or "")
+    if not match:
+        return ""
+    return unescape(" ".join(match.group(1).split()))
+
+
 def extract_id_from_url(url: str) -> str:
     """从 URL 中提取数字 ID（匹配 /12345/）"""
     match = re.search(r"/(\d+)/", url or "")
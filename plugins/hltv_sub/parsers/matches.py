@@ -3,6 +3,7 @@ HLTV matches 页面解析
 
 - parse_event_matches：默认过滤 TBD，展示模式允许单边 TBD
 - parse_match_time_hints：不过滤 TBD（用于 scheduler 自适应轮询）
+- make_matches_soup：选择性解析，只为 match-wrapper 节点建树（解析结果与整页解析一致）
 """
 
 from __future__ import annotations
@@ -10,12 +11,16 @@ from __future__ import annotations
 import re
 from typing import Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from nonebot.log import logger
 
 from ..models import MatchInfo, MatchTimeHint
 from .common import format_date, format_time
 
+# 只保留 match-wrapper 节点（及其完整子树），跳过导航栏、侧栏、脚本等无关节点的建树开销
+# 解析阶段 class 还是原始字符串（如 "match-wrapper live-match"），需按单词匹配
+MATCH_WRAPPER_STRAINER = SoupStrainer("div", class_=re.compile(r"(?:^|\s)match-wrapper(?:\s|$)"))
+
 
 def parse_match_time_hints(soup: BeautifulSoup, tz) -> list[MatchTimeHint]:
     """解析 matches 页面的时间提示（不过滤 TBD）"""
@@ -235,6 +240,19 @@ def parse_event_matches_with_hints(
     return matches, hints
 
 
+def make_matches_soup(html: str) -> tuple[BeautifulSoup, bool]:
+    """构建 matches 页面的 soup，返回 (soup, 是否为选择性解析)
+
+    页面含 match-wrapper 时只解析这些节点：parse_event_matches / parse_match_time_hints
+    在这种情况下只读取 match-wrapper 子树，结果与整页解析相同。
+    没有 match-wrapper 时（赛事不可用的通用页、需要回退链接解析的旧结构）仍整页解析。
+    """
+    soup = BeautifulSoup(html, "lxml", parse_only=MATCH_WRAPPER_STRAINER)
+    if soup.find("div", class_="match-wrapper"):
+        return soup, True
+    return BeautifulSoup(html, "lxml"), False
+
+
 def _is_winner_placeholder(name: str) -> bool:
     normalized = " ".join((name or "").lower().split())
     return normalized not in {"", "tbd", "tba"} and "winner" in normalized
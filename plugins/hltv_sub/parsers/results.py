@@ -6,16 +6,25 @@ from __future__ import annotations
 
 import re
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from nonebot.log import logger
 
 from ..models import ResultInfo
 
+# 只解析 result-con 节点（及其完整子树），其余节点不建树
+# 解析阶段 class 还是原始字符串（可能带其他 class），需按单词匹配
+RESULT_CON_STRAINER = SoupStrainer("div", class_=re.compile(r"(?:^|\s)result-con(?:\s|$)"))
+
 
 def parse_event_results(html: str, max_results: int = 20) -> list[ResultInfo]:
-    """解析 /results?event=xxx 页面"""
+    """解析 /results?event=xxx 页面（选择性解析，只为 result-con 节点建树）"""
+    soup = BeautifulSoup(html, "lxml", parse_only=RESULT_CON_STRAINER)
+    return parse_event_results_soup(soup, max_results=max_results)
+
+
+def parse_event_results_soup(soup: BeautifulSoup, max_results: int = 20) -> list[ResultInfo]:
+    """从已构建的 soup（整页或选择性解析均可）中提取比赛结果"""
     results: list[ResultInfo] = []
-    soup = BeautifulSoup(html, "lxml")
 
     try:
         result_containers = soup.find_all("div", class_="result-con")
@@ -20,6 +20,16 @@ if TYPE_CHECKING:
 # 模板目录
 TEMPLATE_DIR = Path(__file__).parent / "templates"
 
+# 截图结果缓存秒数：同一份数据在此时间内重复请求直接复用图片（生成时间戳不参与缓存键）
+RENDER_CACHE_TTL = {
+    "events.html": 300,
+    "matches.html": 60,
+    "results.html": 60,
+    "stats.html": 60,
+    "help.html": 3600,
+}
+RENDER_CACHE_EXCLUDE = ("timestamp",)
+
 
 def get_timestamp() -> str:
     """获取当前时间戳"""
@@ -51,7 +61,9 @@ async def render_events(
         pages={
             "viewport": {"width": 650, "height": 100},
             "base_url": f"file://{TEMPLATE_DIR}/"
-        }
+        },
+        cache_ttl=RENDER_CACHE_TTL["events.html"],
+        cache_exclude=RENDER_CACHE_EXCLUDE,
     )
 
 
@@ -80,7 +92,9 @@ async def render_matches(
         pages={
             "viewport": {"width": 700, "height": 100},
             "base_url": f"file://{TEMPLATE_DIR}/"
-        }
+        },
+        cache_ttl=RENDER_CACHE_TTL["matches.html"],
+        cache_exclude=RENDER_CACHE_EXCLUDE,
     )
 
 
@@ -105,7 +119,9 @@ async def render_results(
         pages={
             "viewport": {"width": 700, "height": 100},
             "base_url": f"file://{TEMPLATE_DIR}/"
-        }
+        },
+        cache_ttl=RENDER_CACHE_TTL["results.html"],
+        cache_exclude=RENDER_CACHE_EXCLUDE,
     )
 
 
@@ -132,7 +148,9 @@ async def render_stats(stats: Optional[MatchStats]) -> bytes:
         pages={
             "viewport": {"width": 800, "height": 100},
             "base_url": f"file://{TEMPLATE_DIR}/"
-        }
+        },
+        cache_ttl=RENDER_CACHE_TTL["stats.html"],
+        cache_exclude=RENDER_CACHE_EXCLUDE,
     )
 
 
@@ -169,6 +187,8 @@ async def render_help(sections: list[dict]) -> bytes:
             "viewport": {"width": 820, "height": 100},
             "base_url": f"file://{TEMPLATE_DIR}/",
         },
+        cache_ttl=RENDER_CACHE_TTL["help.html"],
+        cache_exclude=RENDER_CACHE_EXCLUDE,
     )
 
 
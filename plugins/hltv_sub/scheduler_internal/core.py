@@ -1,5 +1,10 @@
 """
 HLTVScheduler 核心类（多赛事独立 job 版本）
+
+- 每轮检查先并发抓取一次赛事快照（matches 页 + results 页），三项检查共用同一份快照
+- 多个赛事之间互不依赖：run_check / daily_maintenance 并发处理各赛事，
+  总请求并发由 _fetch_semaphore（hltv_scheduler_max_parallel）统一限制；
+  同一页面的并发请求由 HLTVHttpClient 合并为一次
 """
 
 from __future__ import annotations
@@ -15,10 +20,11 @@ from nonebot import get_bot
 from nonebot.adapters.onebot.v11 import Bot, MessageSegment
 from nonebot.log import logger
 
+from ...utils.dispatcher import message_dispatcher
 from ..config import plugin_config
 from ..data_manager import data_manager
 from ..data_source import hltv_data
-from ..models import ResultInfo
+from ..models import MatchStats, ResultInfo
 from ..render import render_reminder, render_stats
 from .constants import (
     ADAPTIVE_INTERVAL_TABLE,
@@ -30,7 +36,7 @@ from .constants import (
 from .map_result_readiness import build_completed_map_results
 from .result_readiness import get_result_stats_push_block_reason
 from .state import get_event_state, parse_mmdd
-from .types import CompletedMapResult, UpcomingMatch
+from .types import CompletedMapResult, EventSnapshot, UpcomingMatch
 from .wakeup import refresh_wakeup_jobs as _refresh_wakeup_jobs
 
 T = TypeVar("T")
@@ -330,7 +336,39 @@ class HLTVScheduler:
         except Exception:
             return None
 
-    async def check_match_starts_for_event(self, event_id: str) -> list[UpcomingMatch]:
+    async def take_event_snapshot(self, event_id: str) -> EventSnapshot:
+        """并发抓取一轮检查所需的页面（matches + results），每个页面每轮只抓一次"""
+        sub = data_manager.get_any_subscription_by_event(event_id)
+        event_title = sub.event_title if sub else f"Event #{event_id}"
+
+        matches, results = await asyncio.gather(
+            self._fetch_with_retry(
+                lambda eid=event_id: hltv_data.get_event_matches_with_hints_and_meta(eid),
+                event_id=event_id,
+            ),
+            self._fetch_with_retry(
+                lambda eid=event_id: hltv_data.get_event_results(eid, max_results=5),
+                event_id=event_id,
+            ),
+        )
+        return EventSnapshot(
+            event_id=event_id,
+            event_title=event_title,
+            matches=matches,
+            results=results,
+        )
+
+    async def _get_matches_triplet(self, event_id: str, snapshot: Optional[EventSnapshot]):
+        if snapshot is not None:
+            return snapshot.matches
+        return await self._fetch_with_retry(
+            lambda eid=event_id: hltv_data.get_event_matches_with_hints_and_meta(eid),
+            event_id=event_id,
+        )
+
+    async def check_match_starts_for_event(
+        self, event_id: str, snapshot: Optional[EventSnapshot] = None
+    ) -> list[UpcomingMatch]:
         upcoming: list[UpcomingMatch] = []
         now = datetime.now(self._tz)
 
@@ -347,10 +385,7 @@ class HLTVScheduler:
         event_title = sub.event_title if sub else f"Event #{event_id}"
 
         try:
-            triplet = await self._fetch_with_retry(
-                lambda eid=event_id: hltv_data.get_event_matches_with_hints_and_meta(eid),
-                event_id=event_id,
-            )
+            triplet = await self._get_matches_triplet(event_id, snapshot)
             if not triplet:
                 return upcoming
 
@@ -458,7 +493,9 @@ class HLTVScheduler:
 
         return upcoming
 
-    async def check_match_results_for_event(self, event_id: str) -> list[tuple[str, str, ResultInfo]]:
+    async def check_match_results_for_event(
+        self, event_id: str, snapshot: Optional[EventSnapshot] = None
+    ) -> list[tuple[str, str, ResultInfo]]:
         new_results: list[tuple[str, str, ResultInfo]] = []
 
         state = get_event_state(self._tz, self._end_grace_days, event_id)
@@ -472,10 +509,13 @@ class HLTVScheduler:
         poll_state = self._get_event_poll_state(event_id)
 
         try:
-            results = await self._fetch_with_retry(
-                lambda eid=event_id: hltv_data.get_event_results(eid, max_results=5),
-                event_id=event_id,
-            )
+            if snapshot is not None:
+                results = snapshot.results
+            else:
+                results = await self._fetch_with_retry(
+                    lambda eid=event_id: hltv_data.get_event_results(eid, max_results=5),
+                    event_id=event_id,
+                )
             if not results:
                 return new_results
 
@@ -489,7 +529,7 @@ class HLTVScheduler:
         return new_results
 
     async def check_completed_map_results_for_event(
-        self, event_id: str
+        self, event_id: str, snapshot: Optional[EventSnapshot] = None
     ) -> list[CompletedMapResult]:
         completed_maps: list[CompletedMapResult] = []
 
@@ -502,10 +542,7 @@ class HLTVScheduler:
         poll_state = self._get_event_poll_state(event_id)
 
         try:
-            triplet = await self._fetch_with_retry(
-                lambda eid=event_id: hltv_data.get_event_matches_with_hints_and_meta(eid),
-                event_id=event_id,
-            )
+            triplet = await self._get_matches_triplet(event_id, snapshot)
             if not triplet:
                 return completed_maps
 
@@ -517,22 +554,27 @@ class HLTVScheduler:
                 poll_state.has_live_match = True
                 poll_state.last_live_seen_at = datetime.now(self._tz)
 
-            for match in matches:
-                if not match.is_live:
-                    continue
-                if match.maps not in {"3", "5"}:
-                    continue
+            live_series = [m for m in matches if m.is_live and m.maps in {"3", "5"}]
+            # 多场同时进行时并发抓取各场 stats（仍受全局并发上限约束）；
+            # 进行中的比赛轮询间隔可短于页面缓存新鲜期，必须向源站确认（max_age=0）
+            stats_list: list[Optional[MatchStats]] = await asyncio.gather(
+                *(
+                    self._fetch_with_retry(
+                        lambda m=match: hltv_data.get_match_stats(
+                            match_id=m.id,
+                            team1=m.team1,
+                            team2=m.team2,
+                            event_title=event_title,
+                            max_age=0,
+                        ),
+                        event_id=event_id,
+                    )
+                    for match in live_series
+                )
+            )
 
+            for match, stats in zip(live_series, stats_list):
                 bo_maps = int(match.maps)
-                stats = await self._fetch_with_retry(
-                    lambda m=match: hltv_data.get_match_stats(
-                        match_id=m.id,
-                        team1=m.team1,
-                        team2=m.team2,
-                        event_title=event_title,
-                    ),
-                    event_id=event_id,
-                )
                 for candidate in build_completed_map_results(
                     event_id=event_id,
                     event_title=event_title,
@@ -585,16 +627,15 @@ class HLTVScheduler:
 {f'📋 {bo_text}' if bo_text else ''}""".strip()
             )
 
-        any_success = False
-        for group_id in groups:
-            try:
-                await bot.send_group_msg(group_id=group_id, message=msg)
-                any_success = True
+        results = await asyncio.gather(
+            *message_dispatcher.broadcast(bot, groups, msg, key=f"hltv:start:{match.match_id}", desc="比赛提醒")
+        )
+        for result in results:
+            if result.ok:
                 logger.info(
-                    f"[HLTV Scheduler] 已发送比赛提醒到群 {group_id}: {match.team1} vs {match.team2}"
+                    f"[HLTV Scheduler] 已发送比赛提醒到{result.target}: {match.team1} vs {match.team2}"
                 )
-            except Exception as e:
-                logger.error(f"[HLTV Scheduler] 发送比赛提醒到群 {group_id} 失败: {e}")
+        any_success = any(result.ok for result in results)
 
         if any_success:
             data_manager.add_notified_start(match.match_id, force=True)
@@ -635,15 +676,15 @@ class HLTVScheduler:
             score_line = f"{result.team1} {result.score1}:{result.score2} {result.team2}"
             msg = MessageSegment.text(f"🏁 比赛已结束\n{score_line}\n\n") + MessageSegment.image(img)
 
-            for group_id in groups:
-                try:
-                    await bot.send_group_msg(group_id=group_id, message=msg)
-                    any_success = True
+            deliveries = await asyncio.gather(
+                *message_dispatcher.broadcast(bot, groups, msg, key=f"hltv:result:{result.id}", desc="比赛结果")
+            )
+            for delivery in deliveries:
+                if delivery.ok:
                     logger.info(
-                        f"[HLTV Scheduler] 已发送比赛结果到群 {group_id}: {result.team1} vs {result.team2}"
+                        f"[HLTV Scheduler] 已发送比赛结果到{delivery.target}: {result.team1} vs {result.team2}"
                     )
-                except Exception as e:
-                    logger.error(f"[HLTV Scheduler] 发送比赛结果到群 {group_id} 失败: {e}")
+            any_success = any(delivery.ok for delivery in deliveries)
 
         except Exception as e:
             logger.error(f"[HLTV Scheduler] 处理比赛结果 {result.id} 失败: {e}")
@@ -682,18 +723,20 @@ class HLTVScheduler:
                 + MessageSegment.image(img)
             )
 
-            for group_id in groups:
-                try:
-                    await bot.send_group_msg(group_id=group_id, message=msg)
-                    any_success = True
+            results = await asyncio.gather(
+                *message_dispatcher.broadcast(
+                    bot, groups, msg, key=f"hltv:map:{completed_map.notification_id}", desc="单图结果"
+                )
+            )
+            for delivery in results:
+                if delivery.ok:
                     logger.info(
-                        f"[HLTV Scheduler] 已发送单图结果到群 {group_id}: "
+                        f"[HLTV Scheduler] 已发送单图结果到{delivery.target}: "
                         f"{completed_map.team1} vs {completed_map.team2} "
                         f"{completed_map.map_name} "
                         f"({completed_map.score1_after_map}-{completed_map.score2_after_map})"
                     )
-                except Exception as e:
-                    logger.error(f"[HLTV Scheduler] 发送单图结果到群 {group_id} 失败: {e}")
+            any_success = any(delivery.ok for delivery in results)
 
         except Exception as e:
             logger.error(
@@ -740,19 +783,22 @@ class HLTVScheduler:
                 logger.debug(f"[HLTV Scheduler] 无法获取 Bot，跳过推送 (event={event_id})")
                 return result
 
-            upcoming = await self.check_match_starts_for_event(event_id)
+            # 三项检查共用同一份快照：matches 页与 results 页本轮各只抓一次
+            snapshot = await self.take_event_snapshot(event_id)
+
+            upcoming = await self.check_match_starts_for_event(event_id, snapshot)
             result["upcoming_matches"] = upcoming
             for match in upcoming:
                 await self.send_match_reminder(bot, match)
 
-            completed_maps = await self.check_completed_map_results_for_event(event_id)
+            completed_maps = await self.check_completed_map_results_for_event(event_id, snapshot)
             result["completed_map_results"] = [
                 m.notification_id for m in completed_maps
             ]
             for completed_map in completed_maps:
                 await self.send_completed_map_result(bot, completed_map)
 
-            new_results = await self.check_match_results_for_event(event_id)
+            new_results = await self.check_match_results_for_event(event_id, snapshot)
             result["new_results"] = [(eid, title, r.id) for eid, title, r in new_results]
             for eid, title, r in new_results:
                 await self.send_match_result(bot, eid, title, r)
@@ -770,12 +816,19 @@ class HLTVScheduler:
         return result
 
     async def run_check(self) -> dict:
-        """手动执行全量检查（调试命令/兼容旧接口）"""
+        """手动执行全量检查（调试命令/兼容旧接口）：各赛事并发检查"""
         result: dict = {"upcoming_matches": [], "completed_map_results": [], "new_results": [], "errors": []}
         event_ids = sorted(data_manager.get_all_subscribed_event_ids())
 
-        for event_id in event_ids:
-            r = await self.run_check_for_event(event_id)
+        per_event = await asyncio.gather(
+            *(self.run_check_for_event(event_id) for event_id in event_ids),
+            return_exceptions=True,
+        )
+        for event_id, r in zip(event_ids, per_event):
+            if isinstance(r, BaseException):
+                logger.error(f"[HLTV Scheduler] 检查失败(event={event_id}): {r}")
+                result["errors"].append(str(r))
+                continue
             result["upcoming_matches"].extend(r.get("upcoming_matches", []))
             result["completed_map_results"].extend(r.get("completed_map_results", []))
             result["new_results"].extend(r.get("new_results", []))
@@ -825,8 +878,11 @@ class HLTVScheduler:
 
         consecutive_empty_rounds = 0
         for idx in range(1, rounds + 1):
+            # 每轮都向源站确认（条件请求），不复用页面缓存，否则相隔几秒的多轮探测等于只探测一次
             results = await self._fetch_with_retry(
-                lambda eid=event_id: hltv_data.get_event_results(eid, max_results=max_results),
+                lambda eid=event_id: hltv_data.get_event_results(
+                    eid, max_results=max_results, max_age=0
+                ),
                 event_id=event_id,
             )
             if results is None:
@@ -893,86 +949,101 @@ class HLTVScheduler:
         )
         return False
 
-    async def daily_maintenance(self) -> dict:
-        """每日维护：自动取消已结束订阅 + 清理去重状态"""
-        removed_events: list[str] = []
-        failed_events: list[str] = []
-        checked_events = sorted(data_manager.get_all_subscribed_event_ids())
+    async def _maintain_event(self, event_id: str) -> Optional[bool]:
+        """单个赛事的每日维护；返回 True=已退订，False=处理失败（下次维护重试），None=无需处理"""
+        state = get_event_state(self._tz, self._end_grace_days, event_id)
 
-        for event_id in checked_events:
+        # UNKNOWN 先尝试补全一次元信息
+        if state == "UNKNOWN":
+            await self._try_refresh_subscription_meta(event_id)
             state = get_event_state(self._tz, self._end_grace_days, event_id)
 
-            # UNKNOWN 先尝试补全一次元信息
-            if state == "UNKNOWN":
-                await self._try_refresh_subscription_meta(event_id)
-                state = get_event_state(self._tz, self._end_grace_days, event_id)
+        sub = data_manager.get_any_subscription_by_event(event_id)
+        event_title = sub.event_title if sub else f"Event #{event_id}"
 
-            sub = data_manager.get_any_subscription_by_event(event_id)
-            event_title = sub.event_title if sub else f"Event #{event_id}"
+        # 1) finished / ENDED：退订前先做多轮最终结果探测
+        if state == "ENDED":
+            can_unsubscribe = await self._probe_and_drain_pending_results_before_unsubscribe(
+                event_id=event_id,
+                event_title=event_title,
+            )
+            if can_unsubscribe and data_manager.unsubscribe_event_global(event_id):
+                self._remove_event_job(event_id)
+                return True
+            if not can_unsubscribe:
+                return False
+            return None
 
-            # 1) finished / ENDED：退订前先做多轮最终结果探测
-            if state == "ENDED":
-                can_unsubscribe = await self._probe_and_drain_pending_results_before_unsubscribe(
-                    event_id=event_id,
-                    event_title=event_title,
-                )
-                if can_unsubscribe and data_manager.unsubscribe_event_global(event_id):
-                    removed_events.append(event_id)
-                    self._remove_event_job(event_id)
-                elif not can_unsubscribe:
-                    failed_events.append(event_id)
-                continue
+        if state == "NOT_ONGOING":
+            self._update_unavailable_streak(
+                event_id,
+                is_unavailable=False,
+                reason="",
+            )
+            return None
 
-            if state == "NOT_ONGOING":
-                self._update_unavailable_streak(
-                    event_id,
-                    is_unavailable=False,
-                    reason="",
-                )
-                continue
+        # 2) matches 页面不可用（基于真实响应元信息）也要先做最终结果探测
+        health = await self._fetch_with_retry(
+            lambda eid=event_id: hltv_data.get_event_matches_health(eid),
+            event_id=event_id,
+        )
+        if not health:
+            return False
 
-            # 2) matches 页面不可用（基于真实响应元信息）也要先做最终结果探测
-            health = await self._fetch_with_retry(
-                lambda eid=event_id: hltv_data.get_event_matches_health(eid),
-                event_id=event_id,
+        should_auto_unsub = self._update_unavailable_streak(
+            event_id,
+            is_unavailable=health.is_unavailable,
+            reason=health.unavailable_reason,
+        )
+        if not health.is_unavailable:
+            return None
+
+        if not self._is_deterministic_matches_unavailable(health.unavailable_reason):
+            # 非确定性问题（如 403/临时网络失败）不自动退订
+            return False
+
+        if state in ("ONGOING", "UPCOMING"):
+            logger.warning(
+                f"[HLTV Scheduler] 跳过自动退订赛事 {event_id}: "
+                f"state={state}, reason={health.unavailable_reason}"
             )
-            if not health:
-                failed_events.append(event_id)
-                continue
+            return False
+        if not should_auto_unsub:
+            return False
 
-            should_auto_unsub = self._update_unavailable_streak(
-                event_id,
-                is_unavailable=health.is_unavailable,
-                reason=health.unavailable_reason,
+        can_unsubscribe = await self._probe_and_drain_pending_results_before_unsubscribe(
+            event_id=event_id,
+            event_title=event_title,
+        )
+        if can_unsubscribe and data_manager.unsubscribe_event_global(event_id):
+            self._remove_event_job(event_id)
+            logger.warning(
+                f"[HLTV Scheduler] 每日维护自动退订赛事 {event_id}: "
+                f"matches 页面不可用(reason={health.unavailable_reason})"
             )
-            if health.is_unavailable:
-                if self._is_deterministic_matches_unavailable(health.unavailable_reason):
-                    if state in ("ONGOING", "UPCOMING"):
-                        failed_events.append(event_id)
-                        logger.warning(
-                            f"[HLTV Scheduler] 跳过自动退订赛事 {event_id}: "
-                            f"state={state}, reason={health.unavailable_reason}"
-                        )
-                        continue
-                    if not should_auto_unsub:
-                        failed_events.append(event_id)
-                        continue
-                    can_unsubscribe = await self._probe_and_drain_pending_results_before_unsubscribe(
-                        event_id=event_id,
-                        event_title=event_title,
-                    )
-                    if can_unsubscribe and data_manager.unsubscribe_event_global(event_id):
-                        removed_events.append(event_id)
-                        self._remove_event_job(event_id)
-                        logger.warning(
-                            f"[HLTV Scheduler] 每日维护自动退订赛事 {event_id}: "
-                            f"matches 页面不可用(reason={health.unavailable_reason})"
-                        )
-                    elif not can_unsubscribe:
-                        failed_events.append(event_id)
-                else:
-                    # 非确定性问题（如 403/临时网络失败）不自动退订
-                    failed_events.append(event_id)
+            return True
+        if not can_unsubscribe:
+            return False
+        return None
+
+    async def daily_maintenance(self) -> dict:
+        """每日维护：自动取消已结束订阅 + 清理去重状态（各赛事并发处理）"""
+        removed_events: list[str] = []
+        failed_events: list[str] = []
+        checked_events = sorted(data_manager.get_all_subscribed_event_ids())
+
+        outcomes = await asyncio.gather(
+            *(self._maintain_event(event_id) for event_id in checked_events),
+            return_exceptions=True,
+        )
+        for event_id, outcome in zip(checked_events, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"[HLTV Scheduler] 每日维护赛事 {event_id} 失败: {outcome}")
+                failed_events.append(event_id)
+            elif outcome is True:
+                removed_events.append(event_id)
+            elif outcome is False:
+                failed_events.append(event_id)
 
         removed_starts, removed_results = data_manager.cleanup_notified_state(
             plugin_config.hltv_notified_ttl_days
@@ -6,8 +6,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
+from typing import TYPE_CHECKING, Optional
 
-from ..models import MatchStats
+from ..models import MatchInfo, MatchStats, MatchTimeHint, ResultInfo
+
+if TYPE_CHECKING:
+    from ..data_source import EventMatchesMeta
 
 
 @dataclass
@@ -42,3 +46,16 @@ class CompletedMapResult:
     score1_after_map: str
     score2_after_map: str
     single_map_stats: MatchStats
+
+
+@dataclass
+class EventSnapshot:
+    """一轮检查开始时抓取的赛事页面快照（开赛提醒 / 单图结果 / 比赛结果三项检查共用）
+
+    抓取失败的部分为 None（与 _fetch_with_retry 的返回约定一致）。
+    """
+
+    event_id: str
+    event_title: str
+    matches: Optional[tuple[list[MatchInfo], list[MatchTimeHint], "EventMatchesMeta"]] = None
+    results: Optional[list[ResultInfo]] = None
@@ -4,33 +4,47 @@ import os
 from nonebot.log import logger
 from PIL import Image
 
+from ..utils.gif_stream import FrameSpool, iter_frames, read_raw_gif, source_palette
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
     download_to_temp,
     ensure_output_dir,
-    load_gif_frames,
+    gif_loop,
     safe_delete_file,
     save_gif,
+    write_gif_stream,
 )
 
 
 def _reverse_gif_file(image_path: str) -> str:
-    frames, durations, meta = load_gif_frames(image_path)
-    if not frames:
-        raise Exception("没有成功提取到任何帧")
-
-    reversed_frames = list(reversed(frames))
-    reversed_durations = list(reversed(durations))
-
     output_dir = ensure_output_dir("nonebot_gif_reverse")
     output_path = output_dir / f"reversed_{os.urandom(4).hex()}.gif"
 
-    if not save_gif(reversed_frames, output_path, durations=reversed_durations, loop=int(meta.get("loop", 0))):
-        raise Exception("GIF保存失败")
+    raw = read_raw_gif(image_path)
+    if raw is not None and raw.frames_independent:
+        # 每帧都是完整画面：直接倒序重排压缩数据，不解码、不重新量化
+        raw.write(output_path, list(reversed(range(len(raw.frames)))))
+        logger.info(f"GIF倒放成功(直接重排): {len(raw.frames)}帧")
+        return str(output_path)
+
+    # 帧之间有增量依赖：合成后的帧暂存到磁盘，再倒序逐帧编码
+    palette, transparent = source_palette(image_path, raw)
+    with FrameSpool.from_frames(iter_frames(image_path)) as spool:
+        frames = ((spool[i], spool.durations[i]) for i in reversed(range(len(spool))))
+        count = write_gif_stream(
+            frames,
+            output_path,
+            palette=palette,
+            transparent=transparent,
+            loop=gif_loop(image_path),
+        )
+    if not count:
+        raise Exception("没有成功提取到任何帧")
 
-    logger.info(f"GIF倒放成功: {len(frames)}帧")
+    logger.info(f"GIF倒放成功: {count}帧")
     return str(output_path)
 
 
@@ -44,7 +58,7 @@ async def reverse_gif(image_url: str) -> str:
             max_bytes=IMAGE_PROCESSOR_MAX_GIF_BYTES,
             timeout_total=IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
         )
-        return await run_in_pool(_reverse_gif_file, temp_path)
+        return await cached_operation(temp_path, "reverse", {}, lambda: run_in_pool(_reverse_gif_file, temp_path))
     except Exception as e:
         logger.error(f"GIF倒放错误: {e}")
         return ""
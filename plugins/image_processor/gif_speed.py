@@ -5,34 +5,65 @@ from pathlib import Path
 from nonebot.log import logger
 from PIL import Image
 
+from ..utils.gif_stream import FrameSpool, iter_frames, pick_frames, read_raw_gif, source_palette
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
     download_to_temp,
     ensure_output_dir,
-    load_gif_frames,
+    gif_loop,
     retime_frames_for_speed,
+    retime_indices_for_speed,
     safe_delete_file,
     save_gif,
+    write_gif_stream,
 )
 
 
 def _change_gif_speed_file(image_path: str, speed_factor: float) -> str:
-    frames, durations, meta = load_gif_frames(image_path)
-    if not frames:
-        raise Exception("没有成功提取到任何帧")
-
-    new_frames, new_durations = retime_frames_for_speed(frames, durations, speed_factor)
-
     output_dir = ensure_output_dir("nonebot_gif_speed")
     output_path = output_dir / f"speed_{speed_factor}x_{os.urandom(4).hex()}.gif"
 
-    if not save_gif(new_frames, output_path, durations=new_durations, loop=int(meta.get("loop", 0))):
-        raise Exception("GIF保存失败")
+    raw = read_raw_gif(image_path)
+    if raw is not None:
+        durations = raw.durations()
+        indices, new_durations = retime_indices_for_speed(durations, speed_factor)
+        # 只改时长（或每帧都是完整画面时抽帧）：直接改写压缩数据块的延时，不解码、不重新量化
+        if indices == list(range(len(durations))) or raw.frames_independent:
+            raw.write(output_path, indices, new_durations)
+            method = "直接改写"
+        else:
+            palette, transparent = source_palette(image_path, raw)
+            write_gif_stream(
+                pick_frames(iter_frames(image_path), indices, new_durations),
+                output_path,
+                palette=palette,
+                transparent=transparent,
+                loop=gif_loop(image_path),
+            )
+            method = "逐帧编码"
+    else:
+        # 非 GIF 动图（WebP / APNG）：先暂存帧以得到各帧时长
+        palette, transparent = source_palette(image_path)
+        with FrameSpool.from_frames(iter_frames(image_path)) as spool:
+            durations = list(spool.durations)
+            indices, new_durations = retime_indices_for_speed(durations, speed_factor)
+            write_gif_stream(
+                ((spool[i], d) for i, d in zip(indices, new_durations)),
+                output_path,
+                palette=palette,
+                transparent=transparent,
+                loop=gif_loop(image_path),
+            )
+        method = "逐帧编码"
+
+    if not indices:
+        raise Exception("没有成功提取到任何帧")
 
     logger.info(
-        f"GIF倍速处理成功: {len(frames)}帧 -> {len(new_frames)}帧, "
+        f"GIF倍速处理成功({method}): {len(durations)}帧 -> {len(indices)}帧, "
         f"原时长={sum(durations)}ms, 新时长={sum(new_durations)}ms, 倍速={speed_factor}"
     )
     return str(output_path)
@@ -49,7 +80,12 @@ async def change_gif_speed(image_url: str, speed_factor: float) -> str:
             max_bytes=IMAGE_PROCESSOR_MAX_GIF_BYTES,
             timeout_total=IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
         )
-        return await run_in_pool(_change_gif_speed_file, temp_path, speed_factor)
+        return await cached_operation(
+            temp_path,
+            "speed",
+            {"speed_factor": speed_factor},
+            lambda: run_in_pool(_change_gif_speed_file, temp_path, speed_factor),
+        )
     except Exception as e:
         logger.error(f"GIF倍速处理错误: {e}")
         return ""
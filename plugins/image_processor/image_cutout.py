@@ -12,11 +12,11 @@ from PIL import Image
 from nonebot.log import logger
 
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
     IMAGE_PROCESSOR_MAX_IMAGE_BYTES,
-    cleanup_files,
     download_to_temp,
     ensure_output_dir,
     load_gif_frames,
@@ -60,8 +60,15 @@ MAX_FOREGROUND_RATIO = 0.98
 
 # GIF 抠图限制，避免逐帧 rembg 拖垮 bot
 CUTOUT_GIF_MAX_FRAMES = int(os.getenv("HAKUBOT_CUTOUT_GIF_MAX_FRAMES", "80"))
+# 需要 rembg 推理的关键帧数上限（近似相同的相邻帧复用 alpha，不计入）
 CUTOUT_GIF_REMBG_MAX_FRAMES = int(os.getenv("HAKUBOT_CUTOUT_GIF_REMBG_MAX_FRAMES", "12"))
 
+# GIF 批量抠图：关键帧分批直接送入 onnxruntime，每批帧数
+CUTOUT_REMBG_BATCH_SIZE = int(os.getenv("HAKUBOT_REMBG_BATCH_SIZE", "2"))
+# 相邻帧复用 alpha：缩略灰度图与上一关键帧的平均绝对差（0~255）不超过该值时直接复用
+CUTOUT_MASK_REUSE_MAX_DIFF = float(os.getenv("HAKUBOT_CUTOUT_MASK_REUSE_DIFF", "2.0"))
+CUTOUT_MASK_REUSE_THUMB_SIZE = 64
+
 # 已有透明图快速返回阈值
 EXISTING_ALPHA_TRANSPARENT_RATIO = float(os.getenv("HAKUBOT_CUTOUT_EXISTING_ALPHA_RATIO", "0.01"))
 
@@ -80,6 +87,8 @@ REMBG_MODEL_FALLBACK = os.getenv("HAKUBOT_REMBG_MODEL_FALLBACK", "isnet-general-
 # - cpu: 强制 CPU
 # - cuda/gpu: 强制 GPU（若不可用会回退 CPU）
 REMBG_DEVICE = os.getenv("HAKUBOT_REMBG_DEVICE", "auto").strip().lower()
+# onnxruntime 单次推理的线程数：0 表示按 CPU 核数自动设置
+REMBG_THREADS = int(os.getenv("HAKUBOT_REMBG_THREADS", "0"))
 _REMBG_SESSION_CACHE = {}
 # 线程池并发访问 session 缓存时的保护锁
 _REMBG_SESSION_LOCK = threading.Lock()
@@ -95,6 +104,17 @@ LINEART_MIN_CONTOUR_AREA = 200
 LINEART_EDGE_CLOSE_ITERS = 2
 LINEART_EDGE_DILATE_ITERS = 2
 
+# 可批量推理的模型：其 session.predict 为 normalize -> inner_session.run -> min-max -> 缩放回原尺寸，
+# 批量推理按同样流程直接调用 inner_session；其他模型逐帧走 session.predict
+_REMBG_BATCH_MODELS = {"isnet-anime", "isnet-general-use", "u2net"}
+# id(session) -> session.predict 实际使用的 (mean, std, size)，创建 session 时探测；None 表示不批量
+# （session 创建后一直缓存，id 不会复用）
+_REMBG_NORMALIZE_PARAMS: dict[int, tuple | None] = {}
+# 已用 session.predict 校验过批量结果的 session
+_REMBG_BATCH_VERIFIED: set[int] = set()
+# 导出为固定 batch=1 的模型：批量推理失败一次后记下，之后直接逐帧
+_REMBG_NO_BATCH: set[str] = set()
+
 
 def _select_onnx_providers() -> list[str]:
     """为 rembg/new_session 选择 onnxruntime providers（支持 CUDA 自动探测）。"""
@@ -125,6 +145,74 @@ def _select_onnx_providers() -> list[str]:
     return ["CPUExecutionProvider"]
 
 
+def _rembg_session_options():
+    """按宿主机 CPU 设置 onnxruntime 线程：单个推理用满核数，算子间串行（bot 内并发由线程池控制）"""
+    import onnxruntime as ort  # type: ignore
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = REMBG_THREADS if REMBG_THREADS > 0 else (os.cpu_count() or 1)
+    opts.inter_op_num_threads = 1
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return opts
+
+
+def _new_rembg_session(model_name: str, providers: list[str]):
+    from rembg.session_factory import new_session
+
+    try:
+        from rembg.sessions import sessions_class
+
+        session_class = next(cls for cls in sessions_class if cls.name() == model_name)
+        return session_class(model_name, _rembg_session_options(), providers=providers)
+    except Exception as e:
+        # 不同 rembg 版本的 session 构造参数不同，失败时退回默认参数
+        logger.debug(f"rembg session 线程参数设置失败，使用默认参数: {e}")
+        return new_session(model_name, providers=providers)
+
+
+def _get_rembg_session(model_name: str, providers: list[str]):
+    key = (model_name, tuple(providers))
+    # double-check：先无锁 get，miss 后加锁再 get-or-create，避免并发重复建 session
+    session = _REMBG_SESSION_CACHE.get(key)
+    if session is None:
+        with _REMBG_SESSION_LOCK:
+            session = _REMBG_SESSION_CACHE.get(key)
+            if session is None:
+                session = _new_rembg_session(model_name, providers)
+                if model_name in _REMBG_BATCH_MODELS:
+                    _REMBG_NORMALIZE_PARAMS[id(session)] = _probe_rembg_normalize(session)
+                _REMBG_SESSION_CACHE[key] = session
+    return session
+
+
+class _NormalizeProbe(Exception):
+    pass
+
+
+def _probe_rembg_normalize(session) -> tuple | None:
+    """
+    探测 session.predict 传给 normalize 的 (mean, std, size)，不依赖 rembg 内部常量：
+    临时用实例属性替换 normalize，记下参数后抛异常中断，不做推理。探测失败返回 None（逐帧 predict）。
+    """
+    captured = []
+
+    def _record(img, mean, std, size, *args, **kwargs):
+        captured.append((tuple(mean), tuple(std), tuple(size)))
+        raise _NormalizeProbe
+
+    session.normalize = _record
+    try:
+        session.predict(Image.new("RGB", (8, 8)))
+    except _NormalizeProbe:
+        pass
+    except Exception as e:
+        logger.debug(f"rembg session 预处理参数探测失败，逐帧推理: {e}")
+    finally:
+        del session.normalize
+    return captured[0] if captured else None
+
+
 async def download_image(url: str, *, max_bytes: int = IMAGE_PROCESSOR_MAX_IMAGE_BYTES) -> str:
     """下载图片到临时目录"""
     return await download_to_temp(
@@ -144,7 +232,11 @@ def _read_cv_bgr(image_path: str) -> np.ndarray:
     img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
     if img is None:
         raise Exception("无法读取图像")
+    return _compose_on_white(img)
 
+
+def _compose_on_white(img: np.ndarray) -> np.ndarray:
+    """灰度 / BGR / BGRA（uint8）转 BGR，带 alpha 时合成到白底"""
     if img.ndim == 2:
         return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
 
@@ -259,27 +351,39 @@ def _mask_to_rgba(img_bgr: np.ndarray, fg_mask: np.ndarray) -> np.ndarray:
     return bgra
 
 
-def _alpha_quality_from_png_path(png_path: str) -> tuple[float, float]:
+def _alpha_quality(alpha: np.ndarray) -> tuple[float, float]:
     """
-    对输出 PNG 的 alpha 做一个粗略“质量评估”，用于检测“只剩描边/前景过小”。
+    对 alpha 做一个粗略“质量评估”，用于检测“只剩描边/前景过小”。
     返回：(fg_ratio, core_ratio)
       - fg_ratio: alpha>8 的比例
       - core_ratio: 对 fg 侵蚀 3 次后仍为前景的比例（越大越像“有实体填充”）
     """
+    fg = (alpha > 8).astype(np.uint8)
+    fg_ratio = float(fg.mean())
+    core = fg
+    if fg_ratio > 0:
+        core = cv2.erode(core, np.ones((3, 3), np.uint8), iterations=3)
+    core_ratio = float(core.mean())
+    return fg_ratio, core_ratio
+
+
+def _alpha_quality_from_png_path(png_path: str) -> tuple[float, float]:
+    """对输出 PNG 的 alpha 做质量评估，见 _alpha_quality"""
     try:
         im_out = Image.open(png_path).convert("RGBA")
-        alpha = np.array(im_out)[:, :, 3]
-        fg = (alpha > 8).astype(np.uint8)
-        fg_ratio = float(fg.mean())
-        core = fg
-        if fg_ratio > 0:
-            core = cv2.erode(core, np.ones((3, 3), np.uint8), iterations=3)
-        core_ratio = float(core.mean())
-        return fg_ratio, core_ratio
+        return _alpha_quality(np.array(im_out)[:, :, 3])
     except Exception:
         return 0.0, 0.0
 
 
+def _write_cutout(bgra: np.ndarray, prefix: str) -> str:
+    output_dir = Path(tempfile.gettempdir()) / "nonebot_image_cutout"
+    output_dir.mkdir(exist_ok=True)
+    output_path = output_dir / f"{prefix}_{os.urandom(4).hex()}.png"
+    cv2.imwrite(str(output_path), bgra)
+    return str(output_path)
+
+
 def _remove_background_lineart_sync(image_path: str) -> str:
     """
     线稿/描边类表情包兜底（同步重活，在线程池中执行）：
@@ -288,67 +392,68 @@ def _remove_background_lineart_sync(image_path: str) -> str:
     """
     try:
         img_bgr = _read_cv_bgr(image_path)
-        h, w = img_bgr.shape[:2]
-
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-
-        # 用自适应阈值抓“深色描边”（比单纯 Canny 稳定一些）
-        line = cv2.adaptiveThreshold(
-            gray,
-            255,
-            cv2.ADAPTIVE_THRESH_MEAN_C,
-            cv2.THRESH_BINARY_INV,
-            15,
-            8,
-        )
+        fg = _lineart_fg_mask(img_bgr)
+        if fg is None:
+            return ""
+        return _write_cutout(_mask_to_rgba(img_bgr, fg), "cutout_lineart")
+
+    except Exception as e:
+        logger.error(f"线稿兜底抠图错误: {e}")
+        return ""
 
-        # 再叠加一点边缘，补一些断开的线
-        edges = cv2.Canny(gray, 50, 150)
-        walls = cv2.bitwise_or(line, edges)
 
-        kernel = np.ones((3, 3), np.uint8)
+def _lineart_fg_mask(img_bgr: np.ndarray) -> np.ndarray | None:
+    """线稿兜底的前景 mask（uint8 {0,1}），面积不合理时返回 None"""
+    h, w = img_bgr.shape[:2]
 
-        if LINEART_EDGE_CLOSE_ITERS and LINEART_EDGE_CLOSE_ITERS > 0:
-            walls = cv2.morphologyEx(
-                walls, cv2.MORPH_CLOSE, kernel, iterations=LINEART_EDGE_CLOSE_ITERS
-            )
-        if LINEART_EDGE_DILATE_ITERS and LINEART_EDGE_DILATE_ITERS > 0:
-            walls = cv2.dilate(walls, kernel, iterations=LINEART_EDGE_DILATE_ITERS)
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
 
-        walls = (walls > 0).astype(np.uint8)
+    # 用自适应阈值抓“深色描边”（比单纯 Canny 稳定一些）
+    line = cv2.adaptiveThreshold(
+        gray,
+        255,
+        cv2.ADAPTIVE_THRESH_MEAN_C,
+        cv2.THRESH_BINARY_INV,
+        15,
+        8,
+    )
 
-        # free: 255 表示可通行区域（非墙），0 表示墙
-        free = ((1 - walls) * 255).astype(np.uint8)
+    # 再叠加一点边缘，补一些断开的线
+    edges = cv2.Canny(gray, 50, 150)
+    walls = cv2.bitwise_or(line, edges)
 
-        # flood fill：从图像边界把外部区域填成 0，剩下的 255 就是“被墙围起来的内部”
-        mask = np.zeros((h + 2, w + 2), np.uint8)
+    kernel = np.ones((3, 3), np.uint8)
 
-        # 多个种子点，提高鲁棒性
-        seeds = [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1), (w // 2, 0), (w // 2, h - 1)]
-        for x, y in seeds:
-            if free[y, x] == 255:
-                cv2.floodFill(free, mask, (x, y), 0)
+    if LINEART_EDGE_CLOSE_ITERS and LINEART_EDGE_CLOSE_ITERS > 0:
+        walls = cv2.morphologyEx(
+            walls, cv2.MORPH_CLOSE, kernel, iterations=LINEART_EDGE_CLOSE_ITERS
+        )
+    if LINEART_EDGE_DILATE_ITERS and LINEART_EDGE_DILATE_ITERS > 0:
+        walls = cv2.dilate(walls, kernel, iterations=LINEART_EDGE_DILATE_ITERS)
 
-        inside = (free == 255).astype(np.uint8)
+    walls = (walls > 0).astype(np.uint8)
 
-        # 前景 = inside + walls
-        fg = np.maximum(inside, walls).astype(np.uint8)
+    # free: 255 表示可通行区域（非墙），0 表示墙
+    free = ((1 - walls) * 255).astype(np.uint8)
 
-        area_ratio = float(fg.mean())
-        if not (LINEART_MIN_AREA_RATIO <= area_ratio <= LINEART_MAX_AREA_RATIO):
-            return ""
+    # flood fill：从图像边界把外部区域填成 0，剩下的 255 就是“被墙围起来的内部”
+    mask = np.zeros((h + 2, w + 2), np.uint8)
 
-        rgba = _mask_to_rgba(img_bgr, fg)
+    # 多个种子点，提高鲁棒性
+    seeds = [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1), (w // 2, 0), (w // 2, h - 1)]
+    for x, y in seeds:
+        if free[y, x] == 255:
+            cv2.floodFill(free, mask, (x, y), 0)
 
-        output_dir = Path(tempfile.gettempdir()) / "nonebot_image_cutout"
-        output_dir.mkdir(exist_ok=True)
-        output_path = output_dir / f"cutout_lineart_{os.urandom(4).hex()}.png"
-        cv2.imwrite(str(output_path), rgba)
-        return str(output_path)
+    inside = (free == 255).astype(np.uint8)
 
-    except Exception as e:
-        logger.error(f"线稿兜底抠图错误: {e}")
-        return ""
+    # 前景 = inside + walls
+    fg = np.maximum(inside, walls).astype(np.uint8)
+
+    area_ratio = float(fg.mean())
+    if not (LINEART_MIN_AREA_RATIO <= area_ratio <= LINEART_MAX_AREA_RATIO):
+        return None
+    return fg
 
 
 async def remove_background_lineart(image_path: str) -> str:
@@ -363,78 +468,78 @@ def _remove_background_solid_bg_sync(image_path: str) -> str:
     """
     try:
         img_bgr = _read_cv_bgr(image_path)
-        h, w = img_bgr.shape[:2]
-
-        bg_lab, is_solid = _estimate_bg_lab(img_bgr)
-        if not is_solid:
+        fg = _solid_bg_fg_mask(img_bgr)
+        if fg is None:
             return ""
+        return _write_cutout(_mask_to_rgba(img_bgr, fg), "cutout_solid")
+    except Exception as e:
+        logger.error(f"纯色背景抠图错误: {e}")
+        return ""
 
-        # 先做边缘检测，构造“边缘屏障”，防止背景连通域从抗锯齿边缘渗入前景内部
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-
-        edge_kernel = np.ones((3, 3), np.uint8)
-        edge_barrier = edges
-        if EDGE_BARRIER_ITERS and EDGE_BARRIER_ITERS > 0:
-            edge_barrier = cv2.dilate(edge_barrier, edge_kernel, iterations=EDGE_BARRIER_ITERS)
-        edge_barrier = (edge_barrier > 0).astype(np.uint8)
-
-        lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
-        dist = np.linalg.norm(lab - bg_lab.reshape(1, 1, 3), axis=2)
-
-        # 低对比场景检测：如果主体也接近背景色，纯色阈值分割会“只剩描边”
-        # 用中心区域（通常是主体所在）做对比度判定
-        ch, cw = max(1, h // 4), max(1, w // 4)
-        center = dist[ch : h - ch, cw : w - cw]
-        if center.size > 0:
-            # 中心区域如果连 90 分位都不够“远离背景”，说明前景/背景不可分
-            p90 = float(np.percentile(center, 90))
-            if p90 < SOLID_BG_DIST_THRESHOLD * 1.25:
-                return ""
 
-        bg_candidate = (dist < SOLID_BG_DIST_THRESHOLD).astype(np.uint8)
+def _solid_bg_fg_mask(img_bgr: np.ndarray) -> np.ndarray | None:
+    """近纯色背景抠图的前景 mask（uint8 {0,1}），不适用 / 判定失败时返回 None"""
+    h, w = img_bgr.shape[:2]
 
-        # 关键：边缘作为“墙”，不允许 bg_candidate 通过边缘连通到主体内部
-        bg_candidate = (bg_candidate & (1 - edge_barrier)).astype(np.uint8)
+    bg_lab, is_solid = _estimate_bg_lab(img_bgr)
+    if not is_solid:
+        return None
 
-        bg = _connected_bg_from_border(bg_candidate)
+    # 先做边缘检测，构造“边缘屏障”，防止背景连通域从抗锯齿边缘渗入前景内部
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
 
-        # 渗漏检测：如果边缘屏障区域大量被判成背景，说明发生了“穿透”，直接失败回退 rembg
-        barrier_pixels = int(edge_barrier.sum())
-        if barrier_pixels > 0:
-            leak_ratio = float(bg[edge_barrier > 0].mean())
-            if leak_ratio > EDGE_BG_LEAK_MAX_RATIO:
-                return ""
+    edge_kernel = np.ones((3, 3), np.uint8)
+    edge_barrier = edges
+    if EDGE_BARRIER_ITERS and EDGE_BARRIER_ITERS > 0:
+        edge_barrier = cv2.dilate(edge_barrier, edge_kernel, iterations=EDGE_BARRIER_ITERS)
+    edge_barrier = (edge_barrier > 0).astype(np.uint8)
 
-        fg = (1 - bg).astype(np.uint8)
+    lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB).astype(np.float32)
+    dist = np.linalg.norm(lab - bg_lab.reshape(1, 1, 3), axis=2)
 
-        # 边缘保护：把明显边缘像素强制视为前景，避免阈值误杀细笔画/浅色字边缘
-        protect = edges
-        if EDGE_DILATE_ITERS and EDGE_DILATE_ITERS > 0:
-            protect = cv2.dilate(protect, edge_kernel, iterations=EDGE_DILATE_ITERS)
-        protect_bin = (protect > 0).astype(np.uint8)
-        fg = np.maximum(fg, protect_bin)
+    # 低对比场景检测：如果主体也接近背景色，纯色阈值分割会“只剩描边”
+    # 用中心区域（通常是主体所在）做对比度判定
+    ch, cw = max(1, h // 4), max(1, w // 4)
+    center = dist[ch : h - ch, cw : w - cw]
+    if center.size > 0:
+        # 中心区域如果连 90 分位都不够“远离背景”，说明前景/背景不可分
+        p90 = float(np.percentile(center, 90))
+        if p90 < SOLID_BG_DIST_THRESHOLD * 1.25:
+            return None
 
-        # “只剩描边”检测：如果去掉边缘保护后，核心前景几乎没有，则认为失败回退 rembg
-        core = (fg & (1 - protect_bin)).astype(np.uint8)
-        if float(core.mean()) < 0.02:
-            return ""
+    bg_candidate = (dist < SOLID_BG_DIST_THRESHOLD).astype(np.uint8)
 
-        fg_ratio = float(fg.mean())
-        if fg_ratio < MIN_FOREGROUND_RATIO or fg_ratio > MAX_FOREGROUND_RATIO:
-            return ""
+    # 关键：边缘作为“墙”，不允许 bg_candidate 通过边缘连通到主体内部
+    bg_candidate = (bg_candidate & (1 - edge_barrier)).astype(np.uint8)
 
-        rgba = _mask_to_rgba(img_bgr, fg)
+    bg = _connected_bg_from_border(bg_candidate)
 
-        output_dir = Path(tempfile.gettempdir()) / "nonebot_image_cutout"
-        output_dir.mkdir(exist_ok=True)
-        output_path = output_dir / f"cutout_solid_{os.urandom(4).hex()}.png"
-        cv2.imwrite(str(output_path), rgba)
+    # 渗漏检测：如果边缘屏障区域大量被判成背景，说明发生了“穿透”，直接失败回退 rembg
+    barrier_pixels = int(edge_barrier.sum())
+    if barrier_pixels > 0:
+        leak_ratio = float(bg[edge_barrier > 0].mean())
+        if leak_ratio > EDGE_BG_LEAK_MAX_RATIO:
+            return None
 
-        return str(output_path)
-    except Exception as e:
-        logger.error(f"纯色背景抠图错误: {e}")
-        return ""
+    fg = (1 - bg).astype(np.uint8)
+
+    # 边缘保护：把明显边缘像素强制视为前景，避免阈值误杀细笔画/浅色字边缘
+    protect = edges
+    if EDGE_DILATE_ITERS and EDGE_DILATE_ITERS > 0:
+        protect = cv2.dilate(protect, edge_kernel, iterations=EDGE_DILATE_ITERS)
+    protect_bin = (protect > 0).astype(np.uint8)
+    fg = np.maximum(fg, protect_bin)
+
+    # “只剩描边”检测：如果去掉边缘保护后，核心前景几乎没有，则认为失败回退 rembg
+    core = (fg & (1 - protect_bin)).astype(np.uint8)
+    if float(core.mean()) < 0.02:
+        return None
+
+    fg_ratio = float(fg.mean())
+    if fg_ratio < MIN_FOREGROUND_RATIO or fg_ratio > MAX_FOREGROUND_RATIO:
+        return None
+    return fg
 
 
 async def remove_background_solid_bg(image_path: str) -> str:
@@ -449,7 +554,6 @@ def _remove_background_rembg_sync(image_path: str) -> str:
     """
     try:
         from rembg import remove
-        from rembg.session_factory import new_session
 
         providers = _select_onnx_providers()
         logger.info(f"rembg providers: {providers} (device={REMBG_DEVICE})")
@@ -476,30 +580,12 @@ def _remove_background_rembg_sync(image_path: str) -> str:
 
         def _run_model(model_name: str) -> bytes:
             logger.info(f"rembg model: {model_name}")
-            key = (model_name, tuple(providers))
-            # double-check：先无锁 get，miss 后加锁再 get-or-create，避免并发重复建 session
-            session = _REMBG_SESSION_CACHE.get(key)
-            if session is None:
-                with _REMBG_SESSION_LOCK:
-                    session = _REMBG_SESSION_CACHE.get(key)
-                    if session is None:
-                        session = new_session(model_name, providers=providers)
-                        _REMBG_SESSION_CACHE[key] = session
-            return remove(input_data, session=session)
+            return remove(input_data, session=_get_rembg_session(model_name, providers))
 
         def _score_alpha(png_bytes: bytes) -> tuple[float, float]:
             """返回 (fg_ratio, core_ratio)"""
             im_out = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
-            alpha = np.array(im_out)[:, :, 3]
-            fg = (alpha > 8).astype(np.uint8)
-            fg_ratio = float(fg.mean())
-
-            # core: 侵蚀后仍为前景的比例，用于检测“只剩描边”
-            core = fg
-            if fg_ratio > 0:
-                core = cv2.erode(core, np.ones((3, 3), np.uint8), iterations=3)
-            core_ratio = float(core.mean())
-            return fg_ratio, core_ratio
+            return _alpha_quality(np.array(im_out)[:, :, 3])
 
         # 第一次：primary
         out1 = _run_model(REMBG_MODEL_PRIMARY)
@@ -551,35 +637,35 @@ def _remove_background_opencv_sync(image_path: str) -> str:
     """使用 OpenCV 的 GrabCut（同步重活，在线程池中执行）"""
     try:
         img_bgr = _read_cv_bgr(image_path)
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-
-        mask = np.zeros(img_rgb.shape[:2], np.uint8)
-        bgd_model = np.zeros((1, 65), np.float64)
-        fgd_model = np.zeros((1, 65), np.float64)
+        fg = _grabcut_fg_mask(img_bgr)
+        if fg is None:
+            return ""
+        return _write_cutout(_mask_to_rgba(img_bgr, fg), "cutout_cv")
+    except Exception as e:
+        logger.error(f"OpenCV抠图错误: {e}")
+        return ""
 
-        height, width = img_rgb.shape[:2]
-        rect = (int(width * 0.08), int(height * 0.08), int(width * 0.84), int(height * 0.84))
 
-        cv2.grabCut(img_rgb, mask, rect, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_RECT)
+def _grabcut_fg_mask(img_bgr: np.ndarray) -> np.ndarray | None:
+    """GrabCut 前景 mask（uint8 {0,1}），前景比例不合理时返回 None"""
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
 
-        # 0/2 是背景，1/3 是前景
-        fg = np.where((mask == 0) | (mask == 2), 0, 1).astype("uint8")
+    mask = np.zeros(img_rgb.shape[:2], np.uint8)
+    bgd_model = np.zeros((1, 65), np.float64)
+    fgd_model = np.zeros((1, 65), np.float64)
 
-        fg_ratio = float(fg.mean())
-        if fg_ratio < MIN_FOREGROUND_RATIO or fg_ratio > MAX_FOREGROUND_RATIO:
-            return ""
+    height, width = img_rgb.shape[:2]
+    rect = (int(width * 0.08), int(height * 0.08), int(width * 0.84), int(height * 0.84))
 
-        rgba = _mask_to_rgba(cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR), fg)
+    cv2.grabCut(img_rgb, mask, rect, bgd_model, fgd_model, 5, cv2.GC_INIT_WITH_RECT)
 
-        output_dir = Path(tempfile.gettempdir()) / "nonebot_image_cutout"
-        output_dir.mkdir(exist_ok=True)
-        output_path = output_dir / f"cutout_cv_{os.urandom(4).hex()}.png"
-        cv2.imwrite(str(output_path), rgba)
+    # 0/2 是背景，1/3 是前景
+    fg = np.where((mask == 0) | (mask == 2), 0, 1).astype("uint8")
 
-        return str(output_path)
-    except Exception as e:
-        logger.error(f"OpenCV抠图错误: {e}")
-        return ""
+    fg_ratio = float(fg.mean())
+    if fg_ratio < MIN_FOREGROUND_RATIO or fg_ratio > MAX_FOREGROUND_RATIO:
+        return None
+    return fg
 
 
 async def remove_background_opencv(image_path: str) -> str:
@@ -593,27 +679,7 @@ def _remove_background_simple_sync(image_path: str) -> str:
     通过检测近白背景并保留边缘。
     """
     try:
-        img = Image.open(image_path).convert("RGBA")
-        img_array = np.array(img)
-
-        r, g, b, a = (
-            img_array[:, :, 0],
-            img_array[:, :, 1],
-            img_array[:, :, 2],
-            img_array[:, :, 3],
-        )
-
-        white_threshold = 235
-        white_mask = (r > white_threshold) & (g > white_threshold) & (b > white_threshold)
-
-        gray = cv2.cvtColor(img_array[:, :, :3], cv2.COLOR_RGB2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
-        edge_mask = edges > 0
-
-        background_mask = white_mask & ~edge_mask
-        img_array[background_mask] = [0, 0, 0, 0]
-
+        img_array = _simple_cutout_rgba(np.array(Image.open(image_path).convert("RGBA")))
         result_img = Image.fromarray(img_array, "RGBA")
 
         output_dir = Path(tempfile.gettempdir()) / "nonebot_image_cutout"
@@ -627,20 +693,39 @@ def _remove_background_simple_sync(image_path: str) -> str:
         return ""
 
 
+def _simple_cutout_rgba(img_array: np.ndarray) -> np.ndarray:
+    """近白背景置透明、保留边缘（原地修改并返回 RGBA 数组）"""
+    r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
+
+    white_threshold = 235
+    white_mask = (r > white_threshold) & (g > white_threshold) & (b > white_threshold)
+
+    gray = cv2.cvtColor(img_array[:, :, :3], cv2.COLOR_RGB2GRAY)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=1)
+    edge_mask = edges > 0
+
+    background_mask = white_mask & ~edge_mask
+    img_array[background_mask] = [0, 0, 0, 0]
+    return img_array
+
+
 async def remove_background_simple(image_path: str) -> str:
     """最简方案兜底（线程池中执行同步计算）"""
     return await run_in_pool(_remove_background_simple_sync, image_path)
 
 
+def _has_existing_alpha(alpha: np.ndarray) -> bool:
+    return float((alpha < 250).mean()) >= EXISTING_ALPHA_TRANSPARENT_RATIO
+
+
 def _preserve_existing_alpha(image_path: str) -> str:
     try:
         with Image.open(image_path) as im:
             if im.mode not in ("RGBA", "LA", "P"):
                 return ""
             rgba = im.convert("RGBA")
-            alpha = np.array(rgba)[:, :, 3]
-            transparent_ratio = float((alpha < 250).mean())
-            if transparent_ratio < EXISTING_ALPHA_TRANSPARENT_RATIO:
+            if not _has_existing_alpha(np.array(rgba)[:, :, 3]):
                 return ""
 
             output_dir = ensure_output_dir("nonebot_image_cutout")
@@ -651,15 +736,18 @@ def _preserve_existing_alpha(image_path: str) -> str:
         return ""
 
 
-async def remove_background_file(image_path: str, *, allow_rembg: bool = True) -> str:
-    """对本地文件做抠图：已有透明优先 -> 纯色背景 -> rembg -> grabcut -> simple"""
+async def _remove_background_file(image_path: str, *, allow_rembg: bool = True) -> tuple[str, bool]:
+    """
+    返回 (结果路径, 是否走的主路径)。
+    rembg 本该执行却失败（未安装 / 推理报错）时退到 grabcut / simple，这类降级结果不是主路径。
+    """
     alpha = await run_in_pool(_preserve_existing_alpha, image_path)
     if alpha and os.path.exists(alpha):
-        return alpha
+        return alpha, True
 
     solid = await remove_background_solid_bg(image_path)
     if solid and os.path.exists(solid):
-        return solid
+        return solid, True
 
     if allow_rembg:
         rem = await remove_background_rembg(image_path)
@@ -669,62 +757,244 @@ async def remove_background_file(image_path: str, *, allow_rembg: bool = True) -
                 lineart = await remove_background_lineart(image_path)
                 if lineart and os.path.exists(lineart):
                     await safe_delete_file(rem)
-                    return lineart
-            return rem
+                    return lineart, True
+            return rem, True
 
     cvp = await remove_background_opencv(image_path)
     if cvp and os.path.exists(cvp):
-        return cvp
+        return cvp, not allow_rembg
 
     simp = await remove_background_simple(image_path)
     if simp and os.path.exists(simp):
-        return simp
+        return simp, not allow_rembg
+
+    return "", False
+
 
-    return ""
+async def remove_background_file(image_path: str, *, allow_rembg: bool = True) -> str:
+    """对本地文件做抠图：已有透明优先 -> 纯色背景 -> rembg -> grabcut -> simple"""
+    result_path, _ = await _remove_background_file(image_path, allow_rembg=allow_rembg)
+    return result_path
 
 
-def _load_frame_rgba(path: str) -> Image.Image:
-    """读取处理后的单帧并转为 RGBA（同步，在线程池中执行）"""
-    with Image.open(path) as processed_frame:
-        return processed_frame.convert("RGBA").copy()
+# ========= GIF 批量抠图（帧全程在内存中，不落临时 PNG） =========
 
 
-async def remove_background_gif(image_path: str) -> str:
-    """处理 GIF 抠图 - 逐帧处理（复用同样的策略）"""
+def _rembg_predict_alphas(session, model_name: str, images: list[Image.Image]) -> list[np.ndarray]:
+    """
+    对一组帧做 rembg 推理，返回每帧 alpha（uint8，原尺寸）。
+    可批量的模型按 session 自身的预处理参数分批直接送入 onnxruntime（省去 PNG 编解码），
+    首次使用时与 session.predict 的结果对比，不一致（rembg 改了预处理 / 后处理）则之后逐帧 predict；
+    其他模型逐帧走 session.predict。
+    """
+    params = _REMBG_NORMALIZE_PARAMS.get(id(session))
+    if params is not None and id(session) not in _REMBG_BATCH_VERIFIED:
+        expected = np.array(session.predict(images[0])[0].convert("L"), dtype=np.int16)
+        actual = _rembg_batch_alphas(session, model_name, params, images[:1])[0].astype(np.int16)
+        _REMBG_BATCH_VERIFIED.add(id(session))
+        if expected.shape != actual.shape or np.abs(expected - actual).max() > 1:
+            logger.warning(f"rembg 模型 {model_name} 批量推理结果与 session.predict 不一致，改为逐帧推理")
+            _REMBG_NORMALIZE_PARAMS[id(session)] = None
+            params = None
+
+    if params is None:
+        return [np.array(session.predict(img)[0].convert("L")) for img in images]
+    return _rembg_batch_alphas(session, model_name, params, images)
+
+
+def _rembg_batch_alphas(session, model_name: str, params: tuple, images: list[Image.Image]) -> list[np.ndarray]:
+    mean, std, size = params
+    feeds = [session.normalize(img, mean, std, size) for img in images]
+    input_name = next(iter(feeds[0]))
+    batch_size = 1 if model_name in _REMBG_NO_BATCH else max(1, CUTOUT_REMBG_BATCH_SIZE)
+
+    preds: list[np.ndarray] = []
+    start = 0
+    while start < len(feeds):
+        chunk = feeds[start : start + batch_size]
+        batch = np.concatenate([feed[input_name] for feed in chunk], axis=0)
+        try:
+            outputs = session.inner_session.run(None, {input_name: batch})
+        except Exception as e:
+            if len(chunk) == 1:
+                raise
+            # 模型导出为固定 batch=1，之后逐帧
+            logger.info(f"rembg 模型 {model_name} 不支持批量推理，改为逐帧: {e}")
+            _REMBG_NO_BATCH.add(model_name)
+            batch_size = 1
+            continue
+        preds.extend(outputs[0][:, 0, :, :])
+        start += len(chunk)
+
+    alphas: list[np.ndarray] = []
+    for img, pred in zip(images, preds):
+        # 与 rembg 一致：逐帧 min-max 归一化后缩放回原尺寸
+        lo, hi = float(pred.min()), float(pred.max())
+        pred = (pred - lo) / (hi - lo) if hi > lo else np.zeros_like(pred)
+        mask = Image.fromarray((pred * 255).astype(np.uint8)).resize(img.size, Image.LANCZOS)
+        alphas.append(np.array(mask))
+    return alphas
+
+
+def _frame_signature(frame: Image.Image) -> np.ndarray:
+    thumb = frame.convert("L").resize((CUTOUT_MASK_REUSE_THUMB_SIZE, CUTOUT_MASK_REUSE_THUMB_SIZE), Image.BILINEAR)
+    return np.asarray(thumb, dtype=np.int16)
+
+
+def _is_poor_alpha(score: tuple[float, float]) -> bool:
+    return score[0] < REMBG_MIN_FG_RATIO or score[1] < REMBG_MIN_CORE_RATIO
+
+
+def _sequence_score(scores: list[tuple[float, float]]) -> tuple[float, float]:
+    """序列整体得分：(core 中位数, fg 中位数)，与单图选模型的比较方式一致"""
+    return float(np.median([c for _, c in scores])), float(np.median([f for f, _ in scores]))
+
+
+def _rembg_sequence_alphas(
+    frames: list[Image.Image],
+) -> tuple[list[np.ndarray], list[tuple[float, float]]] | None:
+    """
+    对一段帧序列做 rembg，返回 (每帧 alpha, 每帧质量得分)：
+    - 与上一关键帧近似相同的帧直接复用其 alpha，只对关键帧推理
+    - primary 模型过半帧质量不达标时，整个序列换 fallback 模型重跑并按整体得分择优（而非逐帧选模型）
+    关键帧数超过 CUTOUT_GIF_REMBG_MAX_FRAMES 时返回 None；rembg 未安装或推理出错时抛出异常
+    """
+    owners: list[int] = []  # 每帧使用的关键帧下标
+    keyframes: list[Image.Image] = []
+    key_signature: np.ndarray | None = None
+    for frame in frames:
+        signature = _frame_signature(frame)
+        if (
+            key_signature is not None
+            and frame.size == keyframes[-1].size
+            and float(np.abs(signature - key_signature).mean()) <= CUTOUT_MASK_REUSE_MAX_DIFF
+        ):
+            owners.append(len(keyframes) - 1)
+            continue
+        keyframes.append(frame)
+        owners.append(len(keyframes) - 1)
+        key_signature = signature
+
+    if len(keyframes) > CUTOUT_GIF_REMBG_MAX_FRAMES:
+        logger.info(f"GIF 关键帧过多（{len(keyframes)} > {CUTOUT_GIF_REMBG_MAX_FRAMES}），跳过 rembg")
+        return None
+
     try:
-        source_frames, durations, meta = await run_in_pool(load_gif_frames, image_path)
-        if not source_frames:
-            raise Exception("没有成功读取的帧")
-        if len(source_frames) > CUTOUT_GIF_MAX_FRAMES:
-            raise Exception(f"GIF帧数过多: {len(source_frames)} > {CUTOUT_GIF_MAX_FRAMES}")
-
-        allow_rembg = len(source_frames) <= CUTOUT_GIF_REMBG_MAX_FRAMES
-        frames: list[Image.Image] = []
-
-        for frame_rgba in source_frames:
-            temp_frame_path = os.path.join(tempfile.gettempdir(), f"temp_frame_{os.urandom(4).hex()}.png")
-            processed_frame_path = ""
-            try:
-                await run_in_pool(frame_rgba.save, temp_frame_path, "PNG")
-                processed_frame_path = await remove_background_file(temp_frame_path, allow_rembg=allow_rembg)
-                if processed_frame_path and os.path.exists(processed_frame_path):
-                    frames.append(await run_in_pool(_load_frame_rgba, processed_frame_path))
-            finally:
-                await cleanup_files(temp_frame_path, processed_frame_path)
-
-        if not frames:
-            raise Exception("没有成功处理的帧")
-
-        output_dir = ensure_output_dir("nonebot_image_cutout")
-        output_path = output_dir / f"cutout_gif_{os.urandom(4).hex()}.gif"
-        await run_in_pool(
-            save_gif, frames, output_path, durations=durations[: len(frames)], loop=int(meta.get("loop", 0))
-        )
-        return str(output_path)
+        import rembg  # noqa: F401
+    except ImportError:
+        logger.error("rembg未安装，请安装: pip install rembg onnxruntime")
+        raise
+
+    providers = _select_onnx_providers()
+    logger.info(
+        f"GIF rembg: {len(frames)} 帧 / {len(keyframes)} 关键帧, providers: {providers} (device={REMBG_DEVICE})"
+    )
+
+    def _run(model_name: str) -> tuple[list[np.ndarray], list[tuple[float, float]]]:
+        logger.info(f"rembg model: {model_name}")
+        alphas = _rembg_predict_alphas(_get_rembg_session(model_name, providers), model_name, keyframes)
+        return alphas, [_alpha_quality(alpha) for alpha in alphas]
+
+    alphas, scores = _run(REMBG_MODEL_PRIMARY)
+    poor = sum(1 for score in scores if _is_poor_alpha(score))
+    if poor * 2 > len(scores) and REMBG_MODEL_FALLBACK != REMBG_MODEL_PRIMARY:
+        alphas2, scores2 = _run(REMBG_MODEL_FALLBACK)
+        if _sequence_score(scores2) > _sequence_score(scores):
+            alphas, scores = alphas2, scores2
 
+    return [alphas[i] for i in owners], [scores[i] for i in owners]
+
+
+def _apply_alpha(frame: Image.Image, alpha: np.ndarray) -> Image.Image:
+    rgba = np.array(frame.convert("RGBA"))
+    rgba[:, :, 3] = (rgba[:, :, 3].astype(np.uint16) * alpha // 255).astype(np.uint8)
+    return Image.fromarray(rgba, "RGBA")
+
+
+def _bgra_to_image(bgra: np.ndarray) -> Image.Image:
+    return Image.fromarray(cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGBA), "RGBA")
+
+
+def _cutout_gif_frames(frames: list[Image.Image]) -> tuple[list[Image.Image], bool]:
+    """
+    逐帧沿用单图策略（已有透明 -> 纯色背景 -> rembg -> 线稿 -> grabcut -> simple），
+    其中 rembg 对所有需要它的帧整体批量执行。
+    返回 (结果帧, 是否走的主路径)：rembg 出错后退到 grabcut / simple 的结果不是主路径。
+    """
+    results: list[Image.Image | None] = [None] * len(frames)
+    primary = True
+    pending: list[tuple[int, np.ndarray]] = []  # (帧下标, 白底 BGR)
+
+    for i, frame in enumerate(frames):
+        rgba = np.array(frame.convert("RGBA"))
+        if _has_existing_alpha(rgba[:, :, 3]):
+            results[i] = frame
+            continue
+        img_bgr = _compose_on_white(cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA))
+        fg = _solid_bg_fg_mask(img_bgr)
+        if fg is not None:
+            results[i] = _bgra_to_image(_mask_to_rgba(img_bgr, fg))
+            continue
+        pending.append((i, img_bgr))
+
+    if pending:
+        try:
+            rembg_result = _rembg_sequence_alphas([frames[i] for i, _ in pending])
+        except Exception as e:
+            logger.error(f"GIF rembg抠图错误: {e}")
+            rembg_result = None
+            primary = False
+        for j, (i, img_bgr) in enumerate(pending):
+            if rembg_result is not None:
+                alpha, score = rembg_result[0][j], rembg_result[1][j]
+                if _is_poor_alpha(score):
+                    lineart = _lineart_fg_mask(img_bgr)
+                    if lineart is not None:
+                        results[i] = _bgra_to_image(_mask_to_rgba(img_bgr, lineart))
+                        continue
+                results[i] = _apply_alpha(frames[i], alpha)
+                continue
+            fg = _grabcut_fg_mask(img_bgr)
+            if fg is not None:
+                results[i] = _bgra_to_image(_mask_to_rgba(img_bgr, fg))
+            else:
+                results[i] = Image.fromarray(_simple_cutout_rgba(np.array(frames[i].convert("RGBA"))), "RGBA")
+
+    return [frame for frame in results if frame is not None], primary
+
+
+def _remove_background_gif_sync(image_path: str) -> tuple[str, bool]:
+    """GIF 抠图的同步重活：读帧 -> 整段抠图 -> 写 GIF（在线程池中执行）"""
+    source_frames, durations, meta = load_gif_frames(image_path)
+    if not source_frames:
+        raise Exception("没有成功读取的帧")
+    if len(source_frames) > CUTOUT_GIF_MAX_FRAMES:
+        raise Exception(f"GIF帧数过多: {len(source_frames)} > {CUTOUT_GIF_MAX_FRAMES}")
+
+    frames, primary = _cutout_gif_frames(source_frames)
+    if not frames:
+        raise Exception("没有成功处理的帧")
+
+    output_dir = ensure_output_dir("nonebot_image_cutout")
+    output_path = output_dir / f"cutout_gif_{os.urandom(4).hex()}.gif"
+    save_gif(frames, output_path, durations=durations[: len(frames)], loop=int(meta.get("loop", 0)))
+    return str(output_path), primary
+
+
+async def _remove_background_gif(image_path: str) -> tuple[str, bool]:
+    """返回 (结果路径, 是否走的主路径)；整段处理失败时退化为单帧抠图，不是主路径"""
+    try:
+        return await run_in_pool(_remove_background_gif_sync, image_path)
     except Exception as e:
         logger.error(f"GIF抠图错误: {e}")
-        return await remove_background_file(image_path, allow_rembg=False)
+        result_path, _ = await _remove_background_file(image_path, allow_rembg=False)
+        return result_path, False
+
+
+async def remove_background_gif(image_path: str) -> str:
+    """处理 GIF 抠图 - 整段批量处理（复用同样的策略）"""
+    result_path, _ = await _remove_background_gif(image_path)
+    return result_path
 
 
 async def remove_background(image_url: str) -> str:
@@ -733,18 +1003,27 @@ async def remove_background(image_url: str) -> str:
     try:
         image_path = await download_image(image_url, max_bytes=IMAGE_PROCESSOR_MAX_GIF_BYTES)
 
-        # 是否为 GIF
-        is_gif = False
-        try:
-            with Image.open(image_path) as img:
-                is_gif = bool(getattr(img, "is_animated", False))
-        except Exception:
+        async def _compute() -> tuple[str, bool]:
+            # 是否为 GIF
             is_gif = False
-
-        if is_gif:
-            result_path = await remove_background_gif(image_path)
-        else:
-            result_path = await remove_background_file(image_path)
+            try:
+                with Image.open(image_path) as img:
+                    is_gif = bool(getattr(img, "is_animated", False))
+            except Exception:
+                is_gif = False
+
+            if is_gif:
+                return await _remove_background_gif(image_path)
+            return await _remove_background_file(image_path)
+
+        # 模型不同结果不同，一并计入缓存键；命中时不会加载 rembg / onnxruntime。
+        # rembg 临时故障后的降级结果不写缓存，避免之后的请求一直拿到降级结果
+        result_path = await cached_operation(
+            image_path,
+            "cutout",
+            {"models": [REMBG_MODEL_PRIMARY, REMBG_MODEL_FALLBACK]},
+            _compute,
+        )
 
         return result_path if result_path and os.path.exists(result_path) else ""
 
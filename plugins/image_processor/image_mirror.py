@@ -5,6 +5,7 @@ from nonebot.log import logger
 from PIL import Image
 
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
@@ -12,9 +13,8 @@ from .utils import (
     download_to_temp,
     ensure_output_dir,
     guess_ext_from_url,
-    load_gif_frames,
     safe_delete_file,
-    save_gif,
+    transform_gif_file,
 )
 
 
@@ -44,15 +44,11 @@ def _process_static_mirror_file(image_path: str, direction: str) -> str:
 
 
 def _process_gif_mirror_file(image_path: str, direction: str) -> str:
-    frames, durations, meta = load_gif_frames(image_path)
-    if not frames:
-        raise Exception("没有成功处理的帧")
-
     method = get_transpose_method(direction)
-    processed_frames = [frame.transpose(method) for frame in frames]
     output_dir = ensure_output_dir("nonebot_image_mirror")
     output_path = output_dir / f"mirror_{direction}_{os.urandom(4).hex()}.gif"
-    save_gif(processed_frames, output_path, durations=durations, loop=int(meta.get("loop", 0)))
+    if not transform_gif_file(image_path, output_path, lambda frame: frame.transpose(method)):
+        raise Exception("没有成功处理的帧")
     return str(output_path)
 
 
@@ -86,14 +82,16 @@ async def process_image_mirror(image_url: str, direction: str) -> str:
             timeout_total=IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
         )
 
-        is_gif = False
-        try:
-            with Image.open(image_path) as img:
-                is_gif = bool(getattr(img, "is_animated", False))
-        except Exception:
+        async def _compute() -> str:
             is_gif = False
-
-        result_path = await process_gif_mirror(image_path, direction) if is_gif else await process_static_mirror(image_path, direction)
+            try:
+                with Image.open(image_path) as img:
+                    is_gif = bool(getattr(img, "is_animated", False))
+            except Exception:
+                is_gif = False
+            return await process_gif_mirror(image_path, direction) if is_gif else await process_static_mirror(image_path, direction)
+
+        result_path = await cached_operation(image_path, "mirror", {"direction": direction}, _compute)
         return result_path if result_path and os.path.exists(result_path) else ""
     except Exception as e:
         logger.error(f"镜像处理出错: {e}")
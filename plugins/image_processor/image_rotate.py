@@ -5,7 +5,9 @@ import os
 from nonebot.log import logger
 from PIL import Image
 
+from ..utils.gif_stream import FrameSpool, build_palette, iter_frames, source_palette
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
@@ -13,9 +15,8 @@ from .utils import (
     download_to_temp,
     ensure_output_dir,
     guess_ext_from_url,
-    load_gif_frames,
     safe_delete_file,
-    save_gif,
+    write_gif_stream,
 )
 
 
@@ -40,32 +41,37 @@ def _process_rotate_file(image_path: str, direction: str, speed: float) -> str:
     logger.info(f"旋转参数: 倍速{speed}, 总帧数{frames_per_circle}, 步进{step_angle:.2f}度")
 
     with Image.open(image_path) as input_img:
-        if bool(getattr(input_img, "is_animated", False)):
-            original_frames, _, _ = load_gif_frames(image_path)
-        else:
-            original_frames = [input_img.convert("RGBA").copy()]
-
-    if not original_frames:
-        raise Exception("没有可处理的图片帧")
-
-    base_frame = original_frames[0]
-    w, h = base_frame.size
-    diagonal = int(math.sqrt(w**2 + h**2)) + 2
-    canvas_size = (diagonal, diagonal)
-    output_frames = []
-
-    for i in range(frames_per_circle):
-        current_angle = i * step_angle
-        source_frame = original_frames[i % len(original_frames)].convert("RGBA")
-        frame_canvas = Image.new("RGBA", canvas_size, (0, 0, 0, 0))
-        offset_x = (diagonal - source_frame.size[0]) // 2
-        offset_y = (diagonal - source_frame.size[1]) // 2
-        frame_canvas.paste(source_frame, (offset_x, offset_y), source_frame)
-        output_frames.append(frame_canvas.rotate(current_angle, resample=Image.Resampling.BICUBIC))
+        animated = bool(getattr(input_img, "is_animated", False))
+        static_frame = None if animated else input_img.convert("RGBA").copy()
+
+    # 动图的源帧暂存到磁盘按需循环读取；所有输出帧共用一份调色板（旋转后四角透明）
+    if animated:
+        palette, _ = source_palette(image_path)
+        original_frames = FrameSpool.from_frames(iter_frames(image_path))
+    else:
+        palette = build_palette([static_frame], transparent=True)
+        original_frames = [static_frame]
+
+    def _rotated_frames():
+        w, h = original_frames[0].size
+        diagonal = int(math.sqrt(w**2 + h**2)) + 2
+        canvas_size = (diagonal, diagonal)
+        for i in range(frames_per_circle):
+            current_angle = i * step_angle
+            source_frame = original_frames[i % len(original_frames)].convert("RGBA")
+            frame_canvas = Image.new("RGBA", canvas_size, (0, 0, 0, 0))
+            offset_x = (diagonal - source_frame.size[0]) // 2
+            offset_y = (diagonal - source_frame.size[1]) // 2
+            frame_canvas.paste(source_frame, (offset_x, offset_y), source_frame)
+            yield frame_canvas.rotate(current_angle, resample=Image.Resampling.BICUBIC), 50
 
     output_dir = ensure_output_dir("nonebot_image_rotate")
     output_path = output_dir / f"rotate_{direction}_{speed}x_{os.urandom(4).hex()}.gif"
-    save_gif(output_frames, output_path, durations=[50] * len(output_frames), loop=0, optimize_rgb=False)
+    try:
+        write_gif_stream(_rotated_frames(), output_path, palette=palette, transparent=True, loop=0)
+    finally:
+        if isinstance(original_frames, FrameSpool):
+            original_frames.close()
     return str(output_path)
 
 
@@ -89,7 +95,12 @@ async def process_image_rotate(image_url: str, direction: str, speed: float) ->
             max_bytes=max_bytes,
             timeout_total=IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
         )
-        result_path = await process_rotate(image_path, direction, speed)
+        result_path = await cached_operation(
+            image_path,
+            "rotate",
+            {"direction": direction, "speed": speed},
+            lambda: process_rotate(image_path, direction, speed),
+        )
         if result_path and os.path.exists(result_path):
             logger.info(f"旋转成功: {result_path}, 大小: {os.path.getsize(result_path)}")
             return result_path
@@ -5,6 +5,7 @@ from nonebot.log import logger
 from PIL import Image
 
 from ..utils.tools import run_in_pool
+from .op_cache import cached_operation
 from .utils import (
     IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
     IMAGE_PROCESSOR_MAX_GIF_BYTES,
@@ -12,9 +13,8 @@ from .utils import (
     download_to_temp,
     ensure_output_dir,
     guess_ext_from_url,
-    load_gif_frames,
     safe_delete_file,
-    save_gif,
+    transform_gif_file,
 )
 
 
@@ -166,15 +166,12 @@ async def process_bottom_symmetry(image_path: str) -> Image.Image | None:
 
 
 def _process_gif_symmetry_file(image_path: str, symmetry_type: str) -> str:
-    frames, durations, meta = load_gif_frames(image_path)
-    if not frames:
-        raise Exception("没有成功处理的帧")
-
-    processed_frames = [_symmetry_image(frame, symmetry_type) for frame in frames]
     output_dir = ensure_output_dir("nonebot_image_symmetry")
     output_path = output_dir / f"symmetry_{symmetry_type}_{os.urandom(4).hex()}.gif"
-    save_gif(processed_frames, output_path, durations=durations, loop=int(meta.get("loop", 0)))
-    logger.info(f"GIF对称处理完成: {len(processed_frames)}帧, 保存到 {output_path}")
+    count = transform_gif_file(image_path, output_path, lambda frame: _symmetry_image(frame, symmetry_type))
+    if not count:
+        raise Exception("没有成功处理的帧")
+    logger.info(f"GIF对称处理完成: {count}帧, 保存到 {output_path}")
     return str(output_path)
 
 
@@ -208,17 +205,19 @@ async def process_image_symmetry(image_url: str, symmetry_type: str) -> str:
             timeout_total=IMAGE_PROCESSOR_IMAGE_DOWNLOAD_TIMEOUT,
         )
 
-        is_gif = False
-        try:
-            with Image.open(image_path) as img:
-                is_gif = bool(getattr(img, "is_animated", False))
-        except Exception as img_error:
-            logger.error(f"检查图片格式时出错: {img_error}")
-
-        if is_gif:
-            result_path = await process_gif_symmetry(image_path, symmetry_type)
-        else:
-            result_path = await run_in_pool(_process_static_symmetry_file, image_path, symmetry_type)
+        async def _compute() -> str:
+            is_gif = False
+            try:
+                with Image.open(image_path) as img:
+                    is_gif = bool(getattr(img, "is_animated", False))
+            except Exception as img_error:
+                logger.error(f"检查图片格式时出错: {img_error}")
+
+            if is_gif:
+                return await process_gif_symmetry(image_path, symmetry_type)
+            return await run_in_pool(_process_static_symmetry_file, image_path, symmetry_type)
+
+        result_path = await cached_operation(image_path, "symmetry", {"symmetry_type": symmetry_type}, _compute)
 
         if result_path and os.path.exists(result_path):
             logger.info(f"对称处理成功: {result_path}, 大小: {os.path.getsize(result_path)}")
@@ -0,0 +1,260 @@
+# op_cache.py
+"""
+图片处理结果缓存：按「输入内容摘要 + 操作名 + 参数」缓存抠图 / 倒放 / 倍速 / 镜像 / 旋转 / 对称的输出文件。
+
+热门表情包经常被反复发来处理，每次都要重新计算（抠图还要跑一遍 rembg 推理）：
+- 下载后对输入文件求 sha256，与操作名、参数一起组成缓存键，与 URL 无关
+- 并发的相同请求只计算一次（single-flight），其余请求等待同一结果
+- 磁盘存储按总字节数与最久未使用时间淘汰
+- 命中时复制一份临时文件返回：调用方发送后会删除结果文件，缓存文件本身不外借
+
+可用环境变量：
+  - HAKUBOT_IMAGE_OP_CACHE=1/0 （默认 1）
+  - HAKUBOT_IMAGE_OP_CACHE_MB=512 （磁盘总大小上限，默认 512）
+  - HAKUBOT_IMAGE_OP_CACHE_DAYS=7 （超过该天数未被使用的结果会被清理，默认 7）
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from nonebot.log import logger
+
+from ..utils.cache_utils import SingleFlight, prune_cache_dir
+from .utils import ensure_output_dir
+
+IMAGE_OP_CACHE_ENABLED = os.getenv("HAKUBOT_IMAGE_OP_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+IMAGE_OP_CACHE_MAX_BYTES = int(float(os.getenv("HAKUBOT_IMAGE_OP_CACHE_MB", "512")) * 1024 * 1024)
+IMAGE_OP_CACHE_MAX_AGE = float(os.getenv("HAKUBOT_IMAGE_OP_CACHE_DAYS", "7")) * 86400
+# 淘汰检查的最小间隔（秒）
+IMAGE_OP_CACHE_PRUNE_INTERVAL = 600
+# 处理算法有不兼容改动时递增，使旧结果自然失效
+IMAGE_OP_CACHE_VERSION = 2
+
+
+def _default_cache_dir() -> Path:
+    try:
+        from nonebot_plugin_localstore import get_cache_dir
+
+        return get_cache_dir("image_processor") / "op_cache"
+    except Exception:
+        return ensure_output_dir("nonebot_image_op_cache")
+
+
+def file_digest(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def op_cache_key(input_digest: str, operation: str, params: dict[str, Any]) -> str:
+    raw = json.dumps(
+        [IMAGE_OP_CACHE_VERSION, input_digest, operation, params],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=repr,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# compute() 可直接返回结果路径，也可返回 (结果路径, 是否可缓存)：
+# 主路径失败后的降级结果（如 rembg 临时故障后退到 grabcut）应标记为不可缓存
+ComputeResult = Union[str, tuple[str, bool]]
+
+
+@dataclass
+class OpCacheStats:
+    hits: int = 0
+    coalesced: int = 0  # 直接复用了进行中计算结果的请求数
+    misses: int = 0
+    uncacheable: int = 0  # compute 标记为不可缓存的结果数
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.hits + self.coalesced
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+class OpCache:
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: int = IMAGE_OP_CACHE_MAX_BYTES,
+        max_age: float = IMAGE_OP_CACHE_MAX_AGE,
+        enabled: bool = IMAGE_OP_CACHE_ENABLED,
+    ) -> None:
+        self._cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self._flights: SingleFlight[Path] = SingleFlight()
+        self._next_prune = 0.0
+        self._stats = OpCacheStats()
+
+    @property
+    def cache_dir(self) -> Path:
+        if self._cache_dir is None:
+            self._cache_dir = _default_cache_dir()
+        return self._cache_dir
+
+    async def get_or_compute(
+        self,
+        input_path: str,
+        operation: str,
+        params: dict[str, Any],
+        compute: Callable[[], Awaitable[ComputeResult]],
+    ) -> str:
+        """
+        返回处理结果路径（调用方负责删除）；未命中时执行 compute()。
+        compute 返回空字符串视为失败，与标记为不可缓存的结果一样不写入缓存。
+        """
+        if not self.enabled:
+            return (await self._run(compute))[0]
+
+        try:
+            key = op_cache_key(await asyncio.to_thread(file_digest, input_path), operation, params)
+        except OSError as e:
+            logger.warning(f"图片处理缓存: 计算输入摘要失败，跳过缓存: {e}")
+            return (await self._run(compute))[0]
+
+        waited, cached = await self._flights.wait(key)
+        if waited:
+            result = await self._checkout(cached, operation) if cached is not None else None
+            if result is not None:
+                self._stats.coalesced += 1
+                return result
+            # 领头请求没有产出缓存（失败 / 被取消 / 降级结果 / 写盘出错）时自行计算，不沿用它的异常
+            self._stats.misses += 1
+            return (await self._run(compute))[0]
+
+        with self._flights.lead(key) as flight:
+            cached = await asyncio.to_thread(self._lookup, key)
+            result = await self._checkout(cached, operation) if cached is not None else None
+            if result is not None:
+                self._stats.hits += 1
+                flight.result = cached
+                logger.info(f"图片处理缓存命中: {operation} {params}")
+                return result
+
+            self._stats.misses += 1
+            result, cacheable = await self._run(compute)
+            if not cacheable:
+                self._stats.uncacheable += 1
+                logger.info(f"图片处理结果为降级结果，不写入缓存: {operation} {params}")
+            elif result and os.path.exists(result):
+                flight.result = await self._store(key, result)
+            return result
+
+    @staticmethod
+    async def _run(compute: Callable[[], Awaitable[ComputeResult]]) -> tuple[str, bool]:
+        result = await compute()
+        if isinstance(result, tuple):
+            return result
+        return result, True
+
+    # ---------- 磁盘 ----------
+
+    def _lookup(self, key: str) -> Optional[Path]:
+        shard = self.cache_dir / key[:2]
+        for path in shard.glob(f"{key}.*"):
+            try:
+                if time.time() - path.stat().st_mtime >= self.max_age:
+                    path.unlink()
+                    continue
+                # mtime 记录最近一次使用时间，淘汰按它从旧到新进行
+                os.utime(path)
+            except OSError:
+                continue
+            return path
+        return None
+
+    async def _checkout(self, cached: Path, operation: str) -> Optional[str]:
+        output_dir = ensure_output_dir("nonebot_image_processor")
+        output_path = output_dir / f"{operation}_cached_{os.urandom(4).hex()}{cached.suffix}"
+        try:
+            await asyncio.to_thread(shutil.copyfile, cached, output_path)
+        except OSError:
+            # 可能刚好被淘汰
+            return None
+        return str(output_path)
+
+    async def _store(self, key: str, result_path: str) -> Optional[Path]:
+        suffix = Path(result_path).suffix
+        target = self.cache_dir / key[:2] / f"{key}{suffix}"
+
+        def _write() -> Optional[Path]:
+            if os.path.getsize(result_path) > self.max_bytes:
+                return None
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+            os.close(fd)
+            try:
+                shutil.copyfile(result_path, tmp)
+                os.replace(tmp, target)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            return target
+
+        try:
+            stored = await asyncio.to_thread(_write)
+        except OSError as e:
+            logger.warning(f"图片处理缓存写入失败: {e}")
+            return None
+        if stored is not None:
+            self._stats.stores += 1
+
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + IMAGE_OP_CACHE_PRUNE_INTERVAL
+            await asyncio.to_thread(self.prune)
+        return stored
+
+    def prune(self) -> int:
+        """删除超过 max_age 未使用的结果，总量仍超限时按最近使用时间从旧到新删除"""
+        removed = prune_cache_dir(
+            self.cache_dir,
+            max_total_bytes=self.max_bytes,
+            max_age_seconds=self.max_age,
+        ).removed
+        if removed:
+            self._stats.evictions += removed
+            logger.debug(f"图片处理缓存已清理 {removed} 个文件")
+        return removed
+
+    # ---------- 指标 ----------
+
+    def stats(self) -> dict[str, Any]:
+        result = asdict(self._stats)
+        result["hit_rate"] = round(self._stats.hit_rate, 4)
+        return result
+
+
+op_cache = OpCache()
+
+
+async def cached_operation(
+    input_path: str,
+    operation: str,
+    params: dict[str, Any],
+    compute: Callable[[], Awaitable[ComputeResult]],
+) -> str:
+    return await op_cache.get_or_compute(input_path, operation, params, compute)
+
+
+def get_op_cache_stats() -> dict[str, Any]:
+    return op_cache.stats()
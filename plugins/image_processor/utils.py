@@ -2,13 +2,14 @@ import asyncio
 import os
 import tempfile
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable
 from urllib.parse import urlparse
 
 import aiohttp
 from PIL import Image, ImageSequence
 from nonebot.log import logger
 
+from ..utils.gif_stream import GifStreamWriter, iter_frames, source_palette
 from ..utils.network import INSECURE_SSL, get_client_session, get_effective_proxy
 
 IMAGE_PROCESSOR_MAX_IMAGE_BYTES = int(os.getenv("HAKUBOT_IMAGE_PROCESSOR_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
@@ -219,6 +220,48 @@ def save_gif(
     return True
 
 
+def gif_loop(image_path: str | Path) -> int:
+    with Image.open(image_path) as img:
+        return int(img.info.get("loop", 0) or 0)
+
+
+def write_gif_stream(
+    frames: Iterable[tuple[Image.Image, int]],
+    output_path: str | Path,
+    *,
+    palette: list[int] | None,
+    transparent: bool,
+    loop: int = 0,
+) -> int:
+    """把 (帧, 时长) 流逐帧编码写成 GIF，返回读取的帧数；画布尺寸以第一帧为准"""
+    writer: GifStreamWriter | None = None
+    count = 0
+    try:
+        for frame, duration in frames:
+            if writer is None:
+                writer = GifStreamWriter(output_path, frame.size, palette=palette, transparent=transparent, loop=loop)
+            writer.write(frame, duration)
+            count += 1
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.close()
+    return count
+
+
+def transform_gif_file(
+    image_path: str | Path,
+    output_path: str | Path,
+    transform: Callable[[Image.Image], Image.Image],
+) -> int:
+    """逐帧变换动图并流式写出（沿用源 GIF 的调色板），返回处理的帧数"""
+    palette, transparent = source_palette(image_path)
+    frames = ((transform(frame), duration) for frame, duration in iter_frames(image_path))
+    return write_gif_stream(frames, output_path, palette=palette, transparent=transparent, loop=gif_loop(image_path))
+
+
 def _round_durations(values: list[float], target_total: float, min_duration_ms: int) -> list[int]:
     rounded = [max(min_duration_ms, int(round(v))) for v in values]
     diff = int(round(target_total)) - sum(rounded)
@@ -243,27 +286,30 @@ def _round_durations(values: list[float], target_total: float, min_duration_ms:
     return rounded
 
 
-def retime_frames_for_speed(
-    frames: list[Image.Image],
+def retime_indices_for_speed(
     durations: list[int],
     speed_factor: float,
     *,
     min_duration_ms: int = GIF_MIN_DURATION_MS,
-) -> tuple[list[Image.Image], list[int]]:
-    if not frames:
+) -> tuple[list[int], list[int]]:
+    """
+    按倍速重新计算帧时长，返回 (源帧下标, 新时长)。
+    时长低于下限时改为等间隔抽帧，下标单调不减，可边读边处理。
+    """
+    if not durations:
         return [], []
 
     speed = max(0.01, float(speed_factor))
-    source_durations = _normalize_durations(durations, len(frames))
+    source_durations = _normalize_durations(durations, len(durations))
     raw_durations = [d / speed for d in source_durations]
 
     if min(raw_durations) >= min_duration_ms:
-        return [frame.copy() for frame in frames], _round_durations(raw_durations, sum(raw_durations), min_duration_ms)
+        return list(range(len(durations))), _round_durations(raw_durations, sum(raw_durations), min_duration_ms)
 
     original_total = sum(source_durations)
     target_total = max(float(min_duration_ms), original_total / speed)
     target_frame_count = max(1, int(round(target_total / min_duration_ms)))
-    target_frame_count = min(target_frame_count, len(frames))
+    target_frame_count = min(target_frame_count, len(durations))
 
     cumulative: list[int] = []
     total = 0
@@ -271,18 +317,36 @@ def retime_frames_for_speed(
         total += duration
         cumulative.append(total)
 
-    sampled_frames: list[Image.Image] = []
+    indices: list[int] = []
     for i in range(target_frame_count):
         source_time = (i * target_total / target_frame_count) * speed
         source_time = min(source_time, original_total - 1)
         source_index = 0
         while source_index < len(cumulative) - 1 and source_time >= cumulative[source_index]:
             source_index += 1
-        sampled_frames.append(frames[source_index].copy())
+        indices.append(source_index)
 
     base_duration = target_total / target_frame_count
     sampled_durations = _round_durations([base_duration] * target_frame_count, target_total, min_duration_ms)
-    return sampled_frames, sampled_durations
+    return indices, sampled_durations
+
+
+def retime_frames_for_speed(
+    frames: list[Image.Image],
+    durations: list[int],
+    speed_factor: float,
+    *,
+    min_duration_ms: int = GIF_MIN_DURATION_MS,
+) -> tuple[list[Image.Image], list[int]]:
+    if not frames:
+        return [], []
+
+    indices, new_durations = retime_indices_for_speed(
+        _normalize_durations(durations, len(frames)),
+        speed_factor,
+        min_duration_ms=min_duration_ms,
+    )
+    return [frames[i].copy() for i in indices], new_durations
 
 
 def fix_frame_for_gif(im: Image.Image) -> Image.Image:
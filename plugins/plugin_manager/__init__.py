@@ -94,8 +94,8 @@ def load_cd_runtime() -> Dict[str, Dict[str, Dict[str, float]]]:
 
 
 def save_cd_runtime(data: Dict[str, Dict[str, Dict[str, float]]]):
-    """保存用户CD运行时数据"""
-    atomic_write_json(CD_RUNTIME_FILE, data, indent=2, ensure_ascii=False)
+    """保存用户CD运行时数据（写入频繁且无需手动编辑，不做缩进）"""
+    atomic_write_json(CD_RUNTIME_FILE, data, indent=None, ensure_ascii=False)
 
 
 # --- 水印配置 I/O ---
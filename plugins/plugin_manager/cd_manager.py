@@ -1,6 +1,7 @@
 # plugin_manager/cd_manager.py
+import asyncio
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from nonebot import on_command, get_driver
 from nonebot.adapters.onebot.v11 import Bot, MessageEvent, GroupMessageEvent
@@ -61,7 +62,9 @@ def check_cd(plugin_id: str, group_id: str, user_id: str) -> int:
 def update_cd(plugin_id: str, group_id: str, user_id: str):
     """
     更新用户的CD时间戳（标记为“已使用”）
+    只修改内存中的数据，由后台定期/累计一定次数后批量写盘
     """
+    global _pending_updates
     try:
         superusers = get_driver().config.superusers
         if user_id in superusers:
@@ -78,7 +81,114 @@ def update_cd(plugin_id: str, group_id: str, user_id: str):
             cd_runtime[group_id][user_id] = {}
 
         cd_runtime[group_id][user_id][plugin_id] = now
-        save_cd_runtime(cd_runtime)
+        _pending_updates += 1
+        if _pending_updates >= CD_RUNTIME_FLUSH_THRESHOLD:
+            _schedule_flush()
+
+
+# --- CD 运行时写回 ---
+
+CD_RUNTIME_FLUSH_INTERVAL = 30  # 定期写盘间隔（秒）
+CD_RUNTIME_FLUSH_THRESHOLD = 200  # 未落盘的更新次数达到此值时立即写盘
+
+_pending_updates = 0  # 上次写盘后的更新次数
+_flush_lock: Optional[asyncio.Lock] = None
+_flush_task: Optional[asyncio.Task] = None
+_threshold_flush_task: Optional[asyncio.Task] = None
+
+
+def prune_cd_runtime(now: Optional[float] = None) -> int:
+    """
+    清理已经过期（或已取消CD配置）的记录，避免运行时文件无限增长
+    :return: 清理的记录数
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    for group_id in list(cd_runtime.keys()):
+        group_cd = cd_config.get(group_id, {})
+        users = cd_runtime[group_id]
+        for user_id in list(users.keys()):
+            records = users[user_id]
+            for plugin_id, last_call_time in list(records.items()):
+                if now - last_call_time >= group_cd.get(plugin_id, 0):
+                    del records[plugin_id]
+                    removed += 1
+            if not records:
+                del users[user_id]
+        if not users:
+            del cd_runtime[group_id]
+    return removed
+
+
+def _take_snapshot() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """清理过期记录并复制一份用于写盘（在事件循环线程中调用，写盘时不会读到并发修改）"""
+    global _pending_updates
+    prune_cd_runtime()
+    _pending_updates = 0
+    return {g: {u: dict(p) for u, p in users.items()} for g, users in cd_runtime.items()}
+
+
+def flush_cd_runtime(force: bool = False):
+    """同步写盘（关闭时使用）"""
+    if _pending_updates == 0 and not force:
+        return
+    save_cd_runtime(_take_snapshot())
+
+
+async def flush_cd_runtime_async(force: bool = False):
+    """在线程中写盘，写盘之间串行，避免旧快照覆盖新快照"""
+    global _flush_lock
+    if _flush_lock is None:
+        _flush_lock = asyncio.Lock()
+    async with _flush_lock:
+        if _pending_updates == 0 and not force:
+            return
+        await asyncio.to_thread(save_cd_runtime, _take_snapshot())
+
+
+def _schedule_flush():
+    """累计更新过多时立即安排一次后台写盘"""
+    global _threshold_flush_task
+    if _threshold_flush_task is not None and not _threshold_flush_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_cd_runtime()
+        return
+    _threshold_flush_task = loop.create_task(flush_cd_runtime_async())
+
+
+@get_driver().on_startup
+async def _start_cd_runtime_flusher():
+    global _flush_task
+
+    removed = prune_cd_runtime()
+    if removed:
+        logger.info(f"已清理 {removed} 条过期的CD记录")
+        await flush_cd_runtime_async(force=True)
+
+    async def _loop():
+        while True:
+            await asyncio.sleep(CD_RUNTIME_FLUSH_INTERVAL)
+            try:
+                await flush_cd_runtime_async()
+            except Exception as e:
+                logger.exception(f"保存CD运行时数据失败: {e}")
+
+    _flush_task = asyncio.create_task(_loop())
+
+
+@get_driver().on_shutdown
+async def _stop_cd_runtime_flusher():
+    global _flush_task
+    if _flush_task:
+        _flush_task.cancel()
+        _flush_task = None
+    try:
+        flush_cd_runtime()
+    except Exception as e:
+        logger.exception(f"关闭时保存CD运行时数据失败: {e}")
 
 
 # --- SuperUser 命令 ---
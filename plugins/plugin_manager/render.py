@@ -260,7 +260,7 @@ async def render_plugin_status_image(
                                     for child in g.children:
                                         _plugin_row(child, left_width=left_width)
 
-    img = await canvas.get_img()
+    img = await canvas.get_img(cache_key=f"plugin_status:{group_id}")
 
     # Watermark (optional)
     watermark_text = (watermark_text or "").strip()
@@ -2,7 +2,7 @@
 import asyncio
 import re
 from typing import Optional
-from nonebot import on_message, on_command, get_bot  # 确保 get_bot 被导入（虽然我们用依赖注入）
+from nonebot import on_message, on_command, get_bot, get_driver  # 确保 get_bot 被导入（虽然我们用依赖注入）
 from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message, MessageSegment, Bot  # 导入 Bot
 from nonebot.log import logger
 from nonebot.params import CommandArg
@@ -13,7 +13,8 @@ from ..utils.image_utils import path_to_base64_image
 from ..plugin_manager.enable import *
 from ..plugin_manager.cd_manager import check_cd, update_cd
 
-from .send import load_sticker_list, get_random_sticker, get_random_stickers, resolve_folder_name
+from .send import load_sticker_list, get_random_sticker, get_random_stickers, resolve_folder_name, sticker_dir
+from .catalog import catalog_watcher
 from .contribution import extract_contribution_info, save_contribution_images
 from .statistics import handle_statistics_command, get_sticker_statistics, render_stickers_preview
 from .manage import handle_manage_command, is_superuser
@@ -31,6 +32,17 @@ from . import overview
 
 load_sticker_list()
 
+
+@get_driver().on_startup
+async def _start_catalog_watcher():
+    catalog_watcher.start(sticker_dir)
+
+
+@get_driver().on_shutdown
+async def _stop_catalog_watcher():
+    catalog_watcher.stop()
+
+
 sticker_matcher = on_message(priority=10, block=False)
 clean_confirm_matcher = on_command("确认清理", block=True)
 clean_cancel_matcher = on_command("取消", block=True)
@@ -7,7 +7,7 @@ import sqlite3
 import time
 import threading
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, List, Tuple
 from contextlib import contextmanager
 
 from nonebot.log import logger
@@ -19,6 +19,9 @@ from .config import CACHE_VERSION, CACHE_TTL
 # 数据库文件路径
 DB_FILE = sticker_dir / "hash_cache.db"
 
+# 以 '0'/'1' 字符串保存 dHash 的最后一个缓存版本，可直接转换迁移
+_TEXT_HASH_CACHE_VERSION = "3.0"
+
 # 线程本地存储，每个线程一个连接
 _local = threading.local()
 
@@ -54,6 +57,63 @@ def get_db():
         raise e
 
 
+def _to_db_int(dhash: int) -> int:
+    """64 位无符号哈希 -> SQLite INTEGER（有符号 64 位）"""
+    return dhash - (1 << 64) if dhash >= (1 << 63) else dhash
+
+
+def _from_db_int(value: int) -> int:
+    """SQLite INTEGER -> 64 位无符号哈希"""
+    return value + (1 << 64) if value < 0 else value
+
+
+def _parse_bit_string(dhash: str) -> Optional[int]:
+    """旧版 '0'/'1' 字符串哈希 -> 整数"""
+    if not dhash or len(dhash) > 64 or set(dhash) - {'0', '1'}:
+        return None
+    return int(dhash, 2)
+
+
+def _migrate_text_hashes(conn: sqlite3.Connection):
+    """将旧版以 TEXT 保存的 dHash 迁移为 INTEGER 列"""
+    logger.info("迁移哈希缓存：dHash 字符串 -> 64 位整数")
+    conn.execute("ALTER TABLE hash_cache RENAME TO hash_cache_text")
+    _create_hash_table(conn)
+    rows = conn.execute(
+        "SELECT file_path, file_size, file_mtime, dhash, created_at FROM hash_cache_text"
+    ).fetchall()
+    converted = []
+    for row in rows:
+        value = _parse_bit_string(row['dhash'])
+        if value is not None:
+            converted.append((row['file_path'], row['file_size'], row['file_mtime'], _to_db_int(value), row['created_at']))
+    conn.executemany("""
+        INSERT OR IGNORE INTO hash_cache
+        (file_path, file_size, file_mtime, dhash, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, converted)
+    conn.execute("DROP TABLE hash_cache_text")
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('version', ?)",
+        (CACHE_VERSION,)
+    )
+    logger.info(f"哈希缓存迁移完成，共 {len(converted)} 条")
+
+
+def _create_hash_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hash_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            file_mtime REAL NOT NULL,
+            dhash INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            UNIQUE(file_path, file_size, file_mtime)
+        )
+    """)
+
+
 def init_database():
     """初始化数据库表结构"""
     global _initialized
@@ -68,19 +128,6 @@ def init_database():
         logger.info(f"初始化哈希缓存数据库: {DB_FILE}")
         
         with get_db() as conn:
-            # 创建主表
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS hash_cache (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    file_path TEXT NOT NULL,
-                    file_size INTEGER NOT NULL,
-                    file_mtime REAL NOT NULL,
-                    dhash TEXT NOT NULL,
-                    created_at REAL NOT NULL,
-                    UNIQUE(file_path, file_size, file_mtime)
-                )
-            """)
-            
             # 创建元数据表（存储版本信息）
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS cache_meta (
@@ -88,6 +135,18 @@ def init_database():
                     value TEXT NOT NULL
                 )
             """)
+
+            # 旧版本 dHash 列为 TEXT，迁移为 INTEGER；否则直接创建主表
+            columns = {row['name']: row['type'] for row in conn.execute("PRAGMA table_info(hash_cache)")}
+            if columns.get('dhash', '').upper() == 'TEXT':
+                row = conn.execute("SELECT value FROM cache_meta WHERE key = 'version'").fetchone()
+                if row is not None and row['value'] == _TEXT_HASH_CACHE_VERSION:
+                    _migrate_text_hashes(conn)
+                else:
+                    conn.execute("DROP TABLE hash_cache")
+                    _create_hash_table(conn)
+            else:
+                _create_hash_table(conn)
             
             # 创建索引
             conn.execute("""
@@ -137,7 +196,7 @@ def _get_file_key(file_path: Path) -> tuple:
         return None
 
 
-def get_cached_hash(file_path: Path) -> Optional[str]:
+def get_cached_hash(file_path: Path) -> Optional[int]:
     """
     从数据库获取缓存的 dHash
     
@@ -179,16 +238,74 @@ def get_cached_hash(file_path: Path) -> Optional[str]:
             """, (file_path_str, file_size, file_mtime))
             return None
         
-        return row['dhash']
+        return _from_db_int(row['dhash'])
+
+
+def get_cached_hashes(file_keys: Iterable[Tuple[Path, int, float]]) -> Dict[Path, int]:
+    """
+    批量获取缓存的 dHash（一次查询多张图片）
+    
+    Args:
+        file_keys: [(图片路径, 文件大小, 修改时间)]
+        
+    Returns:
+        {图片路径: dHash}，未命中/已过期的不包含在内
+    """
+    init_database()
+
+    wanted: Dict[str, Tuple[Path, int, float]] = {
+        str(path.absolute()): (path, size, mtime) for path, size, mtime in file_keys
+    }
+    result: Dict[Path, int] = {}
+    expire_before = time.time() - CACHE_TTL
+    keys = list(wanted.keys())
+
+    with get_db() as conn:
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(f"""
+                SELECT file_path, file_size, file_mtime, dhash, created_at FROM hash_cache
+                WHERE file_path IN ({placeholders})
+            """, chunk)
+            for row in cursor:
+                path, size, mtime = wanted[row['file_path']]
+                if row['file_size'] == size and row['file_mtime'] == mtime and row['created_at'] >= expire_before:
+                    result[path] = _from_db_int(row['dhash'])
+
+    return result
+
+
+def update_cache_many(entries: List[Tuple[Path, int, float, int]]):
+    """
+    批量更新缓存（单个事务）
+    
+    Args:
+        entries: [(图片路径, 文件大小, 修改时间, dHash)]
+    """
+    if not entries:
+        return
+    init_database()
+    current_time = time.time()
+
+    with get_db() as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO hash_cache 
+            (file_path, file_size, file_mtime, dhash, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (str(path.absolute()), size, mtime, _to_db_int(dhash), current_time)
+            for path, size, mtime, dhash in entries
+        ])
 
 
-def update_cache(file_path: Path, dhash: str):
+def update_cache(file_path: Path, dhash: int):
     """
     更新缓存
     
     Args:
         file_path: 图片文件路径
-        dhash: 计算得到的 dHash
+        dhash: 计算得到的 dHash（64 位整数）
     """
     init_database()
     
@@ -208,7 +325,7 @@ def update_cache(file_path: Path, dhash: str):
             INSERT OR REPLACE INTO hash_cache 
             (file_path, file_size, file_mtime, dhash, created_at)
             VALUES (?, ?, ?, ?, ?)
-        """, (file_path_str, file_size, file_mtime, dhash, current_time))
+        """, (file_path_str, file_size, file_mtime, _to_db_int(dhash), current_time))
 
 
 def invalidate_cache(file_path: Path):
@@ -373,17 +490,17 @@ def migrate_from_json():
                     file_size = int(file_size_str)
                     file_mtime = float(file_mtime_str)
                     
-                    dhash = entry.get("dhash", "")
+                    dhash = _parse_bit_string(entry.get("dhash", ""))
                     created_at = entry.get("timestamp", current_time)
                     
-                    if not dhash:
+                    if dhash is None:
                         continue
                     
                     conn.execute("""
                         INSERT OR IGNORE INTO hash_cache
                         (file_path, file_size, file_mtime, dhash, created_at)
                         VALUES (?, ?, ?, ?, ?)
-                    """, (file_path_str, file_size, file_mtime, dhash, created_at))
+                    """, (file_path_str, file_size, file_mtime, _to_db_int(dhash), created_at))
                     
                     migrated_count += 1
                     
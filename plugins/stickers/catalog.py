@@ -0,0 +1,236 @@
+# stickers/catalog.py
+"""
+Stickers 插件 - 常驻内存的图片目录
+启动/重载 list.json 时扫描一次所有文件夹，之后通过 watchdog 监听文件变化增量维护，
+随机取图和统计直接读取内存中的列表，不再每次请求都 glob 磁盘
+"""
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from nonebot.log import logger
+
+from .config import IMAGE_EXTENSIONS
+
+
+def _dir_key(path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def _is_image_name(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+class StickerCatalog:
+    """文件夹 -> 图片列表（列表 + 位置索引，增删 O(1)，随机选取 O(1)）"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._folders: Dict[str, Path] = {}
+        self._dir_to_folder: Dict[str, str] = {}
+        self._images: Dict[str, List[Path]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+
+    # ==================== 构建 ====================
+
+    @staticmethod
+    def _scan(folder_path: Path) -> List[Path]:
+        if not folder_path.exists():
+            return []
+        with os.scandir(folder_path) as it:
+            return [folder_path / entry.name for entry in it if _is_image_name(entry.name) and entry.is_file()]
+
+    def rebuild(self, folders: Dict[str, Path]):
+        """按文件夹映射重建整个目录"""
+        scanned = {name: self._scan(path) for name, path in folders.items()}
+        with self._lock:
+            self._folders = dict(folders)
+            self._dir_to_folder = {_dir_key(path): name for name, path in folders.items()}
+            self._images = {}
+            self._positions = {}
+            for name, images in scanned.items():
+                self._set_folder_images(name, images)
+        logger.info(f"stickers 目录已构建: {len(folders)} 个文件夹，共 {self.total_count()} 张图片")
+
+    def rescan_folder(self, folder_name: str):
+        """重新扫描单个文件夹（watchdog 不可用或需要强制校正时使用）"""
+        with self._lock:
+            folder_path = self._folders.get(folder_name)
+        if folder_path is None:
+            return
+        images = self._scan(folder_path)
+        with self._lock:
+            if folder_name in self._folders:
+                self._set_folder_images(folder_name, images)
+
+    def _set_folder_images(self, folder_name: str, images: List[Path]):
+        # 调用前需持有 self._lock
+        self._images[folder_name] = list(images)
+        self._positions[folder_name] = {p.name: i for i, p in enumerate(images)}
+
+    # ==================== 增量更新 ====================
+
+    def _locate(self, file_path: str):
+        folder_name = self._dir_to_folder.get(_dir_key(os.path.dirname(file_path)))
+        return folder_name, os.path.basename(file_path)
+
+    def add_file(self, file_path: str):
+        name = os.path.basename(file_path)
+        if not _is_image_name(name):
+            return
+        with self._lock:
+            folder_name, name = self._locate(file_path)
+            if folder_name is None:
+                return
+            positions = self._positions[folder_name]
+            if name in positions:
+                return
+            images = self._images[folder_name]
+            positions[name] = len(images)
+            images.append(self._folders[folder_name] / name)
+
+    def remove_file(self, file_path: str):
+        with self._lock:
+            folder_name, name = self._locate(file_path)
+            if folder_name is None:
+                return
+            positions = self._positions[folder_name]
+            idx = positions.pop(name, None)
+            if idx is None:
+                return
+            images = self._images[folder_name]
+            last = images.pop()
+            if idx < len(images):
+                images[idx] = last
+                positions[last.name] = idx
+
+    def remove_dir(self, dir_path: str):
+        with self._lock:
+            folder_name = self._dir_to_folder.get(_dir_key(dir_path))
+            if folder_name is not None:
+                self._set_folder_images(folder_name, [])
+
+    # ==================== 查询 ====================
+
+    def has_folder(self, folder_path: Path) -> bool:
+        return _dir_key(folder_path) in self._dir_to_folder
+
+    def get_images_by_path(self, folder_path: Path) -> Optional[List[Path]]:
+        """按文件夹路径获取图片列表副本，未登记的文件夹返回 None"""
+        with self._lock:
+            folder_name = self._dir_to_folder.get(_dir_key(folder_path))
+            if folder_name is None:
+                return None
+            return list(self._images.get(folder_name, []))
+
+    def get_images(self, folder_name: str) -> List[Path]:
+        with self._lock:
+            return list(self._images.get(folder_name, []))
+
+    def get_all_images(self) -> List[Path]:
+        with self._lock:
+            return [p for images in self._images.values() for p in images]
+
+    def count(self, folder_name: str) -> int:
+        with self._lock:
+            return len(self._images.get(folder_name, ()))
+
+    def total_count(self) -> int:
+        with self._lock:
+            return sum(len(images) for images in self._images.values())
+
+    def _get_by_global_index(self, idx: int) -> Path:
+        # 调用前需持有 self._lock
+        for images in self._images.values():
+            if idx < len(images):
+                return images[idx]
+            idx -= len(images)
+        raise IndexError(idx)
+
+    def random_choice(self, folder_name: Optional[str] = None) -> Optional[Path]:
+        """随机取一张图片，folder_name 为 None 时从所有文件夹中取"""
+        with self._lock:
+            if folder_name is not None:
+                images = self._images.get(folder_name)
+                return random.choice(images) if images else None
+            total = sum(len(images) for images in self._images.values())
+            if total == 0:
+                return None
+            return self._get_by_global_index(random.randrange(total))
+
+    def random_sample(self, folder_name: Optional[str], count: int) -> List[Path]:
+        """随机取多张不重复的图片，folder_name 为 None 时从所有文件夹中取"""
+        with self._lock:
+            if folder_name is not None:
+                images = self._images.get(folder_name) or []
+                return random.sample(images, min(count, len(images)))
+            total = sum(len(images) for images in self._images.values())
+            indices = random.sample(range(total), min(count, total))
+            return [self._get_by_global_index(i) for i in indices]
+
+
+class _CatalogEventHandler(FileSystemEventHandler):
+    """把 watchdog 事件同步到 StickerCatalog"""
+
+    def __init__(self, catalog: StickerCatalog):
+        self.catalog = catalog
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.catalog.add_file(event.src_path)
+
+    def on_deleted(self, event):
+        if event.is_directory:
+            self.catalog.remove_dir(event.src_path)
+        else:
+            self.catalog.remove_file(event.src_path)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            self.catalog.remove_dir(event.src_path)
+            return
+        self.catalog.remove_file(event.src_path)
+        self.catalog.add_file(event.dest_path)
+
+
+class CatalogWatcher:
+    """sticker 目录监听器"""
+
+    def __init__(self, catalog: StickerCatalog):
+        self.catalog = catalog
+        self.observer = None
+
+    def start(self, root: Path) -> bool:
+        if self.observer is not None:
+            return True
+        try:
+            observer = Observer()
+            observer.schedule(_CatalogEventHandler(self.catalog), path=str(root), recursive=True)
+            observer.start()
+            self.observer = observer
+            logger.info(f"stickers 目录监听已启动: {root}")
+            return True
+        except Exception as e:
+            logger.error(f"启动 stickers 目录监听失败: {e}")
+            return False
+
+    def stop(self):
+        if self.observer is None:
+            return
+        try:
+            self.observer.stop()
+            self.observer.join()
+            logger.info("stickers 目录监听已停止")
+        except Exception as e:
+            logger.error(f"停止 stickers 目录监听失败: {e}")
+        finally:
+            self.observer = None
+
+
+# 全局实例
+sticker_catalog = StickerCatalog()
+catalog_watcher = CatalogWatcher(sticker_catalog)
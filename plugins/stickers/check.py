@@ -12,7 +12,7 @@ from PIL import Image, ImageDraw, ImageFont
 warnings.filterwarnings("ignore", message="Corrupt EXIF data")
 from nonebot.adapters.onebot.v11 import MessageSegment
 from nonebot.log import logger
-from .send import sticker_folders, sticker_dir, resolve_folder_name, count_images_in_folder, refresh_max_id, invalidate_count_cache
+from .send import sticker_folders, sticker_dir, resolve_folder_name, count_images_in_folder, refresh_max_id, invalidate_count_cache, invalidate_count_cache_sync
 from .manage import is_superuser
 from .config import (
     IMAGE_EXTENSIONS,
@@ -21,15 +21,20 @@ from .config import (
     MSE_THRESHOLD_NUMPY,
     AVG_DIFF_THRESHOLD_PYTHON,
     BATCH_SIZE,
+    THUMBNAIL_SIZES,
 )
 from .cache_db import (
     get_cached_hash,
+    get_cached_hashes,
     update_cache,
+    update_cache_many,
     invalidate_cache,
     clear_all_cache,
     get_cache_stats,
     migrate_from_json,
 )
+from .hash_index import DHashIndex
+from .thumbnails import make_thumbnail, thumbnail_store
 
 # numpy 可选，用于加速像素比较
 try:
@@ -48,20 +53,15 @@ except Exception as e:
 
 # ==================== dHash 算法实现 ====================
 
-def calculate_dhash(image_path: Path) -> str:
+def _compute_dhash(image_path: Path) -> Optional[int]:
     """
-    计算图片的差异哈希 (dHash)
+    计算图片的差异哈希 (dHash)，不读写缓存
     
     算法步骤:
     1. 缩放到 (DHASH_SIZE+1) x DHASH_SIZE 灰度图
     2. 比较每行相邻像素，左边 > 右边 = 1，否则 = 0
-    3. 产生 DHASH_SIZE * DHASH_SIZE 位的哈希
+    3. 产生 DHASH_SIZE * DHASH_SIZE 位的哈希，按行优先打包为整数（第一位为最高位）
     """
-    # 先检查缓存
-    cached = get_cached_hash(image_path)
-    if cached:
-        return cached
-
     try:
         with Image.open(image_path) as img:
             # 转为灰度
@@ -72,71 +72,114 @@ def calculate_dhash(image_path: Path) -> str:
             img = img.resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS)
 
             # 获取像素
-            pixels = list(img.getdata())
+            pixels = img.tobytes()
 
             # 计算差异哈希
-            hash_bits = []
+            dhash = 0
             for row in range(DHASH_SIZE):
                 for col in range(DHASH_SIZE):
                     left_idx = row * (DHASH_SIZE + 1) + col
-                    right_idx = left_idx + 1
-                    hash_bits.append('1' if pixels[left_idx] > pixels[right_idx] else '0')
-
-            dhash = ''.join(hash_bits)
-
-            # 更新缓存
-            update_cache(image_path, dhash)
+                    dhash = (dhash << 1) | (pixels[left_idx] > pixels[left_idx + 1])
 
             return dhash
 
     except Exception as e:
         logger.error(f"计算 dHash 失败 {image_path}: {e}")
-        return ""
+        return None
 
 
-def hamming_distance(hash1: str, hash2: str) -> int:
+def calculate_dhash(image_path: Path) -> Optional[int]:
+    """
+    计算图片的差异哈希 (dHash)，优先读取缓存
+    
+    返回: 64 位整数哈希，失败时返回 None
+    """
+    # 先检查缓存
+    cached = get_cached_hash(image_path)
+    if cached is not None:
+        return cached
+
+    dhash = _compute_dhash(image_path)
+    if dhash is not None:
+        # 更新缓存
+        update_cache(image_path, dhash)
+    return dhash
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
     """计算两个哈希的汉明距离"""
-    if len(hash1) != len(hash2):
-        return 999  # 无效比较
-    return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+    return (hash1 ^ hash2).bit_count()
 
 
 # ==================== 批量并行处理 ====================
 
-async def batch_calculate_hashes(image_files: List[Path]) -> Dict[Path, str]:
+def _stat_image(path: Path) -> Optional[Tuple[int, float]]:
+    try:
+        st = path.stat()
+        return st.st_size, st.st_mtime
+    except OSError:
+        return None
+
+
+async def batch_calculate_hashes(
+    image_files: List[Path],
+    signatures: Optional[Dict[Path, Tuple[int, float]]] = None,
+) -> Dict[Path, int]:
     """
-    批量并行计算图片哈希
+    批量并行计算图片哈希（先批量查缓存，只计算未命中的图片，结果批量写回缓存）
+    
+    Args:
+        image_files: 图片路径列表
+        signatures: 可选，已知的 {图片路径: (文件大小, 修改时间)}，避免重复 stat
     
     返回: {图片路径: dhash}
     """
-    results: Dict[Path, str] = {}
     total = len(image_files)
 
     logger.info(f"开始批量计算哈希，共 {total} 张图片")
     start_time = time.time()
 
-    # 分批处理
-    for i in range(0, total, BATCH_SIZE):
-        batch = image_files[i:i + BATCH_SIZE]
+    if signatures is None:
+        signatures = {}
+        for path in image_files:
+            sig = _stat_image(path)
+            if sig is not None:
+                signatures[path] = sig
+    file_keys = [(path, *signatures[path]) for path in image_files if path in signatures]
 
-        # 创建任务
-        tasks = [asyncio.to_thread(calculate_dhash, f) for f in batch]
+    results: Dict[Path, int] = await asyncio.to_thread(get_cached_hashes, file_keys)
+    missing = [key for key in file_keys if key[0] not in results]
+    logger.info(f"哈希缓存命中 {len(results)}/{total}，需计算 {len(missing)} 张")
+
+    # 分批处理
+    for i in range(0, len(missing), BATCH_SIZE):
+        batch = missing[i:i + BATCH_SIZE]
 
         # 并行执行
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+        batch_results = await asyncio.gather(
+            *[asyncio.to_thread(_compute_dhash, key[0]) for key in batch],
+            return_exceptions=True,
+        )
 
         # 收集结果
-        for path, result in zip(batch, batch_results):
+        computed = []
+        for (path, size, mtime), result in zip(batch, batch_results):
             if isinstance(result, Exception):
                 logger.warning(f"计算哈希异常 {path}: {result}")
-            elif result:
+            elif result is not None:
                 results[path] = result
+                computed.append((path, size, mtime, result))
+
+        try:
+            await asyncio.to_thread(update_cache_many, computed)
+        except Exception as e:
+            logger.warning(f"写入哈希缓存失败: {e}")
 
         # 进度日志
-        processed = min(i + BATCH_SIZE, total)
-        if processed % 500 == 0 or processed == total:
+        processed = min(i + BATCH_SIZE, len(missing))
+        if processed % 500 == 0 or processed == len(missing):
             elapsed = time.time() - start_time
-            logger.info(f"哈希计算进度: {processed}/{total} ({elapsed:.1f}s)")
+            logger.info(f"哈希计算进度: {processed}/{len(missing)} ({elapsed:.1f}s)")
 
     elapsed = time.time() - start_time
     logger.info(f"哈希计算完成，耗时 {elapsed:.1f}s，有效结果 {len(results)} 个")
@@ -144,61 +187,113 @@ async def batch_calculate_hashes(image_files: List[Path]) -> Dict[Path, str]:
     return results
 
 
-# ==================== 重复检测核心函数 ====================
+# ==================== 文件夹哈希索引 ====================
 
-async def check_duplicate_images(folder_name: str, new_images: List[Path]) -> Tuple[bool, List[Tuple[Path, Path]]]:
+# 文件夹名 -> dHash 索引（常驻内存，按文件大小/修改时间增量刷新）
+_folder_indexes: Dict[str, DHashIndex] = {}
+_folder_index_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _scan_folder_signatures(folder_path: Path) -> Dict[Path, Tuple[int, float]]:
+    """获取文件夹中所有图片的 (文件大小, 修改时间)"""
+    signatures: Dict[Path, Tuple[int, float]] = {}
+    if not folder_path.exists():
+        return signatures
+    for file in folder_path.iterdir():
+        if file.suffix.lower() in IMAGE_EXTENSIONS:
+            sig = _stat_image(file)
+            if sig is not None:
+                signatures[file] = sig
+    return signatures
+
+
+async def get_folder_index(folder_name: str) -> Optional[DHashIndex]:
     """
-    检查新图片与文件夹中现有图片是否重复
-    
-    返回: (是否有重复, [(已存在图片, 新图片)])
+    获取文件夹的 dHash 索引（首次调用时构建，之后只处理新增/变更/删除的图片）
     """
     actual_folder_name = resolve_folder_name(folder_name)
 
     if actual_folder_name not in sticker_folders:
-        return False, []
+        return None
 
     folder_path = sticker_folders[actual_folder_name]
+    lock = _folder_index_locks.setdefault(actual_folder_name, asyncio.Lock())
+
+    async with lock:
+        index = _folder_indexes.setdefault(actual_folder_name, DHashIndex())
+        signatures = await asyncio.to_thread(_scan_folder_signatures, folder_path)
 
-    # 收集现有图片
-    existing_images: Set[Path] = set()
+        for path in index.paths():
+            if path not in signatures:
+                index.remove(path)
 
-    for ext in IMAGE_EXTENSIONS:
-        existing_images.update(folder_path.glob(f"*{ext}"))
-        existing_images.update(folder_path.glob(f"*{ext.upper()}"))
+        changed = [path for path, sig in signatures.items() if index.get_tag(path) != sig]
+        if changed:
+            hashes = await batch_calculate_hashes(changed, signatures)
+            for path in changed:
+                if path in hashes:
+                    index.add(path, hashes[path], signatures[path])
+
+        return index
+
+
+async def add_images_to_index(folder_name: str, image_files: List[Path]):
+    """将新保存的图片加入文件夹索引（投稿后调用，避免下次查重时再计算）"""
+    actual_folder_name = resolve_folder_name(folder_name)
+    index = _folder_indexes.get(actual_folder_name)
+    if index is None or not image_files:
+        return
 
-    existing_list = list(existing_images)
+    lock = _folder_index_locks.setdefault(actual_folder_name, asyncio.Lock())
+    async with lock:
+        signatures = {}
+        for path in image_files:
+            sig = _stat_image(path)
+            if sig is not None:
+                signatures[path] = sig
+        hashes = await batch_calculate_hashes(list(signatures), signatures)
+        for path, dhash in hashes.items():
+            index.add(path, dhash, signatures[path])
 
-    logger.info(f"开始查重: {folder_name}, 现有图片: {len(existing_list)}, 新图片: {len(new_images)}")
 
-    if not existing_list:
+def clear_folder_indexes():
+    """清空所有文件夹索引（批量重命名等大范围变更后调用）"""
+    _folder_indexes.clear()
+
+
+# ==================== 重复检测核心函数 ====================
+
+async def check_duplicate_images(folder_name: str, new_images: List[Path]) -> Tuple[bool, List[Tuple[Path, Path]]]:
+    """
+    检查新图片与文件夹中现有图片是否重复
+    
+    返回: (是否有重复, [(已存在图片, 新图片)])
+    """
+    index = await get_folder_index(folder_name)
+
+    if index is None:
         return False, []
 
-    # 批量计算现有图片的哈希
-    existing_hashes = await batch_calculate_hashes(existing_list)
+    logger.info(f"开始查重: {folder_name}, 现有图片: {len(index)}, 新图片: {len(new_images)}")
 
-    # 构建哈希索引 {dhash: path}
-    hash_to_path: Dict[str, Path] = {}
-    for path, dhash in existing_hashes.items():
-        if dhash:
-            hash_to_path[dhash] = path
+    if not len(index):
+        return False, []
 
     # 检查新图片
     duplicates: List[Tuple[Path, Path]] = []
 
     for new_img in new_images:
         new_hash = await asyncio.to_thread(calculate_dhash, new_img)
-        if not new_hash:
+        if new_hash is None:
             continue
 
-        # 查找相似的已存在图片
-        for existing_hash, existing_path in hash_to_path.items():
-            distance = hamming_distance(new_hash, existing_hash)
-            if distance <= HAMMING_THRESHOLD:
-                # 找到相似图片，进行最终验证
-                if await verify_duplicate(existing_path, new_img):
-                    duplicates.append((existing_path, new_img))
-                    logger.info(f"发现重复: {existing_path.name} <-> {new_img.name} (距离: {distance})")
-                    break  # 找到一个重复即可
+        # 查找相似的已存在图片（按距离从近到远验证）
+        for existing_path, distance in index.query(new_hash, HAMMING_THRESHOLD):
+            # 找到相似图片，进行最终验证
+            if await verify_duplicate(existing_path, new_img):
+                duplicates.append((existing_path, new_img))
+                logger.info(f"发现重复: {existing_path.name} <-> {new_img.name} (距离: {distance})")
+                break  # 找到一个重复即可
 
     logger.info(f"查重完成: 检查了 {len(new_images)} 张新图片，发现 {len(duplicates)} 个重复")
 
@@ -209,56 +304,29 @@ async def find_folder_duplicates(folder_name: str) -> List[Tuple[Path, Path]]:
     """
     查找指定文件夹中的重复图片
     """
-    actual_folder_name = resolve_folder_name(folder_name)
+    index = await get_folder_index(folder_name)
 
-    if actual_folder_name not in sticker_folders:
+    if index is None:
         return []
 
-    folder_path = sticker_folders[actual_folder_name]
-
-    # 收集所有图片
-    image_files: Set[Path] = set()
-
-    for ext in IMAGE_EXTENSIONS:
-        image_files.update(folder_path.glob(f"*{ext}"))
-        image_files.update(folder_path.glob(f"*{ext.upper()}"))
+    logger.info(f"在文件夹 {folder_name} 中找到 {len(index)} 张图片")
 
-    image_list = list(image_files)
-
-    logger.info(f"在文件夹 {folder_name} 中找到 {len(image_list)} 张图片")
-
-    if len(image_list) < 2:
+    if len(index) < 2:
         return []
 
-    # 批量计算哈希
-    all_hashes = await batch_calculate_hashes(image_list)
-
-    # 按哈希分组，查找相似图片
+    # 从索引中取出所有相似图片对，再逐对验证
     duplicates: List[Tuple[Path, Path]] = []
     processed: Set[Path] = set()
 
-    # 转换为列表便于遍历
-    hash_items = [(path, dhash) for path, dhash in all_hashes.items() if dhash]
-
-    for i, (path1, hash1) in enumerate(hash_items):
-        if path1 in processed:
+    for path1, path2, distance in index.pairs_within(HAMMING_THRESHOLD):
+        if path1 in processed or path2 in processed:
             continue
 
-        for j in range(i + 1, len(hash_items)):
-            path2, hash2 = hash_items[j]
-
-            if path2 in processed:
-                continue
-
-            # 计算汉明距离
-            distance = hamming_distance(hash1, hash2)
-
-            if distance <= HAMMING_THRESHOLD:
-                # 相似，进行最终验证
-                if await verify_duplicate(path1, path2):
-                    duplicates.append((path1, path2))
-                    processed.add(path2)  # 标记为已处理
-                    logger.info(f"发现重复: {path1.name} <-> {path2.name} (距离: {distance})")
+        # 相似，进行最终验证
+        if await verify_duplicate(path1, path2):
+            duplicates.append((path1, path2))
+            processed.add(path2)  # 标记为已处理
+            logger.info(f"发现重复: {path1.name} <-> {path2.name} (距离: {distance})")
 
     logger.info(f"在文件夹 {folder_name} 中发现 {len(duplicates)} 组重复图片")
     return duplicates
@@ -396,7 +464,7 @@ async def safe_remove_duplicates(duplicates: Dict[str, List[Tuple[Path, Path]]])
 
     # 使受影响文件夹的计数缓存失效
     for folder_name in affected_folders:
-        invalidate_count_cache(folder_name)
+        await invalidate_count_cache(folder_name)
 
     return removed_count, removed_files
 
@@ -468,6 +536,8 @@ def _render_duplicate_report_sync(folder_name: str, duplicates: List[Tuple[Path,
 
         # 绘制重复图片对比
         start_y = padding + 130
+        # 两侧预览按同一尺寸上限缩放（已有图片的缩略图缓存最大档位），保证对比时比例一致
+        preview_size = max(THUMBNAIL_SIZES)
 
         for i, (existing_img, new_img) in enumerate(duplicates[:10]):
             x = padding
@@ -484,10 +554,10 @@ def _render_duplicate_report_sync(folder_name: str, duplicates: List[Tuple[Path,
             draw.text((x + (cell_width // 2 - draw.textbbox((0, 0), left_label, font=text_font)[2]) // 2, y + 10), left_label, fill=(52, 152, 219), font=text_font)
 
             try:
-                left_preview = Image.open(existing_img)
-                if left_preview.mode != 'RGB':
-                    left_preview = left_preview.convert('RGB')
-                left_preview.thumbnail((preview_width - 20, preview_height), Image.Resampling.LANCZOS)
+                # 已有图片走缩略图缓存（投稿图片是临时文件，直接读取）
+                left_preview = thumbnail_store.get(existing_img, preview_size)
+                if left_preview is None:
+                    raise ValueError("无法加载缩略图")
                 left_x = x + (cell_width // 2 - left_preview.width) // 2
                 img.paste(left_preview, (left_x, y + 35))
 
@@ -502,10 +572,9 @@ def _render_duplicate_report_sync(folder_name: str, duplicates: List[Tuple[Path,
             draw.text((separator_x + (cell_width // 2 - draw.textbbox((0, 0), right_label, font=text_font)[2]) // 2, y + 10), right_label, fill=(231, 76, 60), font=text_font)
 
             try:
-                right_preview = Image.open(new_img)
-                if right_preview.mode != 'RGB':
-                    right_preview = right_preview.convert('RGB')
-                right_preview.thumbnail((preview_width - 20, preview_height), Image.Resampling.LANCZOS)
+                right_preview = make_thumbnail(new_img, preview_size)
+                if right_preview is None:
+                    raise ValueError("无法加载投稿图片")
                 right_x = separator_x + (cell_width // 2 - right_preview.width) // 2
                 img.paste(right_preview, (right_x, y + 35))
 
@@ -771,6 +840,8 @@ def _batch_rename_stickers_sync() -> Tuple[int, str]:
     
     # 刷新全局编号计数器
     refresh_max_id()
+    clear_folder_indexes()
+    invalidate_count_cache_sync()
     
     return renamed_count, f"已将 {renamed_count} 张图片重新编号（1 至 {current_id - 1}）"
 
@@ -4,7 +4,7 @@ Stickers 插件配置文件
 集中管理所有可配置参数
 """
 
-from typing import Set
+from typing import Set, Tuple
 
 # ==================== 图片文件配置 ====================
 
@@ -14,7 +14,7 @@ IMAGE_EXTENSIONS: Set[str] = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
 
 # ==================== 哈希算法配置 ====================
 
-# dHash 尺寸 (产生 DHASH_SIZE * DHASH_SIZE 位哈希)
+# dHash 尺寸 (产生 DHASH_SIZE * DHASH_SIZE 位哈希，以 64 位整数存储，不能超过 8)
 DHASH_SIZE: int = 8
 
 # 汉明距离阈值，<= 此值认为图片相似
@@ -30,7 +30,7 @@ AVG_DIFF_THRESHOLD_PYTHON: float = 150.0
 # ==================== 缓存配置 ====================
 
 # 缓存版本号 - 算法变更时需更新此版本
-CACHE_VERSION: str = "3.0"
+CACHE_VERSION: str = "4.0"
 
 # 缓存有效期（秒），30天
 CACHE_TTL: int = 30 * 24 * 60 * 60
@@ -73,3 +73,15 @@ OVERVIEW_BATCH_SIZE: int = 2000
 
 # 概览图最大画布像素数 (50MP)
 MAX_CANVAS_PIXELS: int = 50 * 1024 * 1024
+
+
+# ==================== 缩略图缓存配置 ====================
+
+# 缓存的缩略图档位（概览图/预览图/查重报告使用的尺寸），其他尺寸由不小于它的最小档位缩放得到
+THUMBNAIL_SIZES: Tuple[int, ...] = (200, 160, 120, 100)
+
+# 缩略图 JPEG 质量
+THUMBNAIL_QUALITY: int = 85
+
+# 生成缩略图的线程数
+THUMBNAIL_WORKERS: int = 8
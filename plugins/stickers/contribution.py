@@ -13,8 +13,9 @@ from nonebot.adapters.onebot.v11 import Message, MessageSegment, GroupMessageEve
 from nonebot.log import logger
 
 from .send import sticker_dir, sticker_folders, resolve_folder_name, count_images_in_folder, get_next_image_id, invalidate_count_cache
-from .check import check_duplicate_images, render_duplicate_report
+from .check import check_duplicate_images, render_duplicate_report, add_images_to_index
 from .config import DOWNLOAD_CONCURRENCY
+from .thumbnails import thumbnail_store
 
 
 def extract_contribution_info(message_text: str) -> Tuple[str, bool, bool]:
@@ -239,9 +240,17 @@ async def save_contribution_images(
                 except Exception as e:
                     logger.error(f"保存图片时出错: {e}")
 
-        # 保存成功后使缓存失效
+        # 保存成功后使缓存失效，把新图片加入查重索引并预生成缩略图
         if saved_count > 0:
-            invalidate_count_cache(actual_folder_name)
+            await invalidate_count_cache(actual_folder_name)
+            try:
+                await add_images_to_index(actual_folder_name, saved_files)
+            except Exception as e:
+                logger.warning(f"更新查重索引失败: {e}")
+            try:
+                await asyncio.to_thread(thumbnail_store.prewarm, saved_files)
+            except Exception as e:
+                logger.warning(f"预生成缩略图失败: {e}")
 
         # --- 报告结果 ---
         total_processed = saved_count + duplicate_count
@@ -0,0 +1,142 @@
+# stickers/hash_index.py
+"""
+Stickers 插件 - dHash 内存索引
+以 64 位整数保存 dHash，用 numpy 向量化计算汉明距离，支持：
+- 查询与某个哈希距离 <= k 的所有图片（新投稿查重）
+- 查询索引内所有距离 <= k 的图片对（文件夹内查重）
+- 增量添加/删除（投稿、清理后无需重建）
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# numpy 可选，不可用时退化为纯 Python 的 int.bit_count
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# 成对比较时每批处理的行数（内存占用约 PAIR_BLOCK_ROWS * n * 8 字节）
+PAIR_BLOCK_ROWS: int = 256
+
+if HAS_NUMPY:
+    _POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(arr: "np.ndarray") -> "np.ndarray":
+        """对 uint64 数组逐元素求 1 的个数"""
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(arr)
+        return _POPCOUNT8[arr.view(np.uint8)].reshape(arr.shape + (8,)).sum(axis=-1)
+
+
+class DHashIndex:
+    """单个文件夹的 dHash 索引"""
+
+    def __init__(self):
+        self._paths: List[Path] = []
+        self._hashes: List[int] = []
+        self._tags: List[Any] = []
+        self._pos: Dict[Path, int] = {}
+        self._array = None
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._pos
+
+    def paths(self) -> List[Path]:
+        return list(self._paths)
+
+    def get_tag(self, path: Path) -> Any:
+        """获取添加时附带的标记（如文件大小/修改时间），不存在返回 None"""
+        idx = self._pos.get(path)
+        return None if idx is None else self._tags[idx]
+
+    def add(self, path: Path, dhash: int, tag: Any = None):
+        """添加或更新一张图片的哈希"""
+        idx = self._pos.get(path)
+        if idx is None:
+            self._pos[path] = len(self._paths)
+            self._paths.append(path)
+            self._hashes.append(dhash)
+            self._tags.append(tag)
+        else:
+            self._hashes[idx] = dhash
+            self._tags[idx] = tag
+        self._array = None
+
+    def remove(self, path: Path):
+        """删除一张图片（与末尾元素交换后弹出，O(1)）"""
+        idx = self._pos.pop(path, None)
+        if idx is None:
+            return
+        last = len(self._paths) - 1
+        if idx != last:
+            self._paths[idx] = self._paths[last]
+            self._hashes[idx] = self._hashes[last]
+            self._tags[idx] = self._tags[last]
+            self._pos[self._paths[idx]] = idx
+        self._paths.pop()
+        self._hashes.pop()
+        self._tags.pop()
+        self._array = None
+
+    def _get_array(self) -> "np.ndarray":
+        if self._array is None:
+            self._array = np.array(self._hashes, dtype=np.uint64)
+        return self._array
+
+    def query(self, dhash: int, max_distance: int, exclude: Optional[Path] = None) -> List[Tuple[Path, int]]:
+        """
+        查询距离 <= max_distance 的图片
+
+        返回: [(图片路径, 汉明距离)]，按距离升序
+        """
+        if not self._paths:
+            return []
+
+        if HAS_NUMPY:
+            distances = _popcount(self._get_array() ^ np.uint64(dhash))
+            hits = [(int(i), int(distances[i])) for i in np.nonzero(distances <= max_distance)[0]]
+        else:
+            hits = []
+            for i, h in enumerate(self._hashes):
+                d = (h ^ dhash).bit_count()
+                if d <= max_distance:
+                    hits.append((i, d))
+
+        hits.sort(key=lambda x: (x[1], x[0]))
+        return [(self._paths[i], d) for i, d in hits if self._paths[i] != exclude]
+
+    def pairs_within(self, max_distance: int) -> List[Tuple[Path, Path, int]]:
+        """
+        查询索引内所有距离 <= max_distance 的图片对
+
+        返回: [(图片1, 图片2, 汉明距离)]，按索引顺序 (i, j) 升序，i < j
+        """
+        n = len(self._paths)
+        pairs: List[Tuple[int, int, int]] = []
+
+        if HAS_NUMPY:
+            arr = self._get_array()
+            cols = np.arange(n)
+            for start in range(0, n, PAIR_BLOCK_ROWS):
+                block = arr[start:start + PAIR_BLOCK_ROWS]
+                distances = _popcount(block[:, None] ^ arr[None, :])
+                rows = np.arange(start, start + len(block))[:, None]
+                mask = (distances <= max_distance) & (cols[None, :] > rows)
+                for r, c in zip(*np.nonzero(mask)):
+                    pairs.append((start + int(r), int(c), int(distances[r, c])))
+        else:
+            hashes = self._hashes
+            for i in range(n):
+                hi = hashes[i]
+                for j in range(i + 1, n):
+                    d = (hi ^ hashes[j]).bit_count()
+                    if d <= max_distance:
+                        pairs.append((i, j, d))
+
+        pairs.sort()
+        return [(self._paths[i], self._paths[j], d) for i, j, d in pairs]
@@ -6,7 +6,6 @@ from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor
 
 # 忽略 PIL 的 EXIF 损坏警告（不影响图片处理）
 warnings.filterwarnings("ignore", message="Corrupt EXIF data")
@@ -20,6 +19,7 @@ from nonebot.exception import FinishedException
 # 导入模块而非变量，确保获取最新值
 from .send import sticker_folders, resolve_folder_name, get_all_images_in_folder
 from .config import IMAGE_EXTENSIONS, OVERVIEW_BATCH_SIZE, MAX_CANVAS_PIXELS
+from .thumbnails import thumbnail_store
 from . import send
 from ..plugin_manager.enable import is_plugin_enabled
 from ..utils.image_utils import path_to_base64_image
@@ -61,39 +61,6 @@ def load_fonts(font_size: int) -> Tuple[ImageFont.FreeTypeFont, ImageFont.FreeTy
     return ImageFont.load_default(), ImageFont.load_default()
 
 
-# === 并行图片加载 ===
-def load_and_resize_single(args: Tuple[Path, int, int]) -> Tuple[Path, Optional[Image.Image]]:
-    """加载并缩放单张图片（用于线程池）"""
-    file_path, thumb_size, resample_mode = args
-    try:
-        with Image.open(file_path) as src_img:
-            # GIF 只取第一帧
-            if hasattr(src_img, 'is_animated') and src_img.is_animated:
-                src_img.seek(0)
-            
-            # 转换为 RGB
-            if src_img.mode not in ('RGB', 'RGBA'):
-                src_img = src_img.convert('RGB')
-            elif src_img.mode == 'RGBA':
-                # RGBA 需要处理透明背景
-                background = Image.new('RGB', src_img.size, (255, 255, 255))
-                background.paste(src_img, mask=src_img.split()[3])
-                src_img = background
-            
-            # 计算缩放
-            src_w, src_h = src_img.size
-            ratio = min(thumb_size / src_w, thumb_size / src_h)
-            new_w = int(src_w * ratio)
-            new_h = int(src_h * ratio)
-            
-            # 缩放图片
-            resized = src_img.resize((new_w, new_h), resample_mode)
-            return (file_path, resized.copy())  # copy() 确保图片数据独立
-    except Exception as e:
-        logger.debug(f"Failed to load {file_path}: {e}")
-        return (file_path, None)
-
-
 # 注册命令
 view_all_matcher = on_command("看所有", aliases={"查看所有", "view all"}, priority=5, block=True)
 view_single_matcher = on_command("sticker", aliases={"看表情", "No.", "NO", "查看", "no", "no."}, priority=5,
@@ -302,14 +269,6 @@ def render_gallery_overview_sync(image_files: List[Path], folder_name: str,
         thumb_size = 80
         font_size = 12
 
-    # 根据图片数量选择重采样模式（数量越多，使用越快的算法）
-    if total <= 100:
-        resample_mode = Image.Resampling.LANCZOS
-    elif total <= 500:
-        resample_mode = Image.Resampling.BILINEAR
-    else:
-        resample_mode = Image.Resampling.NEAREST
-
     # 间距配置
     padding = 10
     text_height = font_size + 10
@@ -325,17 +284,8 @@ def render_gallery_overview_sync(image_files: List[Path], folder_name: str,
         logger.error(f"Canvas size too large: {canvas_w}x{canvas_h}")
         return None
 
-    # === 2. 并行加载所有图片 ===
-    # 根据图片数量动态调整线程数
-    max_workers = min(16, max(4, total // 50))
-    
-    load_args = [(fp, thumb_size, resample_mode) for fp in image_files]
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        results = list(executor.map(load_and_resize_single, load_args))
-    
-    # 构建 path -> resized_image 的映射
-    loaded_images: Dict[Path, Optional[Image.Image]] = {path: img for path, img in results}
+    # === 2. 读取缩略图（命中缓存时不再解码原图，未命中的并行生成并写入缓存） ===
+    loaded_images: Dict[Path, Optional[Image.Image]] = thumbnail_store.get_many(image_files, thumb_size)
 
     # === 3. 初始化画布 ===
     canvas = Image.new('RGB', (canvas_w, canvas_h), color=(245, 247, 250))
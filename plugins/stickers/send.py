@@ -2,9 +2,8 @@
 """
 Stickers 插件 - 发送和文件管理模块
 """
-import random
+import asyncio
 import json
-import time
 import threading
 from pathlib import Path
 from typing import Dict, Set, List, Optional
@@ -13,6 +12,7 @@ from nonebot_plugin_localstore import get_data_dir
 from nonebot.log import logger
 
 from .config import IMAGE_EXTENSIONS
+from .catalog import sticker_catalog
 
 # 插件数据目录
 sticker_dir: Path = get_data_dir("stickers")
@@ -32,18 +32,12 @@ folder_configs: List[Dict] = []
 current_max_id: int = 0
 _id_lock = threading.Lock()
 
-# 图片计数缓存
-_image_count_cache: Dict[str, int] = {}
-_image_count_cache_time: Dict[str, float] = {}
-_count_cache_lock = threading.Lock()
-_COUNT_CACHE_TTL = 60  # 缓存有效期（秒）
-
 
 # ==================== 公共函数 ====================
 
 def get_all_images_in_folder(folder: Path) -> List[Path]:
     """
-    获取文件夹中所有图片文件
+    获取文件夹中所有图片文件（已登记的文件夹直接读取内存目录）
     
     Args:
         folder: 文件夹路径
@@ -51,6 +45,10 @@ def get_all_images_in_folder(folder: Path) -> List[Path]:
     Returns:
         图片文件路径列表（去重）
     """
+    images = sticker_catalog.get_images_by_path(folder)
+    if images is not None:
+        return images
+
     if not folder.exists():
         return []
     
@@ -72,12 +70,7 @@ def get_all_images_across_folders() -> List[Path]:
     Returns:
         所有图片文件路径列表
     """
-    all_images: List[Path] = []
-    
-    for folder_path in sticker_folders.values():
-        all_images.extend(get_all_images_in_folder(folder_path))
-    
-    return all_images
+    return sticker_catalog.get_all_images()
 
 
 # ==================== 编号计数器 ====================
@@ -176,6 +169,7 @@ def load_sticker_list() -> None:
         create_default_list_json()
         logger.warning("list.json 不存在，已创建默认文件")
 
+    sticker_catalog.rebuild(sticker_folders)
     refresh_max_id()
 
 
@@ -245,23 +239,14 @@ def get_random_sticker(folder_name: str) -> Optional[Path]:
     """
     if folder_name.lower() == "stickers":
         # 从所有文件夹中随机选择
-        all_images = get_all_images_across_folders()
-        if not all_images:
-            return None
-        return random.choice(all_images)
+        return sticker_catalog.random_choice()
     
     actual_folder_name = resolve_folder_name(folder_name)
     
     if actual_folder_name not in sticker_folders:
         return None
 
-    folder = sticker_folders[actual_folder_name]
-    image_files = get_all_images_in_folder(folder)
-
-    if not image_files:
-        return None
-
-    return random.choice(image_files)
+    return sticker_catalog.random_choice(actual_folder_name)
 
 
 def get_random_stickers(folder_name: str, count: int) -> List[Path]:
@@ -277,33 +262,25 @@ def get_random_stickers(folder_name: str, count: int) -> List[Path]:
     """
     if folder_name.lower() == "stickers":
         # 从所有文件夹中随机选择
-        all_images = get_all_images_across_folders()
-    else:
-        actual_folder_name = resolve_folder_name(folder_name)
-        
-        if actual_folder_name not in sticker_folders:
-            return []
-        
-        folder = sticker_folders[actual_folder_name]
-        all_images = get_all_images_in_folder(folder)
+        return sticker_catalog.random_sample(None, count)
 
-    if not all_images:
+    actual_folder_name = resolve_folder_name(folder_name)
+
+    if actual_folder_name not in sticker_folders:
         return []
 
-    # 使用 random.sample 一次性获取，更高效
-    actual_count = min(count, len(all_images))
-    return random.sample(all_images, actual_count)
+    return sticker_catalog.random_sample(actual_folder_name, count)
 
 
 # ==================== 统计函数 ====================
 
 def count_images_in_folder(folder_name: str, use_cache: bool = True) -> int:
     """
-    统计指定文件夹中的图片数量（带缓存）
+    统计指定文件夹中的图片数量（读取内存目录）
     
     Args:
         folder_name: 文件夹名称
-        use_cache: 是否使用缓存（默认启用）
+        use_cache: 为 False 时先重新扫描该文件夹
         
     Returns:
         图片数量
@@ -313,42 +290,30 @@ def count_images_in_folder(folder_name: str, use_cache: bool = True) -> int:
     if actual_folder_name not in sticker_folders:
         return 0
 
-    # 检查缓存
-    if use_cache:
-        current_time = time.time()
-        with _count_cache_lock:
-            if actual_folder_name in _image_count_cache:
-                cache_time = _image_count_cache_time.get(actual_folder_name, 0)
-                if current_time - cache_time < _COUNT_CACHE_TTL:
-                    return _image_count_cache[actual_folder_name]
-
-    # 缓存未命中或过期，重新计算
-    folder = sticker_folders[actual_folder_name]
-    count = len(get_all_images_in_folder(folder))
-    
-    # 更新缓存
-    with _count_cache_lock:
-        _image_count_cache[actual_folder_name] = count
-        _image_count_cache_time[actual_folder_name] = time.time()
-    
-    return count
+    if not use_cache:
+        sticker_catalog.rescan_folder(actual_folder_name)
+
+    return sticker_catalog.count(actual_folder_name)
 
 
-def invalidate_count_cache(folder_name: str = None) -> None:
+def invalidate_count_cache_sync(folder_name: str = None) -> None:
     """
-    使图片计数缓存失效
+    重新扫描文件夹以校正内存目录（watchdog 事件丢失时的兜底），会读磁盘，只能在线程中调用
     
     Args:
-        folder_name: 指定文件夹名称，None 则清空所有缓存
+        folder_name: 指定文件夹名称，None 则重新扫描所有文件夹
+    """
+    if folder_name is None:
+        sticker_catalog.rebuild(sticker_folders)
+    else:
+        sticker_catalog.rescan_folder(resolve_folder_name(folder_name))
+
+
+async def invalidate_count_cache(folder_name: str = None) -> None:
+    """
+    invalidate_count_cache_sync 的异步版本，在线程中扫描磁盘，避免阻塞事件循环
     """
-    with _count_cache_lock:
-        if folder_name is None:
-            _image_count_cache.clear()
-            _image_count_cache_time.clear()
-        else:
-            actual_folder_name = resolve_folder_name(folder_name)
-            _image_count_cache.pop(actual_folder_name, None)
-            _image_count_cache_time.pop(actual_folder_name, None)
+    await asyncio.to_thread(invalidate_count_cache_sync, folder_name)
 
 
 def get_folder_display_info() -> List[Dict]:
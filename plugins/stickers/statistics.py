@@ -7,6 +7,8 @@ from PIL import Image, ImageDraw, ImageFont
 from nonebot.adapters.onebot.v11 import MessageSegment
 from nonebot.log import logger
 from .send import sticker_folders, count_images_in_folder, get_random_sticker, get_folder_display_info
+from .config import THUMBNAIL_SIZES
+from .thumbnails import thumbnail_store
 
 
 def calculate_cell_height(folder_info: Dict) -> int:
@@ -245,9 +247,10 @@ def _render_stickers_preview_sync() -> bytes:
 
             if preview_path and preview_path.exists():
                 try:
-                    preview_image = Image.open(preview_path)
-                    if preview_image.mode != 'RGB':
-                        preview_image = preview_image.convert('RGB')
+                    # 从缩略图缓存读取，不再解码原图
+                    preview_image = thumbnail_store.get(preview_path, max(THUMBNAIL_SIZES))
+                    if preview_image is None:
+                        raise ValueError("无法加载预览图")
 
                     # 缩放图片以适应图片区域
                     preview_width, preview_height = preview_image.size
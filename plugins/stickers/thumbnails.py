@@ -0,0 +1,307 @@
+# stickers/thumbnails.py
+"""
+Stickers 插件 - 缩略图缓存
+按 (文件路径, 文件大小, 修改时间) 缓存各档尺寸的缩略图：
+- 每档尺寸一个打包文件 thumbs_<size>.pack，缩略图以 JPEG 追加写入，读取时通过 mmap 切片解码
+- 索引保存在 SQLite 中（路径 + 尺寸 -> 偏移/长度/宽高）
+- 投稿时预生成，概览/预览/查重报告直接读取缩略图，不再解码原图
+"""
+import io
+import mmap
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+from nonebot_plugin_localstore import get_cache_dir
+from nonebot.log import logger
+
+from .config import THUMBNAIL_SIZES, THUMBNAIL_QUALITY, THUMBNAIL_WORKERS
+
+
+# 放在缓存目录而不是 sticker_dir 下，避免被当成贴图文件夹扫描/监听
+THUMB_DIR: Path = get_cache_dir("stickers") / "thumbnails"
+INDEX_DB_NAME = "index.db"
+
+# 打包文件中失效数据超过此大小且超过有效数据时，执行压缩
+COMPACT_MIN_DEAD_BYTES = 32 * 1024 * 1024
+
+
+def _flatten_to_rgb(src_img: Image.Image) -> Image.Image:
+    """转换为 RGB，透明背景填充为白色（GIF 只取第一帧）"""
+    if getattr(src_img, 'is_animated', False):
+        src_img.seek(0)
+    if src_img.mode in ('RGBA', 'LA') or (src_img.mode == 'P' and 'transparency' in src_img.info):
+        src_img = src_img.convert('RGBA')
+        background = Image.new('RGB', src_img.size, (255, 255, 255))
+        background.paste(src_img, mask=src_img.split()[3])
+        return background
+    if src_img.mode != 'RGB':
+        return src_img.convert('RGB')
+    return src_img
+
+
+def _fit(img: Image.Image, size: int, resample) -> Image.Image:
+    """缩放到限定在 size x size 内（保持宽高比）"""
+    ratio = min(size / img.width, size / img.height)
+    return img.resize((max(1, int(img.width * ratio)), max(1, int(img.height * ratio))), resample)
+
+
+def make_thumbnail(file_path: Path, size: int) -> Optional[Image.Image]:
+    """从原图生成限定在 size x size 内（保持宽高比）的 RGB 缩略图"""
+    try:
+        with Image.open(file_path) as src_img:
+            # JPEG 可在解码时直接降采样，大图生成缩略图更快
+            src_img.draft('RGB', (size, size))
+            return _fit(_flatten_to_rgb(src_img), size, Image.Resampling.LANCZOS)
+    except Exception as e:
+        logger.debug(f"生成缩略图失败 {file_path}: {e}")
+        return None
+
+
+class _Pack:
+    """单档尺寸的打包文件（只追加写，mmap 读）"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        path.touch(exist_ok=True)
+
+    def append(self, data: bytes) -> int:
+        # 调用前需持有 self.lock
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        # 调用前需持有 self.lock
+        if self._mmap is None or offset + length > self._mapped_size:
+            self.close()
+            file_size = self.path.stat().st_size
+            if file_size == 0 or offset + length > file_size:
+                raise ValueError("缩略图数据超出打包文件范围")
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = file_size
+        return self._mmap[offset:offset + length]
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mapped_size = 0
+
+
+class ThumbnailStore:
+    """持久化缩略图缓存"""
+
+    def __init__(self, root: Path = THUMB_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(root / INDEX_DB_NAME), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                file_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime REAL NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                PRIMARY KEY (file_path, size)
+            )
+        """)
+        self._conn.commit()
+        self._packs: Dict[int, _Pack] = {}
+        self._packs_lock = threading.Lock()
+
+    # ==================== 内部工具 ====================
+
+    def _get_pack(self, size: int) -> _Pack:
+        with self._packs_lock:
+            pack = self._packs.get(size)
+            if pack is None:
+                pack = _Pack(self.root / f"thumbs_{size}.pack")
+                self._packs[size] = pack
+                self._maybe_compact(size, pack)
+            return pack
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, float]]:
+        try:
+            st = path.stat()
+            return st.st_size, st.st_mtime
+        except OSError:
+            return None
+
+    def _lookup(self, size: int, keys: Dict[str, Tuple[int, float]]) -> Dict[str, Tuple[int, int]]:
+        """返回 {路径: (偏移, 长度)}，只包含文件大小/修改时间都匹配的条目"""
+        result: Dict[str, Tuple[int, int]] = {}
+        paths = list(keys)
+        with self._db_lock:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(f"""
+                    SELECT file_path, file_size, file_mtime, offset, length FROM thumbnails
+                    WHERE size = ? AND file_path IN ({placeholders})
+                """, (size, *chunk)).fetchall()
+                for file_path, file_size, file_mtime, offset, length in rows:
+                    if keys[file_path] == (file_size, file_mtime):
+                        result[file_path] = (offset, length)
+        return result
+
+    def _store(self, size: int, items: List[Tuple[str, Tuple[int, float], Image.Image]]):
+        """把新生成的缩略图追加到打包文件并写入索引"""
+        if not items:
+            return
+        pack = self._get_pack(size)
+        rows = []
+        with pack.lock:
+            for path_str, (file_size, file_mtime), thumb in items:
+                buf = io.BytesIO()
+                thumb.save(buf, format='JPEG', quality=THUMBNAIL_QUALITY)
+                data = buf.getvalue()
+                offset = pack.append(data)
+                rows.append((path_str, size, file_size, file_mtime, offset, len(data), thumb.width, thumb.height))
+        with self._db_lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO thumbnails
+                (file_path, size, file_size, file_mtime, offset, length, width, height)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.commit()
+
+    def _maybe_compact(self, size: int, pack: _Pack):
+        """失效数据过多时重写打包文件，只保留仍然存在的图片的缩略图"""
+        with self._db_lock:
+            live = self._conn.execute(
+                "SELECT COALESCE(SUM(length), 0) FROM thumbnails WHERE size = ?", (size,)
+            ).fetchone()[0]
+        try:
+            total = pack.path.stat().st_size
+        except OSError:
+            return
+        dead = total - live
+        if dead < COMPACT_MIN_DEAD_BYTES or dead < live:
+            return
+
+        logger.info(f"压缩缩略图打包文件 {pack.path.name}: 有效 {live} 字节，失效 {dead} 字节")
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT file_path, offset, length FROM thumbnails WHERE size = ? ORDER BY offset", (size,)
+            ).fetchall()
+        tmp_path = pack.path.with_suffix('.pack.tmp')
+        updates = []
+        removed = []
+        with pack.lock:
+            with open(pack.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for file_path, offset, length in rows:
+                    if not os.path.exists(file_path):
+                        removed.append((file_path, size))
+                        continue
+                    src.seek(offset)
+                    updates.append((dst.tell(), file_path, size))
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+            pack.close()
+            with self._db_lock:
+                self._conn.executemany("UPDATE thumbnails SET offset = ? WHERE file_path = ? AND size = ?", updates)
+                self._conn.executemany("DELETE FROM thumbnails WHERE file_path = ? AND size = ?", removed)
+                os.replace(tmp_path, pack.path)
+                self._conn.commit()
+
+    # ==================== 公开接口 ====================
+
+    def get_many(
+        self,
+        image_files: Iterable[Path],
+        size: int,
+        sources: Optional[Dict[Path, Optional[Image.Image]]] = None,
+    ) -> Dict[Path, Optional[Image.Image]]:
+        """
+        批量获取缩略图（限定在 size x size 内），未缓存的会生成并写入缓存
+
+        size 不是预设档位时，从不小于它的最小档位缩略图缩放得到
+        sources: 可选的更大尺寸缩略图，未缓存时从它缩放生成而不是解码原图
+        返回: {图片路径: 缩略图或 None（加载失败）}
+        """
+        image_files = list(image_files)
+        base_size = min((s for s in THUMBNAIL_SIZES if s >= size), default=None)
+        if base_size is None:
+            # 超出缓存档位，直接从原图生成
+            with ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS) as executor:
+                return dict(zip(image_files, executor.map(lambda p: make_thumbnail(p, size), image_files)))
+
+        keys: Dict[str, Tuple[int, float]] = {}
+        path_map: Dict[str, Path] = {}
+        for path in image_files:
+            sig = self._stat(path)
+            if sig is not None:
+                path_str = str(path.absolute())
+                keys[path_str] = sig
+                path_map[path_str] = path
+
+        # 先取打包文件（首次打开时可能压缩并改写偏移），再查索引
+        pack = self._get_pack(base_size)
+        hits = self._lookup(base_size, keys)
+        result: Dict[Path, Optional[Image.Image]] = {path: None for path in image_files}
+        missing: List[str] = []
+        with pack.lock:
+            for path_str in keys:
+                hit = hits.get(path_str)
+                if hit is None:
+                    missing.append(path_str)
+                    continue
+                try:
+                    img = Image.open(io.BytesIO(pack.read(*hit)))
+                    img.load()
+                    result[path_map[path_str]] = img
+                except Exception as e:
+                    logger.debug(f"读取缩略图失败 {path_str}: {e}")
+                    missing.append(path_str)
+
+        if missing:
+            def generate(path_str: str) -> Optional[Image.Image]:
+                source = sources.get(path_map[path_str]) if sources else None
+                if source is not None:
+                    return _fit(source, base_size, Image.Resampling.LANCZOS)
+                return make_thumbnail(path_map[path_str], base_size)
+
+            with ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS) as executor:
+                generated = list(executor.map(generate, missing))
+            self._store(base_size, [(p, keys[p], t) for p, t in zip(missing, generated) if t is not None])
+            for path_str, thumb in zip(missing, generated):
+                result[path_map[path_str]] = thumb
+
+        if base_size != size:
+            for path, thumb in result.items():
+                if thumb is not None:
+                    result[path] = _fit(thumb, size, Image.Resampling.BILINEAR)
+        return result
+
+    def get(self, image_file: Path, size: int) -> Optional[Image.Image]:
+        """获取单张缩略图"""
+        return self.get_many([image_file], size).get(image_file)
+
+    def prewarm(self, image_files: Iterable[Path], sizes: Iterable[int] = THUMBNAIL_SIZES):
+        """预生成缩略图（从最大档位开始，较小档位由上一档缩放，避免重复解码原图）"""
+        image_files = list(image_files)
+        sources = None
+        for size in sorted(sizes, reverse=True):
+            sources = self.get_many(image_files, size, sources)
+
+
+# 全局实例
+thumbnail_store = ThumbnailStore()
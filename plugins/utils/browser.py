@@ -7,15 +7,23 @@
 - 提供 html_to_pic / template_to_pic / md_to_pic / get_new_page 等函数
   （接口兼容 nonebot_plugin_htmlrender，可直接替换 import）
 - 保留 PlaywrightPage 上下文管理器（向后兼容）
+- html_to_pic（及基于它的 template_to_pic / md_to_pic / text_to_pic）使用预热页面池：
+  按 (template_path, device_scale_factor, context 参数) 复用已打开的 context + page，
+  资源缓存保持温热；内容加载后等待 load + 字体 / 图片就绪（页面可设置
+  window.renderReady Promise 作为显式就绪信号），不再等待 networkidle
+- html_to_pic / template_to_pic / md_to_pic / text_to_pic 可传 cache_ttl 开启截图结果缓存（见 html_render_cache）
 """
 
 import asyncio
+import json
 import time
+from collections import deque
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from os import getcwd
 from pathlib import Path
-from typing import Any, Literal, Optional, Union
+from typing import Any, Iterable, Literal, Optional, Union
 
 import aiofiles
 import jinja2
@@ -29,6 +37,7 @@ from playwright.async_api import (
     Error as PlaywrightError,
 )
 
+from .html_render_cache import render_cache, render_cache_key
 from .tools import get_logger, get_exc_desc
 
 logger = get_logger("Browser")
@@ -38,6 +47,10 @@ logger = get_logger("Browser")
 IDLE_TIMEOUT = 300  # 空闲 5 分钟后自动关闭浏览器
 MAX_CONTEXTS = 5
 
+POOL_MAX_IDLE_PAGES = 6  # 预热页面池保留的空闲页面总数上限（所有 key 合计）
+POOL_PAGE_MAX_USES = 50  # 单个页面渲染次数上限，超过后回收重建，避免长期运行累积内存
+RENDER_READY_TIMEOUT = 10  # 等待就绪信号的上限（秒），超时后照常截图
+
 TEMPLATES_PATH = str(Path(__file__).parent / "templates")
 
 # ================= 全局状态 =================
@@ -52,6 +65,7 @@ _active_contexts = 0  # 当前活跃的 context 数量
 _state_lock = asyncio.Lock()
 _idle_task: Optional[asyncio.Task] = None
 _last_release_time: float = 0.0
+_render_waiting = 0  # 正在排队等待 context 名额的渲染数
 
 
 # ================= 浏览器生命周期 =================
@@ -106,6 +120,7 @@ async def _ensure_browser() -> Browser:
 async def _close_browser():
     """关闭浏览器实例（不关闭 Playwright runtime，下次可快速重启）。"""
     global _playwright_browser, _using_htmlrender
+    await _page_pool.clear()
     if _playwright_browser is not None:
         if _using_htmlrender:
             # 复用的 htmlrender 浏览器，不由我们关闭，只解除引用
@@ -261,6 +276,206 @@ class PlaywrightPage:
         return False
 
 
+# ================= 预热页面池 =================
+
+# load 之后的显式就绪信号：字体加载完成、（非懒加载的）图片加载完成，
+# 以及页面自行声明的 window.renderReady（Promise，可选）
+_RENDER_READY_SCRIPT = """
+async () => {
+    if (document.fonts && document.fonts.ready) {
+        await document.fonts.ready;
+    }
+    await Promise.all(
+        Array.from(document.images)
+            .filter((img) => !img.complete && img.loading !== "lazy")
+            .map((img) => new Promise((resolve) => {
+                img.addEventListener("load", resolve, { once: true });
+                img.addEventListener("error", resolve, { once: true });
+            }))
+    );
+    if (window.renderReady && typeof window.renderReady.then === "function") {
+        await window.renderReady;
+    }
+}
+"""
+
+
+@dataclass
+class _PooledPage:
+    key: tuple
+    browser: Browser
+    context: Any
+    page: Page
+    uses: int = 0
+    crashed: bool = False
+
+
+class _PagePool:
+    """
+    按 key 复用 context + page 的空闲池。
+
+    - 页面只在渲染期间被占用，用完归还；空闲页面超过 POOL_MAX_IDLE_PAGES 时按 LRU 关闭
+    - 渲染 POOL_PAGE_MAX_USES 次后回收重建
+    - 页面崩溃 / 所属浏览器已断开 / 渲染出错的页面直接丢弃，不会再被复用
+    - 浏览器空闲关闭时一并清空
+    """
+
+    def __init__(self) -> None:
+        self._idle: deque[_PooledPage] = deque()
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def _usable(self, entry: _PooledPage) -> bool:
+        return (
+            not entry.crashed
+            and entry.uses < POOL_PAGE_MAX_USES
+            and entry.browser is _playwright_browser
+            and entry.browser.is_connected()
+            and not entry.page.is_closed()
+        )
+
+    async def acquire(
+        self,
+        browser: Browser,
+        key: tuple,
+        device_scale_factor: float,
+        context_kwargs: dict,
+    ) -> _PooledPage:
+        # 从最近归还的开始找，命中即取出（取出过程中无 await，不会被并发渲染抢到同一页）
+        for entry in reversed(self._idle):
+            if entry.key == key:
+                self._idle.remove(entry)
+                if self._usable(entry):
+                    self.reused += 1
+                    return entry
+                await self._close(entry)
+                break
+
+        context = await browser.new_context(device_scale_factor=device_scale_factor, **context_kwargs)
+        try:
+            page = await context.new_page()
+        except BaseException:
+            await context.close()
+            raise
+        entry = _PooledPage(key=key, browser=browser, context=context, page=page)
+        page.on("console", lambda msg: logger.debug(f"[Browser Console]: {msg.text}"))
+        page.on("crash", lambda _: setattr(entry, "crashed", True))
+        self.created += 1
+        return entry
+
+    async def release(self, entry: _PooledPage, reusable: bool) -> None:
+        entry.uses += 1
+        if not reusable or not self._usable(entry):
+            if entry.uses >= POOL_PAGE_MAX_USES:
+                self.recycled += 1
+            else:
+                self.discarded += 1
+            await self._close(entry)
+            return
+        self._idle.append(entry)
+        while len(self._idle) > POOL_MAX_IDLE_PAGES:
+            await self._close(self._idle.popleft())
+
+    async def clear(self) -> None:
+        entries = list(self._idle)
+        self._idle.clear()
+        for entry in entries:
+            await self._close(entry)
+
+    async def _close(self, entry: _PooledPage) -> None:
+        try:
+            await entry.context.close()
+        except Exception as e:
+            logger.debug(f"关闭池化 Context 失败: {get_exc_desc(e)}")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "created": self.created,
+            "reused": self.reused,
+            "recycled": self.recycled,
+            "discarded": self.discarded,
+            "waiting": _render_waiting,
+        }
+
+
+_page_pool = _PagePool()
+
+
+def get_render_pool_stats() -> dict[str, int]:
+    return _page_pool.stats()
+
+
+def _pool_key(template_path: str, device_scale_factor: float, context_kwargs: dict) -> tuple:
+    return (
+        template_path,
+        float(device_scale_factor),
+        json.dumps(context_kwargs, sort_keys=True, ensure_ascii=False, default=repr),
+    )
+
+
+@asynccontextmanager
+async def _pooled_page(
+    template_path: str,
+    device_scale_factor: float,
+    context_kwargs: dict,
+) -> AsyncIterator[Page]:
+    """从预热池取一个已打开的页面，并导航到 template_path（作为相对资源的 base URL）"""
+    global _render_waiting, _playwright_browser
+    _render_waiting += 1
+    try:
+        await _context_semaphore.acquire()
+    finally:
+        _render_waiting -= 1
+
+    entry: Optional[_PooledPage] = None
+    reusable = False
+    acquired = False
+    try:
+        async with _state_lock:
+            browser = await _ensure_browser()
+        await _on_context_acquire()
+        acquired = True
+
+        entry = await _page_pool.acquire(
+            browser,
+            _pool_key(template_path, device_scale_factor, context_kwargs),
+            device_scale_factor,
+            context_kwargs,
+        )
+        # 每次重新导航以获得全新的 document / window（避免上次渲染的脚本全局变量残留），
+        # context 与其资源缓存保持复用
+        await entry.page.goto(template_path)
+        yield entry.page
+        reusable = True
+    except PlaywrightError:
+        # 浏览器整体崩溃时标记重启；仅单个页面出错则只丢弃该页面
+        if entry is not None and not entry.browser.is_connected() and entry.browser is _playwright_browser:
+            _playwright_browser = None
+            await _page_pool.clear()
+        raise
+    finally:
+        if entry is not None:
+            await _page_pool.release(entry, reusable)
+        if acquired:
+            await _on_context_release()
+        _context_semaphore.release()
+
+
+def _is_crash_error(e: Exception) -> bool:
+    message = str(e).lower()
+    return any(word in message for word in ("crash", "target closed", "has been closed", "disconnected"))
+
+
+async def _wait_render_ready(page: Page) -> None:
+    try:
+        await asyncio.wait_for(page.evaluate(_RENDER_READY_SCRIPT), timeout=RENDER_READY_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.debug(f"等待渲染就绪超时（{RENDER_READY_TIMEOUT}s），直接截图")
+
+
 # ================= 文件/模板读取 =================
 
 async def read_file(path: str) -> str:
@@ -292,26 +507,79 @@ async def html_to_pic(
     device_scale_factor: float = 2,
     screenshot_timeout: Optional[float] = 30_000,
     full_page: Optional[bool] = True,
+    cache_ttl: Optional[float] = None,
     **kwargs,
 ) -> bytes:
-    """html 转图片，接口兼容 nonebot_plugin_htmlrender。"""
+    """
+    html 转图片，接口兼容 nonebot_plugin_htmlrender。
+
+    cache_ttl: 截图结果缓存秒数，默认不缓存；html 与截图参数完全相同的请求在 TTL 内直接复用
+    """
     if "file:" not in template_path:
         raise Exception("template_path should be file:///path/to/template")
-    async with get_new_page(device_scale_factor, **kwargs) as page:
-        page.on("console", lambda msg: logger.debug(f"[Browser Console]: {msg.text}"))
-        await page.goto(template_path)
-        await page.set_content(html, wait_until="networkidle")
-        await page.wait_for_timeout(wait)
-        return await page.screenshot(
-            full_page=full_page,
-            type=type,
-            quality=quality,
-            timeout=screenshot_timeout,
+    if cache_ttl:
+        key = render_cache_key(
+            "html", html, template_path, wait, type, quality, device_scale_factor, full_page, kwargs,
         )
+        return await render_cache.get_or_render(
+            key,
+            cache_ttl,
+            lambda: html_to_pic(
+                html,
+                wait=wait,
+                template_path=template_path,
+                type=type,
+                quality=quality,
+                device_scale_factor=device_scale_factor,
+                screenshot_timeout=screenshot_timeout,
+                full_page=full_page,
+                **kwargs,
+            ),
+        )
+    # 页面崩溃 / 浏览器断开时换一个新页面重试一次；普通超时等错误直接抛出
+    retried = False
+    while True:
+        try:
+            async with _pooled_page(template_path, device_scale_factor, kwargs) as page:
+                await page.set_content(html, wait_until="load")
+                await _wait_render_ready(page)
+                if wait:
+                    await page.wait_for_timeout(wait)
+                return await page.screenshot(
+                    full_page=full_page,
+                    type=type,
+                    quality=quality,
+                    timeout=screenshot_timeout,
+                )
+        except PlaywrightError as e:
+            if retried or not _is_crash_error(e):
+                raise
+            retried = True
+            logger.warning(f"渲染页面崩溃，使用新页面重试: {get_exc_desc(e)}")
 
 
 # ================= template_to_pic =================
 
+def _template_dir_fingerprint(template_path: str) -> list[tuple[str, int, int]]:
+    """
+    模板目录下所有文件的 (相对路径, mtime, 大小)。
+
+    子模板只是 {% extends %} / {% include %} 的一小部分，父模板、样式和图片同样影响截图，
+    整个目录参与缓存键，任意文件改动都会使旧截图失效。
+    """
+    root = Path(template_path)
+    entries = []
+    for path in sorted(root.rglob("*")):
+        try:
+            if not path.is_file():
+                continue
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((path.relative_to(root).as_posix(), stat.st_mtime_ns, stat.st_size))
+    return entries
+
+
 async def template_to_pic(
     template_path: str,
     template_name: str,
@@ -323,8 +591,15 @@ async def template_to_pic(
     quality: Union[int, None] = None,
     device_scale_factor: float = 2,
     screenshot_timeout: Optional[float] = 30_000,
+    cache_ttl: Optional[float] = None,
+    cache_exclude: Iterable[str] = (),
 ) -> bytes:
-    """使用 jinja2 模板引擎通过 html 生成图片，接口兼容 nonebot_plugin_htmlrender。"""
+    """
+    使用 jinja2 模板引擎通过 html 生成图片，接口兼容 nonebot_plugin_htmlrender。
+
+    cache_ttl: 截图结果缓存秒数，默认不缓存；按 模板目录文件 + 模板数据 + 页面参数 的摘要命中
+    cache_exclude: 不参与缓存键的模板变量（如每次都不同的生成时间戳），命中时沿用缓存图中的旧值
+    """
     if pages is None:
         pages = {
             "viewport": {"width": 500, "height": 10},
@@ -342,6 +617,38 @@ async def template_to_pic(
 
     template = template_env.get_template(template_name)
 
+    if cache_ttl:
+        excluded = set(cache_exclude)
+        key = render_cache_key(
+            "template",
+            template_path,
+            template_name,
+            await asyncio.to_thread(_template_dir_fingerprint, template_path),
+            {k: v for k, v in templates.items() if k not in excluded},
+            sorted(filters or ()),
+            pages,
+            wait,
+            type,
+            quality,
+            device_scale_factor,
+        )
+        return await render_cache.get_or_render(
+            key,
+            cache_ttl,
+            lambda: template_to_pic(
+                template_path,
+                template_name,
+                templates,
+                filters=filters,
+                pages=pages,
+                wait=wait,
+                type=type,
+                quality=quality,
+                device_scale_factor=device_scale_factor,
+                screenshot_timeout=screenshot_timeout,
+            ),
+        )
+
     return await html_to_pic(
         template_path=f"file://{template_path}",
         html=await template.render_async(**templates),
@@ -385,6 +692,7 @@ async def md_to_pic(
     quality: Union[int, None] = None,
     device_scale_factor: float = 2,
     screenshot_timeout: Optional[float] = 30_000,
+    cache_ttl: Optional[float] = None,
 ) -> bytes:
     """markdown 转图片，接口兼容 nonebot_plugin_htmlrender。"""
     template = _env.get_template("markdown.html")
@@ -435,6 +743,7 @@ async def md_to_pic(
         quality=quality,
         device_scale_factor=device_scale_factor,
         screenshot_timeout=screenshot_timeout,
+        cache_ttl=cache_ttl,
     )
 
 
@@ -448,6 +757,7 @@ async def text_to_pic(
     quality: Union[int, None] = None,
     device_scale_factor: float = 2,
     screenshot_timeout: Optional[float] = 30_000,
+    cache_ttl: Optional[float] = None,
 ) -> bytes:
     """多行文本转图片，接口兼容 nonebot_plugin_htmlrender。"""
     template = _env.get_template("text.html")
@@ -463,6 +773,7 @@ async def text_to_pic(
         quality=quality,
         device_scale_factor=device_scale_factor,
         screenshot_timeout=screenshot_timeout,
+        cache_ttl=cache_ttl,
     )
 
 
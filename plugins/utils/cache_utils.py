@@ -0,0 +1,120 @@
+"""
+缓存通用工具：
+
+- SingleFlight：并发的相同计算只执行一次，其余请求等待同一结果
+- prune_cache_dir：按「最久未使用时间 + 总字节数」清理 <目录>/<分片>/<文件> 结构的磁盘缓存
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generic, Hashable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Flight(Generic[T]):
+    """领头请求的结果槽：设置 result 后，等待者拿到的就是它（未设置则为 None）"""
+
+    result: Optional[T] = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    按 key 合并并发的相同计算。
+
+    等待者只关心结果：领头请求无论成败、是否被取消都以结果（失败为 None）结束，
+    不把自己的取消或异常传给其他请求；等待者拿到 None 时自行决定重试还是自己计算。
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[Optional[T]]] = {}
+
+    def is_inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def wait(self, key: Hashable) -> tuple[bool, Optional[T]]:
+        """有进行中的计算时等待它，返回 (是否等待过, 结果)"""
+        future = self._inflight.get(key)
+        if future is None:
+            return False, None
+        # shield：某个等待者被取消时不影响领头请求和其他等待者
+        return True, await asyncio.shield(future)
+
+    @contextmanager
+    def lead(self, key: Hashable) -> Iterator[Flight[T]]:
+        """登记为领头请求；退出时把 flight.result 交给所有等待者"""
+        future: asyncio.Future[Optional[T]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        flight: Flight[T] = Flight()
+        try:
+            yield flight
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.done():
+                future.set_result(flight.result)
+
+
+@dataclass
+class PruneResult:
+    removed: int = 0
+    removed_bytes: int = 0
+    kept: int = 0
+    kept_bytes: int = 0
+
+
+def prune_cache_dir(
+    root: Path,
+    *,
+    max_total_bytes: Optional[int] = None,
+    max_age_seconds: Optional[float] = None,
+    pattern: str = "*/*",
+) -> PruneResult:
+    """
+    先删除修改时间早于 max_age_seconds 的文件，总量仍超过 max_total_bytes 时按修改时间从旧到新删除。
+    以 "." 开头的文件（写入中的临时文件）不参与统计；调用方用 mtime 记录最近使用时间。
+    """
+    result = PruneResult()
+    if not root.is_dir():
+        return result
+    cutoff = time.time() - max_age_seconds if max_age_seconds is not None else None
+    files: list[tuple[float, int, Path]] = []
+    for path in root.glob(pattern):
+        if path.name.startswith("."):
+            continue
+        try:
+            stat = path.stat()
+            if cutoff is not None and stat.st_mtime < cutoff:
+                path.unlink()
+                result.removed += 1
+                result.removed_bytes += stat.st_size
+                continue
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    if max_total_bytes is not None and total > max_total_bytes:
+        files.sort()
+        kept: list[tuple[float, int, Path]] = []
+        for index, (mtime, size, path) in enumerate(files):
+            if total <= max_total_bytes:
+                kept.extend(files[index:])
+                break
+            try:
+                path.unlink()
+            except OSError:
+                kept.append((mtime, size, path))
+                continue
+            total -= size
+            result.removed += 1
+            result.removed_bytes += size
+        files = kept
+
+    result.kept = len(files)
+    result.kept_bytes = total
+    return result
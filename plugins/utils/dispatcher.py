@@ -0,0 +1,360 @@
+"""
+全局消息发送调度器
+
+各插件的广播（订阅推送、定时消息、日报、赛事提醒）原先都是逐群串行发送，并在每次发送后硬 sleep：
+向 40 个群推一条动态要一分钟，调用方全程被阻塞。这里统一接管发送：
+
+- 每个发送目标（群 / 私聊）一个 FIFO 队列：同一目标内严格保序，不同目标之间并发投递
+- per-bot 与 per-目标两级令牌桶限速，取代各处的固定 sleep
+- 幂等键：同一 key 在 DEDUP_TTL 秒内只投递一次，重复提交直接复用第一次的结果（投递失败的 key 会释放）
+- 失败按指数退避 + 随机抖动重试；超时视为「服务端可能已处理」不再重试，避免重复消息
+- submit() 立即返回 Future，调用方可以不等待；需要结果（如记录 message_id）时 await 即可
+- get_dispatcher_stats() 返回计数与队列状态，便于排查
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from nonebot import get_driver
+from nonebot.adapters.onebot.v11 import Bot
+from nonebot.exception import ActionFailed, NetworkError
+
+from .tools import get_exc_desc, get_logger
+
+logger = get_logger("Dispatcher")
+
+# per-bot：每秒 3 条，最多攒 5 条突发
+BOT_RATE_PER_SECOND = 3.0
+BOT_BURST = 5
+# per-目标：每 1.5 秒 1 条（沿用各插件原先的发送间隔），最多攒 2 条突发
+TARGET_RATE_PER_SECOND = 1 / 1.5
+TARGET_BURST = 2
+# 同时在途的发送请求上限（OneBot 实现端通常是单连接，过高并发只会排队超时）
+MAX_CONCURRENT_SENDS = 8
+
+DEFAULT_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+DEDUP_TTL = 600.0
+
+
+@dataclass(frozen=True)
+class SendTarget:
+    """一个发送目标：群聊或私聊二选一"""
+
+    group_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+    @property
+    def is_private(self) -> bool:
+        return self.user_id is not None
+
+    def __str__(self) -> str:
+        return f"私聊 {self.user_id}" if self.is_private else f"群 {self.group_id}"
+
+
+@dataclass
+class DeliveryResult:
+    """一条消息的最终投递结果"""
+
+    ok: bool
+    target: SendTarget
+    message_id: Optional[int] = None
+    attempts: int = 0
+    error: str = ""
+
+
+@dataclass
+class DispatcherStats:
+    submitted: int = 0
+    delivered: int = 0
+    failed: int = 0
+    retried: int = 0
+    deduplicated: int = 0
+    total_latency: float = 0.0  # 从提交到投递完成的累计耗时（秒）
+
+
+class TokenBucket:
+    """令牌桶：允许透支，透支部分按速率排队（先预约的先放行）"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass
+class _Job:
+    bot: Bot
+    target: SendTarget
+    message: Any
+    forward: bool
+    retries: int
+    desc: str
+    key: Optional[str]
+    future: asyncio.Future
+    created: float = field(default_factory=time.monotonic)
+
+
+# 队列 key：(bot self_id, 是否私聊, 群号/QQ号)
+_QueueKey = Tuple[str, bool, int]
+
+
+class MessageDispatcher:
+    def __init__(
+        self,
+        bot_rate: float = BOT_RATE_PER_SECOND,
+        bot_burst: int = BOT_BURST,
+        target_rate: float = TARGET_RATE_PER_SECOND,
+        target_burst: int = TARGET_BURST,
+        max_concurrency: int = MAX_CONCURRENT_SENDS,
+    ):
+        self.bot_rate = bot_rate
+        self.bot_burst = bot_burst
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.max_concurrency = max_concurrency
+        self._queues: Dict[_QueueKey, Deque[_Job]] = {}
+        self._workers: Dict[_QueueKey, asyncio.Task] = {}
+        self._target_buckets: Dict[_QueueKey, TokenBucket] = {}
+        self._bot_buckets: Dict[str, TokenBucket] = {}
+        self._keys: Dict[str, Tuple[float, asyncio.Future]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = DispatcherStats()
+
+    # ---------- 提交 ----------
+
+    def submit(
+        self,
+        bot: Bot,
+        target: SendTarget,
+        message: Any,
+        *,
+        key: Optional[str] = None,
+        forward: bool = False,
+        retries: int = DEFAULT_RETRIES,
+        desc: str = "消息",
+    ) -> "asyncio.Future[DeliveryResult]":
+        """
+        提交一条消息，立即返回 Future（结果为 DeliveryResult，不会抛异常）
+
+        key: 幂等键，相同 key 在 DEDUP_TTL 秒内只投递一次
+        forward: message 为合并转发节点列表
+        """
+        self._prune_keys()
+        if key is not None:
+            cached = self._keys.get(key)
+            if cached is not None:
+                self.stats.deduplicated += 1
+                logger.debug(f"{target} 的{desc}（key={key}）已提交过，跳过重复发送")
+                return cached[1]
+
+        future = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._keys[key] = (time.monotonic(), future)
+        job = _Job(bot, target, message, forward, max(1, retries), desc, key, future)
+
+        queue_key = self._queue_key(bot, target)
+        self._queues.setdefault(queue_key, deque()).append(job)
+        self.stats.submitted += 1
+        worker = self._workers.get(queue_key)
+        if worker is None or worker.done():
+            self._workers[queue_key] = asyncio.create_task(self._run_target(queue_key))
+        return future
+
+    async def send(self, bot: Bot, target: SendTarget, message: Any, **kwargs) -> DeliveryResult:
+        """提交并等待投递结果"""
+        return await self.submit(bot, target, message, **kwargs)
+
+    def broadcast(
+        self,
+        bot: Bot,
+        group_ids: Iterable[int],
+        message: Any,
+        *,
+        key: Optional[str] = None,
+        **kwargs,
+    ) -> List["asyncio.Future[DeliveryResult]"]:
+        """向多个群提交同一条消息（各群并发投递）；key 会按群展开为 f"{key}:{group_id}" """
+        return [
+            self.submit(
+                bot,
+                SendTarget(group_id=int(group_id)),
+                message,
+                key=f"{key}:{group_id}" if key is not None else None,
+                **kwargs,
+            )
+            for group_id in group_ids
+        ]
+
+    # ---------- 投递 ----------
+
+    @staticmethod
+    def _queue_key(bot: Bot, target: SendTarget) -> _QueueKey:
+        if target.is_private:
+            return str(bot.self_id), True, int(target.user_id)
+        return str(bot.self_id), False, int(target.group_id)
+
+    def _prune_keys(self):
+        if not self._keys:
+            return
+        deadline = time.monotonic() - DEDUP_TTL
+        for key, (created, future) in list(self._keys.items()):
+            if created < deadline and future.done():
+                del self._keys[key]
+
+    async def _throttle(self, job: _Job, bucket: TokenBucket):
+        wait = bucket.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        bot_id = str(job.bot.self_id)
+        bot_bucket = self._bot_buckets.get(bot_id)
+        if bot_bucket is None:
+            bot_bucket = self._bot_buckets[bot_id] = TokenBucket(self.bot_rate, self.bot_burst)
+        wait = bot_bucket.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    async def _call(job: _Job) -> Any:
+        target = job.target
+        if job.forward:
+            if target.is_private:
+                return await job.bot.call_api("send_private_forward_msg", user_id=target.user_id, messages=job.message)
+            return await job.bot.call_api("send_group_forward_msg", group_id=target.group_id, messages=job.message)
+        if target.is_private:
+            return await job.bot.send_private_msg(user_id=target.user_id, message=job.message)
+        return await job.bot.send_group_msg(group_id=target.group_id, message=job.message)
+
+    async def _deliver(self, job: _Job, bucket: TokenBucket) -> DeliveryResult:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        error = ""
+        for attempt in range(1, job.retries + 1):
+            await self._throttle(job, bucket)
+            async with self._semaphore:
+                try:
+                    resp = await self._call(job)
+                except NetworkError as e:
+                    if "timeout" in str(e).lower():
+                        logger.warning(f"{job.target} 发送{job.desc}超时，服务端可能已处理，跳过重试避免重复发送")
+                        return DeliveryResult(True, job.target, attempts=attempt, error=get_exc_desc(e))
+                    error = get_exc_desc(e)
+                except (ActionFailed, ValueError, asyncio.TimeoutError) as e:
+                    error = get_exc_desc(e)
+                except Exception as e:
+                    # 未预期的异常（消息构造错误等）重试也不会好
+                    logger.exception(f"{job.target} 发送{job.desc}出现未预期的异常: {get_exc_desc(e)}")
+                    return DeliveryResult(False, job.target, attempts=attempt, error=get_exc_desc(e))
+                else:
+                    message_id = resp.get("message_id") if isinstance(resp, dict) else None
+                    return DeliveryResult(True, job.target, message_id=message_id, attempts=attempt)
+
+            if attempt < job.retries:
+                self.stats.retried += 1
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"{job.target} 发送{job.desc}失败（第 {attempt}/{job.retries} 次），{delay:.1f}s 后重试: {error}"
+                )
+                await asyncio.sleep(delay)
+
+        logger.error(f"{job.target} 发送{job.desc}最终失败，已尝试 {job.retries} 次: {error}")
+        return DeliveryResult(False, job.target, attempts=job.retries, error=error)
+
+    def _finish(self, job: _Job, result: DeliveryResult):
+        if result.ok:
+            self.stats.delivered += 1
+        else:
+            self.stats.failed += 1
+            # 失败的 key 释放掉，允许调用方下一轮重新提交
+            if job.key is not None:
+                self._keys.pop(job.key, None)
+        self.stats.total_latency += time.monotonic() - job.created
+        if not job.future.done():
+            job.future.set_result(result)
+
+    async def _run_target(self, queue_key: _QueueKey):
+        """单个目标的投递任务：按序处理队列，队列清空后退出"""
+        queue = self._queues[queue_key]
+        bucket = self._target_buckets.get(queue_key)
+        if bucket is None:
+            bucket = self._target_buckets[queue_key] = TokenBucket(self.target_rate, self.target_burst)
+        try:
+            while queue:
+                job = queue[0]
+                result = await self._deliver(job, bucket)
+                queue.popleft()
+                self._finish(job, result)
+        except asyncio.CancelledError:
+            for job in queue:
+                self._finish(job, DeliveryResult(False, job.target, error="调度器已关闭"))
+            queue.clear()
+            raise
+        finally:
+            if not queue:
+                self._queues.pop(queue_key, None)
+                if self._workers.get(queue_key) is asyncio.current_task():
+                    del self._workers[queue_key]
+
+    # ---------- 状态与关闭 ----------
+
+    def get_stats(self) -> Dict[str, Any]:
+        finished = self.stats.delivered + self.stats.failed
+        return {
+            "submitted": self.stats.submitted,
+            "delivered": self.stats.delivered,
+            "failed": self.stats.failed,
+            "retried": self.stats.retried,
+            "deduplicated": self.stats.deduplicated,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "active_targets": sum(1 for t in self._workers.values() if not t.done()),
+            "avg_latency": self.stats.total_latency / finished if finished else 0.0,
+        }
+
+    async def close(self, timeout: float = 10.0):
+        """关闭前尽量投递完已排队的消息，超时后取消剩余投递"""
+        workers = [t for t in self._workers.values() if not t.done()]
+        if not workers:
+            return
+        queued = sum(len(q) for q in self._queues.values())
+        logger.info(f"等待 {queued} 条排队中的消息发送完成（最多 {timeout:.0f}s）")
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"关闭时仍有 {len(pending)} 个目标的消息未发送完成，已放弃")
+
+
+message_dispatcher = MessageDispatcher()
+
+
+def get_dispatcher_stats() -> Dict[str, Any]:
+    return message_dispatcher.get_stats()
+
+
+try:
+    _driver = get_driver()
+except Exception:
+    # 允许在非 NoneBot 环境下 import（例如命令行检查/单测）
+    _driver = None
+
+
+if _driver:
+
+    @_driver.on_shutdown
+    async def _close_dispatcher():
+        await message_dispatcher.close()
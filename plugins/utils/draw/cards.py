@@ -82,6 +82,7 @@ async def render_leaderboard_card(
     watermark: str | None = None,
     width: int = 720,
     colors: LeaderboardCardColors | None = None,
+    cache_key: str | None = None,
 ) -> bytes:
     """渲染通用排行榜/统计卡片（轻量，无 htmlrender）。
 
@@ -95,6 +96,7 @@ async def render_leaderboard_card(
         watermark: 右下角水印（可选，默认 "Generated by HakuBot"）
         width: 图片宽度（建议 650~800）
         colors: 配色方案（可选）
+        cache_key: Painter 渲染缓存键（可选）；同一个键只保留最新内容的结果，应按卡片用途/群区分
 
     Returns:
         PNG bytes
@@ -241,7 +243,7 @@ async def render_leaderboard_card(
     canvas = Canvas(w=width, h=None, bg=FillBg(colors.canvas_bg))
     canvas.set_items([card]).set_content_align("c")
 
-    img = await canvas.get_img()
+    img = await canvas.get_img(cache_key=cache_key)
 
     buf = BytesIO()
     img.save(buf, format="PNG")
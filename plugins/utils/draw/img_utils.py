@@ -1,4 +1,4 @@
-from typing import Tuple, List, Union
+from typing import Iterable, List, Union
 from collections import defaultdict
 from random import randrange
 from itertools import chain
@@ -7,6 +7,8 @@ import numpy as np
 import math
 from pathlib import Path
 
+from ..gif_stream import GifStreamWriter
+
 # ============================ 透明GIF处理 ============================ #
 # This code adapted from https://github.com/python-pillow/Pillow/issues/4644 to resolve an issue
 # described in https://github.com/python-pillow/Pillow/issues/4640
@@ -17,7 +19,6 @@ from pathlib import Path
 
 _QUANTIZE_METHOD = Image.Quantize.MAXCOVERAGE
 _DITHER = 0
-_OPTIMIZED = False
 
 class TransparentAnimatedGifConverter(object):
     _PALETTE_SLOTSET = set(range(256))
@@ -118,46 +119,35 @@ class TransparentAnimatedGifConverter(object):
         self._img_p.info['background'] = 0
         return self._img_p
 
-def _create_animated_gif(images: List[Image.Image], durations: Union[int, List[int]], alpha_threshold: int = 0) -> Tuple[Image.Image, dict]:
-    """If the image is a GIF, create an its thumbnail here."""
-    save_kwargs = dict()
-    new_images: List[Image.Image] = []
-
-    for frame in images:
-        thumbnail = frame.copy()  # type: Image
-        thumbnail_rgba = thumbnail.convert(mode='RGBA')
-        thumbnail_rgba.thumbnail(size=frame.size, reducing_gap=3.0)
-        converter = TransparentAnimatedGifConverter(img_rgba=thumbnail_rgba, alpha_threshold=alpha_threshold)
-        thumbnail_p = converter.process()  # type: Image
-        new_images.append(thumbnail_p)
-
-    output_image = new_images[0]
-    save_kwargs.update(
-        format='GIF',
-        save_all=True,
-        optimize=_OPTIMIZED,
-        append_images=new_images[1:],
-        duration=durations,
-        disposal=2,  # Other disposals don't work
-        loop=0,
-    )
-    return output_image, save_kwargs
-
-def _save_transparent_gif(images: List[Image.Image], durations: Union[int, List[int]], save_file, alpha_threshold: int = 0):
+def _save_transparent_gif(images: Iterable[Image.Image], durations: Union[int, List[int]], save_file, alpha_threshold: int = 0):
     """Creates a transparent GIF, adjusting to avoid transparency issues that are present in the PIL library
 
     Note that this does NOT work for partial alpha. The partial alpha gets discarded and replaced by solid colors.
 
+    Frames are converted and written one at a time, so `images` may be a lazy iterator and memory use
+    does not grow with the number of frames.
+
     Parameters:
-        images: a list of PIL Image objects that compose the GIF frames
+        images: an iterable of PIL Image objects that compose the GIF frames
         durations: an int or List[int] that describes the animation durations for the frames of this GIF
-        save_file: A filename (string), pathlib.Path object or file object. (This parameter corresponds
-                   and is passed to the PIL.Image.save() method.)
-    Returns:
-        Image - The PIL Image object (after first saving the image to the specified target)
+        save_file: A filename (string), pathlib.Path object or binary file object.
     """
-    root_frame, save_args = _create_animated_gif(images, durations, alpha_threshold)
-    root_frame.save(save_file, **save_args)
+    writer = None
+    try:
+        for index, frame in enumerate(images):
+            converter = TransparentAnimatedGifConverter(img_rgba=frame.convert(mode='RGBA'), alpha_threshold=alpha_threshold)
+            frame_p = converter.process()
+            if writer is None:
+                writer = GifStreamWriter(save_file, frame_p.size, loop=0)
+            duration = durations[index] if isinstance(durations, (list, tuple)) else durations
+            writer.write_paletted(frame_p, duration, transparency=0, disposal=2)  # Other disposals don't work
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is None:
+        raise ValueError("图像列表不能为空")
+    writer.close()
 
 
 # ============================ 工具函数 ============================ #
@@ -193,7 +183,7 @@ def gif_to_frames(img: Image.Image) -> List[Image.Image]:
     """
     return [frame.copy() for frame in ImageSequence.Iterator(img)]
 
-def save_transparent_gif(image_or_frames: Union[Image.Image, List[Image.Image]], duration: int, save_path: str, alpha_threshold: float = 0.5):
+def save_transparent_gif(image_or_frames: Union[Image.Image, Iterable[Image.Image]], duration: int, save_path: str, alpha_threshold: float = 0.5):
     """
     从帧序列保存透明GIF
     """
@@ -201,7 +191,8 @@ def save_transparent_gif(image_or_frames: Union[Image.Image, List[Image.Image]],
     alpha_threshold = int(alpha_threshold * 255)
     if isinstance(image_or_frames, Image.Image):
         if is_animated(image_or_frames):
-            image_or_frames = gif_to_frames(image_or_frames)
+            # 逐帧读取，不一次性展开所有帧
+            image_or_frames = (frame.copy() for frame in ImageSequence.Iterator(image_or_frames))
         else:
             image_or_frames = [image_or_frames]
     _save_transparent_gif(image_or_frames, duration, save_path, alpha_threshold)
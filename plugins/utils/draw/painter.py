@@ -33,14 +33,15 @@ import colorsys
 import random
 import hashlib
 import pickle
-import glob
 import io
 import colour
 import struct
-from concurrent.futures import ThreadPoolExecutor
+import types
 
 from ..tools import get_logger
 from .img_utils import adjust_image_alpha_inplace, save_transparent_static_gif
+from .render_pool import get_render_pool, guess_render_owner, RENDER_PRIORITY_NORMAL
+from .render_cache import get_painter_cache, get_image_fingerprint
 
 logger = get_logger("Painter")
 
@@ -123,8 +124,7 @@ def deterministic_hash(obj: Any, raise_error: bool = False) -> str:
             elif isinstance(o, Image.Image):
                 _update_bytes(b'P')
                 _update_str(f"{o.size}:{o.mode}")
-                _update_bytes(STRUCT_Q.pack(len(o.tobytes())))
-                _update_bytes(o.tobytes())
+                _update_str(get_image_fingerprint(o))
             elif is_dataclass(o) and not isinstance(o, type):
                 _update_bytes(b'C')
                 _update_str(o.__class__.__name__)
@@ -160,8 +160,6 @@ def deterministic_hash(obj: Any, raise_error: bool = False) -> str:
 
 # =========================== 基础定义 =========================== #
 
-PAINTER_CACHE_DIR = "data/utils/painter_cache/"
-
 Color = Tuple[int, int, int, int]
 Position = Tuple[int, int]
 Size = Tuple[int, int]
@@ -438,6 +436,17 @@ class PainterOperation:
                 img_id = int(self.args[i][9:])
                 self.args[i] = img_dict[img_id]
 
+# 可调用对象 -> 需要注入 Painter 实例的参数名，避免每个操作都做一次 get_type_hints
+_op_painter_params: Dict[Any, Tuple[str, ...]] = {}
+
+def _get_op_painter_params(func: callable) -> Tuple[str, ...]:
+    key = getattr(func, '__func__', func)
+    params = _op_painter_params.get(key)
+    if params is None:
+        params = tuple(k for k, v in get_type_hints(func).items() if v == Painter)
+        _op_painter_params[key] = params
+    return params
+
 class Painter:
     
     def __init__(self, img: Image.Image = None, size: Tuple[int, int] = None):
@@ -576,48 +585,69 @@ class Painter:
             p.size = op.size
             p.w, p.h = op.size
             func = getattr(p, op.func) if isinstance(op.func, str) else op.func
-            kwargs = {}
-            for key, value in get_type_hints(func).items():
-                if value == Painter:
-                    kwargs[key] = p
-            func(*op.args, **kwargs)
+            params = _get_op_painter_params(func)
+            if params:
+                func(*op.args, **{key: p for key in params})
+            else:
+                func(*op.args)
         return p.img
 
-    async def get(self, cache_key: str=None) -> Image.Image:
+    async def get(self, cache_key: str=None, priority: int = RENDER_PRIORITY_NORMAL, owner: str = None) -> Image.Image:
         if cache_key is not None:
-            op_hash = await asyncio.to_thread(deterministic_hash, {"key": cache_key, "op": self.operations})
-            paths = glob.glob(os.path.join(PAINTER_CACHE_DIR, f"{cache_key}__*.png"))
-            if paths:
-                path = paths[0]
-                if path.endswith(f"{cache_key}__{op_hash}.png"):
-                    img = Image.open(path)
-                    img.load()
-                    return img
-                else:
-                    for p in paths:
-                        try: os.remove(p)
-                        except Exception: pass
+            op_hash = await asyncio.to_thread(self._get_operations_hash, cache_key)
+            if op_hash is None:
+                logger.debug(f"Painter 操作包含无法稳定哈希的回调，跳过缓存: {cache_key}")
+                cache_key = None
+        if cache_key is not None:
+            img = await asyncio.to_thread(get_painter_cache().get, cache_key, op_hash)
+            if img is not None:
+                self.operations = []
+                self.img = img
+                return img
 
         image_dict = {}
         for op in self.operations:
             op.image_to_id(image_dict)
             
-        # 使用线程池执行绘图操作
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            self.img = await loop.run_in_executor(pool, Painter._execute, self.operations, self.img, self.size, image_dict)
+        # 使用共享渲染线程池执行绘图操作
+        self.img = await get_render_pool().run(
+            Painter._execute, self.operations, self.img, self.size, image_dict,
+            owner=owner or guess_render_owner(), priority=priority,
+        )
 
         self.operations = []
 
         if cache_key is not None:
-            try:
-                cache_path = os.path.join(PAINTER_CACHE_DIR, f"{cache_key}__{op_hash}.png")
-                os.makedirs(PAINTER_CACHE_DIR, exist_ok=True)
-                self.img.save(cache_path, format='PNG')
-            except:
-                pass
+            await asyncio.to_thread(get_painter_cache().put, cache_key, op_hash, self.img)
 
         return self.img
+
+    @staticmethod
+    def _get_func_hash_name(func: Union[str, callable]) -> Optional[str]:
+        # lambda/闭包/绑定方法的 qualname 不包含捕获的状态，无法作为缓存键的一部分
+        if isinstance(func, str):
+            return func
+        if (
+            isinstance(func, types.FunctionType)
+            and func.__closure__ is None
+            and "<" not in func.__qualname__
+        ):
+            return f"{func.__module__}.{func.__qualname__}"
+        return None
+
+    def _get_operations_hash(self, cache_key: str) -> Optional[str]:
+        """
+        计算操作序列的哈希，包含无法稳定标识的回调时返回 None（不缓存）
+        """
+        ops = []
+        for op in self.operations:
+            if op.exclude_on_hash:
+                continue
+            func_name = self._get_func_hash_name(op.func)
+            if func_name is None:
+                return None
+            ops.append((op.offset, op.size, func_name, op.args))
+        return deterministic_hash({"key": cache_key, "op": ops})
     
     def add_operation(self, func: Union[str, callable], exclude_on_hash: bool, args: List[Any]):
         self.operations.append(PainterOperation(
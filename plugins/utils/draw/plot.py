@@ -7,6 +7,8 @@ from copy import deepcopy
 from datetime import datetime
 
 from .painter import *
+from .render_cache import set_image_file_fingerprint
+from .text_layout import clip_text_to_width_idx, layout_text_lines, measure_text_width
 
 from ..tools import get_logger
 
@@ -57,7 +59,9 @@ class RoundRectBg(WidgetBg):
 class ImageBg(WidgetBg):
     def __init__(self, img: Union[str, Image.Image], align: str='c', mode='fit', blur=False, fade=0.1):
         if isinstance(img, str):
-            self.img = Image.open(img)
+            path, img = img, Image.open(img)
+            set_image_file_fingerprint(img, path)
+            self.img = img
         else:
             self.img = img
         assert align in ALIGN_MAP
@@ -803,118 +807,19 @@ class TextBox(Widget):
         return get_font_desc(self.style.font, self.style.size)
 
     def _get_clip_text_to_width_idx(self, font, text: str, width: int, suffix=''):
-        """
-        基于“估算+步进”的线性查找。
-        通常比二分法更快，因为不需要反复在大范围内测量。
-        """
-        suffix_width = 0
-        if suffix:
-            suffix_width = get_text_width(font, suffix)
-            
-        target_width = width - suffix_width
-        
-        # 1. 快速检查：如果连后缀都放不下
-        if target_width < 0:
-            return 0
-            
-        # 2. 快速检查：如果整行都放得下
-        full_width = get_text_width(font, text)
-        if full_width <= target_width:
-            return None
-
-        text_len = len(text)
-        
-        # 3. 估算起点
-        # 假设ascii字符宽度为1，非ascii字符宽度为2，计算要跳到哪个字符位置
-        if full_width > 0:
-            char_len_weight_sum = 0
-            for c in text:
-                char_len_weight_sum += 1 if ord(c) < 128 else 2
-            avg_char_width = full_width / char_len_weight_sum
-            cur_w = 0
-            idx = text_len
-            for i, c in enumerate(text):
-                cur_w += avg_char_width if ord(c) < 128 else avg_char_width * 2
-                if cur_w >= target_width:
-                    idx = i + 1
-                    break
-        else:
-            idx = 0
-        idx = max(0, min(idx, text_len))
-
-        # 4. 局部步进修正 
-        current_w = get_text_width(font, text[:idx])
-
-        if current_w < target_width:
-            # 估算小了，向右步进 (Forward)
-            while idx < text_len:
-                next_idx = idx + 1
-                w = get_text_width(font, text[:next_idx])
-                if w > target_width:
-                    return idx
-                idx = next_idx
-                current_w = w
-            return idx
-
-        elif current_w > target_width:
-            # 估算大了，向左步进 (Backward)
-            while idx > 0:
-                w = get_text_width(font, text[:idx])
-                if w <= target_width:
-                    return idx
-                idx -= 1
-            return 0
-
-        else:
-            return idx
+        return clip_text_to_width_idx(font, text, width, suffix)
 
     def _get_lines(self):
-        font = self._get_pil_font()
-        lines = self.text.split('\n')  
-        clipped_lines = []
-        # 对文本中原本包含的每一行进行处理
-        for line in lines:
-            if self.w:
-                w = self.w - self.hpadding * 2
-                suffix = '...' if self.overflow == 'shrink' else ''
-                if self.wrap:
-                    # 需要自动换行的情况，迭代进行裁剪
-                    while True:
-                        # 首先判断是否能直接放得下
-                        clip_idx = self._get_clip_text_to_width_idx(font, line, w, '')
-                        if clip_idx is None:
-                            clipped_lines.append(line)
-                            break
-                        # 如果不能放下，则进行裁剪，首先判断是否需要添加后缀（是限制的最后一行）
-                        line_suffix = suffix if len(clipped_lines) == self.line_count - 1 else ''
-                        if line_suffix:
-                            # 需要添加后缀，需要考虑后缀重新计算裁剪位置
-                            clip_idx = self._get_clip_text_to_width_idx(font, line, w, line_suffix)
-                            if clip_idx is None:
-                                clipped_lines.append(line)
-                                break
-                        # 进行裁剪并添加后缀
-                        clipped_lines.append(line[:clip_idx] + line_suffix)
-                        line = line[clip_idx:]
-                        # 检查是否达到行数限制
-                        if len(clipped_lines) == self.line_count:
-                            break
-                else:
-                    clip_idx = self._get_clip_text_to_width_idx(font, line, w, suffix)
-                    if clip_idx is not None:
-                        line = line[:clip_idx] + suffix
-                    clipped_lines.append(line)
-            else:
-                clipped_lines.append(line)
-        return clipped_lines[:self.line_count]
+        w = self.w - self.hpadding * 2 if self.w else None
+        suffix = '...' if self.overflow == 'shrink' else ''
+        return list(layout_text_lines(self._get_pil_font(), self.text, w, self.wrap, self.line_count, suffix))
 
     def _get_content_size(self):
         lines = self._get_lines()
         w, h = 0, 0
         font = self._get_pil_font()
         for line in lines:
-            lw, _ = get_text_size(font, line)
-            w = max(w, lw)
+            w = max(w, measure_text_width(font, line))
         line_count = len(lines) if self.use_real_line_count else self.line_count
         h = line_count * (self.style.size + self.line_sep) - self.line_sep
         if self.w:
@@ -935,7 +840,7 @@ class TextBox(Widget):
             start_y = (p.h - text_h) // 2
 
         for i, line in enumerate(lines):
-            lw, _ = get_text_size(font, line)
+            lw = measure_text_width(font, line)
             x, y = 0, start_y + i * (self.style.size + self.line_sep)
             if self.content_halign == 'l':
                 x += 0
@@ -958,7 +863,7 @@ class TextBox(Widget):
     
 # 辅助函数，不在 painter 中，需要补充
 def get_text_width(font, text):
-    return get_text_size(font, text)[0]
+    return measure_text_width(font, text)
 
 class ImageBox(Widget):
     def __init__(
@@ -978,6 +883,7 @@ class ImageBox(Widget):
         super().__init__()
         if isinstance(image, str):
             self.image = Image.open(image)
+            set_image_file_fingerprint(self.image, image)
         else:
             self.image = image
 
@@ -1016,6 +922,7 @@ class ImageBox(Widget):
     def set_image(self, image: Union[str, Image.Image]):
         if isinstance(image, str):
             self.image = Image.open(image)
+            set_image_file_fingerprint(self.image, image)
         else:
             self.image = image
         return self
@@ -1078,7 +985,7 @@ class Canvas(Frame):
         self.set_bg(bg)
         self.set_margin(0)
 
-    async def get_img(self, scale: float = None, cache_key: str=None):
+    async def get_img(self, scale: float = None, cache_key: str=None, priority: int = RENDER_PRIORITY_NORMAL, owner: str = None):
         t = datetime.now()
         size = self._get_self_size()
         size_limit = PLOT_CANVAS_SIZE_LIMIT
@@ -1092,7 +999,7 @@ class Canvas(Frame):
             logger.info(f"Canvas layouted in {(datetime.now() - t).total_seconds():.3f}s, size={size}")
 
         t = datetime.now()
-        img = await p.get(cache_key)
+        img = await p.get(cache_key, priority=priority, owner=owner or guess_render_owner())
         if scale:
             img = img.resize((int(size[0] * scale), int(size[1] * scale)), Image.Resampling.BILINEAR)
         if PLOT_LOG_DRAW_TIME:
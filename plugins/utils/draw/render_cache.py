@@ -0,0 +1,345 @@
+"""
+Painter 渲染结果缓存。
+
+- 图片指纹：只缓存调用方用 set_image_fingerprint 指定的稳定 id（如从文件加载的图片），其余图片每次重新计算像素哈希
+- 内存 LRU：保存已解码的渲染结果，按像素字节数限制总大小
+- 磁盘层：PNG 文件 + index.json 索引（不再每次 glob 目录），按总字节数做 LRU 淘汰
+- 命中/未命中统计：get_stats()
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from PIL import Image
+
+from ..tools import get_logger
+from ..json_io import atomic_write_json
+
+logger = get_logger("PainterCache")
+
+# ================= 配置 =================
+
+PAINTER_CACHE_DIR = "data/utils/painter_cache/"
+PAINTER_CACHE_INDEX_FILE = "index.json"
+PAINTER_CACHE_MEMORY_LIMIT = 256 * 1024 * 1024  # 内存层最多保存的像素字节数
+PAINTER_CACHE_MEMORY_MAX_ITEMS = 128
+PAINTER_CACHE_DISK_LIMIT = 512 * 1024 * 1024  # 磁盘层 PNG 总字节数上限
+PAINTER_CACHE_INDEX_FLUSH_INTERVAL = 60  # 仅命中导致的索引变更，最多每隔多少秒落盘一次
+
+
+# ================= 图片指纹 =================
+
+# id(img) -> (弱引用, 尺寸, 模式, 指纹)；Image 不可哈希，不能直接放进 WeakKeyDictionary
+# 只保存显式指定的指纹：像素哈希不缓存，因为 paste/ImageDraw/putalpha 等原地修改不会改变对象 id
+_image_fingerprints: Dict[int, Tuple[weakref.ref, Tuple[int, int], str, str]] = {}
+_fingerprint_lock = threading.Lock()
+
+
+def _forget_fingerprint(img_id: int, ref: weakref.ref):
+    with _fingerprint_lock:
+        entry = _image_fingerprints.get(img_id)
+        if entry is not None and entry[0] is ref:
+            del _image_fingerprints[img_id]
+
+
+def set_image_fingerprint(img: Image.Image, fingerprint: Optional[str]):
+    """
+    为图片指定稳定指纹（如文件路径+mtime），传 None 清除（图片被原地修改后应清除）
+    """
+    img_id = id(img)
+    if fingerprint is None:
+        with _fingerprint_lock:
+            _image_fingerprints.pop(img_id, None)
+        return
+    ref = weakref.ref(img, lambda r, i=img_id: _forget_fingerprint(i, r))
+    with _fingerprint_lock:
+        _image_fingerprints[img_id] = (ref, img.size, img.mode, fingerprint)
+
+
+def set_image_file_fingerprint(img: Image.Image, path: str):
+    """
+    用文件路径 + mtime + 文件大小作为从文件打开的图片的指纹，避免读取像素计算哈希
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    set_image_fingerprint(img, f"file:{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}")
+
+
+def get_image_fingerprint(img: Image.Image) -> str:
+    """
+    获取图片指纹：优先使用显式指定的稳定指纹，否则每次计算像素哈希（图片可能被原地修改）
+    """
+    img_id = id(img)
+    with _fingerprint_lock:
+        entry = _image_fingerprints.get(img_id)
+    if entry is not None:
+        ref, size, mode, fingerprint = entry
+        if ref() is img and size == img.size and mode == img.mode:
+            return fingerprint
+    return "px:" + hashlib.blake2b(img.tobytes(), digest_size=16).hexdigest()
+
+
+# ================= 缓存 =================
+
+def _cache_file_name(key: str, digest: str) -> str:
+    # cache_key 可能含 ":" 等 Windows 文件名不允许的字符，百分号编码后仍可从文件名还原
+    return f"{quote(key, safe='-_.')}__{digest}.png"
+
+
+@dataclass
+class _DiskEntry:
+    digest: str
+    file: str
+    bytes: int
+    last_used: float
+
+
+class PainterCache:
+    """
+    内存 LRU + 磁盘索引两级缓存，每个 cache_key 只保留最新 digest 对应的结果
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = PAINTER_CACHE_DIR,
+        memory_limit: int = PAINTER_CACHE_MEMORY_LIMIT,
+        memory_max_items: int = PAINTER_CACHE_MEMORY_MAX_ITEMS,
+        disk_limit: int = PAINTER_CACHE_DISK_LIMIT,
+    ):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.memory_max_items = memory_max_items
+        self.disk_limit = disk_limit
+        self._lock = threading.Lock()
+        # cache_key -> (digest, image, 像素字节数)
+        self._memory: "OrderedDict[str, Tuple[str, Image.Image, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: Optional[Dict[str, _DiskEntry]] = None
+        self._disk_bytes = 0
+        self._index_dirty = False
+        self._last_index_flush = 0.0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, PAINTER_CACHE_INDEX_FILE)
+
+    # ---------- 磁盘索引 ----------
+
+    def _load_index(self):
+        # 调用前需持有 self._lock
+        if self._disk is not None:
+            return
+        self._disk = {}
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, e in data.get("entries", {}).items():
+                self._disk[key] = _DiskEntry(e["digest"], e["file"], int(e["bytes"]), float(e["last_used"]))
+        except FileNotFoundError:
+            self._rebuild_index()
+        except Exception as e:
+            logger.warning(f"读取 painter 缓存索引失败，将重建: {e}")
+            self._disk = {}
+            self._rebuild_index()
+        # 丢弃文件已不存在的条目
+        for key in [k for k, e in self._disk.items() if not os.path.exists(os.path.join(self.cache_dir, e.file))]:
+            del self._disk[key]
+            self._index_dirty = True
+        self._disk_bytes = sum(e.bytes for e in self._disk.values())
+
+    def _rebuild_index(self):
+        # 兼容旧版本：目录中已有的 {cache_key}__{digest}.png 文件只在首次加载时扫描一次
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".png") or "__" not in name:
+                continue
+            file_key, digest = name[:-4].rsplit("__", 1)
+            key = unquote(file_key)
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            old = self._disk.get(key)
+            if old is not None:
+                # 同一 key 的多个版本只保留最新的
+                if old.last_used >= st.st_mtime:
+                    self._remove_file(name)
+                    continue
+                self._remove_file(old.file)
+            self._disk[key] = _DiskEntry(digest, name, st.st_size, st.st_mtime)
+        self._index_dirty = True
+
+    def _flush_index(self, force: bool = False):
+        # 调用前需持有 self._lock
+        if not self._index_dirty or self._disk is None:
+            return
+        now = time.time()
+        if not force and now - self._last_index_flush < PAINTER_CACHE_INDEX_FLUSH_INTERVAL:
+            return
+        try:
+            atomic_write_json(self._index_path, {
+                "version": 1,
+                "entries": {
+                    k: {"digest": e.digest, "file": e.file, "bytes": e.bytes, "last_used": e.last_used}
+                    for k, e in self._disk.items()
+                },
+            }, indent=None)
+            self._index_dirty = False
+            self._last_index_flush = now
+        except Exception as e:
+            logger.warning(f"保存 painter 缓存索引失败: {e}")
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    # ---------- 内存层 ----------
+
+    def _memory_put(self, key: str, digest: str, img: Image.Image):
+        # 调用前需持有 self._lock
+        nbytes = img.width * img.height * len(img.getbands())
+        if nbytes > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[2]
+        self._memory[key] = (digest, img, nbytes)
+        self._memory_bytes += nbytes
+        while self._memory and (self._memory_bytes > self.memory_limit or len(self._memory) > self.memory_max_items):
+            _, (_, _, evicted_bytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_bytes
+            self._stats["memory_evictions"] += 1
+
+    # ---------- 公开接口 ----------
+
+    def get(self, key: str, digest: str) -> Optional[Image.Image]:
+        """
+        查找缓存，命中时返回图片副本（调用方可以安全地原地修改）
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == digest:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1].copy()
+
+            self._load_index()
+            disk_entry = self._disk.get(key)
+            if disk_entry is None or disk_entry.digest != digest:
+                self._stats["misses"] += 1
+                return None
+            path = os.path.join(self.cache_dir, disk_entry.file)
+
+        try:
+            img = Image.open(path)
+            img.load()
+        except Exception as e:
+            logger.warning(f"读取 painter 缓存失败: {path}: {e}")
+            with self._lock:
+                if self._disk.get(key) is disk_entry:
+                    del self._disk[key]
+                    self._disk_bytes -= disk_entry.bytes
+                    self._index_dirty = True
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            disk_entry.last_used = time.time()
+            self._index_dirty = True
+            self._memory_put(key, digest, img)
+            self._stats["disk_hits"] += 1
+            self._flush_index()
+        return img.copy()
+
+    def put(self, key: str, digest: str, img: Image.Image):
+        """
+        写入缓存（内存层保存副本，磁盘层写 PNG 并更新索引）
+        """
+        img = img.copy()
+        name = _cache_file_name(key, digest)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            img.save(path, format="PNG")
+            nbytes = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"保存 painter 缓存失败: {path}: {e}")
+            with self._lock:
+                self._memory_put(key, digest, img)
+            return
+
+        with self._lock:
+            self._load_index()
+            self._memory_put(key, digest, img)
+            old = self._disk.pop(key, None)
+            if old is not None:
+                self._disk_bytes -= old.bytes
+                if old.file != name:
+                    self._remove_file(old.file)
+            self._disk[key] = _DiskEntry(digest, name, nbytes, time.time())
+            self._disk_bytes += nbytes
+            self._stats["stores"] += 1
+            if self._disk_bytes > self.disk_limit:
+                for k, e in sorted(self._disk.items(), key=lambda kv: kv[1].last_used):
+                    if self._disk_bytes <= self.disk_limit or k == key:
+                        break
+                    del self._disk[k]
+                    self._disk_bytes -= e.bytes
+                    self._remove_file(e.file)
+                    self._stats["disk_evictions"] += 1
+            self._index_dirty = True
+            self._flush_index(force=True)
+
+    def flush(self):
+        with self._lock:
+            self._flush_index(force=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats.update({
+                "hit_rate": (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_items": len(self._disk) if self._disk is not None else 0,
+                "disk_bytes": self._disk_bytes,
+            })
+            return stats
+
+
+_painter_cache: Optional[PainterCache] = None
+_painter_cache_lock = threading.Lock()
+
+
+def get_painter_cache() -> PainterCache:
+    """
+    获取进程级共享 painter 缓存
+    """
+    global _painter_cache
+    if _painter_cache is None:
+        with _painter_cache_lock:
+            if _painter_cache is None:
+                _painter_cache = PainterCache()
+    return _painter_cache
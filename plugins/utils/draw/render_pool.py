@@ -0,0 +1,276 @@
+"""
+Painter 共享渲染调度器。
+
+- 进程级常驻工作线程池（替代每次渲染都新建/销毁 ThreadPoolExecutor）
+- 出队顺序：先按优先级，同优先级内按插件轮转，避免某个插件的批量渲染饿死其他插件
+- 记录队列深度、排队等待时间、渲染耗时等指标，可通过 get_stats() 查看
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from ..tools import get_logger
+
+logger = get_logger("RenderPool")
+
+# ================= 配置 =================
+
+RENDER_POOL_MAX_WORKERS = max(2, min(8, os.cpu_count() or 4))
+RENDER_STATS_SAMPLE_SIZE = 256  # 用于计算近期平均/分位耗时的样本数
+
+RENDER_PRIORITY_HIGH = 0
+RENDER_PRIORITY_NORMAL = 10
+RENDER_PRIORITY_LOW = 20
+
+DEFAULT_OWNER = "unknown"
+
+# utils.draw 包名 / 插件根包名，用于从调用栈推断发起渲染的插件
+_DRAW_PKG = __name__.rsplit(".", 1)[0]
+_PLUGINS_ROOT = _DRAW_PKG.rsplit(".", 2)[0] if _DRAW_PKG.count(".") >= 2 else ""
+
+
+@dataclass
+class _RenderTask:
+    func: Callable[..., Any]
+    args: tuple
+    owner: str
+    priority: int
+    future: Future
+    enqueued_at: float
+
+
+@dataclass
+class OwnerRenderStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_render_time: float = 0.0
+    total_wait_time: float = 0.0
+
+
+@dataclass
+class _RenderStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    peak_queue_depth: int = 0
+    max_render_time: float = 0.0
+    max_wait_time: float = 0.0
+    recent_render_times: Deque[float] = field(default_factory=lambda: deque(maxlen=RENDER_STATS_SAMPLE_SIZE))
+    recent_wait_times: Deque[float] = field(default_factory=lambda: deque(maxlen=RENDER_STATS_SAMPLE_SIZE))
+    owners: Dict[str, OwnerRenderStats] = field(default_factory=dict)
+
+
+def guess_render_owner() -> str:
+    """
+    从调用栈推断发起渲染的插件名（跳过 utils.draw 自身的帧）
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module and not module.startswith(_DRAW_PKG) and module != "asyncio" and not module.startswith("asyncio."):
+            if _PLUGINS_ROOT and module.startswith(_PLUGINS_ROOT + "."):
+                return module[len(_PLUGINS_ROOT) + 1:].split(".", 1)[0]
+            return module.split(".", 1)[0]
+        frame = frame.f_back
+    return DEFAULT_OWNER
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    idx = min(len(samples) - 1, max(0, int(round(q * (len(samples) - 1)))))
+    return samples[idx]
+
+
+class RenderPool:
+    """
+    带优先级与插件公平调度的常驻渲染线程池
+    """
+
+    def __init__(self, max_workers: int = RENDER_POOL_MAX_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._cond = threading.Condition()
+        # priority -> owner -> 待执行任务，owner 的顺序即轮转顺序
+        self._queues: Dict[int, "OrderedDict[str, Deque[_RenderTask]]"] = {}
+        self._depth = 0
+        self._busy = 0
+        self._threads: List[threading.Thread] = []
+        self._stats = _RenderStats()
+
+    def _ensure_workers(self):
+        # 调用前需持有 self._cond
+        while len(self._threads) < self.max_workers:
+            t = threading.Thread(
+                target=self._worker_loop,
+                name=f"painter-render-{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(t)
+            t.start()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args,
+        owner: Optional[str] = None,
+        priority: int = RENDER_PRIORITY_NORMAL,
+    ) -> Future:
+        """
+        提交渲染任务，返回 concurrent.futures.Future
+        """
+        owner = owner or DEFAULT_OWNER
+        task = _RenderTask(
+            func=func,
+            args=args,
+            owner=owner,
+            priority=priority,
+            future=Future(),
+            enqueued_at=time.perf_counter(),
+        )
+        with self._cond:
+            self._ensure_workers()
+            owners = self._queues.setdefault(priority, OrderedDict())
+            owners.setdefault(owner, deque()).append(task)
+            self._depth += 1
+            stats = self._stats
+            stats.submitted += 1
+            stats.peak_queue_depth = max(stats.peak_queue_depth, self._depth)
+            stats.owners.setdefault(owner, OwnerRenderStats()).submitted += 1
+            self._cond.notify()
+        return task.future
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args,
+        owner: Optional[str] = None,
+        priority: int = RENDER_PRIORITY_NORMAL,
+    ) -> Any:
+        """
+        在渲染线程池中执行同步函数并等待结果
+        """
+        return await asyncio.wrap_future(self.submit(func, *args, owner=owner, priority=priority))
+
+    def _pop_task(self) -> _RenderTask:
+        # 调用前需持有 self._cond，且队列非空
+        priority = min(p for p, owners in self._queues.items() if owners)
+        owners = self._queues[priority]
+        owner, tasks = next(iter(owners.items()))
+        task = tasks.popleft()
+        if tasks:
+            owners.move_to_end(owner)
+        else:
+            del owners[owner]
+        if not owners:
+            del self._queues[priority]
+        self._depth -= 1
+        return task
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while self._depth == 0:
+                    self._cond.wait()
+                task = self._pop_task()
+                self._busy += 1
+
+            try:
+                if not task.future.set_running_or_notify_cancel():
+                    with self._cond:
+                        self._stats.cancelled += 1
+                    continue
+
+                start = time.perf_counter()
+                wait_time = start - task.enqueued_at
+                ok = True
+                try:
+                    result = task.func(*task.args)
+                except BaseException as e:
+                    ok = False
+                    task.future.set_exception(e)
+                else:
+                    task.future.set_result(result)
+                render_time = time.perf_counter() - start
+                self._record(task.owner, ok, wait_time, render_time)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+
+    def _record(self, owner: str, ok: bool, wait_time: float, render_time: float):
+        with self._cond:
+            stats = self._stats
+            owner_stats = stats.owners.setdefault(owner, OwnerRenderStats())
+            if ok:
+                stats.completed += 1
+                owner_stats.completed += 1
+            else:
+                stats.failed += 1
+                owner_stats.failed += 1
+            owner_stats.total_render_time += render_time
+            owner_stats.total_wait_time += wait_time
+            stats.max_render_time = max(stats.max_render_time, render_time)
+            stats.max_wait_time = max(stats.max_wait_time, wait_time)
+            stats.recent_render_times.append(render_time)
+            stats.recent_wait_times.append(wait_time)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度器指标快照（时间单位：秒）
+        """
+        with self._cond:
+            stats = self._stats
+            render_times = list(stats.recent_render_times)
+            wait_times = list(stats.recent_wait_times)
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "busy_workers": self._busy,
+                "queue_depth": self._depth,
+                "peak_queue_depth": stats.peak_queue_depth,
+                "submitted": stats.submitted,
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "cancelled": stats.cancelled,
+                "render_time_avg": sum(render_times) / len(render_times) if render_times else 0.0,
+                "render_time_p95": _percentile(render_times, 0.95),
+                "render_time_max": stats.max_render_time,
+                "wait_time_avg": sum(wait_times) / len(wait_times) if wait_times else 0.0,
+                "wait_time_p95": _percentile(wait_times, 0.95),
+                "wait_time_max": stats.max_wait_time,
+                "owners": {
+                    name: {
+                        "submitted": s.submitted,
+                        "completed": s.completed,
+                        "failed": s.failed,
+                        "render_time_total": s.total_render_time,
+                        "wait_time_total": s.total_wait_time,
+                    }
+                    for name, s in stats.owners.items()
+                },
+            }
+
+
+_render_pool: Optional[RenderPool] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """
+    获取进程级共享渲染线程池
+    """
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = RenderPool()
+                logger.info(f"渲染线程池已创建: max_workers={_render_pool.max_workers}")
+    return _render_pool
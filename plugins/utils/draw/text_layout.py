@@ -0,0 +1,133 @@
+"""
+文本排版工具（TextBox 的换行/裁剪实现）。
+
+- 按字体缓存单字符前进宽度（emoji 单独测量），用前缀和 + 二分查找定位断行位置
+- 断行位置最后用真实宽度（get_text_size）做少量校正，结果与逐字测量一致
+- 整段排版结果按 (text, font, width, ...) 记忆化，TextBox 的测量与绘制共享同一份结果
+"""
+import weakref
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+import emoji
+
+from .painter import Font, get_text_size
+
+TEXT_WIDTH_CACHE_SIZE = 8192
+TEXT_LAYOUT_CACHE_SIZE = 1024
+
+# font -> 字符 -> 前进宽度
+_advance_cache: "weakref.WeakKeyDictionary[Font, Dict[str, float]]" = weakref.WeakKeyDictionary()
+
+
+def get_char_advance(font: Font, ch: str) -> float:
+    """
+    获取单个字符的前进宽度（按字体缓存）
+    """
+    advances = _advance_cache.get(font)
+    if advances is None:
+        advances = {}
+        _advance_cache[font] = advances
+    w = advances.get(ch)
+    if w is None:
+        if ch in emoji.EMOJI_DATA:
+            w = get_text_size(font, ch)[0]
+        elif hasattr(font, 'getlength'):
+            w = font.getlength(ch)
+        else:
+            w = get_text_size(font, ch)[0]
+        advances[ch] = w
+    return w
+
+
+def get_prefix_widths(font: Font, text: str) -> List[float]:
+    """
+    前缀宽度估计：result[i] 为 text[:i] 的前进宽度之和
+    """
+    return [0.0] + list(accumulate(get_char_advance(font, c) for c in text))
+
+
+@lru_cache(maxsize=TEXT_WIDTH_CACHE_SIZE)
+def measure_text_width(font: Font, text: str) -> int:
+    """
+    获取文本的真实绘制宽度（带缓存）
+    """
+    return get_text_size(font, text)[0]
+
+
+def _clip_idx(font: Font, text: str, prefix: List[float], start: int, width: int, suffix: str) -> Optional[int]:
+    """
+    返回 text[start:] 在 width 内（包含后缀）最多能放下的结束下标；整段都能放下时返回 None
+    """
+    target = width - (measure_text_width(font, suffix) if suffix else 0)
+    if target < 0:
+        return start
+    n = len(text)
+
+    # 用前进宽度前缀和估计断点，再用真实宽度校正（只测量一行左右长度的子串）
+    idx = bisect_right(prefix, prefix[start] + target, start, n + 1) - 1
+    idx = max(start, min(idx, n))
+    while idx < n and measure_text_width(font, text[start:idx + 1]) <= target:
+        idx += 1
+    while idx > start and measure_text_width(font, text[start:idx]) > target:
+        idx -= 1
+    if idx == n and measure_text_width(font, text[start:]) <= target:
+        return None
+    return idx
+
+
+def clip_text_to_width_idx(font: Font, text: str, width: int, suffix: str = '') -> Optional[int]:
+    """
+    返回 text 在 width 内（包含后缀）最多能放下的字符数；整段都能放下时返回 None
+    """
+    return _clip_idx(font, text, get_prefix_widths(font, text), 0, width, suffix)
+
+
+@lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+def layout_text_lines(
+    font: Font,
+    text: str,
+    width: Optional[int],
+    wrap: bool,
+    line_count: int,
+    suffix: str,
+) -> Tuple[str, ...]:
+    """
+    将文本按宽度断行/裁剪，超出行数限制时在最后一行末尾添加 suffix
+    """
+    lines: List[str] = []
+    # 对文本中原本包含的每一行进行处理
+    for para in text.split('\n'):
+        if not width:
+            lines.append(para)
+            continue
+        prefix = get_prefix_widths(font, para)
+        if not wrap:
+            clip = _clip_idx(font, para, prefix, 0, width, suffix)
+            lines.append(para if clip is None else para[:clip] + suffix)
+            continue
+
+        start = 0
+        while True:
+            # 首先判断剩余部分是否能直接放得下
+            clip = _clip_idx(font, para, prefix, start, width, '')
+            if clip is None:
+                lines.append(para[start:])
+                break
+            # 放不下时，如果是限制的最后一行，需要考虑后缀重新计算裁剪位置
+            line_suffix = suffix if len(lines) == line_count - 1 else ''
+            if line_suffix:
+                clip = _clip_idx(font, para, prefix, start, width, line_suffix)
+                if clip is None:
+                    lines.append(para[start:])
+                    break
+            elif clip == start:
+                # 单个字符就超宽时至少放一个字符，避免产生大量空行
+                clip = start + 1
+            lines.append(para[start:clip] + line_suffix)
+            start = clip
+            if len(lines) == line_count:
+                break
+    return tuple(lines[:line_count])
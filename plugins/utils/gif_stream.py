@@ -0,0 +1,541 @@
+"""
+GIF 流式处理工具：帧按需解码、逐帧编码写出，峰值内存与帧数无关。
+
+过去的 GIF 处理会先把所有帧解码成 RGBA 列表，变换后再整体交给 PIL 保存（PIL 保存时同样会缓存全部帧），
+大 GIF 动辄占用数百 MB 内存。本模块提供：
+
+- 原始块重写（RawGif）：倒放 / 变速这类只改顺序或时长的操作直接重排 GIF 的压缩帧数据块、改写延时，
+  不解码、不重新量化；帧之间存在增量依赖时无法安全重排，由调用方回退到逐帧处理
+- iter_frames：逐帧产出合成后的 RGBA 帧
+- FrameSpool：需要随机访问 / 倒序访问帧时，把帧暂存在磁盘临时文件中
+- GifStreamWriter：逐帧量化并立即写入文件；源 GIF 只有全局调色板时所有帧共用一份调色板（不逐帧量化），
+  不透明输出只写与上一帧不同的区域，完全相同的连续帧合并时长
+"""
+
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+from PIL import GifImagePlugin, Image, ImageSequence
+
+# 透明 GIF 中保留给透明色的调色板下标
+TRANSPARENT_INDEX = 255
+# 逐帧扫描计算共享调色板时最多采样的帧数与采样缩略图边长
+PALETTE_SAMPLE_FRAMES = 16
+PALETTE_SAMPLE_SIDE = 96
+
+_NETSCAPE_LOOP = b"!\xff\x0bNETSCAPE2.0\x03\x01"
+
+
+# ============================ 原始块重写 ============================ #
+
+
+@dataclass
+class RawGifFrame:
+    left: int
+    top: int
+    width: int
+    height: int
+    # 图像描述符 + 局部调色板 + LZW 数据（含块结束符），原样写回
+    data: bytes
+    has_local_palette: bool
+    # 图形控制扩展的 4 字节内容（packed, delay, transparent index），无则为 None
+    gce: Optional[bytes] = None
+
+    @property
+    def disposal(self) -> int:
+        return (self.gce[0] >> 2) & 0x07 if self.gce else 0
+
+    @property
+    def transparent(self) -> bool:
+        return bool(self.gce and self.gce[0] & 0x01)
+
+    @property
+    def delay_ms(self) -> int:
+        return struct.unpack("<H", self.gce[1:3])[0] * 10 if self.gce else 0
+
+    def to_bytes(self, duration_ms: Optional[int] = None) -> bytes:
+        gce = self.gce
+        if duration_ms is not None:
+            delay = max(1, min(0xFFFF, int(round(duration_ms / 10))))
+            gce = bytes([gce[0] if gce else 0]) + struct.pack("<H", delay) + bytes([gce[3] if gce else 0])
+        prefix = b"!\xf9\x04" + gce + b"\x00" if gce else b""
+        return prefix + self.data
+
+
+@dataclass
+class RawGif:
+    width: int
+    height: int
+    # 文件头 + 逻辑屏幕描述符 + 全局调色板
+    header: bytes
+    # 首帧之前的扩展块（循环次数、注释等）
+    preamble: bytes
+    global_palette: Optional[bytes]
+    loop: Optional[int]
+    frames: list[RawGifFrame] = field(default_factory=list)
+
+    @property
+    def has_transparency(self) -> bool:
+        return any(frame.transparent for frame in self.frames)
+
+    @property
+    def uses_local_palettes(self) -> bool:
+        return any(frame.has_local_palette for frame in self.frames)
+
+    @property
+    def frames_independent(self) -> bool:
+        """
+        每帧是否都能脱离前一帧单独显示（决定能否安全重排帧顺序）：
+        所有帧覆盖整个画布，且要么不含透明，要么每帧显示后都恢复为背景。
+        """
+        for frame in self.frames:
+            if (frame.left, frame.top, frame.width, frame.height) != (0, 0, self.width, self.height):
+                return False
+        if self.has_transparency:
+            return all(frame.disposal == 2 for frame in self.frames)
+        return True
+
+    def durations(self) -> list[int]:
+        delays = [frame.delay_ms for frame in self.frames]
+        default = delays[0] if delays and delays[0] else 100
+        return [delay or default for delay in delays]
+
+    def write(
+        self,
+        target: Union[str, Path, BinaryIO],
+        order: Sequence[int],
+        durations: Optional[Sequence[int]] = None,
+    ) -> None:
+        """按 order 重排帧写出；durations 为 None 时保留原延时"""
+        chunks = [self.header, self.preamble]
+        for i, index in enumerate(order):
+            chunks.append(self.frames[index].to_bytes(durations[i] if durations is not None else None))
+        chunks.append(b";")
+        if hasattr(target, "write"):
+            target.write(b"".join(chunks))
+        else:
+            Path(target).write_bytes(b"".join(chunks))
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    while True:
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def parse_gif(data: bytes) -> RawGif:
+    """解析 GIF 的块结构（不解码像素），格式不符或含不支持的块时抛 ValueError"""
+    try:
+        if data[:6] not in (b"GIF87a", b"GIF89a"):
+            raise ValueError("不是 GIF 文件")
+        width, height, packed = struct.unpack("<HHB", data[6:11])
+        pos = 13
+        global_palette = None
+        if packed & 0x80:
+            size = 3 * (2 ** ((packed & 0x07) + 1))
+            global_palette = data[pos : pos + size]
+            pos += size
+        gif = RawGif(width, height, data[:pos], b"", global_palette, None)
+
+        preamble: list[bytes] = []
+        gce: Optional[bytes] = None
+        while True:
+            block = data[pos]
+            if block == 0x3B:
+                break
+            if block == 0x21:
+                label = data[pos + 1]
+                end = _skip_sub_blocks(data, pos + 2)
+                if label == 0xF9:
+                    gce = data[pos + 3 : pos + 7]
+                elif label == 0x01:
+                    # 纯文本扩展会参与画面合成，重排后无法保证正确
+                    raise ValueError("不支持纯文本扩展")
+                elif not gif.frames:
+                    if data[pos + 2 : pos + 14] == _NETSCAPE_LOOP[2:14]:
+                        gif.loop = struct.unpack("<H", data[pos + 16 : pos + 18])[0]
+                    preamble.append(data[pos:end])
+                pos = end
+            elif block == 0x2C:
+                left, top, w, h, flags = struct.unpack("<HHHHB", data[pos + 1 : pos + 10])
+                start = pos
+                pos += 10
+                if flags & 0x80:
+                    pos += 3 * (2 ** ((flags & 0x07) + 1))
+                pos = _skip_sub_blocks(data, pos + 1)  # 跳过 LZW 最小码长
+                gif.frames.append(RawGifFrame(left, top, w, h, data[start:pos], bool(flags & 0x80), gce))
+                gce = None
+            else:
+                raise ValueError(f"未知的 GIF 块: 0x{block:02x}")
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"GIF 数据不完整: {e}") from e
+
+    if not gif.frames:
+        raise ValueError("GIF 中没有图像帧")
+    gif.preamble = b"".join(preamble)
+    return gif
+
+
+def read_raw_gif(path: Union[str, Path]) -> Optional[RawGif]:
+    """读取并解析 GIF，非 GIF 或无法解析时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            return parse_gif(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+# ============================ 帧读取 ============================ #
+
+
+def iter_frames(path: Union[str, Path]) -> Iterator[tuple[Image.Image, int]]:
+    """逐帧产出 (RGBA 帧, 时长 ms)，同一时刻只有一帧在内存中"""
+    with Image.open(path) as img:
+        default_duration = int(img.info.get("duration", 100) or 100)
+        for frame in ImageSequence.Iterator(img):
+            duration = int(frame.info.get("duration", default_duration) or default_duration)
+            yield frame.convert("RGBA"), max(1, duration)
+
+
+def pick_frames(
+    frames: Iterable[tuple[Image.Image, int]],
+    indices: Sequence[int],
+    durations: Sequence[int],
+) -> Iterator[tuple[Image.Image, int]]:
+    """按单调不减的下标序列从帧流中取帧（可重复取同一帧），配上新的时长；不回看、不缓存其余帧"""
+    source = iter(frames)
+    current = -1
+    frame: Optional[Image.Image] = None
+    for index, duration in zip(indices, durations):
+        while current < index:
+            try:
+                frame, _ = next(source)
+            except StopIteration:
+                return
+            current += 1
+        yield frame, duration
+
+
+class FrameSpool:
+    """把 RGBA 帧暂存到磁盘临时文件，支持按下标随机读取（倒序、循环取帧等）"""
+
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.size = size
+        self.durations: list[int] = []
+        self._frame_bytes = size[0] * size[1] * 4
+        self._file = tempfile.TemporaryFile(prefix="gif_spool_")
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[tuple[Image.Image, int]]) -> "FrameSpool":
+        spool: Optional[FrameSpool] = None
+        try:
+            for frame, duration in frames:
+                if spool is None:
+                    spool = cls(frame.size)
+                spool.append(frame, duration)
+        except BaseException:
+            if spool is not None:
+                spool.close()
+            raise
+        if spool is None:
+            raise ValueError("没有可读取的帧")
+        return spool
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def append(self, frame: Image.Image, duration: int) -> None:
+        frame = frame.convert("RGBA")
+        if frame.size != self.size:
+            canvas = Image.new("RGBA", self.size, (0, 0, 0, 0))
+            canvas.paste(frame, (0, 0), frame)
+            frame = canvas
+        self._file.seek(len(self.durations) * self._frame_bytes)
+        self._file.write(frame.tobytes())
+        self.durations.append(duration)
+
+    def __getitem__(self, index: int) -> Image.Image:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        self._file.seek((index % len(self)) * self._frame_bytes)
+        return Image.frombytes("RGBA", self.size, self._file.read(self._frame_bytes))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "FrameSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ============================ 调色板 ============================ #
+
+
+def build_palette(frames: Iterable[Image.Image], *, transparent: bool) -> list[int]:
+    """对若干帧的缩略图拼接后量化一次，得到所有帧共用的调色板（768 项）"""
+    pixels = []
+    for frame in frames:
+        thumb = frame.convert("RGBA")
+        thumb.thumbnail((PALETTE_SAMPLE_SIDE, PALETTE_SAMPLE_SIDE))
+        rgba = np.asarray(thumb).reshape(-1, 4)
+        # 只统计不透明像素的颜色，透明区域的底色不占用调色板
+        pixels.append(rgba[rgba[:, 3] > 0, :3])
+    if not pixels:
+        raise ValueError("没有可用于计算调色板的帧")
+
+    colors_array = np.concatenate(pixels) if any(len(p) for p in pixels) else np.zeros((1, 3), np.uint8)
+    mosaic = Image.frombytes("RGB", (len(colors_array), 1), np.ascontiguousarray(colors_array).tobytes())
+    colors = 255 if transparent else 256
+    palette = mosaic.quantize(colors=colors, method=Image.Quantize.MEDIANCUT).getpalette() or []
+    return (palette + [0] * 768)[:768]
+
+
+def scan_frames(path: Union[str, Path]) -> tuple[list[int], bool]:
+    """扫描一遍帧（不保留）：均匀采样计算共享调色板，并判断是否含透明"""
+    with Image.open(path) as img:
+        n_frames = int(getattr(img, "n_frames", 1) or 1)
+    step = max(1, n_frames // PALETTE_SAMPLE_FRAMES)
+    samples: list[Image.Image] = []
+    transparent = False
+    for index, (frame, _) in enumerate(iter_frames(path)):
+        if not transparent and frame.getextrema()[3][0] < 255:
+            transparent = True
+        if index % step == 0 and len(samples) < PALETTE_SAMPLE_FRAMES:
+            frame.thumbnail((PALETTE_SAMPLE_SIDE, PALETTE_SAMPLE_SIDE))
+            samples.append(frame)
+    return build_palette(samples, transparent=transparent), transparent
+
+
+def _spare_slot(palette: list[int]) -> Optional[int]:
+    """返回与前面某项颜色重复的最后一个下标（不会被量化用到），没有则返回 None"""
+    seen = set()
+    spare = None
+    for index in range(256):
+        color = tuple(palette[index * 3 : index * 3 + 3])
+        if color in seen:
+            spare = index
+        seen.add(color)
+    return spare
+
+
+def source_palette(path: Union[str, Path], raw: Optional[RawGif] = None) -> tuple[Optional[list[int]], bool]:
+    """
+    为处理 path 的输出选择调色板，返回 (调色板, 是否透明)：
+    - 源 GIF 只有全局调色板：直接沿用，不做任何量化计算
+    - 源 GIF 使用逐帧局部调色板：返回 None，输出也逐帧量化以保持画质
+    - 其他格式（APNG / WebP 等）：扫描一遍计算共享调色板
+
+    输出帧从 RGB 重新量化，调色板顺序无关紧要：沿用源调色板时把源透明色（不透明源则取一个重复的空闲项）
+    换到 TRANSPARENT_INDEX，避免占用该位置的真实颜色被并入其他颜色。
+    """
+    raw = raw if raw is not None else read_raw_gif(path)
+    if raw is None:
+        return scan_frames(path)
+    if raw.uses_local_palettes or raw.global_palette is None:
+        return None, raw.has_transparency
+
+    palette = (list(raw.global_palette) + [0] * 768)[:768]
+    if raw.has_transparency:
+        indices = {frame.gce[3] for frame in raw.frames if frame.transparent}
+        if len(indices) > 1:
+            # 各帧透明下标不同：某帧的透明色可能是其他帧的真实颜色，改为逐帧量化
+            return None, True
+        spare: Optional[int] = indices.pop()
+    else:
+        spare = _spare_slot(palette)
+    if spare is not None and spare != TRANSPARENT_INDEX:
+        a, b = spare * 3, TRANSPARENT_INDEX * 3
+        palette[a : a + 3], palette[b : b + 3] = palette[b : b + 3], palette[a : a + 3]
+    return palette, raw.has_transparency
+
+
+# ============================ 流式编码 ============================ #
+
+
+class GifStreamWriter:
+    """
+    逐帧写 GIF，写出前最多只缓存一帧（用于合并相同帧的时长）。
+
+    palette 不为 None 时写入全局调色板，所有帧按它量化（透明输出保留 TRANSPARENT_INDEX 作透明色）；
+    为 None 时每帧单独量化并带局部调色板。
+    """
+
+    def __init__(
+        self,
+        target: Union[str, Path, BinaryIO],
+        size: tuple[int, int],
+        *,
+        palette: Optional[Sequence[int]] = None,
+        transparent: bool = False,
+        loop: Optional[int] = 0,
+        alpha_threshold: int = 0,
+    ) -> None:
+        self.size = size
+        self.transparent = transparent
+        self.alpha_threshold = alpha_threshold
+        self.frame_count = 0
+        self._owns_file = not hasattr(target, "write")
+        self._path = Path(target) if self._owns_file else None
+        self._fp: BinaryIO = open(target, "wb") if self._owns_file else target  # type: ignore[arg-type]
+        self._previous: Optional[np.ndarray] = None
+        # (帧, 偏移, 时长, 处置方式, 透明下标, 是否带局部调色板)
+        self._pending: Optional[list] = None
+
+        self._quantize_palette: Optional[Image.Image] = None
+        if palette is not None:
+            palette = (list(palette) + [0] * 768)[:768]
+            quantize_palette = list(palette)
+            if transparent:
+                # 透明色下标不参与量化：让它与 0 号颜色相同，量化后再统一改回 0
+                quantize_palette[TRANSPARENT_INDEX * 3 : TRANSPARENT_INDEX * 3 + 3] = quantize_palette[0:3]
+            self._quantize_palette = Image.new("P", (1, 1))
+            self._quantize_palette.putpalette(quantize_palette)
+
+        flags = 0x70  # 颜色深度 8 bit
+        if palette is not None:
+            flags |= 0x80 | 0x07
+        background = TRANSPARENT_INDEX if transparent and palette is not None else 0
+        header = b"GIF89a" + struct.pack("<HHBBB", size[0], size[1], flags, background, 0)
+        if palette is not None:
+            header += bytes(palette)
+        if loop is not None:
+            header += _NETSCAPE_LOOP + struct.pack("<H", int(loop)) + b"\x00"
+        self._fp.write(header)
+
+    # ---------- 写帧 ----------
+
+    def write(self, frame: Image.Image, duration: int) -> None:
+        """量化并写入一帧 RGBA / RGB 图像"""
+        rgba = np.asarray(self._fit(frame.convert("RGBA")))
+        if self.transparent:
+            alpha = rgba[..., 3]
+            # 与 PIL 透明 GIF 处理保持一致：半透明像素按 alpha 压暗到黑底上
+            rgb = (rgba[..., :3].astype(np.uint16) * alpha[..., None] // 255).astype(np.uint8)
+            transparent_mask = alpha <= self.alpha_threshold
+        else:
+            rgb = np.ascontiguousarray(rgba[..., :3])
+            transparent_mask = None
+        rgb_image = Image.frombytes("RGB", self.size, rgb.tobytes())
+
+        if self._quantize_palette is None:
+            colors = 255 if self.transparent else 256
+            paletted = rgb_image.convert("P", palette=Image.Palette.ADAPTIVE, colors=colors)
+            indices = np.array(paletted, dtype=np.uint8)
+            local_palette = ((paletted.getpalette() or []) + [0] * 768)[:768]
+        else:
+            paletted = rgb_image.quantize(palette=self._quantize_palette, dither=Image.Dither.NONE)
+            indices = np.array(paletted, dtype=np.uint8)
+            if self.transparent:
+                indices[indices == TRANSPARENT_INDEX] = 0
+            local_palette = None
+
+        if transparent_mask is not None:
+            indices[transparent_mask] = TRANSPARENT_INDEX
+        self._push(indices, duration, local_palette)
+
+    def write_paletted(
+        self,
+        frame: Image.Image,
+        duration: int,
+        *,
+        transparency: Optional[int] = None,
+        disposal: int = 2,
+    ) -> None:
+        """直接写入已量化好的 P 模式帧（带局部调色板）"""
+        self._flush()
+        self._previous = None
+        frame = self._fit(frame)
+        params = {"duration": duration, "disposal": disposal, "include_color_table": True}
+        if transparency is not None:
+            params["transparency"] = transparency
+        self._write_frame(frame, (0, 0), params)
+
+    def _fit(self, frame: Image.Image) -> Image.Image:
+        if frame.size == self.size:
+            return frame
+        if frame.mode == "P":
+            return frame.crop((0, 0) + self.size)
+        canvas = Image.new("RGBA", self.size, (0, 0, 0, 0))
+        canvas.paste(frame, (0, 0))
+        return canvas
+
+    def _push(self, indices: np.ndarray, duration: int, local_palette: Optional[list[int]]) -> None:
+        previous = self._previous
+        self._previous = indices if local_palette is None else None
+        offset = (0, 0)
+        disposal = 2 if self.transparent else 1
+
+        if previous is not None and self._pending is not None:
+            changed = indices != previous
+            if not changed.any():
+                # 与上一帧完全相同：只延长上一帧的时长
+                self._pending[2] += duration
+                return
+            if not self.transparent:
+                # 不透明输出：只写有变化的矩形区域，其余保留上一帧内容
+                rows = np.flatnonzero(changed.any(axis=1))
+                cols = np.flatnonzero(changed.any(axis=0))
+                top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+                indices = indices[top:bottom, left:right]
+                offset = (int(left), int(top))
+
+        self._flush()
+        height, width = indices.shape
+        image = Image.frombytes("P", (width, height), np.ascontiguousarray(indices).tobytes())
+        if local_palette is not None:
+            image.putpalette(local_palette)
+        transparency = TRANSPARENT_INDEX if self.transparent else None
+        self._pending = [image, offset, duration, disposal, transparency, local_palette is not None]
+
+    def _flush(self) -> None:
+        if self._pending is None:
+            return
+        image, offset, duration, disposal, transparency, include_color_table = self._pending
+        self._pending = None
+        params = {"duration": duration, "disposal": disposal, "include_color_table": include_color_table}
+        if transparency is not None:
+            params["transparency"] = transparency
+        self._write_frame(image, offset, params)
+
+    def _write_frame(self, image: Image.Image, offset: tuple[int, int], params: dict) -> None:
+        for chunk in GifImagePlugin.getdata(image, offset, **params):
+            self._fp.write(chunk)
+        self.frame_count += 1
+
+    # ---------- 结束 ----------
+
+    def close(self) -> None:
+        if self._fp.closed:
+            return
+        try:
+            self._flush()
+            self._fp.write(b";")
+        finally:
+            if self._owns_file:
+                self._fp.close()
+
+    def abort(self) -> None:
+        """放弃写出并删除未完成的文件"""
+        self._pending = None
+        if self._owns_file:
+            self._fp.close()
+            if self._path is not None:
+                self._path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "GifStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,226 @@
+"""
+HTML 渲染结果缓存（html_to_pic / template_to_pic 的截图缓存）。
+
+同一张卡片（比赛列表、帮助图等）经常在短时间内被多人重复请求，每次都要走一遍浏览器截图。
+本模块按「模板源码 + 渲染数据 + 视口等截图参数」的摘要缓存截图结果：
+
+- 调用方按需开启并指定 TTL（cache_ttl 秒），新鲜度按本次调用的 TTL 判断；
+  从磁盘读回的结果以文件修改时间作为生成时间，不会因为被读回而续期
+- 并发的相同渲染只执行一次（single-flight），其余请求等待同一结果
+- 内存 LRU + 磁盘两级存储，均按总字节数限额；磁盘目录不可用时只用内存
+- 记录命中率等指标，见 get_render_cache_stats()
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from .cache_utils import SingleFlight, prune_cache_dir
+from .tools import get_logger
+
+logger = get_logger("RenderCache")
+
+# ================= 配置 =================
+
+MEMORY_MAX_BYTES = 64 * 1024 * 1024
+DISK_MAX_BYTES = 256 * 1024 * 1024
+DISK_PRUNE_INTERVAL = 600  # 磁盘超限检查的最小间隔（秒）
+
+
+def render_cache_key(*parts: Any) -> str:
+    """对任意可 JSON 化的参数求摘要；无法 JSON 化的对象按 repr 处理"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=repr, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _default_disk_dir() -> Optional[Path]:
+    try:
+        from nonebot_plugin_localstore import get_cache_dir
+
+        return get_cache_dir("render_cache")
+    except Exception as e:
+        logger.debug(f"渲染缓存磁盘目录不可用，仅使用内存缓存: {e}")
+        return None
+
+
+@dataclass
+class RenderCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    coalesced: int = 0  # 等待同一个进行中渲染的请求数
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    memory_bytes: int = 0
+    memory_entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory_hits + self.disk_hits + self.coalesced
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+
+class RenderCache:
+    def __init__(
+        self,
+        memory_max_bytes: int = MEMORY_MAX_BYTES,
+        disk_max_bytes: int = DISK_MAX_BYTES,
+        disk_dir: Optional[Path] = None,
+    ) -> None:
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_dir = disk_dir
+        self._disk_dir_resolved = disk_dir is not None
+        self._memory: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()  # key -> (图片, 生成时间)
+        self._memory_bytes = 0
+        self._flights: SingleFlight[bytes] = SingleFlight()
+        self._next_disk_prune = 0.0
+        self._stats = RenderCacheStats()
+
+    @property
+    def disk_dir(self) -> Optional[Path]:
+        if not self._disk_dir_resolved:
+            self._disk_dir = _default_disk_dir()
+            self._disk_dir_resolved = True
+        return self._disk_dir
+
+    async def get_or_render(self, key: str, ttl: float, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        while True:
+            now = time.time()
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] < ttl:
+                    self._memory.move_to_end(key)
+                    self._stats.memory_hits += 1
+                    return entry[0]
+                self._drop_memory(key)
+
+            waited, data = await self._flights.wait(key)
+            if not waited:
+                break
+            if data is not None:
+                self._stats.coalesced += 1
+                return data
+            # 领头请求失败或被取消：重新检查缓存，必要时由自己渲染
+
+        with self._flights.lead(key) as flight:
+            cached = await self._read_disk(key, ttl)
+            if cached is not None:
+                self._stats.disk_hits += 1
+                data, created_at = cached
+                self._put_memory(key, data, created_at)
+            else:
+                self._stats.misses += 1
+                data = await render()
+                self._put_memory(key, data, time.time())
+                await self._write_disk(key, data)
+            flight.result = data
+            return data
+
+    # ---------- 内存 ----------
+
+    def _put_memory(self, key: str, data: bytes, created_at: float) -> None:
+        if len(data) > self.memory_max_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (data, created_at)
+        self._memory_bytes += len(data)
+        self._stats.stores += 1
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._stats.evictions += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0])
+
+    # ---------- 磁盘 ----------
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        disk_dir = self.disk_dir
+        return disk_dir / key[:2] / key if disk_dir is not None else None
+
+    async def _read_disk(self, key: str, ttl: float) -> Optional[tuple[bytes, float]]:
+        """返回 (图片, 生成时间)，生成时间取文件修改时间"""
+        path = self._disk_path(key)
+        if path is None:
+            return None
+
+        def _read() -> Optional[tuple[bytes, float]]:
+            try:
+                mtime = path.stat().st_mtime
+                if time.time() - mtime >= ttl:
+                    return None
+                return path.read_bytes(), mtime
+            except OSError:
+                return None
+
+        return await asyncio.to_thread(_read)
+
+    async def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._disk_path(key)
+        if path is None or len(data) > self.disk_max_bytes:
+            return
+
+        def _write() -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+
+        try:
+            await asyncio.to_thread(_write)
+        except OSError as e:
+            logger.debug(f"写入渲染缓存失败: {e}")
+            return
+
+        if time.monotonic() >= self._next_disk_prune:
+            self._next_disk_prune = time.monotonic() + DISK_PRUNE_INTERVAL
+            await asyncio.to_thread(self._prune_disk)
+
+    def _prune_disk(self) -> None:
+        """磁盘总量超限时按修改时间从旧到新删除"""
+        disk_dir = self.disk_dir
+        if disk_dir is None:
+            return
+        result = prune_cache_dir(disk_dir, max_total_bytes=self.disk_max_bytes)
+        if result.removed:
+            logger.debug(f"渲染缓存磁盘超限，已删除 {result.removed} 个旧文件")
+
+    # ---------- 指标 ----------
+
+    def stats(self) -> dict[str, Any]:
+        self._stats.memory_bytes = self._memory_bytes
+        self._stats.memory_entries = len(self._memory)
+        result = asdict(self._stats)
+        result["hit_rate"] = round(self._stats.hit_rate, 4)
+        return result
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+        self._memory_bytes = 0
+
+
+render_cache = RenderCache()
+
+
+def get_render_cache_stats() -> dict[str, Any]:
+    return render_cache.stats()
@@ -1,20 +1,20 @@
-import base64
-import mimetypes
 from pathlib import Path
 from nonebot.adapters.onebot.v11 import MessageSegment
-from nonebot.log import logger
+
+from .media_transport import get_media_transport
 
 
 def path_to_base64_image(path) -> MessageSegment:
     """
-    将本地文件路径转换为 base64 编码的 MessageSegment.image，
+    将本地文件路径转换为 MessageSegment.image，
     解决 NapCat 在 Docker 容器中无法访问宿主机本地路径的问题。
+    具体以 base64 / 共享卷路径 / HTTP URL 哪种形式发送由 media_transport 配置决定。
 
     Args:
         path: 文件路径，可以是 str 或 Path 对象
 
     Returns:
-        MessageSegment.image (base64 编码)
+        MessageSegment.image
 
     Raises:
         FileNotFoundError: 文件不存在
@@ -28,35 +28,20 @@ def path_to_base64_image(path) -> MessageSegment:
     if p.stat().st_size == 0:
         raise ValueError(f"图片文件为空: {p}")
 
-    data = p.read_bytes()
-
-    mime, _ = mimetypes.guess_type(str(p))
-    if not mime:
-        suffix = p.suffix.lower()
-        mime_map = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".bmp": "image/bmp",
-            ".webp": "image/webp",
-        }
-        mime = mime_map.get(suffix, "image/png")
-
-    b64 = base64.b64encode(data).decode("utf-8")
-    return MessageSegment.image(f"base64://{b64}")
+    return MessageSegment.image(get_media_transport().file_reference(p))
 
 
 def path_to_base64_record(path) -> MessageSegment:
     """
-    将本地音频文件路径转换为 base64 编码的 MessageSegment.record，
+    将本地音频文件路径转换为 MessageSegment.record，
     解决 NapCat 在 Docker 容器中无法访问宿主机本地路径的问题。
+    传输方式同 path_to_base64_image。
 
     Args:
         path: 文件路径，可以是 str 或 Path 对象
 
     Returns:
-        MessageSegment.record (base64 编码)
+        MessageSegment.record
     """
     p = Path(path) if not isinstance(path, Path) else path
 
@@ -66,6 +51,4 @@ def path_to_base64_record(path) -> MessageSegment:
     if p.stat().st_size == 0:
         raise ValueError(f"音频文件为空: {p}")
 
-    data = p.read_bytes()
-    b64 = base64.b64encode(data).decode("utf-8")
-    return MessageSegment.record(f"base64://{b64}")
+    return MessageSegment.record(get_media_transport().file_reference(p))
@@ -1,8 +1,11 @@
+import asyncio
 import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
+from nonebot import get_driver
 from openai import (
     APIConnectionError,
     APIStatusError,
@@ -12,6 +15,10 @@ from openai import (
     RateLimitError,
 )
 
+from .tools import get_logger
+
+logger = get_logger("LLM")
+
 
 @dataclass
 class TokenUsage:
@@ -33,6 +40,8 @@ class LLMClientConfig:
     thinking_enabled: bool = False
     reasoning_effort: Optional[str] = None
     extra_body: dict[str, Any] = field(default_factory=dict)
+    # 同一 provider（base_url）的最大并发请求数，None 使用 LLM_PROVIDER_MAX_CONCURRENCY
+    max_concurrency: Optional[int] = None
 
 
 @dataclass
@@ -66,18 +75,145 @@ def is_retryable_llm_error(exc: Exception) -> bool:
     return False
 
 
-def _make_client(config: LLMClientConfig) -> AsyncOpenAI:
-    http_client = httpx.AsyncClient(
-        proxy=config.proxy,
-        timeout=config.timeout,
-    )
-    return AsyncOpenAI(
-        api_key=config.api_key,
-        base_url=config.base_url,
-        timeout=config.timeout,
-        max_retries=config.max_retries,
-        http_client=http_client,
-    )
+# ============================ client pool ============================ #
+
+# 同一 provider 默认的最大并发请求数（超出的请求排队等待，而不是同时打到上游）
+LLM_PROVIDER_MAX_CONCURRENCY = 8
+LLM_POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120.0)
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+@dataclass
+class LLMCallStats:
+    calls: int = 0
+    errors: int = 0
+    total_elapsed: float = 0.0
+    max_elapsed: float = 0.0
+    total_wait: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+# (base_url, api_key, proxy, timeout, max_retries) -> AsyncOpenAI
+_clients: dict[tuple, AsyncOpenAI] = {}
+# (base_url, max_concurrency) -> 并发限制；配置不同上限的调用方各自独立限流
+_provider_semaphores: dict[tuple[str, int], asyncio.Semaphore] = {}
+# (base_url, model) -> 调用统计
+_call_stats: dict[tuple[str, str], LLMCallStats] = {}
+
+
+def _get_client(config: LLMClientConfig) -> AsyncOpenAI:
+    """
+    按 (base_url, api_key, proxy, timeout, max_retries) 复用长连接客户端，
+    避免每次请求都重新建立 TCP/TLS 连接
+    """
+    key = (config.base_url, config.api_key, config.proxy, float(config.timeout), int(config.max_retries))
+    client = _clients.get(key)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            proxy=config.proxy,
+            timeout=config.timeout,
+            limits=LLM_POOL_LIMITS,
+            http2=_HTTP2_AVAILABLE,
+        )
+        client = AsyncOpenAI(
+            api_key=config.api_key,
+            base_url=config.base_url,
+            timeout=config.timeout,
+            max_retries=config.max_retries,
+            http_client=http_client,
+        )
+        _clients[key] = client
+    return client
+
+
+def _get_provider_semaphore(config: LLMClientConfig) -> asyncio.Semaphore:
+    limit = max(1, int(config.max_concurrency or LLM_PROVIDER_MAX_CONCURRENCY))
+    key = (config.base_url, limit)
+    sem = _provider_semaphores.get(key)
+    if sem is None:
+        sem = asyncio.Semaphore(limit)
+        _provider_semaphores[key] = sem
+    return sem
+
+
+@asynccontextmanager
+async def _pooled_call(config: LLMClientConfig, model: str) -> AsyncIterator[tuple[AsyncOpenAI, LLMCallStats]]:
+    """
+    获取共享客户端并占用一个 provider 并发名额，同时记录耗时/错误统计
+    """
+    stats = _call_stats.setdefault((config.base_url, model), LLMCallStats())
+    t0 = time.time()
+    async with _get_provider_semaphore(config):
+        t1 = time.time()
+        stats.calls += 1
+        stats.total_wait += t1 - t0
+        try:
+            yield _get_client(config), stats
+        except BaseException:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = max(0.0, time.time() - t1)
+            stats.total_elapsed += elapsed
+            stats.max_elapsed = max(stats.max_elapsed, elapsed)
+            logger.debug(f"{model} @ {config.base_url}: {elapsed:.2f}s (排队 {t1 - t0:.2f}s)")
+
+
+def _record_usage(stats: LLMCallStats, usage: TokenUsage):
+    stats.prompt_tokens += usage.prompt_tokens
+    stats.completion_tokens += usage.completion_tokens
+    stats.total_tokens += usage.total_tokens
+
+
+def get_llm_stats() -> dict[str, dict[str, Any]]:
+    """
+    获取各 provider/model 的调用统计（次数、错误数、平均/最大耗时、排队等待、token 用量）
+    """
+    result: dict[str, dict[str, Any]] = {}
+    for (base_url, model), s in _call_stats.items():
+        result[f"{base_url}#{model}"] = {
+            "calls": s.calls,
+            "errors": s.errors,
+            "avg_elapsed": s.total_elapsed / s.calls if s.calls else 0.0,
+            "max_elapsed": s.max_elapsed,
+            "avg_wait": s.total_wait / s.calls if s.calls else 0.0,
+            "prompt_tokens": s.prompt_tokens,
+            "completion_tokens": s.completion_tokens,
+            "total_tokens": s.total_tokens,
+        }
+    return result
+
+
+async def close_llm_clients():
+    """关闭所有共享客户端（进程退出时调用）"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+try:
+    _driver = get_driver()
+except Exception:
+    # 允许在非 NoneBot 环境下 import（例如命令行检查/单测）
+    _driver = None
+
+
+if _driver:
+
+    @_driver.on_shutdown
+    async def _close_llm_clients():
+        await close_llm_clients()
 
 
 def _usage_from_response(resp: Any) -> TokenUsage:
@@ -186,18 +322,17 @@ async def chat_completion(
         response_format=response_format,
     )
 
-    client = _make_client(config)
-    t1 = time.time()
-    try:
+    async with _pooled_call(config, str(kwargs["model"])) as (client, stats):
+        t1 = time.time()
         resp = await client.chat.completions.create(**kwargs)
-    finally:
-        await client.close()
-    elapsed = max(0.0, time.time() - t1)
+        elapsed = max(0.0, time.time() - t1)
+        usage = _usage_from_response(resp)
+        _record_usage(stats, usage)
 
     return ChatResult(
         content=_message_content_from_response(resp),
         model=str(kwargs["model"]),
-        usage=_usage_from_response(resp),
+        usage=usage,
         elapsed=elapsed,
     )
 
@@ -221,15 +356,12 @@ async def image_generation(
     if quality:
         kwargs["quality"] = quality
 
-    client = _make_client(config)
-    try:
+    async with _pooled_call(config, used_model) as (client, _):
         resp = await client.images.generate(**kwargs)
         data = getattr(resp, "data", None) or []
         if not data:
             raise Exception(f"生图 API 返回成功但无数据。完整数据: {resp}")
         item = data[0]
-    finally:
-        await client.close()
 
     b64_json = getattr(item, "b64_json", None)
     if isinstance(item, dict):
@@ -270,15 +402,12 @@ async def image_edit(
     if quality:
         kwargs["quality"] = quality
 
-    client = _make_client(config)
-    try:
+    async with _pooled_call(config, used_model) as (client, _):
         resp = await client.images.edit(**kwargs)
         data = getattr(resp, "data", None) or []
         if not data:
             raise Exception(f"图生图 API 返回成功但无数据。完整数据: {resp}")
         item = data[0]
-    finally:
-        await client.close()
 
     b64_json = getattr(item, "b64_json", None)
     if isinstance(item, dict):
@@ -0,0 +1,311 @@
+"""
+媒体发送传输层：决定本地图片 / 音频以什么形式交给 NapCat。
+
+NapCat 多部署在 Docker 容器中，无法直接读取宿主机路径，过去统一读文件后 base64 内联进
+WebSocket 帧：每次发送占用 1.33 倍文件大小的内存与带宽，同一张表情包每次都要重新编码。
+
+通过 NoneBot 配置（.env）中的 MEDIA_TRANSPORT 选择传输方式：
+- base64（默认）：与原行为一致，但按 (路径, mtime, 大小) 缓存编码结果（LRU，按总字节数限额）
+- path：共享卷路径映射，MEDIA_PATH_MAP 为 {"宿主机前缀": "容器内前缀"}，
+  命中映射的文件以 file:// 容器路径发送，未命中则回退 base64
+- http：在 Bot 自身的 HTTP 服务上注册媒体端点，MEDIA_HTTP_BASE_URL 为 NapCat 访问 Bot 的地址
+  （如 http://hakubot:8080），文件以按需注册的随机令牌 URL 发送，不暴露其他路径；
+  驱动不支持 HTTP 服务或未配置地址时回退 base64
+
+.env 示例：
+    MEDIA_TRANSPORT=path
+    MEDIA_PATH_MAP={"/home/bot/HakuBot/data": "/app/hakubot-data"}
+"""
+
+import asyncio
+import base64
+import mimetypes
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Literal, Optional
+from urllib.parse import quote
+
+from nonebot import get_driver
+
+from .tools import get_logger
+
+logger = get_logger("MediaTransport")
+
+TransportName = Literal["base64", "path", "http"]
+
+# ================= 配置 =================
+
+DEFAULT_BASE64_CACHE_ENTRIES = 128
+DEFAULT_BASE64_CACHE_MB = 64  # 编码缓存总大小上限
+DEFAULT_HTTP_TOKEN_TTL = 600  # 令牌有效期（秒），NapCat 通常在发送时立即拉取
+HTTP_MAX_TOKENS = 2048
+HTTP_ROUTE_PATH = "/hakubot/media"
+
+_MIME_FALLBACK = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".webp": "image/webp",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".silk": "audio/silk",
+}
+
+
+def guess_mime(path: Path) -> str:
+    mime, _ = mimetypes.guess_type(str(path))
+    return mime or _MIME_FALLBACK.get(path.suffix.lower(), "application/octet-stream")
+
+
+@dataclass(frozen=True)
+class MediaTransportConfig:
+    transport: TransportName = "base64"
+    path_map: tuple[tuple[Path, PurePosixPath], ...] = ()
+    http_base_url: str = ""
+    http_token_ttl: float = DEFAULT_HTTP_TOKEN_TTL
+    base64_cache_entries: int = DEFAULT_BASE64_CACHE_ENTRIES
+    base64_cache_bytes: int = DEFAULT_BASE64_CACHE_MB * 1024 * 1024
+
+
+def load_transport_config() -> MediaTransportConfig:
+    """从 NoneBot 全局配置读取；非 NoneBot 环境（命令行 / 脚本）下使用默认值"""
+    try:
+        config = get_driver().config
+    except Exception:
+        return MediaTransportConfig()
+
+    transport = str(getattr(config, "media_transport", "base64") or "base64").lower()
+    if transport not in ("base64", "path", "http"):
+        logger.warning(f"未知的 MEDIA_TRANSPORT={transport!r}，使用 base64")
+        transport = "base64"
+
+    raw_map = getattr(config, "media_path_map", None) or {}
+    path_map: list[tuple[Path, PurePosixPath]] = []
+    if isinstance(raw_map, dict):
+        for local, remote in raw_map.items():
+            path_map.append((Path(str(local)).resolve(), PurePosixPath(str(remote))))
+    else:
+        logger.warning("MEDIA_PATH_MAP 应为 JSON 对象，已忽略")
+    # 更长（更具体）的前缀优先匹配
+    path_map.sort(key=lambda item: len(item[0].parts), reverse=True)
+
+    return MediaTransportConfig(
+        transport=transport,  # type: ignore[arg-type]
+        path_map=tuple(path_map),
+        http_base_url=str(getattr(config, "media_http_base_url", "") or "").rstrip("/"),
+        http_token_ttl=float(getattr(config, "media_http_token_ttl", DEFAULT_HTTP_TOKEN_TTL)),
+        base64_cache_entries=int(getattr(config, "media_base64_cache_entries", DEFAULT_BASE64_CACHE_ENTRIES)),
+        base64_cache_bytes=int(float(getattr(config, "media_base64_cache_mb", DEFAULT_BASE64_CACHE_MB)) * 1024 * 1024),
+    )
+
+
+# ================= base64 编码缓存 =================
+
+_FileKey = tuple[str, int, int]  # (绝对路径, mtime_ns, size)
+
+
+def _file_key(path: Path) -> _FileKey:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+class Base64Cache:
+    """(路径, mtime, 大小) -> "base64://..." 的 LRU；文件被改写后 mtime / 大小变化自然失效"""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[_FileKey, str]" = OrderedDict()
+        self._total = 0
+        # 发送函数是同步的，可能被 run_in_pool 等线程调用
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, path: Path) -> str:
+        key = _file_key(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        payload = "base64://" + base64.b64encode(path.read_bytes()).decode("ascii")
+        with self._lock:
+            self.misses += 1
+            if self.max_entries and len(payload) <= self.max_bytes:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._total -= len(previous)
+                self._entries[key] = payload
+                self._total += len(payload)
+                while self._entries and (
+                    len(self._entries) > self.max_entries or self._total > self.max_bytes
+                ):
+                    _, evicted = self._entries.popitem(last=False)
+                    self._total -= len(evicted)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+
+# ================= HTTP 媒体端点 =================
+
+
+class MediaTokenRegistry:
+    """令牌 -> 文件 的短期映射；同一文件版本复用同一令牌，其余路径一律不可访问"""
+
+    def __init__(self, ttl: float, max_tokens: int = HTTP_MAX_TOKENS) -> None:
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self._tokens: "OrderedDict[str, tuple[_FileKey, float]]" = OrderedDict()
+        self._by_file: dict[_FileKey, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: Path) -> str:
+        key = _file_key(path)
+        now = time.monotonic()
+        with self._lock:
+            token = self._by_file.get(key)
+            if token is not None and token in self._tokens:
+                self._tokens[token] = (key, now + self.ttl)
+                self._tokens.move_to_end(token)
+                return token
+            token = secrets.token_urlsafe(18)
+            self._tokens[token] = (key, now + self.ttl)
+            self._by_file[key] = token
+            while len(self._tokens) > self.max_tokens:
+                _, (old_key, _) = self._tokens.popitem(last=False)
+                self._by_file.pop(old_key, None)
+            return token
+
+    def resolve(self, token: str) -> Optional[Path]:
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+            key, expires_at = entry
+            if time.monotonic() >= expires_at:
+                self._tokens.pop(token, None)
+                self._by_file.pop(key, None)
+                return None
+        path = Path(key[0])
+        try:
+            # 令牌只对应注册时的文件版本，之后被改写则视为失效
+            if _file_key(path) != key:
+                return None
+        except OSError:
+            return None
+        return path
+
+
+def _setup_http_route(registry: MediaTokenRegistry) -> bool:
+    """在驱动的 HTTP 服务上注册媒体端点，驱动不支持时返回 False"""
+    try:
+        from nonebot.drivers import URL, ASGIMixin, HTTPServerSetup, Request, Response
+
+        driver = get_driver()
+    except Exception:
+        return False
+    if not isinstance(driver, ASGIMixin):
+        return False
+
+    async def _handle_media(request: Request) -> Response:
+        token = request.url.query.get("t", "")
+        path = registry.resolve(token) if token else None
+        if path is None:
+            return Response(404, content="Not Found")
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+        except OSError:
+            return Response(404, content="Not Found")
+        return Response(
+            200,
+            headers={"Content-Type": guess_mime(path), "Cache-Control": "no-store"},
+            content=data,
+        )
+
+    driver.setup_http_server(
+        HTTPServerSetup(
+            path=URL(HTTP_ROUTE_PATH),
+            method="GET",
+            name="hakubot_media",
+            handle_func=_handle_media,
+        )
+    )
+    return True
+
+
+# ================= 传输层 =================
+
+
+class MediaTransport:
+    def __init__(self, config: MediaTransportConfig) -> None:
+        self.config = config
+        self.base64_cache = Base64Cache(config.base64_cache_entries, config.base64_cache_bytes)
+        self.registry = MediaTokenRegistry(config.http_token_ttl)
+        self.transport: TransportName = config.transport
+
+        if self.transport == "path" and not config.path_map:
+            logger.warning("MEDIA_TRANSPORT=path 但未配置 MEDIA_PATH_MAP，回退 base64")
+            self.transport = "base64"
+        if self.transport == "http":
+            if not config.http_base_url:
+                logger.warning("MEDIA_TRANSPORT=http 但未配置 MEDIA_HTTP_BASE_URL，回退 base64")
+                self.transport = "base64"
+            elif not _setup_http_route(self.registry):
+                logger.warning("当前驱动不提供 HTTP 服务，MEDIA_TRANSPORT=http 回退 base64")
+                self.transport = "base64"
+        logger.info(f"媒体传输方式: {self.transport}")
+
+    def _map_path(self, path: Path) -> Optional[str]:
+        resolved = path.resolve()
+        for local, remote in self.config.path_map:
+            try:
+                relative = resolved.relative_to(local)
+            except ValueError:
+                continue
+            return (remote / PurePosixPath(*relative.parts)).as_uri()
+        return None
+
+    def file_reference(self, path: Path) -> str:
+        """返回可直接放入 OneBot file 字段的引用（file:// / http:// / base64://）"""
+        if self.transport == "path":
+            mapped = self._map_path(path)
+            if mapped is not None:
+                return mapped
+        elif self.transport == "http":
+            token = self.registry.register(path)
+            return f"{self.config.http_base_url}{HTTP_ROUTE_PATH}?t={quote(token)}"
+        return self.base64_cache.encode(path)
+
+
+_transport: Optional[MediaTransport] = None
+
+
+def get_media_transport() -> MediaTransport:
+    global _transport
+    if _transport is None:
+        _transport = MediaTransport(load_transport_config())
+    return _transport
+
+
+try:
+    get_driver()
+except Exception:
+    # 允许在非 NoneBot 环境下 import（例如命令行检查/单测）
+    pass
+else:
+    # 插件加载阶段即初始化：HTTP 端点需在驱动启动前注册
+    get_media_transport()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Callable
+
+from ..utils.cache_utils import PruneResult, prune_cache_dir
+
+BLOB_REF_TYPE = "blob"
+BYTES_TYPE = "bytes"
+BASE64_URI_PREFIX = "base64://"
+BLOB_MIN_BYTES = 4_096
+
+
+def blob_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_ref(digest: str, size: int, encoding: str) -> dict[str, Any]:
+    return {
+        "__type__": BLOB_REF_TYPE,
+        "sha256": digest,
+        "size": size,
+        "encoding": encoding,
+    }
+
+
+def is_blob_ref(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and value.get("__type__") == BLOB_REF_TYPE
+        and isinstance(value.get("sha256"), str)
+    )
+
+
+def _offload_data(data: bytes, blobs: dict[str, bytes], encoding: str) -> Any:
+    digest = blob_digest(data)
+    blobs.setdefault(digest, data)
+    return blob_ref(digest, len(data), encoding)
+
+
+def offload_blobs(value: Any, blobs: dict[str, bytes]) -> Any:
+    """Move large base64 payloads of a decoded JSON record into ``blobs``.
+
+    ``value`` is what ``serialize_api_value`` wrote, so bytes appear in their
+    ``{"__type__": "bytes", "base64": ...}`` form and segments as plain dicts.
+    """
+    if isinstance(value, dict):
+        encoded = value.get("base64")
+        if (
+            value.get("__type__") == BYTES_TYPE
+            and isinstance(encoded, str)
+            and len(encoded) >= BLOB_MIN_BYTES
+        ):
+            try:
+                data = base64.b64decode(encoded, validate=True)
+            except (binascii.Error, ValueError):
+                return value
+            return _offload_data(data, blobs, BYTES_TYPE)
+        return {key: offload_blobs(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [offload_blobs(item, blobs) for item in value]
+    if isinstance(value, str):
+        if (
+            not value.startswith(BASE64_URI_PREFIX)
+            or len(value) < BLOB_MIN_BYTES
+        ):
+            return value
+        try:
+            data = base64.b64decode(
+                value[len(BASE64_URI_PREFIX):],
+                validate=True,
+            )
+        except (binascii.Error, ValueError):
+            return value
+        return _offload_data(data, blobs, "base64_uri")
+    return value
+
+
+def restore_blobs(value: Any, read: Callable[[str], bytes | None]) -> Any:
+    """Inline offloaded payloads back into a record; pruned refs stay."""
+    if is_blob_ref(value):
+        data = read(value["sha256"])
+        if data is None:
+            return value
+        encoded = base64.b64encode(data).decode("ascii")
+        if value.get("encoding") == "base64_uri":
+            return BASE64_URI_PREFIX + encoded
+        return {"__type__": BYTES_TYPE, "base64": encoded}
+    if isinstance(value, dict):
+        return {key: restore_blobs(item, read) for key, item in value.items()}
+    if isinstance(value, list):
+        return [restore_blobs(item, read) for item in value]
+    return value
+
+
+class BlobStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path_for(self, digest: str) -> Path:
+        if len(digest) != 64 or any(
+            character not in "0123456789abcdef" for character in digest
+        ):
+            raise ValueError(f"invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest
+
+    def contains(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    def put(self, data: bytes, digest: str | None = None) -> str:
+        digest = digest or blob_digest(data)
+        target = self.path_for(digest)
+        if target.is_file():
+            try:
+                os.utime(target)
+            except OSError:
+                pass
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_name = tempfile.mkstemp(
+            prefix=".webconsole-blob-",
+            suffix=".tmp",
+            dir=target.parent,
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as temporary:
+                temporary.write(data)
+                temporary.flush()
+                os.fsync(temporary.fileno())
+            os.replace(temporary_name, target)
+        except BaseException:
+            try:
+                os.unlink(temporary_name)
+            except FileNotFoundError:
+                pass
+            raise
+        return digest
+
+    def put_many(self, blobs: dict[str, bytes]) -> None:
+        for digest, data in blobs.items():
+            self.put(data, digest)
+
+    def read(self, digest: str) -> bytes | None:
+        """Return a stored payload, or None once it has been pruned."""
+        try:
+            return self.path_for(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def restore(self, value: Any) -> Any:
+        """Inline stored payloads back into a decoded record."""
+        return restore_blobs(value, self.read)
+
+    def prune(
+        self,
+        *,
+        max_age_seconds: float,
+        max_total_bytes: int | None = None,
+    ) -> PruneResult:
+        return prune_cache_dir(
+            self.root,
+            max_total_bytes=max_total_bytes,
+            max_age_seconds=max_age_seconds,
+        )
@@ -14,6 +14,7 @@ from nonebot.adapters import Bot, Event
 from nonebot.matcher import Matcher, current_matcher
 from nonebot.message import run_postprocessor, run_preprocessor
 
+from .blobs import offload_blobs
 from .status import BridgeRuntime
 
 RUN_CONTEXT_STATE_KEY = "_webconsole_bridge_run_context"
@@ -201,6 +202,7 @@ class RunContext:
     matcher_traceback: str | None = None
     api_calls: list[Any] = field(default_factory=list)
     diagnostic_logs: list[Any] = field(default_factory=list)
+    blobs: dict[str, bytes] = field(default_factory=dict)
 
     @property
     def should_record(self) -> bool:
@@ -228,6 +230,7 @@ class CompletedResponse:
     request_raw: str | None
     response_raw: str | None
     logs_raw: str | None
+    blobs: dict[str, bytes] = field(default_factory=dict)
 
 
 FinalizeCallback = Callable[[RunContext, CompletedResponse | None], Awaitable[None]]
@@ -427,15 +430,27 @@ class CaptureManager:
         logs_raw = None
         if has_full_diagnostics:
             request_raw = context.request_raw
-            response_raw = json.dumps(
-                [
+            calls_payload = []
+            for call in context.api_calls:
+                params = offload_blobs(
+                    json.loads(call.params_raw),
+                    context.blobs,
+                )
+                result = offload_blobs(
+                    json.loads(call.result_raw),
+                    context.blobs,
+                )
+                calls_payload.append(
                     {
                         **asdict(call),
-                        "params": json.loads(call.params_raw),
-                        "result": json.loads(call.result_raw),
+                        "params_raw": serialize_api_value(params),
+                        "result_raw": serialize_api_value(result),
+                        "params": params,
+                        "result": result,
                     }
-                    for call in context.api_calls
-                ],
+                )
+            response_raw = json.dumps(
+                calls_payload,
                 ensure_ascii=False,
                 separators=(",", ":"),
             )
@@ -476,6 +491,7 @@ class CaptureManager:
             request_raw=request_raw,
             response_raw=response_raw,
             logs_raw=logs_raw,
+            blobs=context.blobs if has_full_diagnostics else {},
         )
 
     async def finalize_run(
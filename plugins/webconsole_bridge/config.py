@@ -12,6 +12,9 @@ _ALLOWED_KEYS = {
     "database_path",
     "spool_path",
     "probe_interval_seconds",
+    "blob_path",
+    "blob_retention_days",
+    "blob_max_total_mb",
 }
 
 
@@ -37,6 +40,18 @@ def _read_probe_interval(value: Any) -> float:
     return interval
 
 
+def _read_positive_number(value: Any, name: str) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{name} must be a number") from exc
+    if number <= 0:
+        raise ValueError(f"{name} must be greater than 0")
+    return number
+
+
 def _read_absolute_path(raw: Any, name: str) -> Path:
     if not isinstance(raw, str) or not raw.strip():
         raise ValueError(f"{name} must be a non-empty absolute path")
@@ -52,6 +67,9 @@ class BridgeConfig:
     database_path: Path
     spool_path: Path
     probe_interval_seconds: float
+    blob_path: Path
+    blob_retention_seconds: float
+    blob_max_total_bytes: int | None
 
     @classmethod
     def from_file(cls, path: Path = CONFIG_FILE) -> "BridgeConfig":
@@ -73,12 +91,28 @@ class BridgeConfig:
             raise ValueError(
                 f"config.json contains unknown fields: {', '.join(unknown)}"
             )
+        database_path = _read_absolute_path(
+            raw.get("database_path"),
+            "database_path",
+        )
+        blob_path = (
+            _read_absolute_path(raw["blob_path"], "blob_path")
+            if raw.get("blob_path") is not None
+            else database_path.parent / "blobs"
+        )
+        blob_max_total_bytes = None
+        if raw.get("blob_max_total_mb") is not None:
+            blob_max_total_bytes = int(
+                _read_positive_number(
+                    raw["blob_max_total_mb"],
+                    "blob_max_total_mb",
+                )
+                * 1024
+                * 1024
+            )
         return cls(
             enabled=_read_bool(raw.get("enabled", True)),
-            database_path=_read_absolute_path(
-                raw.get("database_path"),
-                "database_path",
-            ),
+            database_path=database_path,
             spool_path=_read_absolute_path(
                 raw.get("spool_path"),
                 "spool_path",
@@ -86,6 +120,13 @@ class BridgeConfig:
             probe_interval_seconds=_read_probe_interval(
                 raw.get("probe_interval_seconds", 60)
             ),
+            blob_path=blob_path,
+            blob_retention_seconds=_read_positive_number(
+                raw.get("blob_retention_days", 30),
+                "blob_retention_days",
+            )
+            * 86_400,
+            blob_max_total_bytes=blob_max_total_bytes,
         )
 
     @classmethod
@@ -95,4 +136,7 @@ class BridgeConfig:
             database_path=Path("/nonexistent/webconsole.db"),
             spool_path=Path("/nonexistent/webconsole-spool"),
             probe_interval_seconds=60,
+            blob_path=Path("/nonexistent/webconsole-blobs"),
+            blob_retention_seconds=30 * 86_400,
+            blob_max_total_bytes=None,
         )
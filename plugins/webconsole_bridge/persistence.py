@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import asdict
+from collections import deque
+from dataclasses import asdict, dataclass
 import gzip
 import hashlib
 import json
@@ -15,11 +16,20 @@ from urllib.parse import quote
 import aiosqlite
 from loguru import logger
 
+from .blobs import BlobStore
 from .capture import CompletedResponse, DiagnosticLogEntry, RunContext
 from .config import BridgeConfig
 from .status import BotStatusSnapshot
 
 SUCCESS_QUEUE_SIZE = 5_000
+BATCH_MAX_ITEMS = 500
+BATCH_MAX_WAIT_SECONDS = 0.05
+SPOOL_BATCH_SIZE = 50
+SPOOL_RESCAN_SECONDS = 30.0
+STATS_LOG_INTERVAL_SECONDS = 300.0
+COMMIT_RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8)
+BUSY_BACKOFF_DELAYS = (0.5, 1.0, 2.0, 5.0)
+BLOB_PRUNE_INTERVAL_SECONDS = 3_600.0
 
 
 def _encode_full_value(
@@ -120,23 +130,248 @@ def _read_spool(path: Path) -> dict[str, Any]:
     return payload
 
 
+def _load_spool_batch(
+    paths: list[Path],
+) -> list[tuple[Path, dict[str, Any] | None, Exception | None]]:
+    loaded: list[tuple[Path, dict[str, Any] | None, Exception | None]] = []
+    for path in paths:
+        try:
+            loaded.append((path, _read_spool(path), None))
+        except FileNotFoundError:
+            continue
+        except Exception as exc:
+            loaded.append((path, None, exc))
+    return loaded
+
+
+def _unlink_all(paths: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _list_spool(spool_path: Path) -> list[Path]:
+    return sorted(spool_path.glob("*.json.gz"))
+
+
+RESPONSE_SQL = """
+    INSERT OR IGNORE INTO response_events (
+        run_id, started_at_ms, finished_at_ms, duration_ms,
+        status, plugin_name, plugin_id, module_name, matcher_type,
+        matcher_lineno, bot_id, event_name, group_id, user_id,
+        source_message_id, request_summary, response_summary,
+        send_count, send_success_count, send_failure_count,
+        max_log_level, error_type, error_message,
+        has_full_diagnostics, request_raw_gzip, response_raw_gzip,
+        logs_raw_gzip, request_raw_sha256, response_raw_sha256,
+        logs_raw_sha256, created_at_ms
+    ) VALUES (
+        :run_id, :started_at_ms, :finished_at_ms, :duration_ms,
+        :status, :plugin_name, :plugin_id, :module_name, :matcher_type,
+        :matcher_lineno, :bot_id, :event_name, :group_id, :user_id,
+        :source_message_id, :request_summary, :response_summary,
+        :send_count, :send_success_count, :send_failure_count,
+        :max_log_level, :error_type, :error_message,
+        :has_full_diagnostics, :request_raw_gzip, :response_raw_gzip,
+        :logs_raw_gzip, :request_raw_sha256, :response_raw_sha256,
+        :logs_raw_sha256, :created_at_ms
+    )
+"""
+
+DIAGNOSTIC_SQL = """
+    INSERT INTO diagnostic_logs (
+        run_id, created_at_ms, level, logger_name, module_name,
+        plugin_name, message_summary, full_log_gzip, raw_sha256
+    ) VALUES (
+        :run_id, :created_at_ms, :level, :logger_name, :module_name,
+        :plugin_name, :message_summary, :full_log_gzip, :raw_sha256
+    )
+"""
+
+STATUS_SQL = """
+    INSERT INTO bot_status (
+        bot_id, adapter, connected, connection_started_at_ms,
+        last_heartbeat_at_ms, heartbeat_online, heartbeat_good,
+        collector_heartbeat_at_ms, updated_at_ms
+    ) VALUES (
+        :bot_id, :adapter, :connected, :connection_started_at_ms,
+        :last_heartbeat_at_ms, :heartbeat_online, :heartbeat_good,
+        :collector_heartbeat_at_ms, :updated_at_ms
+    )
+    ON CONFLICT(bot_id) DO UPDATE SET
+        adapter = excluded.adapter,
+        connected = excluded.connected,
+        connection_started_at_ms = excluded.connection_started_at_ms,
+        last_heartbeat_at_ms = excluded.last_heartbeat_at_ms,
+        heartbeat_online = excluded.heartbeat_online,
+        heartbeat_good = excluded.heartbeat_good,
+        collector_heartbeat_at_ms =
+            excluded.collector_heartbeat_at_ms,
+        updated_at_ms = excluded.updated_at_ms
+"""
+
+
+def _response_parameters(payload: dict[str, Any]) -> dict[str, Any]:
+    request_gzip, request_sha = _encode_full_value(
+        payload.get("request_raw")
+    )
+    response_gzip, response_sha = _encode_full_value(
+        payload.get("response_raw")
+    )
+    logs_gzip, logs_sha = _encode_full_value(payload.get("logs_raw"))
+    return {
+        **payload,
+        "has_full_diagnostics": int(bool(payload["has_full_diagnostics"])),
+        "request_raw_gzip": request_gzip,
+        "response_raw_gzip": response_gzip,
+        "logs_raw_gzip": logs_gzip,
+        "request_raw_sha256": request_sha,
+        "response_raw_sha256": response_sha,
+        "logs_raw_sha256": logs_sha,
+    }
+
+
+def _diagnostic_parameters(payload: dict[str, Any]) -> dict[str, Any]:
+    full_log = str(payload["full_log"])
+    full_log_gzip, raw_sha256 = _encode_full_value(full_log)
+    return {
+        "run_id": payload.get("run_id"),
+        "created_at_ms": int(payload["created_at_ms"]),
+        "level": str(payload["level"]),
+        "logger_name": payload.get("logger_name"),
+        "module_name": payload.get("module_name"),
+        "plugin_name": payload.get("plugin_name"),
+        "message_summary": str(payload.get("message", ""))[:2_000],
+        "full_log_gzip": full_log_gzip,
+        "raw_sha256": raw_sha256,
+    }
+
+
+def _status_parameters(payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        **payload,
+        "connected": int(bool(payload["connected"])),
+        "heartbeat_online": (
+            None
+            if payload["heartbeat_online"] is None
+            else int(bool(payload["heartbeat_online"]))
+        ),
+        "heartbeat_good": (
+            None
+            if payload["heartbeat_good"] is None
+            else int(bool(payload["heartbeat_good"]))
+        ),
+    }
+
+
+ROW_STATEMENTS = {
+    "response": (RESPONSE_SQL, _response_parameters),
+    "diagnostic": (DIAGNOSTIC_SQL, _diagnostic_parameters),
+    "status": (STATUS_SQL, _status_parameters),
+}
+
+
+def _unpack_spool(payload: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    kind = payload.get("kind")
+    if kind == "response":
+        response = payload.get("response")
+        if not isinstance(response, dict):
+            raise ValueError("response spool is missing response object")
+        return kind, response
+    if kind == "diagnostic":
+        diagnostic = payload.get("diagnostic")
+        if not isinstance(diagnostic, dict):
+            raise ValueError("diagnostic spool is missing diagnostic object")
+        return kind, diagnostic
+    raise ValueError(f"unsupported spool kind: {kind!r}")
+
+
+@dataclass(slots=True)
+class PendingRow:
+    kind: str
+    payload: dict[str, Any]
+    spool_path: Path | None = None
+    enqueued_at: float | None = None
+    parameters: dict[str, Any] | None = None
+    error: Exception | None = None
+    deferred: bool = False
+
+
+def _prepare_rows(rows: list[PendingRow]) -> None:
+    for row in rows:
+        if row.parameters is not None:
+            continue
+        try:
+            row.parameters = ROW_STATEMENTS[row.kind][1](row.payload)
+        except Exception as exc:
+            row.error = exc
+
+
+def _is_busy_error(exc: BaseException) -> bool:
+    if not isinstance(exc, aiosqlite.OperationalError):
+        return False
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+@dataclass(slots=True)
+class WriterStats:
+    batches: int = 0
+    responses: int = 0
+    diagnostics: int = 0
+    statuses: int = 0
+    failed_rows: int = 0
+    dropped_success: int = 0
+    queue_depth: int = 0
+    spool_pending: int = 0
+    last_batch_rows: int = 0
+    last_commit_ms: float = 0.0
+    max_commit_ms: float = 0.0
+    last_lag_ms: float = 0.0
+    max_lag_ms: float = 0.0
+    rows_per_second: float = 0.0
+
+
 class PersistenceWriter:
     def __init__(self, config: BridgeConfig) -> None:
         self.config = config
+        self.blobs = BlobStore(config.blob_path)
         self._connection: aiosqlite.Connection | None = None
-        self._queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(
+        self._queue: asyncio.Queue[tuple[str, Any, float]] = asyncio.Queue(
             maxsize=SUCCESS_QUEUE_SIZE
         )
         self._pending_status: dict[str, dict[str, Any]] = {}
+        self._deferred_rows: list[PendingRow] = []
+        self._busy_streak = 0
         self._worker_task: asyncio.Task[None] | None = None
         self._running = False
         self._overflow_active = False
         self._dropped_success_count = 0
+        self._spool_hints: deque[Path] = deque()
+        self._spool_pending: dict[Path, None] = {}
+        self._next_spool_rescan = 0.0
+        self._stats = WriterStats()
+        self._window_started = time.monotonic()
+        self._window_rows = 0
+        self._next_stats_log = time.monotonic() + STATS_LOG_INTERVAL_SECONDS
+        self._next_blob_prune = 0.0
 
     @property
     def running(self) -> bool:
         return self._running
 
+    def stats(self) -> WriterStats:
+        elapsed = time.monotonic() - self._window_started
+        snapshot = WriterStats(**asdict(self._stats))
+        snapshot.dropped_success = self._dropped_success_count
+        snapshot.queue_depth = self._queue.qsize()
+        snapshot.spool_pending = len(self._spool_pending) + len(
+            self._spool_hints
+        )
+        snapshot.rows_per_second = (
+            self._window_rows / elapsed if elapsed > 0 else 0.0
+        )
+        return snapshot
+
     async def start(self) -> None:
         if self._running:
             return
@@ -153,6 +388,7 @@ class PersistenceWriter:
             raise
         self._connection = connection
         self._running = True
+        self._next_spool_rescan = 0.0
         self._worker_task = asyncio.create_task(
             self._worker_loop(),
             name="webconsole-database-writer",
@@ -186,6 +422,18 @@ class PersistenceWriter:
         if response is None:
             return
         if response.has_full_diagnostics:
+            if response.blobs:
+                try:
+                    await asyncio.to_thread(
+                        self.blobs.put_many,
+                        response.blobs,
+                    )
+                except Exception as exc:
+                    logger.bind(webconsole_bridge_internal=True).warning(
+                        "WebConsole bridge could not store payload blobs "
+                        f"for run {context.run_id}: "
+                        f"{type(exc).__name__}: {exc}"
+                    )
             try:
                 path = await asyncio.to_thread(
                     _write_spool_atomic,
@@ -204,16 +452,15 @@ class PersistenceWriter:
                 )
                 return
             if self._running:
-                try:
-                    self._queue.put_nowait(("spool", path))
-                except asyncio.QueueFull:
-                    pass
+                self._spool_hints.append(path)
             return
 
         if not self._running:
             return
         try:
-            self._queue.put_nowait(("response", _response_payload(response)))
+            self._queue.put_nowait(
+                ("response", _response_payload(response), time.monotonic())
+            )
             if self._overflow_active:
                 logger.bind(webconsole_bridge_internal=True).info(
                     "WebConsole bridge success queue recovered after dropping "
@@ -235,13 +482,13 @@ class PersistenceWriter:
             return
         self._pending_status[snapshot.bot_id] = asdict(snapshot)
         try:
-            self._queue.put_nowait(("wake", None))
+            self._queue.put_nowait(("wake", None, time.monotonic()))
         except asyncio.QueueFull:
             pass
 
     def persist_log_from_sink(self, entry: DiagnosticLogEntry) -> None:
         try:
-            _write_spool_atomic(
+            path = _write_spool_atomic(
                 self.config.spool_path,
                 {
                     "kind": "diagnostic",
@@ -254,6 +501,15 @@ class PersistenceWriter:
                 "WebConsole bridge could not persist diagnostic spool: "
                 f"{type(exc).__name__}: {exc}"
             )
+            return
+        if self._running:
+            self._spool_hints.append(path)
+
+    async def read_blob(self, digest: str) -> bytes | None:
+        return await asyncio.to_thread(self.blobs.read, digest)
+
+    async def restore_blobs(self, value: Any) -> Any:
+        return await asyncio.to_thread(self.blobs.restore, value)
 
     async def flush(self, timeout: float = 5) -> None:
         deadline = asyncio.get_running_loop().time() + timeout
@@ -262,6 +518,7 @@ class PersistenceWriter:
             if (
                 self._queue.empty()
                 and not self._pending_status
+                and not self._deferred_rows
                 and not spool_files
             ):
                 return
@@ -271,229 +528,324 @@ class PersistenceWriter:
 
     async def _worker_loop(self) -> None:
         while self._running or not self._queue.empty():
-            command: tuple[str, Any] | None = None
+            commands = await self._collect_commands()
             try:
-                command = await asyncio.wait_for(
-                    self._queue.get(),
-                    timeout=0.25,
+                await self._write_batch(commands)
+            except Exception as exc:
+                logger.bind(webconsole_bridge_internal=True).warning(
+                    "WebConsole bridge database writer failed: "
+                    f"{type(exc).__name__}: {exc}"
                 )
-            except asyncio.TimeoutError:
-                pass
-
-            if command is not None:
-                kind, payload = command
-                try:
-                    if kind == "response":
-                        await self._insert_response(payload)
-                    elif kind == "spool":
-                        await self._import_spool(Path(payload))
-                except Exception as exc:
-                    logger.bind(webconsole_bridge_internal=True).warning(
-                        "WebConsole bridge database writer failed: "
-                        f"{type(exc).__name__}: {exc}"
-                    )
-                finally:
+            finally:
+                for _ in commands:
                     self._queue.task_done()
+            self._log_stats_if_due()
+            await self._prune_blobs_if_due()
 
+        await self._rescan_spool()
+        while self._spool_pending or self._spool_hints or self._pending_status:
             try:
-                await self._flush_pending_status()
+                if not await self._write_batch([]):
+                    break
             except Exception as exc:
                 logger.bind(webconsole_bridge_internal=True).warning(
-                    "WebConsole bridge could not update current Bot status: "
-                    f"{type(exc).__name__}: {exc}"
+                    "WebConsole bridge could not flush pending writes during "
+                    f"shutdown: {type(exc).__name__}: {exc}"
                 )
-            await self._scan_spool(limit=10)
+                break
 
+    async def _collect_commands(self) -> list[tuple[str, Any, float]]:
         try:
-            await self._flush_pending_status()
-        except Exception as exc:
-            logger.bind(webconsole_bridge_internal=True).warning(
-                "WebConsole bridge could not flush current Bot status during "
-                f"shutdown: {type(exc).__name__}: {exc}"
-            )
-        await self._scan_spool(limit=None)
-
-    async def _flush_pending_status(self) -> None:
-        if not self._pending_status:
-            return
-        pending = self._pending_status
-        self._pending_status = {}
-        for bot_id, payload in pending.items():
+            first = await asyncio.wait_for(self._queue.get(), timeout=0.25)
+        except asyncio.TimeoutError:
+            return []
+        commands = [first]
+        deadline = time.monotonic() + BATCH_MAX_WAIT_SECONDS
+        while len(commands) < BATCH_MAX_ITEMS:
             try:
-                await self._upsert_status(payload)
-            except Exception:
-                self._pending_status[bot_id] = payload
-                raise
-
-    async def _scan_spool(self, *, limit: int | None) -> None:
-        paths = sorted(self.config.spool_path.glob("*.json.gz"))
-        if limit is not None:
-            paths = paths[:limit]
-        for path in paths:
+                commands.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             try:
-                await self._import_spool(path)
-            except Exception as exc:
-                logger.bind(webconsole_bridge_internal=True).warning(
-                    "WebConsole bridge could not import durable spool "
-                    f"{path.name}: {type(exc).__name__}: {exc}"
+                commands.append(
+                    await asyncio.wait_for(self._queue.get(), timeout=remaining)
                 )
+            except asyncio.TimeoutError:
                 break
+        return commands
 
-    async def _import_spool(self, path: Path) -> None:
-        if not path.exists():
+    async def _rescan_spool(self) -> None:
+        self._next_spool_rescan = time.monotonic() + SPOOL_RESCAN_SECONDS
+        try:
+            paths = await asyncio.to_thread(_list_spool, self.config.spool_path)
+        except OSError as exc:
+            logger.bind(webconsole_bridge_internal=True).warning(
+                "WebConsole bridge could not scan durable spool: "
+                f"{type(exc).__name__}: {exc}"
+            )
             return
-        payload = await asyncio.to_thread(_read_spool, path)
-        kind = payload.get("kind")
-        if kind == "response":
-            response = payload.get("response")
-            if not isinstance(response, dict):
-                raise ValueError("response spool is missing response object")
-            await self._insert_response(response)
-        elif kind == "diagnostic":
-            diagnostic = payload.get("diagnostic")
-            if not isinstance(diagnostic, dict):
-                raise ValueError(
-                    "diagnostic spool is missing diagnostic object"
+        for path in paths:
+            self._spool_pending.setdefault(path, None)
+
+    async def _take_spool_batch(self) -> list[Path]:
+        if time.monotonic() >= self._next_spool_rescan:
+            await self._rescan_spool()
+        while self._spool_hints:
+            self._spool_pending.setdefault(self._spool_hints.popleft(), None)
+        batch: list[Path] = []
+        for path in self._spool_pending:
+            batch.append(path)
+            if len(batch) >= SPOOL_BATCH_SIZE:
+                break
+        return batch
+
+    async def _write_batch(self, commands: list[tuple[str, Any, float]]) -> bool:
+        rows = self._deferred_rows
+        self._deferred_rows = []
+        for kind, payload, enqueued_at in commands:
+            if kind == "response":
+                rows.append(
+                    PendingRow("response", payload, enqueued_at=enqueued_at)
                 )
-            await self._insert_diagnostic(diagnostic)
-        else:
-            raise ValueError(f"unsupported spool kind: {kind!r}")
-        await asyncio.to_thread(path.unlink, missing_ok=True)
 
-    async def _insert_response(self, payload: dict[str, Any]) -> None:
-        connection = self._require_connection()
-        request_gzip, request_sha = _encode_full_value(
-            payload.get("request_raw")
-        )
-        response_gzip, response_sha = _encode_full_value(
-            payload.get("response_raw")
-        )
-        logs_gzip, logs_sha = _encode_full_value(payload.get("logs_raw"))
-        parameters = {
-            **payload,
-            "has_full_diagnostics": int(
-                bool(payload["has_full_diagnostics"])
-            ),
-            "request_raw_gzip": request_gzip,
-            "response_raw_gzip": response_gzip,
-            "logs_raw_gzip": logs_gzip,
-            "request_raw_sha256": request_sha,
-            "response_raw_sha256": response_sha,
-            "logs_raw_sha256": logs_sha,
-        }
-        sql = """
-            INSERT OR IGNORE INTO response_events (
-                run_id, started_at_ms, finished_at_ms, duration_ms,
-                status, plugin_name, plugin_id, module_name, matcher_type,
-                matcher_lineno, bot_id, event_name, group_id, user_id,
-                source_message_id, request_summary, response_summary,
-                send_count, send_success_count, send_failure_count,
-                max_log_level, error_type, error_message,
-                has_full_diagnostics, request_raw_gzip, response_raw_gzip,
-                logs_raw_gzip, request_raw_sha256, response_raw_sha256,
-                logs_raw_sha256, created_at_ms
-            ) VALUES (
-                :run_id, :started_at_ms, :finished_at_ms, :duration_ms,
-                :status, :plugin_name, :plugin_id, :module_name, :matcher_type,
-                :matcher_lineno, :bot_id, :event_name, :group_id, :user_id,
-                :source_message_id, :request_summary, :response_summary,
-                :send_count, :send_success_count, :send_failure_count,
-                :max_log_level, :error_type, :error_message,
-                :has_full_diagnostics, :request_raw_gzip, :response_raw_gzip,
-                :logs_raw_gzip, :request_raw_sha256, :response_raw_sha256,
-                :logs_raw_sha256, :created_at_ms
-            )
-        """
-        await self._execute_commit(sql, parameters)
-
-    async def _insert_diagnostic(self, payload: dict[str, Any]) -> None:
-        full_log = str(payload["full_log"])
-        full_log_gzip, raw_sha256 = _encode_full_value(full_log)
-        parameters = {
-            "run_id": payload.get("run_id"),
-            "created_at_ms": int(payload["created_at_ms"]),
-            "level": str(payload["level"]),
-            "logger_name": payload.get("logger_name"),
-            "module_name": payload.get("module_name"),
-            "plugin_name": payload.get("plugin_name"),
-            "message_summary": str(payload.get("message", ""))[:2_000],
-            "full_log_gzip": full_log_gzip,
-            "raw_sha256": raw_sha256,
-        }
-        sql = """
-            INSERT INTO diagnostic_logs (
-                run_id, created_at_ms, level, logger_name, module_name,
-                plugin_name, message_summary, full_log_gzip, raw_sha256
-            ) VALUES (
-                :run_id, :created_at_ms, :level, :logger_name, :module_name,
-                :plugin_name, :message_summary, :full_log_gzip, :raw_sha256
+        spool_paths = await self._take_spool_batch()
+        if spool_paths:
+            loaded = await asyncio.to_thread(_load_spool_batch, spool_paths)
+            found = {path for path, _, _ in loaded}
+            for path in spool_paths:
+                if path not in found:
+                    self._spool_pending.pop(path, None)
+            for path, payload, error in loaded:
+                if payload is not None:
+                    try:
+                        kind, inner = _unpack_spool(payload)
+                    except Exception as exc:
+                        error = exc
+                    else:
+                        rows.append(PendingRow(kind, inner, spool_path=path))
+                        continue
+                self._spool_pending.pop(path, None)
+                logger.bind(webconsole_bridge_internal=True).warning(
+                    "WebConsole bridge could not import durable spool "
+                    f"{path.name}: {type(error).__name__}: {error}"
+                )
+
+        pending_status = self._pending_status
+        self._pending_status = {}
+        for payload in pending_status.values():
+            rows.append(PendingRow("status", payload))
+
+        if not rows:
+            return False
+
+        await asyncio.to_thread(_prepare_rows, rows)
+        prepared: list[PendingRow] = []
+        for row in rows:
+            if row.error is None:
+                prepared.append(row)
+                continue
+            self._stats.failed_rows += 1
+            if row.spool_path is not None:
+                self._spool_pending.pop(row.spool_path, None)
+            logger.bind(webconsole_bridge_internal=True).warning(
+                f"WebConsole bridge dropped malformed {row.kind} row: "
+                f"{type(row.error).__name__}: {row.error}"
             )
-        """
-        await self._execute_commit(sql, parameters)
-
-    async def _upsert_status(self, payload: dict[str, Any]) -> None:
-        parameters = {
-            **payload,
-            "connected": int(bool(payload["connected"])),
-            "heartbeat_online": (
-                None
-                if payload["heartbeat_online"] is None
-                else int(bool(payload["heartbeat_online"]))
-            ),
-            "heartbeat_good": (
-                None
-                if payload["heartbeat_good"] is None
-                else int(bool(payload["heartbeat_good"]))
-            ),
-        }
-        sql = """
-            INSERT INTO bot_status (
-                bot_id, adapter, connected, connection_started_at_ms,
-                last_heartbeat_at_ms, heartbeat_online, heartbeat_good,
-                collector_heartbeat_at_ms, updated_at_ms
-            ) VALUES (
-                :bot_id, :adapter, :connected, :connection_started_at_ms,
-                :last_heartbeat_at_ms, :heartbeat_online, :heartbeat_good,
-                :collector_heartbeat_at_ms, :updated_at_ms
+        if not prepared:
+            return False
+
+        started = time.monotonic()
+        try:
+            await self._commit_rows(prepared)
+            committed = prepared
+        except Exception as exc:
+            if _is_busy_error(exc):
+                self._defer_rows(prepared)
+                await self._back_off_busy(exc)
+                return False
+            logger.bind(webconsole_bridge_internal=True).warning(
+                "WebConsole bridge batch commit failed, retrying rows "
+                f"individually: {type(exc).__name__}: {exc}"
             )
-            ON CONFLICT(bot_id) DO UPDATE SET
-                adapter = excluded.adapter,
-                connected = excluded.connected,
-                connection_started_at_ms = excluded.connection_started_at_ms,
-                last_heartbeat_at_ms = excluded.last_heartbeat_at_ms,
-                heartbeat_online = excluded.heartbeat_online,
-                heartbeat_good = excluded.heartbeat_good,
-                collector_heartbeat_at_ms =
-                    excluded.collector_heartbeat_at_ms,
-                updated_at_ms = excluded.updated_at_ms
-        """
-        await self._execute_commit(sql, parameters)
-
-    async def _execute_commit(
-        self,
-        sql: str,
-        parameters: dict[str, Any],
-    ) -> None:
+            committed = await self._commit_individually(prepared)
+        finished = time.monotonic()
+        self._busy_streak = 0
+
+        committed_spool = [
+            row.spool_path for row in committed if row.spool_path is not None
+        ]
+        if committed_spool:
+            await asyncio.to_thread(_unlink_all, committed_spool)
+        for row in prepared:
+            if row.spool_path is not None and not row.deferred:
+                self._spool_pending.pop(row.spool_path, None)
+        self._record_batch(prepared, committed, started, finished)
+        return bool(committed)
+
+    async def _commit_rows(self, rows: list[PendingRow]) -> None:
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            sql = ROW_STATEMENTS[row.kind][0]
+            grouped.setdefault(sql, []).append(row.parameters)
         connection = self._require_connection()
-        delays = (0.05, 0.1, 0.2, 0.4, 0.8)
-        for attempt in range(len(delays) + 1):
+        for attempt in range(len(COMMIT_RETRY_DELAYS) + 1):
             try:
-                await connection.execute(sql, parameters)
+                for sql, parameters in grouped.items():
+                    await connection.executemany(sql, parameters)
                 await connection.commit()
                 return
             except aiosqlite.OperationalError as exc:
                 await connection.rollback()
-                message = str(exc).lower()
-                if (
-                    ("locked" not in message and "busy" not in message)
-                    or attempt >= len(delays)
+                if not _is_busy_error(exc) or attempt >= len(
+                    COMMIT_RETRY_DELAYS
                 ):
                     raise
-                await asyncio.sleep(delays[attempt])
+                await asyncio.sleep(COMMIT_RETRY_DELAYS[attempt])
             except BaseException:
                 await connection.rollback()
                 raise
 
+    async def _commit_individually(
+        self,
+        rows: list[PendingRow],
+    ) -> list[PendingRow]:
+        committed: list[PendingRow] = []
+        for index, row in enumerate(rows):
+            try:
+                await self._commit_rows([row])
+            except Exception as exc:
+                if _is_busy_error(exc):
+                    self._defer_rows(rows[index:])
+                    logger.bind(webconsole_bridge_internal=True).warning(
+                        "WebConsole bridge database is busy; deferring "
+                        f"{len(rows) - index} rows: {exc}"
+                    )
+                    break
+                self._stats.failed_rows += 1
+                if row.kind == "status":
+                    self._pending_status.setdefault(
+                        str(row.payload["bot_id"]),
+                        row.payload,
+                    )
+                logger.bind(webconsole_bridge_internal=True).warning(
+                    "WebConsole bridge database writer failed: "
+                    f"{type(exc).__name__}: {exc}"
+                )
+                continue
+            committed.append(row)
+        return committed
+
+    def _defer_rows(self, rows: list[PendingRow]) -> None:
+        # Spooled rows stay in ``_spool_pending`` and are re-read from disk;
+        # status snapshots go back unless a newer one arrived meanwhile.
+        for row in rows:
+            row.deferred = True
+            if row.spool_path is not None:
+                continue
+            if row.kind == "status":
+                self._pending_status.setdefault(
+                    str(row.payload["bot_id"]),
+                    row.payload,
+                )
+            else:
+                self._deferred_rows.append(row)
+        overflow = len(self._deferred_rows) - SUCCESS_QUEUE_SIZE
+        if overflow > 0:
+            del self._deferred_rows[:overflow]
+            self._dropped_success_count += overflow
+
+    async def _back_off_busy(self, exc: Exception) -> None:
+        delay = BUSY_BACKOFF_DELAYS[
+            min(self._busy_streak, len(BUSY_BACKOFF_DELAYS) - 1)
+        ]
+        self._busy_streak += 1
+        logger.bind(webconsole_bridge_internal=True).warning(
+            "WebConsole bridge database is busy; keeping "
+            f"{len(self._deferred_rows)} queued rows and "
+            f"{len(self._spool_pending)} spool files for retry "
+            f"in {delay:.1f}s: {exc}"
+        )
+        await asyncio.sleep(delay)
+
+    def _record_batch(
+        self,
+        prepared: list[PendingRow],
+        committed: list[PendingRow],
+        started: float,
+        finished: float,
+    ) -> None:
+        stats = self._stats
+        stats.batches += 1
+        stats.last_batch_rows = len(prepared)
+        stats.last_commit_ms = (finished - started) * 1000
+        stats.max_commit_ms = max(stats.max_commit_ms, stats.last_commit_ms)
+        lag = 0.0
+        for row in committed:
+            if row.kind == "response":
+                stats.responses += 1
+            elif row.kind == "diagnostic":
+                stats.diagnostics += 1
+            else:
+                stats.statuses += 1
+            if row.enqueued_at is not None:
+                lag = max(lag, finished - row.enqueued_at)
+        stats.last_lag_ms = lag * 1000
+        stats.max_lag_ms = max(stats.max_lag_ms, stats.last_lag_ms)
+        self._window_rows += len(committed)
+
+    def _log_stats_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_stats_log:
+            return
+        self._next_stats_log = now + STATS_LOG_INTERVAL_SECONDS
+        if self._window_rows:
+            stats = self.stats()
+            logger.bind(webconsole_bridge_internal=True).info(
+                "WebConsole bridge writer: "
+                f"{stats.rows_per_second:.1f} rows/s, "
+                f"batches={stats.batches}, "
+                f"last_batch={stats.last_batch_rows}, "
+                f"commit={stats.last_commit_ms:.1f}ms "
+                f"(max {stats.max_commit_ms:.1f}ms), "
+                f"lag={stats.last_lag_ms:.1f}ms "
+                f"(max {stats.max_lag_ms:.1f}ms), "
+                f"queue={stats.queue_depth}, "
+                f"spool={stats.spool_pending}, "
+                f"failed={stats.failed_rows}, "
+                f"dropped={stats.dropped_success}"
+            )
+        self._window_started = now
+        self._window_rows = 0
+
+    async def _prune_blobs_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_blob_prune:
+            return
+        self._next_blob_prune = now + BLOB_PRUNE_INTERVAL_SECONDS
+        try:
+            result = await asyncio.to_thread(
+                self.blobs.prune,
+                max_age_seconds=self.config.blob_retention_seconds,
+                max_total_bytes=self.config.blob_max_total_bytes,
+            )
+        except OSError as exc:
+            logger.bind(webconsole_bridge_internal=True).warning(
+                "WebConsole bridge could not prune payload blobs: "
+                f"{type(exc).__name__}: {exc}"
+            )
+            return
+        if result.removed:
+            logger.bind(webconsole_bridge_internal=True).info(
+                "WebConsole bridge pruned "
+                f"{result.removed} payload blobs "
+                f"({result.removed_bytes} bytes), "
+                f"kept={result.kept} ({result.kept_bytes} bytes)"
+            )
+
     def _require_connection(self) -> aiosqlite.Connection:
         if self._connection is None:
             raise RuntimeError("persistence database is not open")
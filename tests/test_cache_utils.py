@@ -0,0 +1,55 @@
+import asyncio
+import os
+import time
+
+from plugins.utils.cache_utils import SingleFlight, prune_cache_dir
+
+
+def _write(path, size, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_drops_expired_then_oldest_until_under_limit(tmp_path):
+    now = time.time()
+    _write(tmp_path / "aa" / "expired", 10, now - 1_000)
+    _write(tmp_path / "bb" / "old", 10, now - 30)
+    _write(tmp_path / "cc" / "new", 10, now - 10)
+    _write(tmp_path / "cc" / ".tmp-writing", 100, now - 1_000)
+
+    result = prune_cache_dir(
+        tmp_path,
+        max_total_bytes=15,
+        max_age_seconds=500,
+    )
+
+    assert result.removed == 2
+    assert result.kept == 1
+    assert result.kept_bytes == 10
+    assert (tmp_path / "cc" / "new").exists()
+    assert (tmp_path / "cc" / ".tmp-writing").exists()
+
+
+def test_waiter_gets_none_when_leader_fails():
+    async def main():
+        flights: SingleFlight[str] = SingleFlight()
+        started = asyncio.Event()
+
+        async def leader():
+            with flights.lead("k"):
+                started.set()
+                await asyncio.sleep(0)
+                raise RuntimeError("boom")
+
+        task = asyncio.create_task(leader())
+        await started.wait()
+        waited, result = await flights.wait("k")
+        assert waited and result is None
+        assert not flights.is_inflight("k")
+        try:
+            await task
+        except RuntimeError:
+            pass
+
+    asyncio.run(main())
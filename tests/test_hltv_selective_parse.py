@@ -0,0 +1,62 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+import pytz
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "hltv"
+TZ = pytz.timezone("Asia/Shanghai")
+
+
+def _load_parsers():
+    # 插件 __init__ 会注册命令和定时任务，借用基准脚本只加载 parsers
+    spec = importlib.util.spec_from_file_location(
+        "hltv_bench_parsers", ROOT / "plugins" / "hltv_sub" / "bench_parsers.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module._load_parsers()
+
+
+matches_parser, results_parser = _load_parsers()
+
+
+def _read(name: str) -> str:
+    return (FIXTURE_DIR / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("include_partial_tbd", [False, True])
+def test_selective_matches_parse_equals_full_parse(include_partial_tbd):
+    html = _read("event_matches.html")
+    soup, selective = matches_parser.make_matches_soup(html)
+    assert selective
+
+    full = matches_parser.parse_event_matches_with_hints(
+        BeautifulSoup(html, "lxml"), TZ, include_partial_tbd=include_partial_tbd
+    )
+    fast = matches_parser.parse_event_matches_with_hints(
+        soup, TZ, include_partial_tbd=include_partial_tbd
+    )
+    assert fast == full
+    matches, hints = full
+    assert any(m.is_live for m in matches)
+    assert any(h.is_tbd for h in hints)
+
+
+def test_matches_page_without_wrappers_falls_back_to_full_parse():
+    html = _read("event_matches_finished.html")
+    soup, selective = matches_parser.make_matches_soup(html)
+    assert not selective
+    assert "counter-strike matches" in soup.title.get_text().lower()
+
+
+@pytest.mark.parametrize("max_results", [5, 20, 100])
+def test_selective_results_parse_equals_full_parse(max_results):
+    html = _read("event_results.html")
+    full = results_parser.parse_event_results_soup(
+        BeautifulSoup(html, "lxml"), max_results=max_results
+    )
+    assert full
+    assert results_parser.parse_event_results(html, max_results=max_results) == full
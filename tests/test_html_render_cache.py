@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from plugins.utils.html_render_cache import RenderCache
+
+
+def _make_cache(tmp_path) -> RenderCache:
+    return RenderCache(disk_dir=tmp_path)
+
+
+def test_waiter_renders_when_leader_is_cancelled(tmp_path):
+    async def main():
+        cache = _make_cache(tmp_path)
+        leader_started = asyncio.Event()
+
+        async def slow_render() -> bytes:
+            leader_started.set()
+            await asyncio.sleep(10)
+            return b"leader"
+
+        async def fast_render() -> bytes:
+            return b"waiter"
+
+        leader = asyncio.create_task(cache.get_or_render("k", 60, slow_render))
+        await leader_started.wait()
+        waiter = asyncio.create_task(cache.get_or_render("k", 60, fast_render))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == b"waiter"
+        assert not waiter.cancelled()
+
+    asyncio.run(main())
+
+
+def test_waiter_renders_when_leader_fails(tmp_path):
+    async def main():
+        cache = _make_cache(tmp_path)
+        leader_started = asyncio.Event()
+
+        async def failing_render() -> bytes:
+            leader_started.set()
+            await asyncio.sleep(0.01)
+            raise RuntimeError("browser crashed")
+
+        async def fast_render() -> bytes:
+            return b"waiter"
+
+        leader = asyncio.create_task(cache.get_or_render("k", 60, failing_render))
+        await leader_started.wait()
+        waiter = asyncio.create_task(cache.get_or_render("k", 60, fast_render))
+
+        with pytest.raises(RuntimeError):
+            await leader
+        assert await waiter == b"waiter"
+
+    asyncio.run(main())
+
+
+def test_concurrent_renders_are_coalesced(tmp_path):
+    async def main():
+        cache = _make_cache(tmp_path)
+        calls = 0
+
+        async def render() -> bytes:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b"png"
+
+        results = await asyncio.gather(*(cache.get_or_render("k", 60, render) for _ in range(5)))
+        assert results == [b"png"] * 5
+        assert calls == 1
+        assert cache.stats()["coalesced"] == 4
+
+    asyncio.run(main())
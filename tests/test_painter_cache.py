@@ -0,0 +1,26 @@
+import os
+
+from PIL import Image
+
+from plugins.utils.draw.render_cache import PainterCache
+
+
+def test_keys_with_colons_use_portable_file_names(tmp_path):
+    cache = PainterCache(cache_dir=str(tmp_path))
+    img = Image.new("RGBA", (4, 4), (255, 0, 0, 255))
+
+    cache.put("group_statistics:today:123", "abc", img)
+
+    names = [name for name in os.listdir(tmp_path) if name.endswith(".png")]
+    assert len(names) == 1
+    assert ":" not in names[0]
+    assert cache.get("group_statistics:today:123", "abc") is not None
+
+
+def test_rebuilt_index_recovers_original_key(tmp_path):
+    cache = PainterCache(cache_dir=str(tmp_path))
+    cache.put("plugin_status:42", "abc", Image.new("RGBA", (2, 2)))
+    os.remove(tmp_path / "index.json")
+
+    reloaded = PainterCache(cache_dir=str(tmp_path))
+    assert reloaded.get("plugin_status:42", "abc") is not None
@@ -0,0 +1,57 @@
+import base64
+import json
+
+from plugins.webconsole_bridge.blobs import (
+    BLOB_MIN_BYTES,
+    BlobStore,
+    is_blob_ref,
+    offload_blobs,
+)
+from plugins.webconsole_bridge.capture import serialize_api_value
+
+
+def _payload() -> dict:
+    image = bytes(range(256)) * (BLOB_MIN_BYTES // 256 + 1)
+    return json.loads(
+        serialize_api_value(
+            {
+                "message": [
+                    {"type": "text", "data": {"text": "hi"}},
+                    {
+                        "type": "image",
+                        "data": {
+                            "file": "base64://"
+                            + base64.b64encode(image).decode("ascii")
+                        },
+                    },
+                ],
+                "raw": image[::-1],
+                "small": b"tiny",
+            }
+        )
+    )
+
+
+def test_offload_then_restore_returns_original_payload(tmp_path):
+    store = BlobStore(tmp_path)
+    original = _payload()
+    blobs: dict[str, bytes] = {}
+
+    offloaded = offload_blobs(original, blobs)
+    assert len(blobs) == 2
+    assert is_blob_ref(offloaded["message"][1]["data"]["file"])
+    assert is_blob_ref(offloaded["raw"])
+    assert offloaded["small"] == original["small"]
+
+    store.put_many(blobs)
+    assert store.restore(json.loads(json.dumps(offloaded))) == original
+
+
+def test_pruned_blob_stays_a_reference(tmp_path):
+    store = BlobStore(tmp_path)
+    blobs: dict[str, bytes] = {}
+    offloaded = offload_blobs(_payload(), blobs)
+    digest = offloaded["raw"]["sha256"]
+
+    assert store.read(digest) is None
+    assert store.restore(offloaded)["raw"] == offloaded["raw"]